@@ -0,0 +1,232 @@
+"""
+여러 체인의 시계열 결과를 날짜/시간 기준으로 정렬(align)
+
+체인별 쿼리 결과를 하나의 표로 합치고, 기준 체인 대비 비율(ratio)과
+변화율(delta_pct) 컬럼을 계산합니다. 비교 요약에서 체인별 JSON을 따로
+보내는 대신 이 표 하나만 Gemini에 전달합니다.
+
+정렬 방식:
+- calendar: 겹치는 기간이 가장 짧은 체인 기간의 MIN_OVERLAP_RATIO 이상이면
+  같은 날짜(시각)끼리 맞춤
+- relative: 기간이 겹치지 않거나 조금만 겹치면 (예: 2025-03-31에 업데이트가 중단된
+  Solana vs 실시간 Ethereum) 각 체인의 최근 N개 기간을 1..N 순번으로 맞춤
+  (하루만 겹쳐도 calendar로 맞추면 나머지 행이 모두 버려짐)
+
+사용법:
+    from alignment import align_results
+    
+    table, meta = align_results({'Ethereum': eth_rows, 'Solana': sol_rows})
+"""
+
+import re
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from chunking import find_time_column
+from result_set import ResultSet
+
+# calendar 정렬에 필요한 최소 겹침 비율 (가장 짧은 체인의 기간 수 대비)
+MIN_OVERLAP_RATIO = 0.5
+
+
+class MissingTimeColumnError(ValueError):
+    """시간(date/timestamp) 컬럼이 없어 시계열로 정렬할 수 없는 결과 (예: Top N 주소)"""
+
+
+def label_slug(label: str) -> str:
+    """라벨을 컬럼 이름에 쓸 수 있는 형태로 변환 (예: 'BNB Chain' → 'bnb_chain', '이더리움' → '이더리움')"""
+    return re.sub(r'\W+', '_', label.lower()).strip('_') or 'chain'
+
+
+def _to_number(value: Any) -> Optional[float]:
+    """숫자 값을 int/float로 변환 (Decimal → float, 숫자가 아니면 None)"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    return None
+
+
+def _is_hourly(times) -> bool:
+    return any(isinstance(t, datetime) and (t.hour or t.minute) for t in times)
+
+
+def _period_key(value: Any, hourly: bool) -> Any:
+    """시간 값을 정렬 기준 키로 변환 (시간별: 정시 datetime, 일별: date)"""
+    if isinstance(value, datetime):
+        if hourly:
+            return value.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+        return value.date()
+    return value
+
+
+class _Series:
+    """체인 하나의 시계열 (기간 키 → 행 위치)"""
+    
+    def __init__(self, label: str, results: ResultSet):
+        self.label = label
+        self.slug = label_slug(label)
+        self.results = ResultSet.from_records(results)
+        self.time_column = find_time_column(self.results)
+        if not self.time_column:
+            raise MissingTimeColumnError(f"{label}: 시간(date/timestamp) 컬럼이 없어 정렬할 수 없습니다.")
+        
+        times = self.results.column(self.time_column)
+        self.hourly = _is_hourly(times)
+        self.metrics = [
+            name for name in self.results.schema
+            if name != self.time_column and self._is_numeric(name)
+        ]
+        self.positions: Dict[Any, int] = {}
+        self.times = times
+    
+    def _is_numeric(self, name: str) -> bool:
+        for value in self.results.column(name):
+            if value is not None:
+                return _to_number(value) is not None
+        return False
+    
+    def index(self, hourly: bool):
+        """기간 키 → 행 위치 매핑 생성 (같은 기간이 여러 행이면 첫 행 사용)"""
+        self.positions = {}
+        for position, value in enumerate(self.times):
+            if value is None:
+                continue
+            self.positions.setdefault(_period_key(value, hourly), position)
+    
+    def value(self, position: int, metric: str) -> Optional[float]:
+        if metric not in self.metrics:
+            return None
+        return _to_number(self.results.column(metric)[position])
+
+
+def align_results(
+    results_by_label: Dict[str, ResultSet],
+    base_label: Optional[str] = None,
+    ratio_digits: int = 4,
+    min_overlap: float = MIN_OVERLAP_RATIO
+) -> Tuple[ResultSet, Dict[str, Any]]:
+    """
+    체인별 시계열 결과를 하나의 표로 정렬
+    
+    Args:
+        results_by_label: {라벨: 쿼리 결과} (2개 이상)
+        base_label: 비율/변화율의 기준 체인 (None이면 첫 번째 라벨)
+        ratio_digits: 비율/변화율 반올림 자릿수
+        min_overlap: calendar 정렬에 필요한 겹치는 기간 비율 (가장 짧은 체인 기준)
+    
+    Returns:
+        (정렬된 ResultSet, 정렬 정보 딕셔너리)
+    
+    Raises:
+        MissingTimeColumnError: 시간 컬럼이 없는 결과가 있는 경우
+        ValueError: 결과가 2개 미만, 라벨의 컬럼 이름이 겹침, 일별/시간별 결과가 섞인 경우
+    """
+    if len(results_by_label) < 2:
+        raise ValueError("비교하려면 2개 이상의 결과가 필요합니다.")
+    
+    series = [_Series(label, results) for label, results in results_by_label.items()]
+    # 'Eth'와 'eth'처럼 컬럼 접미사가 같은 라벨은 서로의 컬럼을 덮어쓰므로 거부
+    slugs: Dict[str, str] = {}
+    for s in series:
+        if s.slug in slugs:
+            raise ValueError(
+                f"라벨 '{slugs[s.slug]}'과(와) '{s.label}'의 컬럼 이름({s.slug})이 같습니다. 라벨을 구분되게 지정해주세요."
+            )
+        slugs[s.slug] = s.label
+    base_label = base_label or series[0].label
+    base = next((s for s in series if s.label == base_label), None)
+    if base is None:
+        raise ValueError(f"기준 라벨이 없습니다: {base_label}")
+    
+    hourly_flags = {s.hourly for s in series if s.results}
+    if len(hourly_flags) > 1:
+        raise ValueError("일별 결과와 시간별 결과는 함께 정렬할 수 없습니다. 쿼리의 시간 단위를 맞춰주세요.")
+    hourly = hourly_flags.pop() if hourly_flags else False
+    for s in series:
+        s.index(hourly)
+    
+    shared_keys = set(series[0].positions)
+    for s in series[1:]:
+        shared_keys &= set(s.positions)
+    
+    key_column = 'hour' if hourly else 'date'
+    shortest = min(len(s.positions) for s in series)
+    if shared_keys and len(shared_keys) >= max(shortest * min_overlap, 1):
+        mode = 'calendar'
+        keys = sorted(shared_keys)
+        rows_by_series = {s.label: [s.positions[k] for k in keys] for s in series}
+        schema = [key_column]
+        columns: List[list] = [keys]
+    else:
+        # 기간이 겹치지 않거나 조금만 겹치면 각 체인의 최근 N개 기간을 순번으로 맞춤
+        mode = 'relative'
+        length = shortest
+        rows_by_series = {}
+        for s in series:
+            recent = sorted(s.positions)[-length:] if length else []
+            rows_by_series[s.label] = [s.positions[k] for k in recent]
+        schema = ['period']
+        columns = [list(range(1, length + 1))]
+        for s in series:
+            schema.append(f"{key_column}_{s.slug}")
+            columns.append([_period_key(s.times[p], hourly) for p in rows_by_series[s.label]])
+    
+    # 체인별 지표 컬럼
+    for s in series:
+        for metric in s.metrics:
+            schema.append(f"{metric}_{s.slug}")
+            columns.append([s.value(p, metric) for p in rows_by_series[s.label]])
+    
+    # 모든 체인에 공통인 지표: 기준 체인 대비 비율/변화율
+    shared_metrics = [m for m in base.metrics if all(m in s.metrics for s in series)]
+    base_rows = rows_by_series[base.label]
+    for s in series:
+        if s is base:
+            continue
+        for metric in shared_metrics:
+            ratios, deltas = [], []
+            for base_pos, pos in zip(base_rows, rows_by_series[s.label]):
+                base_value, value = base.value(base_pos, metric), s.value(pos, metric)
+                if base_value in (None, 0.0) or value is None:
+                    ratios.append(None)
+                    deltas.append(None)
+                else:
+                    ratios.append(round(value / base_value, ratio_digits))
+                    deltas.append(round((value - base_value) / base_value * 100, ratio_digits))
+            schema.append(f"{metric}_ratio_{s.slug}")
+            columns.append(ratios)
+            schema.append(f"{metric}_delta_pct_{s.slug}")
+            columns.append(deltas)
+    
+    table = ResultSet(schema, columns)
+    
+    meta = {
+        'alignment': mode,
+        'granularity': 'hour' if hourly else 'day',
+        'base': base.label,
+        'periods': {
+            s.label: (
+                [str(min(s.positions)), str(max(s.positions))] if s.positions else None
+            )
+            for s in series
+        },
+        'aligned_rows': len(table),
+        'overlap_periods': len(shared_keys),
+        'shared_metrics': shared_metrics,
+    }
+    if mode == 'calendar':
+        meta['dropped_rows'] = {s.label: len(s.positions) - len(table) for s in series}
+    
+    return table, meta
+
+
+def to_compact_table(results: ResultSet) -> Dict[str, Any]:
+    """ResultSet을 컬럼 이름 1회 + 행 값 배열 형태로 변환 (프롬프트용)"""
+    return {
+        'columns': list(results.schema),
+        'rows': [list(values) for values in results.iter_tuples()]
+    }
@@ -0,0 +1,385 @@
+"""
+로컬 통계 기반 이상 징후 사전 탐지
+
+Gemini에 전체 데이터를 보내기 전에 시계열 컬럼을 로컬에서 검사하여
+이상 구간만 골라냅니다. 사용하는 기법:
+
+- rolling z-score: 직전 window 구간의 평균/표준편차 대비 편차
+- median/MAD: 직전 window 구간의 중앙값/MAD 대비 편차 (이상치에 강함)
+- 요일(시간대)별 기준선: 같은 요일(시간별 데이터면 같은 요일·시각) 값들의 중앙값 대비 편차
+- 변화점(changepoint): 평균이 달라지는 지점을 이진 분할로 탐지
+
+사용법:
+    from anomaly import detect_anomalies
+    
+    report = detect_anomalies(results)   # ResultSet (예: 04_failed_transactions.sql 결과)
+    report['flagged_windows']            # 이상 구간 + 앞뒤 문맥 행 + 점수
+"""
+
+import math
+import statistics
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from chunking import find_time_column
+from result_set import ResultSet
+
+# 정규분포 가정 시 MAD → 표준편차 환산 계수
+MAD_SCALE = 1.4826
+
+DEFAULT_THRESHOLD = 3.5
+DEFAULT_CONTEXT_ROWS = 2
+DEFAULT_MIN_VOTES = 2
+MIN_SEGMENT = 3
+MAX_CHANGEPOINTS = 5
+
+
+def _robust_score(value: float, center: float, spread: float) -> float:
+    """기준값 대비 편차를 척도로 나눈 점수 (척도가 0이면 편차 유무만 반영)"""
+    if spread > 0:
+        return (value - center) / spread
+    if value == center:
+        return 0.0
+    return math.copysign(math.inf, value - center)
+
+
+def rolling_zscore(values: Sequence[float], window: int) -> List[Optional[float]]:
+    """
+    직전 window개 값의 평균/표준편차 기준 z-score (누적합으로 O(n))
+    
+    Args:
+        values: 시간 오름차순 값
+        window: 기준 구간 길이
+    
+    Returns:
+        값별 점수 (기준 구간이 부족하면 None)
+    """
+    scores: List[Optional[float]] = []
+    total = 0.0
+    total_sq = 0.0
+    for i, value in enumerate(values):
+        if i >= window:
+            mean = total / window
+            variance = max(total_sq / window - mean * mean, 0.0)
+            scores.append(_robust_score(value, mean, math.sqrt(variance)))
+            old = values[i - window]
+            total -= old
+            total_sq -= old * old
+        else:
+            scores.append(None)
+        total += value
+        total_sq += value * value
+    return scores
+
+
+def rolling_mad_score(values: Sequence[float], window: int) -> List[Optional[float]]:
+    """
+    직전 window개 값의 중앙값/MAD 기준 점수
+    
+    정렬된 window를 유지하므로 값마다 O(window)입니다.
+    
+    Args:
+        values: 시간 오름차순 값
+        window: 기준 구간 길이
+    
+    Returns:
+        값별 점수 (기준 구간이 부족하면 None)
+    """
+    scores: List[Optional[float]] = []
+    ordered: List[float] = []
+    recent: deque = deque()
+    for value in values:
+        if len(recent) == window:
+            median = statistics.median(ordered)
+            mad = statistics.median([abs(v - median) for v in ordered])
+            scores.append(_robust_score(value, median, MAD_SCALE * mad))
+            old = recent.popleft()
+            del ordered[bisect_left(ordered, old)]
+        else:
+            scores.append(None)
+        recent.append(value)
+        insort(ordered, value)
+    return scores
+
+
+def seasonal_scores(
+    times: Sequence[Any],
+    values: Sequence[float],
+    hourly: bool
+) -> List[Optional[float]]:
+    """
+    요일별(시간별 데이터면 요일·시각별) 기준선 대비 점수
+    
+    같은 그룹의 다른 값들(자기 자신 제외)의 중앙값을 기준선으로 사용하고,
+    척도는 전체 잔차의 MAD로 추정합니다.
+    
+    Args:
+        times: 시간 값 (date 또는 datetime)
+        values: 값
+        hourly: True면 (요일, 시각) 그룹, False면 요일 그룹
+    
+    Returns:
+        값별 점수 (그룹에 비교할 값이 2개 미만이면 None)
+    """
+    def key(t: Any) -> Any:
+        if t is None:
+            return None
+        if hourly and isinstance(t, datetime):
+            return (t.weekday(), t.hour)
+        return t.weekday()
+    
+    keys = [key(t) for t in times]
+    groups: Dict[Any, List[int]] = {}
+    for i, k in enumerate(keys):
+        if k is not None:
+            groups.setdefault(k, []).append(i)
+    
+    # 그룹 기준선(자기 자신 제외 중앙값) 대비 잔차
+    residuals: List[Optional[float]] = [None] * len(values)
+    for members in groups.values():
+        if len(members) < 3:
+            continue
+        for i in members:
+            others = [values[j] for j in members if j != i]
+            residuals[i] = values[i] - statistics.median(others)
+    
+    # 그룹당 표본이 적으므로 척도는 전체 잔차의 MAD로 추정
+    valid = [r for r in residuals if r is not None]
+    if not valid:
+        return [None] * len(values)
+    center = statistics.median(valid)
+    spread = MAD_SCALE * statistics.median([abs(r - center) for r in valid])
+    
+    return [
+        _robust_score(r, center, spread) if r is not None else None
+        for r in residuals
+    ]
+
+
+def changepoints(
+    values: Sequence[float],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_segment: int = MIN_SEGMENT
+) -> List[Dict[str, float]]:
+    """
+    평균 변화 지점 탐지 (누적합 기반 이진 분할)
+    
+    구간을 두 부분으로 나눴을 때 평균 차이의 t 통계량이 가장 큰 지점을 찾고,
+    threshold를 넘으면 양쪽 구간에서 다시 탐색합니다.
+    
+    Args:
+        values: 시간 오름차순 값
+        threshold: 변화점으로 인정할 최소 t 통계량
+        min_segment: 분할된 구간의 최소 길이
+    
+    Returns:
+        [{'index': 변화 후 첫 위치, 'before_mean', 'after_mean', 'score'}] (index 오름차순)
+    """
+    prefix = [0.0]
+    prefix_sq = [0.0]
+    for v in values:
+        prefix.append(prefix[-1] + v)
+        prefix_sq.append(prefix_sq[-1] + v * v)
+    
+    def segment_stats(start: int, stop: int) -> Tuple[float, float]:
+        n = stop - start
+        mean = (prefix[stop] - prefix[start]) / n
+        variance = max((prefix_sq[stop] - prefix_sq[start]) / n - mean * mean, 0.0)
+        return mean, variance
+    
+    found: List[Dict[str, float]] = []
+    stack = [(0, len(values))]
+    while stack:
+        start, stop = stack.pop()
+        if stop - start < 2 * min_segment:
+            continue
+        
+        best = None
+        for split in range(start + min_segment, stop - min_segment + 1):
+            left_mean, left_var = segment_stats(start, split)
+            right_mean, right_var = segment_stats(split, stop)
+            n_left, n_right = split - start, stop - split
+            pooled = (left_var * n_left + right_var * n_right) / (n_left + n_right)
+            stderr = math.sqrt(pooled * (1 / n_left + 1 / n_right))
+            diff = right_mean - left_mean
+            if stderr > 0:
+                score = abs(diff) / stderr
+            else:
+                score = math.inf if diff else 0.0
+            if best is None or score > best[0]:
+                best = (score, split, left_mean, right_mean)
+        
+        if best and best[0] >= threshold:
+            score, split, left_mean, right_mean = best
+            found.append({
+                'index': split,
+                'before_mean': left_mean,
+                'after_mean': right_mean,
+                'score': score
+            })
+            stack.append((start, split))
+            stack.append((split, stop))
+    
+    return sorted(found, key=lambda c: c['index'])
+
+
+def _is_numeric_column(column: Sequence[Any]) -> bool:
+    for value in column:
+        if value is None:
+            continue
+        return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+    return False
+
+
+def _round(value: Optional[float]) -> Any:
+    """점수 반올림 (기준선 편차가 0인 경우의 무한대는 JSON 호환 문자열로 표기)"""
+    if value is None:
+        return None
+    if math.isinf(value):
+        return 'inf' if value > 0 else '-inf'
+    return round(value, 2)
+
+
+def detect_anomalies(
+    results: ResultSet,
+    time_column: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+    context_rows: int = DEFAULT_CONTEXT_ROWS,
+    window: Optional[int] = None,
+    min_votes: int = DEFAULT_MIN_VOTES
+) -> Dict[str, Any]:
+    """
+    시계열 결과에서 이상 구간과 변화점 탐지
+    
+    Args:
+        results: 쿼리 결과
+        time_column: 시간 컬럼 (None이면 자동 탐지, 없으면 행 순서 사용)
+        columns: 검사할 숫자 컬럼 (None이면 시간 컬럼을 제외한 모든 숫자 컬럼)
+        threshold: 이상으로 판단할 점수 기준 (표준편차 배수)
+        context_rows: 이상 구간 앞뒤로 함께 전달할 행 수
+        window: rolling 기준 구간 길이 (None이면 일별 7, 시간별 24)
+        min_votes: 이상으로 판단할 최소 기법 수 (점수가 threshold의 2배 이상이면 1개로 충분,
+            요일별 기준선을 계산할 수 있는 지점은 기준선 점수가 반드시 포함되어야 함)
+    
+    Returns:
+        Gemini에 전달할 탐지 결과 딕셔너리
+    """
+    results = ResultSet.from_records(results)
+    if not results:
+        return {'rows_scanned': 0, 'flagged_windows': [], 'changepoints': []}
+    
+    time_column = time_column or find_time_column(results)
+    
+    # 시간 오름차순 정렬 (템플릿은 대부분 ORDER BY date DESC)
+    if time_column:
+        times_raw = results.column(time_column)
+        order = sorted(
+            (i for i in range(len(results)) if times_raw[i] is not None),
+            key=lambda i: times_raw[i]
+        )
+        ordered = results.take(order)
+        times = list(ordered.column(time_column))
+    else:
+        ordered = results
+        times = [None] * len(results)
+    
+    hourly = any(isinstance(t, datetime) and (t.hour or t.minute) for t in times)
+    if window is None:
+        window = 24 if hourly else 7
+    window = max(min(window, len(ordered) // 2), 2)
+    
+    if columns is None:
+        columns = [
+            name for name in ordered.schema
+            if name != time_column and _is_numeric_column(ordered.column(name))
+        ]
+    
+    def label(i: int) -> Any:
+        return times[i] if time_column else i
+    
+    flagged_points: Dict[int, Dict[str, Any]] = {}
+    found_changepoints = []
+    
+    for name in columns:
+        raw = ordered.column(name)
+        if any(v is None for v in raw):
+            continue
+        values = [float(v) for v in raw]
+        if len(values) < 2 * MIN_SEGMENT:
+            continue
+        
+        methods = {
+            'zscore': rolling_zscore(values, window),
+            'mad': rolling_mad_score(values, window),
+        }
+        if time_column and isinstance(times[0], (date, datetime)):
+            methods['seasonal'] = seasonal_scores(times, values, hourly)
+        
+        for i, value in enumerate(values):
+            scores = {
+                method: score[i] for method, score in methods.items()
+                if score[i] is not None and abs(score[i]) >= threshold
+            }
+            # 주기성이 있는 데이터는 요일(시각)별 기준선이 가장 적절하므로 반드시 동의해야 함
+            seasonal = methods.get('seasonal')
+            if seasonal and seasonal[i] is not None and 'seasonal' not in scores:
+                continue
+            strong = any(abs(score) >= 2 * threshold for score in scores.values())
+            if len(scores) < min_votes and not strong:
+                continue
+            point = flagged_points.setdefault(i, {'time': label(i), 'columns': {}})
+            point['columns'][name] = {
+                'value': raw[i],
+                'scores': {method: _round(score) for method, score in scores.items()}
+            }
+        
+        # 점수가 큰 변화점만 전달
+        column_changepoints = sorted(
+            changepoints(values, threshold), key=lambda c: c['score'], reverse=True
+        )[:MAX_CHANGEPOINTS]
+        for cp in sorted(column_changepoints, key=lambda c: c['index']):
+            found_changepoints.append({
+                'column': name,
+                'time': label(cp['index']),
+                'before_mean': _round(cp['before_mean']),
+                'after_mean': _round(cp['after_mean']),
+                'score': _round(cp['score'])
+            })
+    
+    # 인접한 이상 지점을 하나의 구간으로 묶고 앞뒤 문맥 행 추가
+    windows = []
+    for i in sorted(flagged_points):
+        if windows and i - windows[-1]['last'] <= context_rows * 2 + 1:
+            windows[-1]['last'] = i
+            windows[-1]['points'].append(flagged_points[i])
+        else:
+            windows.append({'first': i, 'last': i, 'points': [flagged_points[i]]})
+    
+    flagged_windows = []
+    for w in windows:
+        start = max(w['first'] - context_rows, 0)
+        stop = min(w['last'] + context_rows + 1, len(ordered))
+        flagged_windows.append({
+            'start': label(w['first']),
+            'end': label(w['last']),
+            'anomalies': w['points'],
+            'context': ordered[start:stop].to_records()
+        })
+    
+    return {
+        'time_column': time_column,
+        'rows_scanned': len(ordered),
+        'columns_checked': columns,
+        'methods': {
+            'threshold': threshold,
+            'rolling_window': window,
+            'min_votes': min_votes,
+            'seasonal_baseline': 'weekday_hour' if hourly else 'weekday'
+        },
+        'flagged_windows': flagged_windows,
+        'changepoints': found_changepoints
+    }
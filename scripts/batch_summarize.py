@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+매니페스트에 등록된 여러 결과를 한 번에 요약 (쿼리/요약 파이프라인)
+
+주간 리포트처럼 템플릿 십여 개를 요약할 때 summarize_with_gemini.py를 하나씩
+실행하면 BigQuery 실행과 Gemini 호출이 순서대로 이어져 전체 시간이 모든 단계의
+합이 됩니다. 이 스크립트는
+
+- 쿼리 워커 풀이 SQL 실행(또는 저장된 결과 읽기)을 먼저 진행하고,
+- 결과가 준비되는 대로 Gemini 워커 풀이 요약하도록 넘겨 두 단계를 겹치며,
+- 분당 Gemini 호출 수(RPM) 한도를 지키고,
+- 항목별 쿼리/대기/요약 시간을 포함한 통합 리포트 하나를 작성합니다.
+
+사용법:
+    python scripts/batch_summarize.py <manifest.json> [옵션]
+
+매니페스트 예시:
+    {
+      "rpm": 15,
+      "entries": [
+        {"name": "eth_tx_volume", "sql_file": "templates/queries/01_tx_volume.sql", "type": "weekly"},
+        {"name": "failed_tx", "sql_file": "templates/queries/04_failed_transactions.sql", "type": "anomalies"},
+        {"name": "fee_notes", "from_file": "results/03_fee_gas.csv", "type": "custom",
+         "prompt": "수수료 추이를 3줄로 요약해주세요"}
+      ]
+    }
+
+예시:
+    python scripts/batch_summarize.py weekly_batch.json --output reports/weekly.md
+    python scripts/batch_summarize.py weekly_batch.json --query-workers 4 --gemini-workers 2 --rpm 10
+"""
+
+import sys
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from result_io import read_results
+from run_history import RunHistory, gemini_metrics
+from structured_report import render_report
+from summarize_with_gemini import BigQueryExecutor, GeminiSummarizer, format_query_results
+
+# 파이프라인 기본값: 동시 쿼리 수, 동시 Gemini 호출 수, 분당 Gemini 호출 한도
+DEFAULT_QUERY_WORKERS = 4
+DEFAULT_GEMINI_WORKERS = 2
+DEFAULT_RPM = 15
+
+SUMMARY_TYPES = ('weekly', 'anomalies', 'report', 'custom')
+
+# 워커 스레드의 진행 메시지가 한 줄씩 출력되도록 보호
+_print_lock = threading.Lock()
+
+
+def _log(message: str, error: bool = False) -> None:
+    with _print_lock:
+        print(message, file=sys.stderr if error else sys.stdout, flush=True)
+
+
+class RateLimiter:
+    """최근 60초 호출 수 기준 분당 요청 한도 (여러 스레드에서 공유)"""
+    
+    def __init__(self, per_minute: Optional[int], period: float = 60.0):
+        """
+        초기화
+        
+        Args:
+            per_minute: 분당 최대 호출 수 (None 또는 0이면 제한 없음)
+            period: 한도를 적용할 기간(초)
+        """
+        self.per_minute = per_minute
+        self.period = period
+        self._calls: deque = deque()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        호출 가능할 때까지 대기
+        
+        Returns:
+            대기한 시간(초)
+        """
+        if not self.per_minute:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.per_minute:
+                    self._calls.append(now)
+                    return waited
+                delay = self.period - (now - self._calls[0])
+            time.sleep(delay)
+            waited += delay
+
+
+class BatchEntry:
+    """매니페스트 항목 하나 (설정 + 실행 결과/시간)"""
+    
+    def __init__(self, config: Dict[str, Any]):
+        """
+        초기화
+        
+        Args:
+            config: 항목 설정 (name, sql_file 또는 from_file, type, prompt, sample_rows)
+        """
+        sources = [key for key in ('sql_file', 'from_file') if config.get(key)]
+        if len(sources) != 1:
+            raise ValueError(f"항목에는 sql_file과 from_file 중 하나만 지정해야 합니다: {config}")
+        self.source_key = sources[0]
+        self.source = config[self.source_key]
+        self.name = config.get('name') or Path(self.source).stem
+        self.summary_type = config.get('type', 'weekly')
+        if self.summary_type not in SUMMARY_TYPES:
+            raise ValueError(f"{self.name}: 지원하지 않는 요약 타입 {self.summary_type} (사용 가능: {', '.join(SUMMARY_TYPES)})")
+        self.prompt = config.get('prompt')
+        if self.summary_type == 'custom' and not self.prompt:
+            raise ValueError(f"{self.name}: custom 타입은 prompt가 필요합니다.")
+        self.sample_rows = config.get('sample_rows', 5)
+        
+        self.summary: Optional[str] = None
+        self.error: Optional[str] = None
+        self.rows: Optional[int] = None
+        self.execution: Optional[Dict[str, Any]] = None
+        # 시간 (초): 쿼리 실행, 쿼리 완료 후 요약 시작까지 대기(워커/RPM), 요약 생성
+        self.query_seconds: Optional[float] = None
+        self.wait_seconds: Optional[float] = None
+        self.rate_wait_seconds = 0.0
+        self.gemini_seconds: Optional[float] = None
+        # 이 항목의 요약에서 나온 Gemini 호출 기록 (실행 이력의 항목별 Gemini 지표)
+        self.token_usage: List[Dict[str, Any]] = []
+        self._ready_at: Optional[float] = None
+
+
+class BatchSummarizer:
+    """쿼리 워커 풀 → Gemini 워커 풀 파이프라인"""
+    
+    def __init__(
+        self,
+        bq_executor: Optional[BigQueryExecutor],
+        summarizer: GeminiSummarizer,
+        query_workers: int = DEFAULT_QUERY_WORKERS,
+        gemini_workers: int = DEFAULT_GEMINI_WORKERS,
+        rpm: Optional[int] = DEFAULT_RPM
+    ):
+        """
+        초기화
+        
+        Args:
+            bq_executor: 쿼리 실행기 (모든 항목이 저장된 결과면 None)
+            summarizer: Gemini 요약기 (워커 간 공유)
+            query_workers: 동시 쿼리 실행 수
+            gemini_workers: 동시 Gemini 호출 수
+            rpm: 분당 Gemini 호출 한도 (None 또는 0이면 제한 없음)
+        """
+        self.bq_executor = bq_executor
+        self.summarizer = summarizer
+        self.query_workers = query_workers
+        self.gemini_workers = gemini_workers
+        self.rate_limiter = RateLimiter(rpm)
+    
+    def run(self, entries: List[BatchEntry]) -> float:
+        """
+        모든 항목을 실행/요약 (실패한 항목은 error에 기록하고 계속 진행)
+        
+        Args:
+            entries: 매니페스트 항목
+        
+        Returns:
+            전체 경과 시간(초)
+        """
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.gemini_workers, thread_name_prefix='gemini') as gemini_pool:
+            summaries: List[Future] = []
+            summaries_lock = threading.Lock()
+            
+            def hand_off(entry: BatchEntry, future: Future) -> None:
+                # 쿼리가 끝난 항목은 바로 요약 대기열로 (실패한 항목은 건너뜀)
+                if future.exception() is None and entry.error is None:
+                    with summaries_lock:
+                        summaries.append(gemini_pool.submit(self._summarize, entry, future.result()))
+            
+            with ThreadPoolExecutor(max_workers=self.query_workers, thread_name_prefix='query') as query_pool:
+                for entry in entries:
+                    future = query_pool.submit(self._fetch, entry)
+                    future.add_done_callback(lambda f, entry=entry: hand_off(entry, f))
+            
+            # 쿼리 풀 종료 시점에는 모든 요약이 제출되어 있음
+            for future in summaries:
+                future.result()
+        return time.perf_counter() - start_time
+    
+    def _fetch(self, entry: BatchEntry) -> Optional[Dict[str, Any]]:
+        """쿼리 실행 또는 저장된 결과 읽기 → 요약용 통계"""
+        start_time = time.perf_counter()
+        try:
+            if entry.source_key == 'from_file':
+                results = read_results(entry.source)
+            else:
+                sql = self.bq_executor.read_sql_file(entry.source)
+                entry.execution = self.bq_executor.execute_query_to_dict(sql)
+                entry.execution['sql'] = sql
+                results = entry.execution['data']
+            entry.rows = len(results)
+            formatted = format_query_results(results, entry.sample_rows or None)
+            if entry.execution and entry.execution.get('sampling'):
+                formatted['sampling'] = entry.execution['sampling']
+            _log(f"📊 쿼리 완료: {entry.name} ({time.perf_counter() - start_time:.2f}초, {len(results):,}행)")
+            return formatted
+        except Exception as e:
+            entry.error = f"쿼리 실패: {e}"
+            _log(f"✗ 쿼리 실패: {entry.name} ({e})", error=True)
+            return None
+        finally:
+            entry.query_seconds = time.perf_counter() - start_time
+            entry._ready_at = time.perf_counter()
+    
+    def _summarize(self, entry: BatchEntry, formatted: Dict[str, Any]) -> None:
+        """RPM 한도 안에서 요약 생성"""
+        entry.rate_wait_seconds = self.rate_limiter.acquire()
+        start_time = time.perf_counter()
+        entry.wait_seconds = start_time - entry._ready_at
+        try:
+            with self.summarizer.capture_usage() as usage:
+                entry.token_usage = usage
+                if entry.summary_type == 'weekly':
+                    entry.summary = self.summarizer.generate_weekly_summary(formatted)
+                elif entry.summary_type == 'anomalies':
+                    entry.summary = self.summarizer.detect_anomalies(formatted)
+                elif entry.summary_type == 'report':
+                    entry.summary = render_report(self.summarizer.generate_structured_report(formatted))
+                else:
+                    entry.summary = self.summarizer.generate_custom_summary(formatted, entry.prompt)
+            _log(f"🤖 요약 완료: {entry.name} ({time.perf_counter() - start_time:.2f}초)")
+        except Exception as e:
+            entry.error = f"요약 실패: {e}"
+            _log(f"✗ 요약 실패: {entry.name} ({e})", error=True)
+        finally:
+            entry.gemini_seconds = time.perf_counter() - start_time
+
+
+def load_manifest(manifest_file: str) -> Dict[str, Any]:
+    """매니페스트 파일(JSON) 읽기 (entries 리스트만 있는 파일도 허용)"""
+    path = Path(manifest_file)
+    if not path.exists():
+        raise FileNotFoundError(f"매니페스트 파일을 찾을 수 없습니다: {manifest_file}")
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {'entries': manifest}
+    if not manifest.get('entries'):
+        raise ValueError("매니페스트에 등록된 항목(entries)이 없습니다.")
+    return manifest
+
+
+def _seconds(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:.2f}"
+
+
+def render_batch_report(entries: List[BatchEntry], wall_seconds: float, manifest_file: str) -> str:
+    """
+    통합 리포트(Markdown) 작성
+    
+    Args:
+        entries: 실행이 끝난 항목 (매니페스트 순서)
+        wall_seconds: 전체 경과 시간(초)
+        manifest_file: 매니페스트 경로
+    
+    Returns:
+        Markdown 텍스트
+    """
+    serial = sum((e.query_seconds or 0) + (e.gemini_seconds or 0) for e in entries)
+    failed = [e for e in entries if e.error]
+    lines = [
+        "# 일괄 요약 리포트",
+        "",
+        f"생성 일시: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"매니페스트: {manifest_file}",
+        f"항목: {len(entries)}개 (실패 {len(failed)}개), 전체 {wall_seconds:.2f}초 "
+        f"(단계 시간 합 {serial:.2f}초)",
+        "",
+        "| 항목 | 타입 | 행 수 | 쿼리(초) | 대기(초) | RPM 대기(초) | 요약(초) | 상태 |",
+        "|------|------|------:|---------:|---------:|-------------:|---------:|------|",
+    ]
+    for e in entries:
+        status = '✗ ' + e.error.split(':', 1)[0] if e.error else '✓'
+        lines.append(
+            f"| {e.name} | {e.summary_type} | {'-' if e.rows is None else f'{e.rows:,}'} | "
+            f"{_seconds(e.query_seconds)} | {_seconds(e.wait_seconds)} | {_seconds(e.rate_wait_seconds if e.wait_seconds is not None else None)} | "
+            f"{_seconds(e.gemini_seconds if e.wait_seconds is not None else None)} | {status} |"
+        )
+    
+    for e in entries:
+        lines += ["", "---", "", f"## {e.name}", "", f"{'쿼리 파일' if e.source_key == 'sql_file' else '결과 파일'}: {e.source}", ""]
+        lines.append(f"✗ {e.error}" if e.error else e.summary or '')
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        description='매니페스트에 등록된 여러 결과를 쿼리/요약 파이프라인으로 일괄 요약',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # 주간 리포트 템플릿 일괄 요약 → 통합 리포트 하나
+  python scripts/batch_summarize.py weekly_batch.json --output reports/weekly.md
+  
+  # Gemini 무료 등급 한도에 맞춰 분당 10회로 제한
+  python scripts/batch_summarize.py weekly_batch.json --rpm 10
+  
+  # 로컬 DuckDB로 매니페스트/프롬프트 점검
+  python scripts/batch_summarize.py weekly_batch.json --backend local
+        """
+    )
+    
+    parser.add_argument('manifest', help='매니페스트 파일 경로 (JSON)')
+    parser.add_argument('--output', '-o', help='통합 리포트 저장 경로 (기본값: 화면 출력)')
+    parser.add_argument(
+        '--query-workers', type=int,
+        help=f'동시 쿼리 실행 수 (기본값: 매니페스트 query_workers 또는 {DEFAULT_QUERY_WORKERS})'
+    )
+    parser.add_argument(
+        '--gemini-workers', type=int,
+        help=f'동시 Gemini 호출 수 (기본값: 매니페스트 gemini_workers 또는 {DEFAULT_GEMINI_WORKERS})'
+    )
+    parser.add_argument(
+        '--rpm', type=int,
+        help=f'분당 Gemini 호출 한도, 0이면 제한 없음 (기본값: 매니페스트 rpm 또는 {DEFAULT_RPM})'
+    )
+    parser.add_argument(
+        '--backend',
+        choices=['bigquery', 'local'],
+        help='쿼리 실행 백엔드 (기본값: 매니페스트 backend 또는 bigquery)'
+    )
+    parser.add_argument('--local-db', help='local 백엔드의 DuckDB 파일 경로')
+    parser.add_argument('--timeout', type=float, metavar='SEC', help='쿼리별 제한 시간(초)')
+    parser.add_argument('--project-id', '-p', help='GCP 프로젝트 ID (기본값: GCP_PROJECT_ID 환경 변수)')
+    parser.add_argument('--api-key', help='Gemini API 키 (기본값: GEMINI_API_KEY 환경 변수)')
+    parser.add_argument(
+        '--no-history',
+        action='store_true',
+        help='실행 이력(RUN_HISTORY_DB 또는 local_data/run_history.sqlite)에 기록하지 않음'
+    )
+    
+    args = parser.parse_args()
+    
+    try:
+        manifest = load_manifest(args.manifest)
+        entries = [BatchEntry(config) for config in manifest['entries']]
+        names = [entry.name for entry in entries]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"항목 이름이 중복됩니다: {', '.join(duplicates)}")
+        
+        backend = args.backend or manifest.get('backend', 'bigquery')
+        bq_executor = None
+        if any(entry.source_key == 'sql_file' for entry in entries):
+            bq_executor = BigQueryExecutor(
+                project_id=args.project_id,
+                backend=backend,
+                local_db=args.local_db or manifest.get('local_db'),
+                timeout=args.timeout or manifest.get('query_timeout'),
+                progress=False
+            )
+        summarizer = GeminiSummarizer(
+            api_key=args.api_key,
+            context_cache=manifest.get('context_cache', 'off')
+        )
+        batch = BatchSummarizer(
+            bq_executor,
+            summarizer,
+            query_workers=args.query_workers or manifest.get('query_workers', DEFAULT_QUERY_WORKERS),
+            gemini_workers=args.gemini_workers or manifest.get('gemini_workers', DEFAULT_GEMINI_WORKERS),
+            rpm=args.rpm if args.rpm is not None else manifest.get('rpm', DEFAULT_RPM)
+        )
+        
+        print(f"📋 {len(entries)}개 항목 일괄 요약 (쿼리 워커 {batch.query_workers}, "
+              f"Gemini 워커 {batch.gemini_workers}, RPM {batch.rate_limiter.per_minute or '제한 없음'})")
+        
+        # Ctrl-C를 받으면 실행 중인 BigQuery 잡을 취소한 뒤 종료
+        with (bq_executor.jobs if bq_executor else nullcontext()):
+            wall_seconds = batch.run(entries)
+        summarizer.close()
+        
+        # 실행 이력 기록 (Gemini 지표는 항목별 요약 호출만 해당 템플릿 행에 기록)
+        executed = [entry for entry in entries if entry.execution]
+        if not args.no_history and executed:
+            try:
+                history = RunHistory()
+                for entry in executed:
+                    history.record(
+                        'summarize',
+                        entry.execution['sql'],
+                        template=entry.source,
+                        backend=backend,
+                        duration_seconds=entry.execution['duration_seconds'],
+                        rows=entry.execution['total_rows'],
+                        **entry.execution['job_metrics'],
+                        **gemini_metrics(entry.token_usage)
+                    )
+                history.close()
+            except sqlite3.Error as e:
+                print(f"⚠️  실행 이력을 기록하지 못했습니다: {e}", file=sys.stderr)
+        
+        report = render_batch_report(entries, wall_seconds, args.manifest)
+        if args.output:
+            output_path = Path(args.output)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_text(report, encoding='utf-8')
+            print(f"\n✓ 통합 리포트가 저장되었습니다: {args.output}")
+        else:
+            print("\n" + report)
+        
+        failed = sum(1 for entry in entries if entry.error)
+        total_prompt = sum(u['prompt_tokens'] for u in summarizer.token_usage)
+        print(f"⏱️  전체 {wall_seconds:.2f}초, 성공 {len(entries) - failed}/{len(entries)}개, "
+              f"Gemini 호출 {len(summarizer.token_usage)}회 (프롬프트 토큰 {total_prompt:,})")
+        sys.exit(1 if failed else 0)
+    
+    except KeyboardInterrupt:
+        print("\n✗ 사용자 요청으로 중단되었습니다.", file=sys.stderr)
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n✗ 오류 발생: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+BigQuery/Gemini 호출 녹화·재생 (카세트)
+
+오프라인에서 요약 파이프라인 전체를 시간 측정하거나 프로파일링하려면 매번 같은
+응답이 필요합니다. 녹화 모드는 실제 클라이언트를 감싸 client.query() 결과(스키마,
+행, 잡 통계, 실행/수신 시간)와 Gemini generate_content()/count_tokens() 응답을
+gzip 압축 JSON 카세트 파일 하나에 기록하고, 재생 모드는 네트워크 없이 카세트에서
+같은 응답을 돌려줍니다.
+
+- 쿼리는 SQL 키(주석/공백 차이만 무시, 리터럴은 그대로 비교), Gemini 호출은
+  프롬프트와 생성 옵션의 해시로 찾습니다. 같은 키를 여러 번 호출하면 녹화 순서대로
+  돌려주고, 녹화 횟수보다 많이 호출하면 마지막 응답을 반복합니다.
+- 행은 컬럼 단위로 저장하고 Decimal/datetime/date/time/bytes 컬럼은 문자열로
+  변환한 뒤 재생할 때 원래 타입으로 복원합니다.
+- 재생 지연(latency_scale)을 주면 녹화한 잡 실행 시간, 결과 수신 시간, Gemini 응답
+  시간에 배수를 곱한 만큼 기다립니다 (0이면 지연 없음).
+- 같은 카세트에 다시 녹화하면 이번 실행에서 호출한 키만 교체하고 나머지는 유지합니다.
+- 카세트에 없는 호출을 재생하면 CassetteMissError가 발생합니다.
+
+사용 예:
+    cassette = Cassette('cassettes/tx_volume.json.gz', 'record')
+    client = cassette.wrap_client(bigquery.Client())
+    model = cassette.wrap_model(genai.GenerativeModel('gemini-2.0-flash'))
+    ...
+    cassette.save()
+    
+    cassette = Cassette('cassettes/tx_volume.json.gz', 'replay', latency_scale=1.0)
+    client = cassette.wrap_client(None)       # 네트워크/인증 불필요
+    
+    python scripts/cassette.py show cassettes/tx_volume.json.gz
+"""
+
+import sys
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, List, Tuple
+
+from local_backend import LocalField, LocalRow
+from run_history import sql_cache_key
+from sampling import strip_comments
+
+CASSETTE_MODES = ('record', 'replay')
+CASSETTE_VERSION = 1
+
+# 녹화할 잡 통계 (없는 속성은 None)
+_JOB_STATS = ('total_bytes_processed', 'total_bytes_billed', 'slot_millis', 'cache_hit', 'job_id')
+
+# 컬럼 값 변환: (파이썬 타입, 코덱 이름, 저장 함수, 복원 함수)
+_CODECS = [
+    (Decimal, 'decimal', str, Decimal),
+    (datetime, 'datetime', datetime.isoformat, datetime.fromisoformat),
+    (date, 'date', date.isoformat, date.fromisoformat),
+    (dt_time, 'time', dt_time.isoformat, dt_time.fromisoformat),
+    (bytes, 'bytes', lambda v: base64.b64encode(v).decode('ascii'), base64.b64decode),
+]
+_DECODERS = {name: decode for _, name, _, decode in _CODECS}
+
+
+class CassetteMissError(LookupError):
+    """재생 모드에서 카세트에 녹화되지 않은 호출"""
+
+
+def _hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+def _prompt_text(contents: Any) -> str:
+    """generate_content()/count_tokens() 입력을 키 계산용 문자열로 변환"""
+    if isinstance(contents, str):
+        return contents
+    return json.dumps(contents, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _encode_column(values: List[Any]) -> Tuple[Optional[str], List[Any]]:
+    """컬럼 값을 JSON으로 저장할 수 있게 변환 → (코덱 이름, 값 목록)"""
+    sample = next((v for v in values if v is not None), None)
+    # datetime은 date의 하위 클래스이므로 _CODECS 순서대로 확인
+    for python_type, name, encode, _ in _CODECS:
+        if isinstance(sample, python_type):
+            return name, [None if v is None else encode(v) for v in values]
+    return None, list(values)
+
+
+def _decode_column(codec: Optional[str], values: List[Any]) -> List[Any]:
+    if codec is None:
+        return values
+    decode = _DECODERS[codec]
+    return [None if v is None else decode(v) for v in values]
+
+
+def _sleep(seconds: Optional[float], scale: float) -> None:
+    if seconds and scale > 0:
+        time.sleep(seconds * scale)
+
+
+class Cassette:
+    """녹화/재생 카세트 파일 (gzip 압축 JSON)"""
+    
+    def __init__(self, path: str, mode: str, latency_scale: float = 0.0):
+        """
+        초기화
+        
+        Args:
+            path: 카세트 파일 경로 (녹화 모드에서 파일이 있으면 이어서 기록)
+            mode: 'record' 또는 'replay'
+            latency_scale: 재생 시 녹화한 지연 시간에 곱할 배수 (0이면 지연 없음)
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"지원하지 않는 카세트 모드: {mode} (사용 가능: {', '.join(CASSETTE_MODES)})")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        # 이번 실행에서 녹화한 키 (처음 녹화할 때 이전 녹화를 교체)
+        self._recorded: set = set()
+        # 재생 위치 (키별로 몇 번째 응답을 돌려줄지)
+        self._cursors: Dict[Tuple[str, str], int] = {}
+        self.stats = {'queries': 0, 'generations': 0, 'token_counts': 0}
+        
+        if Path(path).exists():
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                self.data = json.load(f)
+            if self.data.get('version') != CASSETTE_VERSION:
+                raise ValueError(f"지원하지 않는 카세트 버전: {self.data.get('version')} ({path})")
+        elif mode == 'replay':
+            raise FileNotFoundError(f"카세트 파일이 없습니다: {path}\n먼저 --record로 녹화하세요.")
+        else:
+            self.data = {'version': CASSETTE_VERSION, 'queries': {}, 'generations': {}, 'token_counts': {}}
+    
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+    
+    def wrap_client(self, client: Any) -> Any:
+        """
+        BigQuery 클라이언트(또는 LocalClient) 감싸기
+        
+        Args:
+            client: 녹화 모드에서 실제로 호출할 클라이언트 (재생 모드에서는 사용하지 않음)
+        
+        Returns:
+            query()를 지원하는 녹화/재생 클라이언트
+        """
+        return ReplayClient(self) if self.replaying else RecordingClient(client, self)
+    
+    def wrap_model(self, model: Any) -> Any:
+        """
+        Gemini GenerativeModel 감싸기
+        
+        Args:
+            model: 녹화 모드에서 실제로 호출할 모델 (재생 모드에서는 사용하지 않음)
+        
+        Returns:
+            generate_content(), count_tokens()를 지원하는 녹화/재생 모델
+        """
+        return ReplayModel(self) if self.replaying else RecordingModel(model, self)
+    
+    def record(self, section: str, key: str, entry: Any) -> None:
+        """응답 1건 녹화 (이번 실행에서 처음 녹화하는 키면 이전 녹화를 교체)"""
+        with self._lock:
+            if (section, key) not in self._recorded:
+                self._recorded.add((section, key))
+                self.data[section][key] = []
+            self.data[section][key].append(entry)
+            self.stats[section] += 1
+    
+    def lookup(self, section: str, key: str, description: str) -> Any:
+        """녹화한 응답을 순서대로 반환 (다 쓰면 마지막 응답 반복)"""
+        with self._lock:
+            entries = self.data[section].get(key)
+            if not entries:
+                raise CassetteMissError(
+                    f"카세트에 녹화되지 않은 {description}입니다 (키: {key}, 카세트: {self.path})\n"
+                    "같은 옵션으로 --record를 다시 실행하세요."
+                )
+            position = self._cursors.get((section, key), 0)
+            self._cursors[(section, key)] = position + 1
+            self.stats[section] += 1
+            return entries[min(position, len(entries) - 1)]
+    
+    def save(self) -> None:
+        """녹화 내용을 파일로 저장 (재생 모드에서는 아무것도 하지 않음)"""
+        if self.replaying:
+            return
+        output_path = Path(self.path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self.data['recorded_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+            with gzip.open(output_path, 'wt', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, separators=(',', ':'))
+    
+    def describe(self) -> str:
+        """이번 실행의 녹화/재생 건수"""
+        action = '재생' if self.replaying else '녹화'
+        return (f"{action}: 쿼리 {self.stats['queries']}건, Gemini 호출 {self.stats['generations']}건, "
+                f"토큰 계산 {self.stats['token_counts']}건 ({self.path})")
+
+
+# ---------------------------------------------------------------------------
+# BigQuery
+# ---------------------------------------------------------------------------
+
+class _RecordingRows:
+    """결과 페이지를 그대로 넘기면서 값을 모아 다 읽으면 카세트에 기록"""
+    
+    def __init__(self, job: 'RecordingQueryJob', row_iterator: Any):
+        self._job = job
+        self._rows = row_iterator
+        self.schema = row_iterator.schema
+    
+    @property
+    def pages(self):
+        pages = getattr(self._rows, 'pages', None)
+        if pages is None:
+            pages = [self._rows]
+        rows: List[tuple] = []
+        page_count = 0
+        start_time = time.perf_counter()
+        for page in pages:
+            page = list(page)
+            rows.extend(tuple(row.values()) for row in page)
+            page_count += 1
+            yield page
+        self._job.finish(self.schema, rows, page_count, time.perf_counter() - start_time)
+    
+    def __iter__(self):
+        for page in self.pages:
+            yield from page
+
+
+class RecordingQueryJob:
+    """실제 QueryJob을 감싸 결과를 녹화 (나머지 속성은 원래 잡으로 전달)"""
+    
+    def __init__(self, cassette: Cassette, job: Any, sql: str, dry_run: bool):
+        self._cassette = cassette
+        self._job = job
+        self._sql = sql
+        self._dry_run = dry_run
+        self._submitted = time.perf_counter()
+        self._seconds: Optional[float] = None
+        if dry_run:
+            self._seconds = time.perf_counter() - self._submitted
+            self.finish(None, [], 0, 0.0)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._job, name)
+    
+    def done(self, *args, **kwargs) -> bool:
+        return self._job.done(*args, **kwargs)
+    
+    def cancel(self) -> bool:
+        return self._job.cancel()
+    
+    def result(self, *args, **kwargs) -> _RecordingRows:
+        row_iterator = self._job.result(*args, **kwargs)
+        self._seconds = time.perf_counter() - self._submitted
+        return _RecordingRows(self, row_iterator)
+    
+    def finish(self, schema: Any, rows: List[tuple], pages: int, fetch_seconds: float) -> None:
+        """결과를 다 읽은 뒤 카세트에 기록"""
+        names = [field.name for field in (schema or [])]
+        encoded = [_encode_column(list(column)) for column in zip(*rows)] if rows else [(None, []) for _ in names]
+        started, ended = getattr(self._job, 'started', None), getattr(self._job, 'ended', None)
+        self._cassette.record('queries', _query_key(self._sql, self._dry_run), {
+            'sql': self._sql,
+            'schema': [[field.name, getattr(field, 'field_type', None)] for field in (schema or [])],
+            'codecs': [codec for codec, _ in encoded],
+            'columns': [values for _, values in encoded],
+            'stats': {name: getattr(self._job, name, None) for name in _JOB_STATS},
+            'execution_seconds': (ended - started).total_seconds() if started and ended else None,
+            'seconds': round(self._seconds or 0.0, 3),
+            'fetch_seconds': round(fetch_seconds, 3),
+            'pages': pages,
+        })
+
+
+class RecordingClient:
+    """client.query() 결과를 녹화하는 클라이언트 래퍼"""
+    
+    def __init__(self, client: Any, cassette: Cassette):
+        self._client = client
+        self._cassette = cassette
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+    
+    def query(self, sql: str, job_config: Any = None, **kwargs) -> RecordingQueryJob:
+        dry_run = bool(getattr(job_config, 'dry_run', False))
+        job = self._client.query(sql, job_config=job_config, **kwargs)
+        return RecordingQueryJob(self._cassette, job, sql, dry_run)
+
+
+def _query_key(sql: str, dry_run: bool) -> str:
+    return f"{sql_cache_key(sql)}{':dry' if dry_run else ''}"
+
+
+class _ReplayRows:
+    """녹화한 행을 페이지 단위로 돌려주는 RowIterator 대용"""
+    
+    def __init__(self, entry: Dict[str, Any], latency_scale: float, page_size: int = 10000):
+        self.schema = [LocalField(name, field_type) for name, field_type in entry['schema']]
+        self._entry = entry
+        self._latency_scale = latency_scale
+        self._page_size = page_size
+        self.total_rows = len(entry['columns'][0]) if entry['columns'] else 0
+    
+    @property
+    def pages(self):
+        index = {field.name: i for i, field in enumerate(self.schema)}
+        columns = [_decode_column(codec, values) for codec, values in zip(self._entry['codecs'], self._entry['columns'])]
+        rows = list(zip(*columns))
+        page_count = max(1, -(-len(rows) // self._page_size))
+        page_delay = (self._entry.get('fetch_seconds') or 0.0) / page_count
+        for start in range(0, len(rows), self._page_size):
+            _sleep(page_delay, self._latency_scale)
+            yield [LocalRow(values, index) for values in rows[start:start + self._page_size]]
+    
+    def __iter__(self):
+        for page in self.pages:
+            yield from page
+
+
+class ReplayQueryJob:
+    """녹화한 잡 통계와 결과를 돌려주는 QueryJob 대용 (지연 배수만큼 실행 중 상태 유지)"""
+    
+    def __init__(self, cassette: Cassette, entry: Dict[str, Any]):
+        self._cassette = cassette
+        self._entry = entry
+        self.query = entry['sql']
+        for name, value in entry['stats'].items():
+            setattr(self, name, value)
+        self._ready_at = time.monotonic() + (entry.get('seconds') or 0.0) * cassette.latency_scale
+        self.started = datetime.now(timezone.utc)
+        execution = entry.get('execution_seconds')
+        self.ended = self.started + timedelta(seconds=execution) if execution is not None else None
+        self.state = 'RUNNING'
+    
+    def done(self, *args, **kwargs) -> bool:
+        if time.monotonic() >= self._ready_at:
+            self.state = 'DONE'
+        return self.state == 'DONE'
+    
+    def result(self, timeout: Optional[float] = None, page_size: Optional[int] = None, **kwargs) -> _ReplayRows:
+        remaining = self._ready_at - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        self.state = 'DONE'
+        return _ReplayRows(self._entry, self._cassette.latency_scale, page_size or 10000)
+    
+    def cancel(self) -> bool:
+        return False
+
+
+class ReplayClient:
+    """카세트에서 쿼리 결과를 돌려주는 bigquery.Client 대용 (query()만 지원)"""
+    
+    def __init__(self, cassette: Cassette):
+        self._cassette = cassette
+        self.project = 'replay'
+    
+    def query(self, sql: str, job_config: Any = None, **kwargs) -> ReplayQueryJob:
+        dry_run = bool(getattr(job_config, 'dry_run', False))
+        entry = self._cassette.lookup('queries', _query_key(sql, dry_run), '쿼리')
+        return ReplayQueryJob(self._cassette, entry)
+
+
+# ---------------------------------------------------------------------------
+# Gemini
+# ---------------------------------------------------------------------------
+
+def _generation_key(contents: Any, options: Dict[str, Any]) -> str:
+    return _hash(_prompt_text(contents), json.dumps(options, ensure_ascii=False, sort_keys=True, default=str))
+
+
+class RecordingModel:
+    """generate_content()/count_tokens() 응답을 녹화하는 GenerativeModel 래퍼"""
+    
+    def __init__(self, model: Any, cassette: Cassette):
+        self._model = model
+        self._cassette = cassette
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+    
+    def generate_content(self, contents: Any, **options: Any) -> Any:
+        start_time = time.perf_counter()
+        response = self._model.generate_content(contents, **options)
+        usage = getattr(response, 'usage_metadata', None)
+        self._cassette.record('generations', _generation_key(contents, options), {
+            'text': response.text,
+            'usage': {
+                name: getattr(usage, name, None)
+                for name in ('prompt_token_count', 'candidates_token_count', 'cached_content_token_count')
+            },
+            'seconds': round(time.perf_counter() - start_time, 3),
+        })
+        return response
+    
+    def count_tokens(self, contents: Any, **options: Any) -> Any:
+        result = self._model.count_tokens(contents, **options)
+        self._cassette.record('token_counts', _hash(_prompt_text(contents)), result.total_tokens)
+        return result
+
+
+class ReplayModel:
+    """카세트에서 Gemini 응답을 돌려주는 GenerativeModel 대용"""
+    
+    def __init__(self, cassette: Cassette):
+        self._cassette = cassette
+    
+    def generate_content(self, contents: Any, **options: Any) -> Any:
+        entry = self._cassette.lookup('generations', _generation_key(contents, options), 'Gemini 프롬프트')
+        _sleep(entry.get('seconds'), self._cassette.latency_scale)
+        return SimpleNamespace(text=entry['text'], usage_metadata=SimpleNamespace(**entry['usage']))
+    
+    def count_tokens(self, contents: Any, **options: Any) -> Any:
+        total = self._cassette.lookup('token_counts', _hash(_prompt_text(contents)), '토큰 계산')
+        return SimpleNamespace(total_tokens=total)
+
+
+def summarize_cassette(path: str) -> Dict[str, Any]:
+    """
+    카세트 내용 요약
+    
+    Args:
+        path: 카세트 파일 경로
+    
+    Returns:
+        녹화 시각, 파일 크기, 쿼리별 SQL 앞부분/행 수/녹화 시간, Gemini 호출 수
+    """
+    cassette = Cassette(path, 'replay')
+    queries = []
+    for key, entries in cassette.data['queries'].items():
+        entry = entries[-1]
+        queries.append({
+            'key': key,
+            'sql': ' '.join(strip_comments(entry['sql']).split())[:80],
+            'rows': len(entry['columns'][0]) if entry['columns'] else 0,
+            'recorded': len(entries),
+            'seconds': entry.get('seconds'),
+            'fetch_seconds': entry.get('fetch_seconds'),
+        })
+    generations = cassette.data['generations']
+    return {
+        'recorded_at': cassette.data.get('recorded_at'),
+        'size_bytes': Path(path).stat().st_size,
+        'queries': queries,
+        'generations': sum(len(entries) for entries in generations.values()),
+        'gemini_seconds': round(sum(e.get('seconds') or 0 for entries in generations.values() for e in entries), 3),
+        'token_counts': len(cassette.data['token_counts']),
+    }
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        description='BigQuery/Gemini 녹화 카세트 확인',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # 녹화 (실제 BigQuery/Gemini 호출)
+  python scripts/summarize_with_gemini.py templates/queries/01_tx_volume.sql --record cassettes/tx_volume.json.gz
+  
+  # 네트워크 없이 재생 (녹화한 지연 시간 그대로)
+  python scripts/summarize_with_gemini.py templates/queries/01_tx_volume.sql --replay cassettes/tx_volume.json.gz --replay-latency 1
+  
+  # 카세트 내용 확인
+  python scripts/cassette.py show cassettes/tx_volume.json.gz
+        """
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    
+    show_parser = subparsers.add_parser('show', help='카세트에 녹화된 쿼리와 Gemini 호출 목록')
+    show_parser.add_argument('path', help='카세트 파일 경로')
+    
+    args = parser.parse_args()
+    if args.command != 'show':
+        parser.print_help()
+        sys.exit(0)
+    
+    try:
+        summary = summarize_cassette(args.path)
+    except (OSError, ValueError) as e:
+        print(f"✗ 오류 발생: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    print(f"카세트: {args.path} ({summary['size_bytes'] / 1024:.1f} KB, 녹화: {summary['recorded_at'] or '-'})")
+    print(f"\n쿼리 {len(summary['queries'])}개")
+    for query in summary['queries']:
+        print(f"  - {query['key']}: {query['rows']:,}행, 실행 {query['seconds'] or 0:.2f}초 + 수신 "
+              f"{query['fetch_seconds'] or 0:.2f}초 (녹화 {query['recorded']}회)")
+        print(f"    {query['sql']}")
+    print(f"\nGemini 호출 {summary['generations']}건 (응답 시간 합계 {summary['gemini_seconds']:.2f}초), "
+          f"토큰 계산 {summary['token_counts']}건")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+쿼리 결과 분할(chunking) 유틸리티
+
+프롬프트 한 번에 담기 어려운 결과를 토큰 예산에 맞춰 행 단위 또는
+시간 구간(hour/day/week) 단위로 나눕니다. map-reduce 요약에서 사용합니다.
+
+사용법:
+    from chunking import chunk_results
+    
+    chunks = chunk_results(results, token_budget=8000, window='day')
+    for chunk in chunks:
+        print(chunk.label, len(chunk.rows))
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from result_set import ResultSet
+from serialization import to_json
+
+# 시간 컬럼으로 인식하는 BigQuery 필드 타입
+TIME_FIELD_TYPES = {'DATE', 'DATETIME', 'TIMESTAMP'}
+
+# 행당 토큰 수 추정에 사용할 샘플 행 수
+TOKEN_SAMPLE_ROWS = 50
+
+
+@dataclass
+class Chunk:
+    """분할된 결과 구간"""
+    index: int
+    label: str
+    rows: ResultSet
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    텍스트의 토큰 수 근사치 (UTF-8 4바이트 ≈ 1토큰)
+    
+    영문/숫자는 약 4글자당 1토큰, 한글은 약 1.3글자당 1토큰으로 계산됩니다.
+    정확한 값이 필요하면 모델의 count_tokens를 사용하세요.
+    """
+    return math.ceil(len(text.encode('utf-8')) / 4)
+
+
+def find_time_column(results: ResultSet) -> Optional[str]:
+    """
+    시간 컬럼(DATE/DATETIME/TIMESTAMP) 이름 찾기
+    
+    BigQuery 필드 타입이 없으면 첫 번째 행의 값 타입으로 판단합니다.
+    """
+    for name, field_type in zip(results.schema, results.field_types):
+        if field_type in TIME_FIELD_TYPES:
+            return name
+    
+    if results:
+        first_row = results[0]
+        for name in results.schema:
+            if isinstance(first_row[name], (date, datetime)):
+                return name
+    
+    return None
+
+
+def estimate_tokens_per_row(results: ResultSet) -> float:
+    """샘플 행을 compact JSON으로 직렬화하여 행당 토큰 수 추정"""
+    if not results:
+        return 0.0
+    
+    sample = results[:TOKEN_SAMPLE_ROWS]
+    return estimate_tokens(to_json(sample.to_records(), compact=True)) / len(sample)
+
+
+def rows_per_chunk(results: ResultSet, token_budget: int) -> int:
+    """
+    토큰 예산 안에 들어가는 청크당 행 수 계산
+    
+    Args:
+        results: 쿼리 결과
+        token_budget: 청크 하나의 데이터에 허용할 토큰 수
+    
+    Returns:
+        청크당 행 수 (최소 1)
+    """
+    per_row = estimate_tokens_per_row(results)
+    if per_row <= 0:
+        return max(len(results), 1)
+    return max(int(token_budget // per_row), 1)
+
+
+def _bucket_key(value: Any, window: str) -> Any:
+    """시간 값을 구간 시작 시각으로 변환"""
+    if value is None:
+        return None
+    
+    if window == 'hour':
+        if isinstance(value, datetime):
+            return value.replace(minute=0, second=0, microsecond=0)
+        return value
+    
+    day = value.date() if isinstance(value, datetime) else value
+    if window == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def chunk_by_rows(results: ResultSet, chunk_rows: int) -> List[Chunk]:
+    """
+    행 수 기준 분할 (슬라이스이므로 복사 없음)
+    
+    Args:
+        results: 쿼리 결과
+        chunk_rows: 청크당 행 수
+    
+    Returns:
+        Chunk 리스트
+    """
+    chunks = []
+    for index, start in enumerate(range(0, len(results), chunk_rows)):
+        stop = min(start + chunk_rows, len(results))
+        chunks.append(Chunk(index, f"행 {start + 1}-{stop}", results[start:stop]))
+    return chunks
+
+
+def chunk_by_time_window(
+    results: ResultSet,
+    time_column: str,
+    window: str,
+    max_rows: int
+) -> List[Chunk]:
+    """
+    시간 구간 기준 분할 (시간 오름차순)
+    
+    연속된 구간을 max_rows 안에서 하나의 청크로 묶고, 한 구간이 max_rows를
+    넘는 경우에만 그 구간을 행 수 기준으로 다시 나눕니다.
+    
+    Args:
+        results: 쿼리 결과
+        time_column: 시간 컬럼 이름
+        window: 'hour', 'day', 'week'
+        max_rows: 청크당 최대 행 수
+    
+    Returns:
+        Chunk 리스트
+    """
+    times = results.column(time_column)
+    buckets: Dict[Any, List[int]] = {}
+    for position, value in enumerate(times):
+        buckets.setdefault(_bucket_key(value, window), []).append(position)
+    
+    # NULL 구간은 마지막에 배치
+    ordered_keys = sorted(k for k in buckets if k is not None)
+    if None in buckets:
+        ordered_keys.append(None)
+    
+    chunks: List[Chunk] = []
+    pending: List[int] = []
+    pending_keys: List[Any] = []
+    
+    def flush():
+        if pending:
+            first, last = pending_keys[0], pending_keys[-1]
+            label = f"{window} {first}" if first == last else f"{window} {first} ~ {last}"
+            chunks.append(Chunk(len(chunks), label, results.take(pending)))
+            pending.clear()
+            pending_keys.clear()
+    
+    for key in ordered_keys:
+        positions = buckets[key]
+        if key is not None:
+            positions.sort(key=lambda p: times[p])
+        
+        if len(pending) + len(positions) > max_rows:
+            flush()
+        
+        if len(positions) > max_rows:
+            # 한 구간이 예산을 넘으면 행 수 기준으로 분할
+            for start in range(0, len(positions), max_rows):
+                part = positions[start:start + max_rows]
+                label = f"{window} {key} ({start + 1}-{start + len(part)})"
+                chunks.append(Chunk(len(chunks), label, results.take(part)))
+            continue
+        
+        pending.extend(positions)
+        pending_keys.append(key)
+    
+    flush()
+    return chunks
+
+
+def chunk_results(
+    results: ResultSet,
+    token_budget: int,
+    window: Optional[str] = None
+) -> List[Chunk]:
+    """
+    토큰 예산에 맞춰 결과 분할
+    
+    window가 주어지고 시간 컬럼이 있으면 시간 구간 기준, 아니면 행 수 기준으로 나눕니다.
+    
+    Args:
+        results: 쿼리 결과
+        token_budget: 청크 하나의 데이터에 허용할 토큰 수
+        window: 'hour', 'day', 'week' 또는 None
+    
+    Returns:
+        Chunk 리스트
+    """
+    if not results:
+        return []
+    
+    max_rows = rows_per_chunk(results, token_budget)
+    
+    if window:
+        time_column = find_time_column(results)
+        if time_column:
+            return chunk_by_time_window(results, time_column, window, max_rows)
+    
+    return chunk_by_rows(results, max_rows)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+시계열 결과를 모양을 유지하는 대표 지점 N개로 줄이기 (LTTB, 구간별 최소/최대)
+
+format_query_results()가 앞에서 N행만 잘라 sample_data로 넣으면 ORDER BY date DESC
+결과는 최근 며칠만 남고 그 전의 급증/급감은 프롬프트에서 사라집니다. 이 모듈은
+시간 컬럼 기준으로 정렬한 뒤 다음 방식으로 N개 지점을 고릅니다.
+
+- lttb: Largest-Triangle-Three-Buckets. 구간마다 이전 선택 지점과 다음 구간 평균이
+  이루는 삼각형 넓이가 가장 큰 지점을 골라 꺾이는 지점(피크/저점)을 보존
+- minmax: 구간마다 최소/최대 지점을 함께 선택 (급증/급감 극값을 반드시 포함)
+- head: 기존 동작 (앞에서 N행)
+
+numpy가 있으면 구간 평균과 구간 내 넓이 계산을 벡터 연산으로 처리하고, 없으면
+같은 결과를 순수 Python으로 계산합니다. 선택한 행은 원래 결과의 행 순서를 유지합니다.
+
+사용법:
+    from downsample import downsample
+    
+    sample = downsample(results, 20, method='lttb')   # ResultSet
+
+성능 비교:
+    python scripts/downsample.py --bench --rows 100000 --points 50
+"""
+
+import sys
+import argparse
+import math
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # numpy가 없으면 순수 Python 구현 사용
+
+from chunking import find_time_column
+from result_set import ResultSet
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax', 'head')
+DEFAULT_METHOD = 'lttb'
+
+
+def _time_value(value: Any) -> Optional[float]:
+    """시간 값을 정렬/거리 계산용 실수로 변환 (DATE는 일 단위, 그 외는 초 단위)"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, date):
+        return float(value.toordinal() * 86400)
+    if isinstance(value, (int, float, Decimal)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return _time_value(datetime.fromisoformat(value))
+        except ValueError:
+            return None
+    return None
+
+
+def _numeric_value(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float, Decimal)):
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _bucket_bounds(length: int, buckets: int) -> List[Tuple[int, int]]:
+    """1..length-2 범위를 buckets개 구간 [start, stop)으로 분할 (첫/마지막 지점 제외)"""
+    every = (length - 2) / buckets
+    return [(int(i * every) + 1, int((i + 1) * every) + 1) for i in range(buckets)]
+
+
+def lttb_indices(x: Sequence[float], y: Sequence[float], points: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets로 대표 지점 선택
+    
+    Args:
+        x: 오름차순 정렬된 x 값 (시간)
+        y: y 값
+        points: 선택할 지점 수 (3 이상, 첫/마지막 지점 포함)
+    
+    Returns:
+        선택한 위치 목록 (오름차순)
+    """
+    length = len(x)
+    if points >= length:
+        return list(range(length))
+    if points < 3:
+        return [0, length - 1][:max(points, 0)]
+    
+    bounds = _bucket_bounds(length, points - 2)
+    # 다음 구간 평균 (마지막 구간의 "다음"은 마지막 지점)
+    if np is not None:
+        xs = np.asarray(x, dtype=float)
+        ys = np.asarray(y, dtype=float)
+        starts = np.array([start for start, _ in bounds] + [length - 1])
+        counts = np.diff(np.append(starts, length))
+        avg_x = np.add.reduceat(xs, starts) / counts
+        avg_y = np.add.reduceat(ys, starts) / counts
+    else:
+        xs, ys = x, y
+        edges = [start for start, _ in bounds] + [length - 1, length]
+        avg_x, avg_y = [], []
+        for start, stop in zip(edges, edges[1:]):
+            avg_x.append(sum(xs[start:stop]) / (stop - start))
+            avg_y.append(sum(ys[start:stop]) / (stop - start))
+    
+    selected = [0]
+    anchor = 0
+    for bucket, (start, stop) in enumerate(bounds):
+        next_x, next_y = avg_x[bucket + 1], avg_y[bucket + 1]
+        ax, ay = xs[anchor], ys[anchor]
+        if np is not None:
+            areas = np.abs((ax - next_x) * (ys[start:stop] - ay) - (ax - xs[start:stop]) * (next_y - ay))
+            anchor = start + int(np.argmax(areas))
+        else:
+            best = -1.0
+            for i in range(start, stop):
+                area = abs((ax - next_x) * (ys[i] - ay) - (ax - xs[i]) * (next_y - ay))
+                if area > best:
+                    best, anchor = area, i
+        selected.append(anchor)
+    selected.append(length - 1)
+    return selected
+
+
+def minmax_indices(y: Sequence[float], points: int) -> List[int]:
+    """
+    구간별 최소/최대 지점 선택
+    
+    Args:
+        y: 시간순 y 값
+        points: 선택할 최대 지점 수 (첫/마지막 지점 포함)
+    
+    Returns:
+        선택한 위치 목록 (오름차순, 중복 제거)
+    """
+    length = len(y)
+    if points >= length:
+        return list(range(length))
+    if points < 4:
+        return lttb_indices(range(length), y, points)
+    
+    selected = {0, length - 1}
+    bounds = _bucket_bounds(length, (points - 2) // 2)
+    if np is not None:
+        ys = np.asarray(y, dtype=float)
+        for start, stop in bounds:
+            segment = ys[start:stop]
+            selected.update((start + int(np.argmin(segment)), start + int(np.argmax(segment))))
+    else:
+        for start, stop in bounds:
+            segment = range(start, stop)
+            selected.update((min(segment, key=y.__getitem__), max(segment, key=y.__getitem__)))
+    return sorted(selected)
+
+
+def downsample(
+    results: ResultSet,
+    points: Optional[int],
+    method: str = DEFAULT_METHOD,
+    value_column: Optional[str] = None
+) -> ResultSet:
+    """
+    시계열 결과를 대표 지점 N개로 줄이기
+    
+    시간 컬럼이나 숫자 컬럼이 없는 결과(예: Top N 주소)와 head 방식은 앞에서 N행을
+    그대로 사용합니다.
+    
+    Args:
+        results: 쿼리 결과
+        points: 남길 행 수 (None이면 전체 행)
+        method: 'lttb', 'minmax', 'head'
+        value_column: 모양을 보존할 숫자 컬럼 (None이면 시간 컬럼 다음의 첫 숫자 컬럼)
+    
+    Returns:
+        선택한 행의 ResultSet (원래 행 순서 유지)
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"지원하지 않는 다운샘플링 방식: {method} (사용 가능: {', '.join(DOWNSAMPLE_METHODS)})")
+    if points is None or len(results) <= points:
+        return results
+    if method == 'head' or points <= 0:
+        return results[:max(points, 0)]
+    
+    time_column = find_time_column(results)
+    if time_column is None:
+        return results[:points]
+    if value_column is None:
+        first_row = results[0]
+        value_column = next(
+            (name for name in results.schema
+             if name != time_column and _numeric_value(first_row[name]) is not None),
+            None
+        )
+    if value_column is None:
+        return results[:points]
+    
+    # 시간/값이 모두 있는 행만 후보로 두고 시간순 정렬
+    times = results.column(time_column)
+    values = results.column(value_column)
+    candidates = []
+    for position, (t, v) in enumerate(zip(times, values)):
+        t, v = _time_value(t), _numeric_value(v)
+        if t is not None and v is not None:
+            candidates.append((t, position, v))
+    if len(candidates) <= points:
+        return results[:points]
+    candidates.sort()
+    
+    x = [c[0] for c in candidates]
+    y = [c[2] for c in candidates]
+    if method == 'lttb':
+        chosen = lttb_indices(x, y, points)
+    else:
+        chosen = minmax_indices(y, points)
+    return results.take(sorted(candidates[i][1] for i in chosen))
+
+
+def benchmark(n_rows: int = 100_000, points: int = 50):
+    """
+    numpy/순수 Python 구현 실행 시간 비교
+    
+    Args:
+        n_rows: 샘플 시계열 길이 (시간별 데이터)
+        points: 선택할 지점 수
+    """
+    global np
+    base = datetime(2025, 1, 1).timestamp()
+    x = [base + i * 3600 for i in range(n_rows)]
+    y = [1000 + 200 * math.sin(i / 24 * 2 * math.pi) + (5000 if i % 997 == 0 else 0) for i in range(n_rows)]
+    
+    numpy_module = np
+    print(f"다운샘플링 벤치마크: {n_rows:,}개 지점 → {points}개")
+    for label, module in (('numpy', numpy_module), ('순수 Python', None)):
+        if label == 'numpy' and module is None:
+            print("  numpy        : 설치되지 않음")
+            continue
+        np = module
+        for name, run in (('lttb', lambda: lttb_indices(x, y, points)), ('minmax', lambda: minmax_indices(y, points))):
+            start = time.perf_counter()
+            selected = run()
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<6} {name:<6}: {elapsed * 1000:8.2f} ms ({len(selected)}개 선택)")
+    np = numpy_module
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='시계열 다운샘플링 벤치마크')
+    parser.add_argument('--bench', action='store_true', help='벤치마크 실행')
+    parser.add_argument('--rows', type=int, default=100_000, help='샘플 시계열 길이 (기본값: 100000)')
+    parser.add_argument('--points', type=int, default=50, help='선택할 지점 수 (기본값: 50)')
+    args = parser.parse_args()
+    
+    if not args.bench:
+        parser.print_help()
+        sys.exit(0)
+    
+    benchmark(args.rows, args.points)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,690 @@
+#!/usr/bin/env python3
+"""
+병합 가능한 HLL++ 스케치로 기간별 고유 주소 수 근사
+
+01_tx_volume.sql, 02_active_addresses.sql의 COUNT(DISTINCT from_address)는 기간
+(일/주/월)을 바꿀 때마다 원본 테이블을 다시 스캔해야 합니다. 이 모듈은 일별
+HLL_COUNT.INIT 스케치를 한 번만 가져와 로컬 SQLite에 저장하고, 클라이언트에서
+스케치를 병합해 임의의 이동 기간 고유 수를 BigQuery 재조회 없이 계산합니다.
+
+- 스케치는 BigQuery(ZetaSketch) HLL++ 직렬화 형식(AggregatorStateProto)을 그대로
+  저장하며, sparse/dense 표현을 모두 읽고 병합합니다.
+- 추정은 sparse 표현이면 sparse 정밀도의 선형 계수(linear counting), dense 표현이면
+  Ertl(2017)의 개선 추정식을 사용합니다 (경험적 편향 보정표 불필요).
+- 추정값마다 95% 오차 범위를 함께 표시합니다.
+- 가져올 때 BigQuery의 HLL_COUNT.EXTRACT 값과 로컬 추정값을 비교해 형식 해석이
+  어긋나면 경고합니다.
+
+사용법:
+    python scripts/hll_sketch.py sync <metric> [옵션]
+    python scripts/hll_sketch.py query <metric> [옵션]
+
+예시:
+    python scripts/hll_sketch.py sync eth_senders --days 30
+    python scripts/hll_sketch.py query eth_senders --windows 1,7,30
+    python scripts/hll_sketch.py query eth_senders --windows 7 --last 14 --json
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import math
+import sqlite3
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Iterator, Tuple
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # python-dotenv가 없으면 환경 변수에서 직접 가져옴
+
+from job_control import JobController
+from local_backend import create_client
+from serialization import to_json
+
+# 스케치 DB 기본 경로 (HLL_SKETCH_DB 환경 변수로 변경)
+DEFAULT_SKETCH_DB = 'local_data/hll_sketches.sqlite'
+
+# HLL_COUNT.INIT 정밀도 (10~24, 레지스터 2^p개, 표준 오차 약 1.04/√2^p)
+DEFAULT_PRECISION = 14
+SPARSE_PRECISION_DELTA = 5
+
+# 가져올 때 BigQuery 추정값과 로컬 추정값의 허용 차이 (형식 해석 확인용)
+VERIFY_TOLERANCE = 0.05
+
+Z_95 = 1.96
+
+# 고유 수 지표: 원본 테이블, 대상 컬럼, 추가 조건 (01/02 템플릿과 같은 기준)
+METRICS: Dict[str, Dict[str, str]] = {
+    'eth_senders': {
+        'table': 'bigquery-public-data.crypto_ethereum.transactions',
+        'column': 'from_address',
+        'where': 'receipt_status = 1',
+        'label': 'Ethereum 고유 발신 주소',
+    },
+    'eth_receivers': {
+        'table': 'bigquery-public-data.crypto_ethereum.transactions',
+        'column': 'to_address',
+        'where': 'receipt_status = 1 AND to_address IS NOT NULL',
+        'label': 'Ethereum 고유 수신 주소',
+    },
+    'sol_signers': {
+        'table': 'bigquery-public-data.crypto_solana_mainnet_us.Transactions',
+        'column': 'accounts[OFFSET(0)].pubkey',
+        'where': "status = 'Success'",
+        'label': 'Solana 고유 서명자',
+    },
+}
+
+# AggregatorStateProto 필드 번호 (ZetaSketch aggregator.proto, hllplus-unique.proto)
+_HLLPP_TYPE = 112
+_ENCODING_VERSION = 2
+_RHOW_BITS = 6
+
+
+# ---------------------------------------------------------------------------
+# protobuf 최소 인코더/디코더 (varint, length-delimited 필드만 사용)
+# ---------------------------------------------------------------------------
+
+def _read_varint(buffer: bytes, position: int) -> Tuple[int, int]:
+    result, shift = 0, 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+
+def _write_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _fields(buffer: bytes) -> Iterator[Tuple[int, Any]]:
+    """(필드 번호, 값) 순회 (varint는 int, length-delimited는 bytes)"""
+    position = 0
+    while position < len(buffer):
+        key, position = _read_varint(buffer, position)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, position = _read_varint(buffer, position)
+        elif wire_type == 2:
+            length, position = _read_varint(buffer, position)
+            value = buffer[position:position + length]
+            position += length
+        elif wire_type == 1:
+            value, position = buffer[position:position + 8], position + 8
+        elif wire_type == 5:
+            value, position = buffer[position:position + 4], position + 4
+        else:
+            raise ValueError(f"지원하지 않는 protobuf wire type: {wire_type}")
+        yield number, value
+
+
+def _field(number: int, value: Any) -> bytes:
+    if isinstance(value, int):
+        return _write_varint(number << 3) + _write_varint(value)
+    return _write_varint(number << 3 | 2) + _write_varint(len(value)) + bytes(value)
+
+
+# ---------------------------------------------------------------------------
+# HLL++ 스케치
+# ---------------------------------------------------------------------------
+
+def _sigma(x: float) -> float:
+    if x == 1.0:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous = z
+        z += x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x: float) -> float:
+    if x == 0.0 or x == 1.0:
+        return 0.0
+    y, z = 1.0, 1.0 - x
+    while True:
+        x = math.sqrt(x)
+        previous = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+class HLLSketch:
+    """HLL++ 스케치 (ZetaSketch 직렬화 호환, sparse/dense 표현)"""
+    
+    def __init__(self, precision: int = DEFAULT_PRECISION, sparse_precision: Optional[int] = None):
+        """
+        초기화
+        
+        Args:
+            precision: 일반(dense) 정밀도 p
+            sparse_precision: sparse 정밀도 (None이면 p + 5)
+        """
+        if not 4 <= precision <= 24:
+            raise ValueError(f"정밀도는 4~24 사이여야 합니다: {precision}")
+        self.precision = precision
+        self.sparse_precision = sparse_precision or precision + SPARSE_PRECISION_DELTA
+        self.registers: Optional[bytearray] = None
+        self.sparse: set = set()
+        self.num_values = 0
+    
+    # -- sparse 값 인코딩 -------------------------------------------------
+    
+    @property
+    def _rho_flag(self) -> int:
+        return 1 << max(self.sparse_precision, self.precision + _RHOW_BITS)
+    
+    def _encode_sparse(self, hash_value: int) -> int:
+        sp, p = self.sparse_precision, self.precision
+        sparse_index = hash_value >> (64 - sp)
+        if sparse_index & ((1 << (sp - p)) - 1):
+            return sparse_index
+        # 일반 인덱스 뒤의 비트가 모두 0이면 ρ(w)를 따로 기록
+        rest = (hash_value << sp) & ((1 << 64) - 1)
+        rho = min(64 - rest.bit_length(), 64 - sp) + 1
+        return self._rho_flag | (sparse_index >> (sp - p)) << _RHOW_BITS | rho
+    
+    def _decode_sparse(self, value: int) -> Tuple[int, int]:
+        """sparse 값 → (일반 인덱스, 일반 ρ)"""
+        sp, p = self.sparse_precision, self.precision
+        if value & self._rho_flag:
+            index = (value >> _RHOW_BITS) & ((1 << p) - 1)
+            return index, (value & ((1 << _RHOW_BITS) - 1)) + sp - p
+        bits = value & ((1 << (sp - p)) - 1)
+        return value >> (sp - p), (sp - p) - bits.bit_length() + 1
+    
+    def _sparse_index(self, value: int) -> int:
+        if value & self._rho_flag:
+            return ((value >> _RHOW_BITS) & ((1 << self.precision) - 1)) << (self.sparse_precision - self.precision)
+        return value
+    
+    # -- 추가/병합 --------------------------------------------------------
+    
+    def add_hash(self, hash_value: int) -> None:
+        """64비트 해시 값 추가"""
+        self.num_values += 1
+        if self.registers is None:
+            self.sparse.add(self._encode_sparse(hash_value))
+            # sparse 값 하나는 약 4바이트, dense는 레지스터당 1바이트
+            if len(self.sparse) * 4 > (1 << self.precision):
+                self._densify()
+            return
+        index = hash_value >> (64 - self.precision)
+        rest = (hash_value << self.precision) & ((1 << 64) - 1)
+        rho = min(64 - rest.bit_length(), 64 - self.precision) + 1
+        if rho > self.registers[index]:
+            self.registers[index] = rho
+    
+    def add(self, value: Any) -> None:
+        """값 추가 (로컬 백엔드용 해시, BigQuery 스케치와 섞으면 안 됨)"""
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        self.add_hash(int.from_bytes(digest, 'big'))
+    
+    def _densify(self) -> None:
+        registers = bytearray(1 << self.precision)
+        for value in self.sparse:
+            index, rho = self._decode_sparse(value)
+            if rho > registers[index]:
+                registers[index] = rho
+        self.registers = registers
+        self.sparse = set()
+    
+    def merge(self, other: 'HLLSketch') -> 'HLLSketch':
+        """
+        다른 스케치를 병합 (제자리 변경)
+        
+        Args:
+            other: 같은 정밀도의 스케치
+        
+        Returns:
+            self
+        """
+        if (other.precision, other.sparse_precision) != (self.precision, self.sparse_precision):
+            raise ValueError(
+                f"정밀도가 다른 스케치는 병합할 수 없습니다: "
+                f"p={self.precision}/{self.sparse_precision}, p={other.precision}/{other.sparse_precision}"
+            )
+        self.num_values += other.num_values
+        if self.registers is None and other.registers is None:
+            self.sparse |= other.sparse
+            if len(self.sparse) * 4 > (1 << self.precision):
+                self._densify()
+            return self
+        if self.registers is None:
+            self._densify()
+        if other.registers is None:
+            for value in other.sparse:
+                index, rho = other._decode_sparse(value)
+                if rho > self.registers[index]:
+                    self.registers[index] = rho
+        else:
+            self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+    
+    def copy(self) -> 'HLLSketch':
+        sketch = HLLSketch(self.precision, self.sparse_precision)
+        sketch.registers = bytearray(self.registers) if self.registers is not None else None
+        sketch.sparse = set(self.sparse)
+        sketch.num_values = self.num_values
+        return sketch
+    
+    # -- 추정 ------------------------------------------------------------
+    
+    def estimate(self) -> float:
+        """고유 값 수 추정"""
+        if self.registers is None:
+            # sparse: sparse 정밀도(2^sp 레지스터)에서 선형 계수
+            m = 1 << self.sparse_precision
+            occupied = len({self._sparse_index(value) for value in self.sparse})
+            return m * math.log(m / (m - occupied)) if occupied < m else float(m)
+        
+        m = 1 << self.precision
+        q = 64 - self.precision
+        counts = [self.registers.count(k) for k in range(q + 2)]
+        z = m * _tau(1 - counts[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + counts[k])
+        z += m * _sigma(counts[0] / m)
+        return m * m / (2 * math.log(2) * z)
+    
+    def relative_error(self, estimate: Optional[float] = None) -> float:
+        """추정값의 상대 표준 오차"""
+        if self.registers is not None:
+            return 1.04 / math.sqrt(1 << self.precision)
+        estimate = self.estimate() if estimate is None else estimate
+        if estimate <= 0:
+            return 0.0
+        m = 1 << self.sparse_precision
+        t = estimate / m
+        return math.sqrt(m * (math.exp(t) - t - 1)) / estimate
+    
+    # -- 직렬화 (ZetaSketch AggregatorStateProto) ---------------------------
+    
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> 'HLLSketch':
+        """
+        HLL_COUNT.INIT 결과(BYTES)에서 스케치 생성
+        
+        Args:
+            blob: 직렬화된 AggregatorStateProto
+        
+        Returns:
+            HLLSketch
+        
+        Raises:
+            ValueError: HLL++ 스케치가 아니거나 형식이 맞지 않는 경우
+        """
+        state, aggregator_type, num_values = None, None, 0
+        for number, value in _fields(blob):
+            if number == 1:
+                aggregator_type = value
+            elif number == 2:
+                num_values = value
+            elif number == _HLLPP_TYPE:
+                state = value
+        if aggregator_type != _HLLPP_TYPE or state is None:
+            raise ValueError("HLL++ 스케치(HLL_COUNT.INIT 결과)가 아닙니다.")
+        
+        fields = dict(_fields(state))
+        precision = fields.get(3)
+        sparse_precision = fields.get(4)
+        if not precision:
+            raise ValueError("스케치에 정밀도 정보가 없습니다.")
+        sketch = cls(precision, sparse_precision)
+        sketch.num_values = num_values
+        
+        if fields.get(5):
+            if len(fields[5]) != 1 << precision:
+                raise ValueError(f"dense 레지스터 크기가 정밀도와 맞지 않습니다: {len(fields[5])}")
+            sketch.registers = bytearray(fields[5])
+        elif fields.get(6):
+            position, value, data = 0, 0, fields[6]
+            while position < len(data):
+                delta, position = _read_varint(data, position)
+                value += delta
+                sketch.sparse.add(value)
+        return sketch
+    
+    def to_bytes(self) -> bytes:
+        """AggregatorStateProto로 직렬화 (from_bytes와 호환)"""
+        state = _field(3, self.precision) + _field(4, self.sparse_precision)
+        if self.registers is not None:
+            state += _field(5, bytes(self.registers))
+        else:
+            data, previous = bytearray(), 0
+            for value in sorted(self.sparse):
+                data += _write_varint(value - previous)
+                previous = value
+            state = _field(2, len(self.sparse)) + state + _field(6, bytes(data))
+        return (
+            _field(1, _HLLPP_TYPE) + _field(2, self.num_values)
+            + _field(3, _ENCODING_VERSION) + _field(_HLLPP_TYPE, state)
+        )
+
+
+# ---------------------------------------------------------------------------
+# 로컬 스케치 저장소
+# ---------------------------------------------------------------------------
+
+class SketchStore:
+    """지표/백엔드/날짜별 스케치 저장소 (SQLite)"""
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        초기화
+        
+        Args:
+            path: SQLite 파일 경로 (None이면 HLL_SKETCH_DB 또는 DEFAULT_SKETCH_DB)
+        """
+        self.path = path or os.getenv('HLL_SKETCH_DB') or DEFAULT_SKETCH_DB
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sketches ("
+            " metric TEXT NOT NULL, backend TEXT NOT NULL, day TEXT NOT NULL,"
+            " precision INTEGER NOT NULL, sketch BLOB NOT NULL, bq_estimate INTEGER,"
+            " complete INTEGER NOT NULL, fetched_at TEXT NOT NULL,"
+            " PRIMARY KEY (metric, backend, day))"
+        )
+    
+    def complete_days(self, metric: str, backend: str, precision: int) -> set:
+        """다시 가져올 필요가 없는(하루가 끝난 뒤 가져온) 날짜 집합"""
+        rows = self.conn.execute(
+            "SELECT day FROM sketches WHERE metric = ? AND backend = ? AND precision = ? AND complete = 1",
+            (metric, backend, precision)
+        )
+        return {date.fromisoformat(day) for day, in rows}
+    
+    def save(self, metric: str, backend: str, day: date, sketch: HLLSketch, bq_estimate: Optional[int]) -> None:
+        now = datetime.now(timezone.utc)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sketches VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    metric, backend, day.isoformat(), sketch.precision, sketch.to_bytes(), bq_estimate,
+                    int(day < now.date()), now.isoformat(timespec='seconds')
+                )
+            )
+    
+    def load(self, metric: str, backend: str) -> Dict[date, HLLSketch]:
+        """날짜별 스케치 (정밀도가 다른 스케치는 병합할 수 없으므로 가장 최근에 가져온 정밀도만)"""
+        latest = self.conn.execute(
+            "SELECT precision FROM sketches WHERE metric = ? AND backend = ? ORDER BY fetched_at DESC LIMIT 1",
+            (metric, backend)
+        ).fetchone()
+        if latest is None:
+            return {}
+        rows = self.conn.execute(
+            "SELECT day, sketch FROM sketches WHERE metric = ? AND backend = ? AND precision = ? ORDER BY day",
+            (metric, backend, latest[0])
+        )
+        return {date.fromisoformat(day): HLLSketch.from_bytes(blob) for day, blob in rows}
+    
+    def close(self) -> None:
+        self.conn.close()
+
+
+def sketch_sql(metric: str, start: date, end: date, precision: int) -> str:
+    """
+    일별 HLL_COUNT.INIT 스케치 쿼리 (BigQuery)
+    
+    Args:
+        metric: METRICS 키
+        start: 시작 날짜 (포함)
+        end: 끝 날짜 (포함)
+        precision: HLL_COUNT.INIT 정밀도
+    
+    Returns:
+        date, sketch, bq_estimate 컬럼을 반환하는 SQL
+    """
+    spec = METRICS[metric]
+    return f"""SELECT
+  date,
+  sketch,
+  HLL_COUNT.EXTRACT(sketch) AS bq_estimate
+FROM (
+  SELECT
+    DATE(block_timestamp) AS date,
+    HLL_COUNT.INIT({spec['column']}, {precision}) AS sketch
+  FROM
+    `{spec['table']}`
+  WHERE
+    block_timestamp >= TIMESTAMP('{start.isoformat()}')
+    AND block_timestamp < TIMESTAMP('{(end + timedelta(days=1)).isoformat()}')
+    AND {spec['where']}
+  GROUP BY
+    date
+)"""
+
+
+def _local_sql(metric: str, start: date, end: date) -> str:
+    """로컬 백엔드용: 일별 고유 값을 내려받아 클라이언트에서 스케치 생성"""
+    spec = METRICS[metric]
+    return f"""SELECT DISTINCT
+  DATE(block_timestamp) AS date,
+  {spec['column']} AS value
+FROM
+  `{spec['table']}`
+WHERE
+  block_timestamp >= TIMESTAMP('{start.isoformat()}')
+  AND block_timestamp < TIMESTAMP('{(end + timedelta(days=1)).isoformat()}')
+  AND {spec['where']}"""
+
+
+def sync(
+    store: SketchStore,
+    metric: str,
+    end: date,
+    days: int,
+    precision: int = DEFAULT_PRECISION,
+    backend: str = 'bigquery',
+    project_id: Optional[str] = None,
+    local_db: Optional[str] = None
+) -> List[Tuple[date, float, Optional[int]]]:
+    """
+    아직 없는 날짜의 스케치를 가져와 저장
+    
+    Args:
+        store: 스케치 저장소
+        metric: METRICS 키
+        end: 마지막 날짜 (포함)
+        days: end부터 거슬러 올라갈 일수
+        precision: HLL_COUNT.INIT 정밀도
+        backend: 'bigquery' 또는 'local' (로컬은 고유 값을 내려받아 직접 스케치 생성)
+        project_id: GCP 프로젝트 ID
+        local_db: local 백엔드의 DuckDB 파일 경로
+    
+    Returns:
+        [(날짜, 로컬 추정값, BigQuery 추정값)] — 새로 가져온 날짜만
+    """
+    wanted = {end - timedelta(days=offset) for offset in range(days)}
+    missing = wanted - store.complete_days(metric, backend, precision)
+    if not missing:
+        return []
+    start, stop = min(missing), max(missing)
+    
+    client = create_client(backend, project_id, local_db)
+    fetched = []
+    with JobController() as jobs:
+        if backend == 'local':
+            sketches: Dict[date, HLLSketch] = {}
+            for row in jobs.wait(client.query(_local_sql(metric, start, stop))):
+                day, value = row['date'], row['value']
+                if value is not None:
+                    sketches.setdefault(day, HLLSketch(precision)).add(value)
+            rows = [(day, sketch, None) for day, sketch in sketches.items()]
+        else:
+            rows = [
+                (row['date'], HLLSketch.from_bytes(row['sketch']), row['bq_estimate'])
+                for row in jobs.wait(client.query(sketch_sql(metric, start, stop, precision)))
+            ]
+    
+    for day, sketch, bq_estimate in rows:
+        if day not in missing:
+            continue
+        store.save(metric, backend, day, sketch, bq_estimate)
+        fetched.append((day, sketch.estimate(), bq_estimate))
+    return sorted(fetched)
+
+
+def rolling_estimates(
+    sketches: Dict[date, HLLSketch],
+    windows: Iterable[int],
+    end_days: Iterable[date]
+) -> List[Dict[str, Any]]:
+    """
+    이동 기간 고유 수 추정
+    
+    Args:
+        sketches: 날짜별 스케치
+        windows: 기간(일) 목록
+        end_days: 기간의 마지막 날짜 목록
+    
+    Returns:
+        [{date, window_days, estimate, err95, relative_err95}] — 기간 안에 빠진 날짜가 있으면 제외
+    """
+    results = []
+    for end_day in end_days:
+        for window in windows:
+            days = [end_day - timedelta(days=offset) for offset in range(window)]
+            if any(day not in sketches for day in days):
+                continue
+            merged = sketches[days[0]].copy()
+            for day in days[1:]:
+                merged.merge(sketches[day])
+            estimate = merged.estimate()
+            relative = Z_95 * merged.relative_error(estimate)
+            results.append({
+                'date': end_day,
+                'window_days': window,
+                'estimate': int(round(estimate)),
+                'err95': int(round(estimate * relative)),
+                'relative_err95': round(relative, 4),
+            })
+    return results
+
+
+def main(argv: Optional[List[str]] = None):
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        description='일별 HLL++ 스케치로 기간별 고유 주소 수 근사 (BigQuery 재조회 없음)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # 최근 30일 일별 스케치 가져오기 (이미 있는 날짜는 건너뜀)
+  python scripts/hll_sketch.py sync eth_senders --days 30
+  
+  # 1일/7일/30일 이동 기간 고유 발신 주소 수 (±95% 오차)
+  python scripts/hll_sketch.py query eth_senders --windows 1,7,30
+  
+  # Solana 데이터셋은 2025-03-31 이후 업데이트 중단 → 기준일 지정
+  python scripts/hll_sketch.py sync sol_signers --days 31 --end 2025-03-31
+  python scripts/hll_sketch.py query sol_signers --windows 7 --end 2025-03-31
+        """
+    )
+    parser.add_argument('--db', help=f'스케치 DB 경로 (기본값: HLL_SKETCH_DB 또는 {DEFAULT_SKETCH_DB})')
+    parser.add_argument(
+        '--backend',
+        choices=['bigquery', 'local'],
+        default='bigquery',
+        help='스케치를 만들 백엔드 (local: 로컬 DuckDB에서 값을 받아 직접 생성, 기본값: bigquery)'
+    )
+    parser.add_argument('--end', type=date.fromisoformat, help='마지막 날짜 YYYY-MM-DD (기본값: 오늘, UTC)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    sync_parser = subparsers.add_parser('sync', help='일별 스케치 가져오기')
+    sync_parser.add_argument('metric', choices=sorted(METRICS), help='고유 수 지표')
+    sync_parser.add_argument('--days', type=int, default=30, help='가져올 일수 (기본값: 30)')
+    sync_parser.add_argument(
+        '--precision', type=int, default=DEFAULT_PRECISION,
+        help=f'HLL_COUNT.INIT 정밀도 10~24 (기본값: {DEFAULT_PRECISION}, 오차 약 ±{Z_95 * 1.04 / math.sqrt(1 << DEFAULT_PRECISION):.1%})'
+    )
+    sync_parser.add_argument('--project-id', '-p', help='GCP 프로젝트 ID (기본값: GCP_PROJECT_ID 환경 변수)')
+    sync_parser.add_argument('--local-db', help='local 백엔드의 DuckDB 파일 경로')
+    
+    query_parser = subparsers.add_parser('query', help='저장된 스케치로 이동 기간 고유 수 계산')
+    query_parser.add_argument('metric', choices=sorted(METRICS), help='고유 수 지표')
+    query_parser.add_argument('--windows', default='1,7,30', help='기간(일) 목록, 쉼표 구분 (기본값: 1,7,30)')
+    query_parser.add_argument('--last', type=int, default=7, help='표시할 마지막 날짜 수 (기본값: 7)')
+    query_parser.add_argument('--json', action='store_true', help='JSON으로 출력')
+    
+    args = parser.parse_args(argv)
+    end = args.end or datetime.now(timezone.utc).date()
+    store = None
+    
+    try:
+        store = SketchStore(args.db)
+        
+        if args.command == 'sync':
+            if not 10 <= args.precision <= 24:
+                raise ValueError("--precision은 10~24 사이여야 합니다 (HLL_COUNT.INIT 제한).")
+            fetched = sync(
+                store, args.metric, end, args.days, args.precision,
+                args.backend, args.project_id or os.getenv("GCP_PROJECT_ID"), args.local_db
+            )
+            print(f"✓ {METRICS[args.metric]['label']}: {len(fetched)}일 스케치 저장 ({store.path})")
+            mismatched = [
+                (day, estimate, bq_estimate) for day, estimate, bq_estimate in fetched
+                if bq_estimate and abs(estimate - bq_estimate) > VERIFY_TOLERANCE * bq_estimate
+            ]
+            for day, estimate, bq_estimate in mismatched:
+                print(f"⚠️  {day}: 로컬 추정 {estimate:,.0f}, BigQuery 추정 {bq_estimate:,} (스케치 해석 확인 필요)")
+            return
+        
+        windows = sorted({int(w) for w in args.windows.split(',') if w.strip()})
+        sketches = store.load(args.metric, args.backend)
+        if not sketches:
+            raise ValueError(f"저장된 스케치가 없습니다. 먼저 실행하세요: python scripts/hll_sketch.py sync {args.metric}")
+        end_days = [end - timedelta(days=offset) for offset in range(args.last)]
+        results = rolling_estimates(sketches, windows, end_days)
+        
+        if args.json:
+            print(to_json(results))
+            return
+        
+        print(f"📐 {METRICS[args.metric]['label']} (HLL++ 근사, ±95% 오차)")
+        header = f"{'날짜':<10}" + ''.join(f"{f'{w}일':>24}" for w in windows)
+        print(header)
+        by_key = {(r['date'], r['window_days']): r for r in results}
+        for end_day in end_days:
+            cells = []
+            for window in windows:
+                result = by_key.get((end_day, window))
+                cells.append(
+                    f"{result['estimate']:>12,} ±{result['relative_err95']:>6.1%}  " if result else f"{'-':>24}"
+                )
+            print(f"{end_day.isoformat():<10}" + ''.join(f"{cell:>24}" for cell in cells))
+        missing = sum(1 for end_day in end_days for window in windows if (end_day, window) not in by_key)
+        if missing:
+            print(f"\n'-'는 기간 안에 스케치가 없는 날짜가 있어 계산하지 않았습니다. sync --days를 늘려 보세요.")
+    
+    except Exception as e:
+        print(f"\n✗ 오류 발생: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == '__main__':
+    main()
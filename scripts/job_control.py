@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+BigQuery 잡 타임아웃, 취소, 진행 상황 표시
+
+query_job.result()는 잡이 끝날 때까지 아무 출력 없이 기다리고, Ctrl-C로 스크립트를
+멈춰도 서버의 잡은 계속 실행되어 과금됩니다. JobController는 실행 중인 잡을 추적해
+
+- 제한 시간(timeout)을 넘으면 서버 잡을 취소하고 JobTimeoutError를 발생시키고
+- SIGINT(Ctrl-C)를 받으면 남은 잡을 모두 취소한 뒤 KeyboardInterrupt를 전달하며
+- 잡 상태, 경과 시간, 다운로드한 행 수와 초당 행 수를 한 줄로 갱신해 표시합니다.
+
+사용 예:
+    controller = JobController(timeout=300)
+    with controller:
+        rows = ResultSet.from_bigquery(controller.wait(client.query(sql)))
+"""
+
+import signal
+import sys
+import threading
+import time
+from typing import Optional, Dict, Any, List, TextIO
+
+# 잡 상태 확인 간격(초)과 진행 줄 갱신 최소 간격(초)
+POLL_INTERVAL = 1.0
+PROGRESS_INTERVAL = 0.2
+
+
+class JobTimeoutError(RuntimeError):
+    """제한 시간을 넘겨 잡을 취소함"""
+
+
+class JobCancelledError(RuntimeError):
+    """사용자 요청(SIGINT)으로 잡을 취소함"""
+
+
+class _Tracked:
+    """추적 중인 잡 하나의 진행 상태"""
+    
+    def __init__(self, job: Any):
+        self.job = job
+        self.started = time.monotonic()
+        self.state = getattr(job, 'state', None) or 'PENDING'
+        self.rows = 0
+        self.fetch_started: Optional[float] = None
+
+
+class _ProgressRows:
+    """RowIterator 래퍼: 페이지를 넘길 때마다 다운로드 행 수를 갱신"""
+    
+    def __init__(self, controller: 'JobController', tracked: _Tracked, row_iterator: Any):
+        self._controller = controller
+        self._tracked = tracked
+        self._rows = row_iterator
+        self.schema = row_iterator.schema
+        self.total_rows = getattr(row_iterator, 'total_rows', None)
+    
+    @property
+    def pages(self):
+        pages = getattr(self._rows, 'pages', None)
+        if pages is None:
+            pages = [list(self._rows)]
+        try:
+            for page in pages:
+                page = list(page)
+                self._controller._fetched(self._tracked, len(page))
+                yield page
+        finally:
+            self._controller._finish(self._tracked)
+    
+    def __iter__(self):
+        for page in self.pages:
+            yield from page
+
+
+class JobController:
+    """실행 중인 잡의 타임아웃/취소/진행 표시 관리"""
+    
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        progress: Optional[bool] = None,
+        stream: Optional[TextIO] = None,
+        poll_interval: float = POLL_INTERVAL
+    ):
+        """
+        초기화
+        
+        Args:
+            timeout: 잡 제출부터 다운로드 완료까지의 제한 시간(초, None이면 무제한)
+            progress: 진행 줄 표시 여부 (None이면 stream이 터미널일 때만 표시)
+            stream: 진행 줄을 쓸 스트림 (기본값: sys.stderr)
+            poll_interval: 잡 상태 확인 간격(초)
+        """
+        self.timeout = timeout
+        self.stream = stream or sys.stderr
+        self.progress = self.stream.isatty() if progress is None else progress
+        self.poll_interval = poll_interval
+        self.cancelled = threading.Event()
+        self._jobs: Dict[int, _Tracked] = {}
+        self._lock = threading.RLock()
+        self._last_render = 0.0
+        self._line_width = 0
+        self._previous_handler: Any = None
+    
+    def __enter__(self) -> 'JobController':
+        # 대화형 세션처럼 같은 컨트롤러를 다시 쓰면 이전 Ctrl-C 취소 상태를 지움
+        self.cancelled.clear()
+        self.install()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.restore()
+        self._clear_line()
+    
+    def install(self) -> None:
+        """SIGINT 핸들러 등록 (메인 스레드에서만 가능하므로 그 외에는 무시)"""
+        if threading.current_thread() is not threading.main_thread():
+            return
+        self._previous_handler = signal.signal(signal.SIGINT, self._on_sigint)
+    
+    def restore(self) -> None:
+        """install() 이전의 SIGINT 핸들러로 복원"""
+        if self._previous_handler is not None:
+            signal.signal(signal.SIGINT, self._previous_handler)
+            self._previous_handler = None
+    
+    def wait(self, query_job: Any) -> Any:
+        """
+        잡 완료를 기다린 뒤 진행 상황을 표시하는 결과 반복자 반환
+        
+        Args:
+            query_job: client.query()가 반환한 잡
+        
+        Returns:
+            RowIterator 래퍼 (schema, pages, 행 순회 지원)
+        
+        Raises:
+            JobTimeoutError: 제한 시간 초과 (서버 잡은 취소됨)
+            JobCancelledError: SIGINT로 취소됨
+        """
+        tracked = _Tracked(query_job)
+        with self._lock:
+            self._jobs[id(query_job)] = tracked
+        
+        try:
+            while not query_job.done():
+                self._check(tracked)
+                tracked.state = getattr(query_job, 'state', None) or tracked.state
+                self._render()
+                self.cancelled.wait(self.poll_interval)
+            self._check(tracked)
+            
+            remaining = self._remaining(tracked)
+            row_iterator = query_job.result(timeout=remaining)
+        except BaseException:
+            self._finish(tracked)
+            raise
+        
+        tracked.state = 'FETCH'
+        tracked.fetch_started = time.monotonic()
+        self._render(force=True)
+        return _ProgressRows(self, tracked, row_iterator)
+    
+    def cancel_all(self) -> int:
+        """
+        추적 중인 잡을 모두 취소 요청
+        
+        Returns:
+            취소 요청한 잡 수
+        """
+        # 다운로드 단계의 잡은 서버에서 이미 끝났으므로 제외
+        with self._lock:
+            jobs = [tracked.job for tracked in self._jobs.values() if tracked.fetch_started is None]
+        
+        cancelled = 0
+        for job in jobs:
+            try:
+                if job.cancel():
+                    cancelled += 1
+            except Exception as e:
+                print(f"⚠️  잡 취소 실패 ({getattr(job, 'job_id', '?')}): {e}", file=self.stream)
+        return cancelled
+    
+    def _on_sigint(self, signum: int, frame: Any) -> None:
+        self.cancelled.set()
+        self._clear_line()
+        cancelled = self.cancel_all()
+        if cancelled:
+            print(f"\n⚠️  중단 요청: 실행 중인 BigQuery 잡 {cancelled}개를 취소했습니다.", file=self.stream)
+        # 두 번째 Ctrl-C는 기본 동작(즉시 종료)으로 처리
+        self.restore()
+        raise KeyboardInterrupt
+    
+    def _remaining(self, tracked: _Tracked) -> Optional[float]:
+        if self.timeout is None:
+            return None
+        return max(self.timeout - (time.monotonic() - tracked.started), 0.0)
+    
+    def _check(self, tracked: _Tracked) -> None:
+        """취소/타임아웃 확인 (타임아웃이면 서버 잡 취소)"""
+        if self.cancelled.is_set():
+            raise JobCancelledError("사용자 요청으로 잡을 취소했습니다.")
+        remaining = self._remaining(tracked)
+        if remaining is not None and remaining <= 0:
+            job = tracked.job
+            if not job.done():
+                job.cancel()
+            self._clear_line()
+            raise JobTimeoutError(
+                f"제한 시간 {self.timeout:g}초를 넘겨 잡을 취소했습니다 "
+                f"(job_id: {getattr(job, 'job_id', '?')})."
+            )
+    
+    def _fetched(self, tracked: _Tracked, rows: int) -> None:
+        tracked.rows += rows
+        # 다운로드 중 타임아웃: 서버 잡은 이미 끝났으므로 다운로드만 중단
+        if self.cancelled.is_set():
+            raise JobCancelledError("사용자 요청으로 다운로드를 중단했습니다.")
+        remaining = self._remaining(tracked)
+        if remaining is not None and remaining <= 0:
+            raise JobTimeoutError(f"제한 시간 {self.timeout:g}초를 넘겨 결과 다운로드를 중단했습니다.")
+        self._render()
+    
+    def _finish(self, tracked: _Tracked) -> None:
+        with self._lock:
+            self._jobs.pop(id(tracked.job), None)
+            remaining = len(self._jobs)
+        if not remaining:
+            self._clear_line()
+    
+    def _render(self, force: bool = False) -> None:
+        """진행 줄 갱신: 잡 상태, 경과 시간, 다운로드 행 수, 초당 행 수"""
+        if not self.progress:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_render < PROGRESS_INTERVAL:
+                return
+            self._last_render = now
+            parts: List[str] = []
+            for tracked in self._jobs.values():
+                part = f"{tracked.state} {now - tracked.started:.1f}초"
+                if tracked.fetch_started is not None:
+                    fetch_seconds = max(now - tracked.fetch_started, 1e-6)
+                    part += f", {tracked.rows:,}행 ({tracked.rows / fetch_seconds:,.0f}행/초)"
+                parts.append(part)
+            if not parts:
+                return
+            line = "⏳ " + " | ".join(parts)
+            padding = max(self._line_width - len(line), 0)
+            self._line_width = len(line)
+        self.stream.write("\r" + line + " " * padding)
+        self.stream.flush()
+    
+    def _clear_line(self) -> None:
+        if self.progress and self._line_width:
+            self.stream.write("\r" + " " * self._line_width + "\r")
+            self.stream.flush()
+            self._line_width = 0
+
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+주소/프로그램 라벨 로컬 인덱스 (메모리 매핑 정렬 인덱스)
+
+컨트랙트나 Solana 프로그램 이름을 붙이려면 BigQuery에서 매핑 테이블을 JOIN해야
+했습니다. 이 모듈은 address → label 파일(CSV/JSON/NDJSON/Parquet)을 정렬된 바이너리
+인덱스로 한 번 변환해 두고, 결과를 받은 뒤 address, contract_address, fee_payer 같은
+컬럼에 <컬럼>_label 컬럼을 한꺼번에 붙입니다. 인덱스 파일은 mmap으로 열기 때문에
+수백만 개 라벨도 읽어 들이는 시간이 거의 없고, 필요한 페이지만 메모리에 올라갑니다.
+
+인덱스 파일 형식 (리틀 엔디언):
+    헤더      magic(8) count(u64) label_count(u64) key_bytes(u64)
+    hashes    주소 해시(blake2b 8바이트) u64 × count, 오름차순
+    key_offs  주소 문자열 위치 u32 × (count + 1)
+    label_ids 라벨 번호 u32 × count
+    label_offs 라벨 문자열 위치 u32 × (label_count + 1)
+    keys      주소 문자열 (UTF-8, 해시 충돌 확인용)
+    labels    라벨 문자열 (UTF-8, 중복 제거)
+
+조회는 해시 배열을 이진 탐색한 뒤 주소 문자열을 비교하므로 해시가 충돌해도 정확합니다.
+numpy가 있으면 한 컬럼의 고유 주소를 searchsorted로 한 번에 찾고, 없으면 bisect로
+찾습니다. Ethereum 주소(0x...)는 소문자로 정규화하고 Solana 주소는 대소문자를 구분합니다.
+
+사용법:
+    python scripts/label_index.py build labels.csv -o local_data/address_labels.lblidx
+    python scripts/label_index.py lookup local_data/address_labels.lblidx 0xdac17f958d2ee523a2206206994597c13d831ec7
+    python scripts/label_index.py bench --entries 1000000 --rows 100000
+    
+    python scripts/run_query.py templates/queries/02_active_addresses.sql --address-labels local_data/address_labels.lblidx
+"""
+
+import os
+import sys
+import argparse
+import bisect
+import hashlib
+import mmap
+import random
+import struct
+import tempfile
+import time
+from array import array
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # numpy가 없으면 bisect로 조회
+
+from result_io import read_results
+from result_set import ResultSet
+
+MAGIC = b'LBLIDX01'
+_HEADER = struct.Struct('<8sQQQ')
+
+# 라벨을 붙일 기본 컬럼 (결과에 있는 컬럼만 사용)
+DEFAULT_LABEL_COLUMNS = ('address', 'contract_address', 'fee_payer', 'from_address', 'to_address', 'program_id')
+LABEL_SUFFIX = '_label'
+
+# 라벨 원본 파일에서 찾을 컬럼 이름 (없으면 첫 번째/두 번째 컬럼)
+_ADDRESS_COLUMNS = ('address', 'program_id', 'account', 'pubkey')
+_LABEL_COLUMNS = ('label', 'name', 'program_name')
+
+
+def normalize_address(value: Any) -> Optional[str]:
+    """주소 정규화 (0x 주소는 소문자, 그 외는 그대로, 문자열이 아니면 None)"""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value[:2] in ('0x', '0X'):
+        return value.lower()
+    return value or None
+
+
+def _hash_key(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little')
+
+
+def _native_bytes(values: array) -> bytes:
+    """array를 리틀 엔디언 바이트로 변환"""
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def build_index(entries: Iterable[Tuple[Any, Any]], output_path: str) -> Dict[str, int]:
+    """
+    address → label 목록으로 인덱스 파일 생성
+    
+    Args:
+        entries: (주소, 라벨) 목록 (같은 주소가 여러 번 나오면 마지막 라벨 사용)
+        output_path: 인덱스 파일 경로
+    
+    Returns:
+        entries(주소 수), labels(고유 라벨 수), skipped(주소/라벨이 비어 건너뛴 행) 딕셔너리
+    """
+    mapping: Dict[str, str] = {}
+    skipped = 0
+    for address, label in entries:
+        key = normalize_address(address)
+        if key is None or label is None or str(label).strip() == '':
+            skipped += 1
+            continue
+        mapping[key] = str(label).strip()
+    
+    label_ids: Dict[str, int] = {}
+    records = []
+    for key, label in mapping.items():
+        encoded = key.encode('utf-8')
+        records.append((_hash_key(encoded), encoded, label_ids.setdefault(label, len(label_ids))))
+    records.sort()
+    
+    hashes = array('Q', (h for h, _, _ in records))
+    key_offsets = array('I', [0])
+    for _, encoded, _ in records:
+        key_offsets.append(key_offsets[-1] + len(encoded))
+    ids = array('I', (label_id for _, _, label_id in records))
+    encoded_labels = [label.encode('utf-8') for label in label_ids]
+    label_offsets = array('I', [0])
+    for encoded in encoded_labels:
+        label_offsets.append(label_offsets[-1] + len(encoded))
+    
+    output = Path(output_path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = output.with_name(output.name + '.tmp')
+    with open(temp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(records), len(label_ids), key_offsets[-1]))
+        for values in (hashes, key_offsets, ids, label_offsets):
+            f.write(_native_bytes(values))
+        for _, encoded, _ in records:
+            f.write(encoded)
+        for encoded in encoded_labels:
+            f.write(encoded)
+    # 읽는 중인 다른 프로세스가 있어도 완성된 파일로 한 번에 교체
+    os.replace(temp_path, output)
+    return {'entries': len(records), 'labels': len(label_ids), 'skipped': skipped}
+
+
+def build_from_file(
+    source: str,
+    output_path: str,
+    address_column: Optional[str] = None,
+    label_column: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    라벨 원본 파일(CSV/JSON/NDJSON/Parquet)로 인덱스 생성
+    
+    Args:
+        source: 원본 파일 경로
+        output_path: 인덱스 파일 경로
+        address_column: 주소 컬럼 (None이면 address/program_id/account/pubkey 또는 첫 번째 컬럼)
+        label_column: 라벨 컬럼 (None이면 label/name/program_name 또는 두 번째 컬럼)
+    
+    Returns:
+        build_index() 결과
+    """
+    results = read_results(source)
+    if len(results.schema) < 2:
+        raise ValueError(f"라벨 파일에는 주소와 라벨 컬럼이 필요합니다: {source}")
+    address_column = address_column or next((c for c in _ADDRESS_COLUMNS if c in results.schema), results.schema[0])
+    label_column = label_column or next((c for c in _LABEL_COLUMNS if c in results.schema), results.schema[1])
+    return build_index(zip(results.column(address_column), results.column(label_column)), output_path)
+
+
+class LabelIndex:
+    """메모리 매핑한 라벨 인덱스 (읽기 전용)"""
+    
+    def __init__(self, path: str):
+        """
+        인덱스 파일 열기
+        
+        Args:
+            path: build_index()로 만든 인덱스 파일 경로
+        """
+        if sys.byteorder != 'little':
+            raise ValueError("라벨 인덱스는 리틀 엔디언 시스템에서만 열 수 있습니다.")
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 빈 파일은 mmap할 수 없음
+            self._file.close()
+            raise ValueError(f"라벨 인덱스 파일이 아닙니다: {path}")
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise ValueError(f"라벨 인덱스 파일이 아닙니다: {path}")
+        magic, count, label_count, key_bytes = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"라벨 인덱스 파일이 아닙니다: {path}")
+        
+        self.count = count
+        self.label_count = label_count
+        self._view = view = memoryview(self._map)
+        offset = _HEADER.size
+        
+        def section(size: int, fmt: Optional[str]) -> memoryview:
+            nonlocal offset
+            part = view[offset:offset + size]
+            offset += size
+            return part.cast(fmt) if fmt else part
+        
+        self._hashes = section(8 * count, 'Q')
+        self._key_offsets = section(4 * (count + 1), 'I')
+        self._label_ids = section(4 * count, 'I')
+        self._label_offsets = section(4 * (label_count + 1), 'I')
+        self._keys = section(key_bytes, None)
+        self._labels = section(self._label_offsets[label_count], None)
+        self._np_hashes = np.frombuffer(self._map, dtype='<u8', count=count, offset=_HEADER.size) if np is not None else None
+        self._label_cache: Dict[int, str] = {}
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __enter__(self) -> 'LabelIndex':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _label(self, label_id: int) -> str:
+        label = self._label_cache.get(label_id)
+        if label is None:
+            start, stop = self._label_offsets[label_id], self._label_offsets[label_id + 1]
+            label = self._label_cache[label_id] = bytes(self._labels[start:stop]).decode('utf-8')
+        return label
+    
+    def _match(self, position: int, key_hash: int, encoded: bytes) -> Optional[str]:
+        """해시가 같은 구간에서 주소 문자열이 일치하는 항목의 라벨"""
+        while position < self.count and self._hashes[position] == key_hash:
+            start, stop = self._key_offsets[position], self._key_offsets[position + 1]
+            if self._keys[start:stop] == encoded:
+                return self._label(self._label_ids[position])
+            position += 1
+        return None
+    
+    def get(self, address: Any) -> Optional[str]:
+        """
+        주소 1개의 라벨 조회
+        
+        Args:
+            address: 주소 문자열
+        
+        Returns:
+            라벨, 없으면 None
+        """
+        key = normalize_address(address)
+        if key is None or not self.count:
+            return None
+        encoded = key.encode('utf-8')
+        key_hash = _hash_key(encoded)
+        return self._match(bisect.bisect_left(self._hashes, key_hash), key_hash, encoded)
+    
+    def lookup_many(self, values: Sequence[Any]) -> List[Optional[str]]:
+        """
+        컬럼 값 전체의 라벨 조회 (고유 주소만 한 번씩 찾음)
+        
+        Args:
+            values: 주소 컬럼 값 시퀀스
+        
+        Returns:
+            값과 같은 순서의 라벨 목록 (없으면 None)
+        """
+        unique = {value for value in values if isinstance(value, str)}
+        if not unique or not self.count:
+            return [None] * len(values)
+        
+        keys = [(value, normalize_address(value)) for value in unique]
+        keys = [(value, key.encode('utf-8')) for value, key in keys if key is not None]
+        hashes = [_hash_key(encoded) for _, encoded in keys]
+        if self._np_hashes is not None:
+            positions = np.searchsorted(self._np_hashes, np.array(hashes, dtype='<u8')).tolist()
+        else:
+            positions = [bisect.bisect_left(self._hashes, key_hash) for key_hash in hashes]
+        
+        found = {
+            value: self._match(position, key_hash, encoded)
+            for (value, encoded), key_hash, position in zip(keys, hashes, positions)
+        }
+        return [found.get(value) if isinstance(value, str) else None for value in values]
+    
+    def close(self) -> None:
+        """mmap과 파일 닫기"""
+        for name in ('_hashes', '_key_offsets', '_label_ids', '_label_offsets', '_keys', '_labels', '_view'):
+            part = self.__dict__.pop(name, None)
+            if part is not None:
+                part.release()
+        self._np_hashes = None
+        if not self._map.closed:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # 아직 참조 중인 라벨 배열이 있으면 프로세스 종료 시 해제
+        self._file.close()
+
+
+def enrich(
+    results: ResultSet,
+    index: LabelIndex,
+    columns: Optional[Iterable[str]] = None
+) -> Tuple[ResultSet, Dict[str, int]]:
+    """
+    주소 컬럼마다 <컬럼>_label 컬럼 추가
+    
+    Args:
+        results: 쿼리 결과
+        index: 라벨 인덱스
+        columns: 라벨을 붙일 컬럼 (None이면 DEFAULT_LABEL_COLUMNS 중 결과에 있는 컬럼)
+    
+    Returns:
+        (라벨 컬럼을 추가한 ResultSet, {컬럼: 라벨을 찾은 행 수})
+    """
+    columns = [c for c in (columns or DEFAULT_LABEL_COLUMNS) if c in results.schema]
+    matched: Dict[str, int] = {}
+    for column in columns:
+        labels = index.lookup_many(results.column(column))
+        matched[column] = sum(label is not None for label in labels)
+        results = results.with_column(column + LABEL_SUFFIX, labels, 'STRING')
+    return results, matched
+
+
+def describe_matches(matched: Dict[str, int], total_rows: int) -> str:
+    """enrich() 결과를 한 줄로 표시 (예: address 12/20행, fee_payer 3/20행)"""
+    return ', '.join(f"{column} {count:,}/{total_rows:,}행" for column, count in matched.items())
+
+
+def benchmark(n_entries: int = 1_000_000, n_rows: int = 100_000):
+    """
+    인덱스 생성/열기/조회 시간 측정
+    
+    Args:
+        n_entries: 라벨 수
+        n_rows: 조회할 결과 행 수 (절반은 인덱스에 있는 주소)
+    """
+    global np
+    rng = random.Random(42)
+    addresses = [f"0x{rng.getrandbits(160):040x}" for _ in range(n_entries)]
+    labels = [f"label_{i % 5000}" for i in range(n_entries)]
+    rows = [rng.choice(addresses) if i % 2 else f"0x{rng.getrandbits(160):040x}" for i in range(n_rows)]
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.lblidx')
+        start = time.perf_counter()
+        stats = build_index(zip(addresses, labels), path)
+        print(f"라벨 인덱스 벤치마크: 라벨 {stats['entries']:,}개 (고유 라벨 {stats['labels']:,}개), 결과 {n_rows:,}행")
+        print(f"  생성: {time.perf_counter() - start:.2f}초, 파일 크기 {os.path.getsize(path) / 1024 ** 2:.1f} MB")
+        
+        numpy_module = np
+        for label, module in (('numpy', numpy_module), ('bisect', None)):
+            if label == 'numpy' and module is None:
+                print("  numpy : 설치되지 않음")
+                continue
+            np = module
+            start = time.perf_counter()
+            index = LabelIndex(path)
+            opened = time.perf_counter() - start
+            start = time.perf_counter()
+            found = index.lookup_many(rows)
+            elapsed = time.perf_counter() - start
+            hits = sum(value is not None for value in found)
+            print(f"  {label:<6}: 열기 {opened * 1000:.2f} ms, 조회 {elapsed * 1000:.1f} ms "
+                  f"({elapsed / n_rows * 1e6:.2f} µs/행, 일치 {hits:,}행)")
+            index.close()
+        np = numpy_module
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        description='주소/프로그램 라벨 로컬 인덱스',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # CSV(address,label)로 인덱스 생성
+  python scripts/label_index.py build labels.csv -o local_data/address_labels.lblidx
+  
+  # Solana 프로그램 이름 (컬럼 이름 지정)
+  python scripts/label_index.py build programs.parquet --address-column program_id --label-column name -o local_data/programs.lblidx
+  
+  # 주소 조회
+  python scripts/label_index.py lookup local_data/address_labels.lblidx 0xdac17f958d2ee523a2206206994597c13d831ec7
+  
+  # 결과에 라벨 컬럼 추가 (address, contract_address, fee_payer 등)
+  python scripts/run_query.py templates/queries/02_active_addresses.sql --address-labels local_data/address_labels.lblidx
+        """
+    )
+    subparsers = parser.add_subparsers(dest='command')
+    
+    build_parser = subparsers.add_parser('build', help='라벨 파일(CSV/JSON/NDJSON/Parquet)로 인덱스 생성')
+    build_parser.add_argument('source', help='라벨 원본 파일 경로')
+    build_parser.add_argument('--output', '-o', required=True, help='인덱스 파일 경로')
+    build_parser.add_argument('--address-column', help='주소 컬럼 (기본값: address/program_id/account/pubkey 또는 첫 번째 컬럼)')
+    build_parser.add_argument('--label-column', help='라벨 컬럼 (기본값: label/name/program_name 또는 두 번째 컬럼)')
+    
+    lookup_parser = subparsers.add_parser('lookup', help='주소 라벨 조회')
+    lookup_parser.add_argument('index', help='인덱스 파일 경로')
+    lookup_parser.add_argument('addresses', nargs='+', help='조회할 주소')
+    
+    bench_parser = subparsers.add_parser('bench', help='생성/조회 시간 측정')
+    bench_parser.add_argument('--entries', type=int, default=1_000_000, help='라벨 수 (기본값: 1000000)')
+    bench_parser.add_argument('--rows', type=int, default=100_000, help='조회할 행 수 (기본값: 100000)')
+    
+    args = parser.parse_args()
+    
+    try:
+        if args.command == 'build':
+            start = time.perf_counter()
+            stats = build_from_file(args.source, args.output, args.address_column, args.label_column)
+            print(f"✓ 라벨 인덱스 생성: {args.output}")
+            print(f"  - 주소 {stats['entries']:,}개, 고유 라벨 {stats['labels']:,}개 (빈 값 {stats['skipped']:,}행 제외)")
+            print(f"  - 파일 크기: {os.path.getsize(args.output) / 1024:.1f} KB, {time.perf_counter() - start:.2f}초")
+        elif args.command == 'lookup':
+            with LabelIndex(args.index) as index:
+                for address in args.addresses:
+                    print(f"{address}\t{index.get(address) or '-'}")
+        elif args.command == 'bench':
+            benchmark(args.entries, args.rows)
+        else:
+            parser.print_help()
+    except (OSError, ValueError) as e:
+        print(f"✗ 오류 발생: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
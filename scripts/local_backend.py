@@ -0,0 +1,739 @@
+#!/usr/bin/env python3
+"""
+로컬 DuckDB 실행 백엔드 (BigQuery 대체)
+
+템플릿 SQL을 BigQuery 대신 로컬 DuckDB 파일에서 실행합니다. BigQuery 전용
+함수(TIMESTAMP_SUB, APPROX_QUANTILES, OFFSET, UNNEST, TABLESAMPLE 등)는 DuckDB 문법으로
+변환하고, `bigquery-public-data.crypto_ethereum.transactions` 같은 테이블
+이름은 로컬 DB의 `crypto_ethereum.transactions` 테이블로 연결합니다.
+네트워크와 쿼리 비용 없이 템플릿 수정 → 실행 → 요약 과정을 반복할 수 있습니다.
+
+LocalClient는 bigquery.Client의 query() → job.result() 인터페이스를 흉내내므로
+run_query.py/summarize_with_gemini.py에서 `--backend local`로 바로 사용할 수 있습니다.
+
+사용법:
+    python scripts/local_backend.py generate            # 합성 샘플 데이터 생성
+    python scripts/local_backend.py fetch crypto_ethereum.transactions --percent 0.1
+    python scripts/local_backend.py load crypto_ethereum.transactions eth.parquet
+    python scripts/local_backend.py tables
+    python scripts/local_backend.py translate templates/queries/03_fee_gas.sql
+
+필요 패키지:
+    pip install duckdb
+"""
+
+import os
+import re
+import sys
+import argparse
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+DEFAULT_LOCAL_DB = 'local_data/blockchain.duckdb'
+
+# 합성 데이터 기본값
+DEFAULT_SAMPLE_DAYS = 35
+DEFAULT_ROWS_PER_DAY = 2000
+
+# Solana 공개 데이터셋은 2025-03-31 이후 업데이트가 중단되어 있어 합성 데이터도 이 시점에서 끝냄
+SOLANA_SAMPLE_END = '2025-04-01'
+
+VOTE_PROGRAM = 'Vote111111111111111111111111111111111111111'
+
+# DuckDB 타입 → BigQuery 필드 타입
+_FIELD_TYPES = {
+    'BOOLEAN': 'BOOLEAN',
+    'TINYINT': 'INTEGER',
+    'SMALLINT': 'INTEGER',
+    'INTEGER': 'INTEGER',
+    'BIGINT': 'INTEGER',
+    'HUGEINT': 'INTEGER',
+    'UTINYINT': 'INTEGER',
+    'USMALLINT': 'INTEGER',
+    'UINTEGER': 'INTEGER',
+    'UBIGINT': 'INTEGER',
+    'FLOAT': 'FLOAT',
+    'DOUBLE': 'FLOAT',
+    'DATE': 'DATE',
+    'TIME': 'TIME',
+    'TIMESTAMP': 'TIMESTAMP',
+    'TIMESTAMP WITH TIME ZONE': 'TIMESTAMP',
+    'VARCHAR': 'STRING',
+    'BLOB': 'BYTES',
+}
+
+
+def default_db_path() -> str:
+    """로컬 DB 경로 (LOCAL_DUCKDB_PATH 환경 변수 또는 local_data/blockchain.duckdb)"""
+    return os.getenv('LOCAL_DUCKDB_PATH', DEFAULT_LOCAL_DB)
+
+
+def _require_duckdb():
+    if duckdb is None:
+        raise ImportError(
+            "로컬 백엔드에는 duckdb 패키지가 필요합니다.\n"
+            "설치 방법: pip install duckdb"
+        )
+
+
+# ---------------------------------------------------------------------------
+# BigQuery SQL → DuckDB SQL 변환
+# ---------------------------------------------------------------------------
+
+def _in_string(sql: str, position: int) -> bool:
+    """position이 작은따옴표 문자열 리터럴 안에 있는지 확인"""
+    return sql.count("'", 0, position) % 2 == 1
+
+
+def _split_args(text: str) -> List[str]:
+    """괄호/문자열 밖의 쉼표로 함수 인자 분리"""
+    args, depth, current, quoted = [], 0, [], False
+    for char in text:
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char in '([':
+            depth += 1
+        elif not quoted and char in ')]':
+            depth -= 1
+        elif not quoted and char == ',' and depth == 0:
+            args.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if ''.join(current).strip():
+        args.append(''.join(current).strip())
+    return args
+
+
+def _find_call(sql: str, name: str, start: int = 0) -> Optional[Tuple[int, int, List[str]]]:
+    """
+    함수 호출 위치 찾기
+    
+    Returns:
+        (호출 시작 위치, 닫는 괄호 다음 위치, 인자 리스트) 또는 None
+    """
+    pattern = re.compile(r'(?<![\w.])' + name + r'\s*\(', re.IGNORECASE)
+    for match in pattern.finditer(sql, start):
+        if _in_string(sql, match.start()):
+            continue
+        
+        depth, quoted = 1, False
+        position = match.end()
+        while position < len(sql) and depth:
+            char = sql[position]
+            if char == "'":
+                quoted = not quoted
+            elif not quoted and char == '(':
+                depth += 1
+            elif not quoted and char == ')':
+                depth -= 1
+            position += 1
+        if depth:
+            raise ValueError(f"{name}( 의 괄호가 닫히지 않았습니다.")
+        return match.start(), position, _split_args(sql[match.end():position - 1])
+    return None
+
+
+def _rewrite_calls(sql: str, name: str, rewrite) -> str:
+    """name(...) 호출을 모두 rewrite(args)의 결과로 교체 (안쪽 호출도 처리)"""
+    position = 0
+    while True:
+        found = _find_call(sql, name, position)
+        if found is None:
+            return sql
+        start, end, args = found
+        replacement = rewrite(args)
+        if replacement is None:
+            position = end
+            continue
+        sql = sql[:start] + replacement + sql[end:]
+        position = start
+
+
+def _interval_sub(cast: Optional[str], operator: str):
+    def rewrite(args: List[str]) -> str:
+        expression = f"(({args[0]}) {operator} {args[1]})"
+        return f"CAST({expression} AS {cast})" if cast else expression
+    return rewrite
+
+
+def _date_trunc(args: List[str]) -> Optional[str]:
+    # BigQuery: DATE_TRUNC(x, WEEK) / DuckDB: date_trunc('week', x)
+    if len(args) != 2 or args[0].startswith("'"):
+        return None
+    unit = args[1].split('(')[0].strip().lower()
+    return f"date_trunc('{unit}', {args[0]})"
+
+
+def _approx_quantiles(args: List[str]) -> str:
+    # BigQuery는 n+1개 경계값 배열을 반환하므로 같은 길이의 리스트로 변환
+    buckets = int(args[1])
+    fractions = ', '.join(repr(i / buckets) for i in range(buckets + 1))
+    return f"quantile_disc({args[0]}, [{fractions}])"
+
+
+def _unnest_alias(match: 're.Match') -> str:
+    # FROM UNNEST(arr) AS a → 각 원소를 컬럼 a로 갖는 (상관) 서브쿼리
+    keyword, argument, alias = match.group(1), match.group(2), match.group(3)
+    return f'{keyword} (SELECT UNNEST({argument}) AS {alias}) AS "_unnest_{alias}"'
+
+
+def translate_sql(sql: str, now: Optional[datetime] = None) -> str:
+    """
+    BigQuery 표준 SQL을 DuckDB SQL로 변환
+    
+    템플릿에서 사용하는 범위의 함수/문법만 변환합니다. 변환되지 않은 BigQuery
+    전용 함수는 DuckDB 실행 시 오류로 나타납니다.
+    
+    Args:
+        sql: BigQuery SQL
+        now: CURRENT_TIMESTAMP()/CURRENT_DATE()에 사용할 UTC 시각 (None이면 현재 시각)
+    
+    Returns:
+        DuckDB SQL
+    """
+    now = now or datetime.now(timezone.utc)
+    now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    
+    # 테이블: `project.dataset.table` → "dataset"."table", 그 외 `ident` → "ident"
+    sql = re.sub(
+        r'`(?:[\w-]+\.)?(\w+)\.(\w+)`',
+        lambda m: f'"{m.group(1)}"."{m.group(2)}"',
+        sql
+    )
+    sql = re.sub(r'`([^`]+)`', r'"\1"', sql)
+    
+    # 현재 시각은 UTC 리터럴로 고정 (DuckDB 세션 시간대와 무관하게 BigQuery와 동일)
+    sql = re.sub(
+        r'\bCURRENT_TIMESTAMP\s*\(\s*\)',
+        f"TIMESTAMP '{now.isoformat(sep=' ', timespec='seconds')}'",
+        sql,
+        flags=re.IGNORECASE
+    )
+    sql = re.sub(
+        r'\bCURRENT_DATE\s*\(\s*\)',
+        f"DATE '{now.date().isoformat()}'",
+        sql,
+        flags=re.IGNORECASE
+    )
+    
+    sql = _rewrite_calls(sql, 'TIMESTAMP_SUB', _interval_sub(None, '-'))
+    sql = _rewrite_calls(sql, 'TIMESTAMP_ADD', _interval_sub(None, '+'))
+    sql = _rewrite_calls(sql, 'DATE_SUB', _interval_sub('DATE', '-'))
+    sql = _rewrite_calls(sql, 'DATE_ADD', _interval_sub('DATE', '+'))
+    sql = _rewrite_calls(
+        sql, 'TIMESTAMP_TRUNC', lambda a: f"date_trunc('{a[1].lower()}', {a[0]})"
+    )
+    sql = _rewrite_calls(sql, 'DATE_TRUNC', _date_trunc)
+    
+    sql = _rewrite_calls(
+        sql, 'TIMESTAMP', lambda a: f"CAST({a[0]} AS TIMESTAMP)" if len(a) == 1 else None
+    )
+    sql = _rewrite_calls(
+        sql, 'DATE', lambda a: f"CAST({a[0]} AS DATE)" if len(a) == 1 else f"make_date({', '.join(a)})"
+    )
+    
+    sql = _rewrite_calls(sql, 'APPROX_QUANTILES', _approx_quantiles)
+    sql = _rewrite_calls(
+        sql, 'SAFE_DIVIDE',
+        lambda a: f"(CASE WHEN ({a[1]}) = 0 THEN NULL ELSE ({a[0]}) / ({a[1]}) END)"
+    )
+    sql = re.sub(r'\bCOUNTIF\s*\(', 'count_if(', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\bLOGICAL_OR\s*\(', 'bool_or(', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\bLOGICAL_AND\s*\(', 'bool_and(', sql, flags=re.IGNORECASE)
+    
+    # 배열 인덱스: BigQuery OFFSET은 0부터, DuckDB 리스트는 1부터
+    sql = re.sub(
+        r'\[\s*(?:SAFE_)?OFFSET\s*\(\s*(\d+)\s*\)\s*\]',
+        lambda m: f"[{int(m.group(1)) + 1}]",
+        sql,
+        flags=re.IGNORECASE
+    )
+    sql = re.sub(
+        r'\[\s*(?:SAFE_)?ORDINAL\s*\(\s*(\d+)\s*\)\s*\]',
+        r'[\1]',
+        sql,
+        flags=re.IGNORECASE
+    )
+    
+    sql = re.sub(r'\bAS\s+FLOAT64\b', 'AS DOUBLE', sql, flags=re.IGNORECASE)
+    sql = re.sub(r'\bAS\s+INT64\b', 'AS BIGINT', sql, flags=re.IGNORECASE)
+    # DuckDB DECIMAL은 최대 38자리 (wei 단위 곱/합계에는 충분)
+    sql = re.sub(r'\bAS\s+BIGNUMERIC\b', 'AS DECIMAL(38, 0)', sql, flags=re.IGNORECASE)
+    
+    # SYSTEM 샘플은 DuckDB에서 벡터(2048행) 단위라 작은 로컬 테이블에서는 행 단위(bernoulli)로 추출
+    sql = re.sub(r'\bTABLESAMPLE\s+SYSTEM\s*\(', 'TABLESAMPLE bernoulli(', sql, flags=re.IGNORECASE)
+    
+    sql = re.sub(
+        r'\b(FROM|JOIN|,)\s*UNNEST\s*\(([^()]*)\)\s+AS\s+(\w+)',
+        _unnest_alias,
+        sql,
+        flags=re.IGNORECASE
+    )
+    
+    return sql
+
+
+# ---------------------------------------------------------------------------
+# bigquery.Client 호환 인터페이스
+# ---------------------------------------------------------------------------
+
+class LocalQueryError(RuntimeError):
+    """로컬 DuckDB 쿼리 실행 실패 (BigQuery의 GoogleCloudError에 해당)"""
+
+
+class LocalField:
+    """bigquery.SchemaField 대용 (name, field_type)"""
+    
+    def __init__(self, name: str, field_type: Optional[str]):
+        self.name = name
+        self.field_type = field_type
+        self.mode = 'NULLABLE'
+
+
+class LocalRow:
+    """bigquery.Row 대용"""
+    
+    def __init__(self, values: tuple, index: Dict[str, int]):
+        self._values = values
+        self._index = index
+    
+    def values(self) -> tuple:
+        return self._values
+    
+    def keys(self):
+        return self._index.keys()
+    
+    def items(self):
+        return [(name, self._values[i]) for name, i in self._index.items()]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values[self._index[key]] if key in self._index else default
+    
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._values[key]
+        return self._values[self._index[key]]
+    
+    def __iter__(self):
+        return iter(self._values)
+    
+    def __len__(self) -> int:
+        return len(self._values)
+
+
+class LocalRowIterator:
+    """job.result() 반환값 (schema, pages, 행 순회)"""
+    
+    def __init__(self, schema: List[LocalField], cursor: Any, page_size: int = 10000):
+        self.schema = schema
+        self._cursor = cursor
+        self._page_size = page_size
+        self._index = {field.name: i for i, field in enumerate(schema)}
+    
+    @property
+    def pages(self):
+        while self._cursor is not None:
+            batch = self._cursor.fetchmany(self._page_size)
+            if not batch:
+                return
+            yield [LocalRow(values, self._index) for values in batch]
+    
+    def __iter__(self):
+        for page in self.pages:
+            yield from page
+
+
+class LocalQueryJob:
+    """bigquery.QueryJob 대용"""
+    
+    def __init__(self, client: 'LocalClient', sql: str, dry_run: bool):
+        self.client = client
+        self.query = sql
+        self.translated_sql = translate_sql(sql)
+        self.job_id = f"local_{id(self):x}"
+        self.state = 'DONE'
+        # 로컬 실행은 BigQuery 과금이 없으므로 처리 바이트를 0으로 보고
+        self.total_bytes_processed = 0
+        self.total_bytes_billed = 0
+        self.cache_hit = False
+        self.dry_run = dry_run
+        self.started = datetime.now(timezone.utc)
+        
+        try:
+            if dry_run:
+                # Dry run: 실행 계획만 만들어 SQL 유효성 확인
+                client.connection.execute(f"EXPLAIN {self.translated_sql}")
+                self._cursor = None
+            else:
+                self._cursor = client.connection.cursor()
+                self._cursor.execute(self.translated_sql)
+        except duckdb.Error as e:
+            raise LocalQueryError(
+                f"로컬 쿼리 실행 실패: {e}\n변환된 SQL:\n{self.translated_sql}"
+            ) from e
+        self.ended = datetime.now(timezone.utc)
+    
+    def result(self, timeout: Optional[float] = None, page_size: Optional[int] = None, **kwargs) -> LocalRowIterator:
+        if self._cursor is None or self._cursor.description is None:
+            return LocalRowIterator([], None)
+        schema = [
+            LocalField(name, _FIELD_TYPES.get(str(type_code).upper(), str(type_code).upper()))
+            for name, type_code, *_ in self._cursor.description
+        ]
+        return LocalRowIterator(schema, self._cursor, page_size or 10000)
+    
+    def done(self, *args, **kwargs) -> bool:
+        return True
+    
+    def cancel(self) -> bool:
+        return False
+
+
+class LocalClient:
+    """bigquery.Client 대용 (query()만 지원)"""
+    
+    def __init__(self, database: Optional[str] = None, read_only: bool = True):
+        """
+        초기화
+        
+        Args:
+            database: DuckDB 파일 경로 (None이면 LOCAL_DUCKDB_PATH 또는 기본 경로)
+            read_only: 읽기 전용으로 열기 (여러 프로세스가 동시에 읽을 수 있음)
+        """
+        _require_duckdb()
+        self.database = database or default_db_path()
+        if read_only and not Path(self.database).exists():
+            raise FileNotFoundError(
+                f"로컬 DB 파일이 없습니다: {self.database}\n"
+                "먼저 샘플 데이터를 준비하세요: python scripts/local_backend.py generate"
+            )
+        if not read_only:
+            Path(self.database).parent.mkdir(parents=True, exist_ok=True)
+        self.project = 'local'
+        self.connection = duckdb.connect(self.database, read_only=read_only)
+    
+    def query(self, sql: str, job_config: Any = None, **kwargs) -> LocalQueryJob:
+        dry_run = bool(getattr(job_config, 'dry_run', False))
+        return LocalQueryJob(self, sql, dry_run)
+    
+    def close(self):
+        self.connection.close()
+
+
+def create_client(backend: str, project_id: Optional[str] = None, local_db: Optional[str] = None):
+    """
+    백엔드 이름에 맞는 클라이언트 생성
+    
+    Args:
+        backend: 'bigquery' 또는 'local'
+        project_id: GCP 프로젝트 ID (bigquery 백엔드)
+        local_db: DuckDB 파일 경로 (local 백엔드)
+    
+    Returns:
+        bigquery.Client 또는 LocalClient
+    """
+    if backend == 'local':
+        return LocalClient(local_db)
+    if backend != 'bigquery':
+        raise ValueError(f"지원하지 않는 백엔드: {backend}")
+    
+    from google.cloud import bigquery
+    return bigquery.Client(project=project_id)
+
+
+# ---------------------------------------------------------------------------
+# 샘플 데이터 준비
+# ---------------------------------------------------------------------------
+
+def _table_parts(table: str) -> Tuple[str, str]:
+    parts = table.replace('`', '').split('.')
+    if len(parts) < 2:
+        raise ValueError(f"테이블은 dataset.table 형식이어야 합니다: {table}")
+    return parts[-2], parts[-1]
+
+
+def generate_sample_data(
+    connection: Any,
+    days: int = DEFAULT_SAMPLE_DAYS,
+    rows_per_day: int = DEFAULT_ROWS_PER_DAY,
+    seed: float = 0.42
+) -> Dict[str, int]:
+    """
+    템플릿이 사용하는 컬럼만 가진 합성 데이터 생성
+    
+    Ethereum은 현재 시각까지, Solana는 공개 데이터셋과 같이 2025-03-31까지의
+    기간으로 만듭니다. 주소는 일부 주소에 거래가 몰리도록 치우친 분포로 생성합니다.
+    
+    Args:
+        connection: 쓰기 가능한 DuckDB 연결
+        days: 생성할 기간 (일)
+        rows_per_day: 하루 트랜잭션 수
+        seed: 난수 시드
+    
+    Returns:
+        {테이블 이름: 행 수}
+    """
+    total = days * rows_per_day
+    seconds = days * 86400
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    
+    connection.execute(f"SELECT setseed({seed})")
+    connection.execute("CREATE SCHEMA IF NOT EXISTS crypto_ethereum")
+    connection.execute("CREATE SCHEMA IF NOT EXISTS crypto_solana_mainnet_us")
+    
+    # 블록은 12초 간격, 트랜잭션의 block_timestamp는 소속 블록의 시각
+    connection.execute(f"""
+        CREATE OR REPLACE TABLE crypto_ethereum.transactions AS
+        SELECT
+            '0x' || md5(CAST(i AS VARCHAR)) || md5(CAST(-i AS VARCHAR))[1:32] AS hash,
+            b AS block_number,
+            CAST(to_timestamp(b * 12) AS TIMESTAMP) AS block_timestamp,
+            '0x' || lpad(CAST(CAST(pow(random(), 3) * 5000 AS BIGINT) AS VARCHAR), 40, '0') AS from_address,
+            CASE WHEN random() < 0.01 THEN NULL
+                 ELSE '0x' || lpad(CAST(CAST(pow(random(), 4) * 2000 AS BIGINT) AS VARCHAR), 40, 'c')
+            END AS to_address,
+            CAST(floor(pow(random(), 6) * 1e19) AS DECIMAL(38, 0)) AS value,
+            CAST(21000 + random() * 279000 AS BIGINT) AS gas,
+            CAST((5 + random() * 45) * 1e9 AS BIGINT) AS gas_price,
+            CASE WHEN random() < 0.96 THEN 1 ELSE 0 END AS receipt_status
+        FROM (
+            SELECT i, CAST(epoch(TIMESTAMP '{now}') / 12 AS BIGINT) - CAST(random() * {seconds // 12} AS BIGINT) AS b
+            FROM range({total}) AS t(i)
+        )
+    """)
+    # 실패 트랜잭션의 일부는 gas를 모두 소진 (out of gas)
+    connection.execute("""
+        ALTER TABLE crypto_ethereum.transactions ADD COLUMN receipt_gas_used BIGINT;
+        UPDATE crypto_ethereum.transactions
+        SET receipt_gas_used = CASE
+            WHEN receipt_status = 0 AND random() < 0.4 THEN gas
+            ELSE CAST(gas * (0.3 + random() * 0.69) AS BIGINT)
+        END;
+    """)
+    connection.execute("""
+        CREATE OR REPLACE TABLE crypto_ethereum.blocks AS
+        SELECT
+            block_number AS number,
+            MIN(block_timestamp) AS timestamp,
+            COUNT(*) AS transaction_count,
+            SUM(receipt_gas_used) AS gas_used,
+            30000000 AS gas_limit
+        FROM crypto_ethereum.transactions
+        GROUP BY block_number
+    """)
+    connection.execute("""
+        CREATE OR REPLACE TABLE crypto_ethereum.contracts AS
+        SELECT address, random() < 0.3 AS is_erc20, random() < 0.1 AS is_erc721
+        FROM (
+            SELECT DISTINCT to_address AS address
+            FROM crypto_ethereum.transactions
+            WHERE to_address IS NOT NULL
+        )
+        WHERE random() < 0.5
+    """)
+    
+    connection.execute(f"""
+        CREATE OR REPLACE TABLE crypto_solana_mainnet_us.Transactions AS
+        SELECT
+            md5(CAST(i AS VARCHAR)) || md5(CAST(i * 7 AS VARCHAR)) AS signature,
+            TIMESTAMP '{SOLANA_SAMPLE_END}' - to_seconds(CAST(1 + random() * {seconds} AS BIGINT)) AS block_timestamp,
+            CASE WHEN random() < 0.97 THEN 'Success' ELSE 'Failed' END AS status,
+            CAST(5000 + pow(random(), 8) * 200000 AS BIGINT) AS fee,
+            [
+                {{'pubkey': 'Payer' || lpad(CAST(CAST(pow(random(), 3) * 3000 AS BIGINT) AS VARCHAR), 39, '1'),
+                  'signer': true, 'writable': true}},
+                {{'pubkey': CASE WHEN random() < 0.7 THEN '{VOTE_PROGRAM}'
+                                 ELSE 'Program' || CAST(CAST(random() * 50 AS BIGINT) AS VARCHAR) END,
+                  'signer': false, 'writable': false}}
+            ] AS accounts
+        FROM range({total}) AS t(i)
+    """)
+    
+    return {
+        'crypto_ethereum.transactions': total,
+        'crypto_ethereum.blocks': connection.execute(
+            "SELECT COUNT(*) FROM crypto_ethereum.blocks"
+        ).fetchone()[0],
+        'crypto_ethereum.contracts': connection.execute(
+            "SELECT COUNT(*) FROM crypto_ethereum.contracts"
+        ).fetchone()[0],
+        'crypto_solana_mainnet_us.Transactions': total,
+    }
+
+
+def load_file(connection: Any, table: str, file_path: str) -> int:
+    """
+    CSV/NDJSON/Parquet 파일을 로컬 테이블로 적재 (기존 테이블은 교체)
+    
+    Args:
+        connection: 쓰기 가능한 DuckDB 연결
+        table: dataset.table 형식 이름
+        file_path: 적재할 파일
+    
+    Returns:
+        적재된 행 수
+    """
+    dataset, name = _table_parts(table)
+    suffix = Path(file_path).suffix.lower()
+    readers = {
+        '.parquet': 'read_parquet',
+        '.csv': 'read_csv_auto',
+        '.json': 'read_json_auto',
+        '.jsonl': 'read_json_auto',
+        '.ndjson': 'read_json_auto',
+    }
+    if suffix not in readers:
+        raise ValueError(f"지원하지 않는 파일 형식: {suffix} (parquet, csv, json, jsonl, ndjson)")
+    
+    connection.execute(f'CREATE SCHEMA IF NOT EXISTS "{dataset}"')
+    connection.execute(
+        f'CREATE OR REPLACE TABLE "{dataset}"."{name}" AS SELECT * FROM {readers[suffix]}(?)',
+        [str(file_path)]
+    )
+    return connection.execute(f'SELECT COUNT(*) FROM "{dataset}"."{name}"').fetchone()[0]
+
+
+def fetch_sample(
+    connection: Any,
+    table: str,
+    percent: float,
+    where: Optional[str] = None,
+    project_id: Optional[str] = None
+) -> int:
+    """
+    BigQuery 공개 데이터셋에서 TABLESAMPLE로 일부를 가져와 로컬 테이블로 저장
+    
+    Args:
+        connection: 쓰기 가능한 DuckDB 연결
+        table: dataset.table 형식 이름 (bigquery-public-data 기준)
+        percent: 샘플 비율 (%)
+        where: 추가 WHERE 조건 (예: 기간 필터로 스캔량 제한)
+        project_id: GCP 프로젝트 ID
+    
+    Returns:
+        저장된 행 수
+    """
+    from google.cloud import bigquery
+    from result_set import ResultSet
+    from serialization import to_json
+    
+    dataset, name = _table_parts(table)
+    sql = (
+        f"SELECT * FROM `bigquery-public-data.{dataset}.{name}` "
+        f"TABLESAMPLE SYSTEM ({percent} PERCENT)"
+    )
+    if where:
+        sql += f" WHERE {where}"
+    
+    client = bigquery.Client(project=project_id or os.getenv("GCP_PROJECT_ID"))
+    rows = ResultSet.from_bigquery(client.query(sql).result())
+    
+    # NDJSON 임시 파일을 거쳐 적재 (중첩 컬럼(accounts 등)도 DuckDB가 타입을 추론)
+    with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False, encoding='utf-8') as f:
+        for record in rows:
+            f.write(to_json(dict(record), compact=True))
+            f.write('\n')
+        temp_path = f.name
+    try:
+        return load_file(connection, table, temp_path)
+    finally:
+        os.unlink(temp_path)
+
+
+def list_tables(connection: Any) -> List[Tuple[str, int]]:
+    """로컬 DB의 (dataset.table, 행 수) 목록"""
+    tables = connection.execute(
+        "SELECT table_schema, table_name FROM information_schema.tables "
+        "WHERE table_schema NOT IN ('information_schema', 'pg_catalog') ORDER BY 1, 2"
+    ).fetchall()
+    return [
+        (f"{schema}.{name}", connection.execute(f'SELECT COUNT(*) FROM "{schema}"."{name}"').fetchone()[0])
+        for schema, name in tables
+    ]
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        description='로컬 DuckDB 실행 백엔드 데이터 관리',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # 합성 샘플 데이터 생성 (네트워크 불필요)
+  python scripts/local_backend.py generate --days 35 --rows-per-day 2000
+  
+  # BigQuery 공개 데이터셋에서 0.1% 샘플 가져오기
+  python scripts/local_backend.py fetch crypto_ethereum.transactions --percent 0.1 \\
+      --where "block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 30 DAY)"
+  
+  # 로컬 DB로 템플릿 실행
+  python scripts/run_query.py templates/queries/01_tx_volume.sql --backend local
+        """
+    )
+    parser.add_argument('--db', help=f'DuckDB 파일 경로 (기본값: LOCAL_DUCKDB_PATH 또는 {DEFAULT_LOCAL_DB})')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    generate = subparsers.add_parser('generate', help='합성 샘플 데이터 생성')
+    generate.add_argument('--days', type=int, default=DEFAULT_SAMPLE_DAYS, help=f'기간 (기본값: {DEFAULT_SAMPLE_DAYS}일)')
+    generate.add_argument(
+        '--rows-per-day', type=int, default=DEFAULT_ROWS_PER_DAY,
+        help=f'하루 트랜잭션 수 (기본값: {DEFAULT_ROWS_PER_DAY})'
+    )
+    
+    fetch = subparsers.add_parser('fetch', help='BigQuery 공개 데이터셋에서 샘플 가져오기')
+    fetch.add_argument('table', help='dataset.table (예: crypto_ethereum.transactions)')
+    fetch.add_argument('--percent', type=float, default=0.1, help='샘플 비율 %% (기본값: 0.1)')
+    fetch.add_argument('--where', help='추가 WHERE 조건 (BigQuery SQL)')
+    fetch.add_argument('--project-id', '-p', help='GCP 프로젝트 ID (기본값: GCP_PROJECT_ID 환경 변수)')
+    
+    load = subparsers.add_parser('load', help='CSV/NDJSON/Parquet 파일 적재')
+    load.add_argument('table', help='dataset.table (예: crypto_ethereum.transactions)')
+    load.add_argument('file', help='적재할 파일 경로')
+    
+    subparsers.add_parser('tables', help='로컬 테이블 목록')
+    
+    translate = subparsers.add_parser('translate', help='BigQuery SQL을 DuckDB SQL로 변환하여 출력')
+    translate.add_argument('sql_file', help='SQL 파일 경로')
+    
+    args = parser.parse_args()
+    database = args.db or default_db_path()
+    
+    try:
+        if args.command == 'translate':
+            print(translate_sql(Path(args.sql_file).read_text(encoding='utf-8')))
+            return
+        
+        client = LocalClient(database, read_only=args.command == 'tables')
+        connection = client.connection
+        
+        if args.command == 'generate':
+            counts = generate_sample_data(connection, args.days, args.rows_per_day)
+            print(f"✓ 합성 샘플 데이터 생성 완료: {database}")
+            for table, count in counts.items():
+                print(f"  - {table}: {count:,}행")
+        elif args.command == 'fetch':
+            count = fetch_sample(connection, args.table, args.percent, args.where, args.project_id)
+            print(f"✓ 샘플 저장 완료: {args.table} ({count:,}행)")
+        elif args.command == 'load':
+            count = load_file(connection, args.table, args.file)
+            print(f"✓ 적재 완료: {args.table} ({count:,}행)")
+        elif args.command == 'tables':
+            for table, count in list_tables(connection):
+                print(f"{table:50s} {count:>12,}행")
+        
+        client.close()
+    except Exception as e:
+        print(f"\n✗ 오류 발생: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
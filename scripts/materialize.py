@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+쿼리 결과를 만료 시간이 있는 BigQuery 테이블로 저장하고 재사용
+
+여러 템플릿이 같은 필터 조각(예: 최근 N일 성공한 Ethereum 트랜잭션)을 반복해서
+계산하는 경우, 한 번 실행한 결과를 임시 테이블(destination)에 저장해 두면 이후
+템플릿과 summarize_with_gemini.py가 원본 대형 테이블 대신 작은 중간 테이블을
+읽을 수 있습니다.
+
+- 테이블에는 실행한 SQL의 키(run_history.sql_cache_key)를 라벨로 기록합니다.
+  (주석/공백만 무시하고 리터럴 대소문자는 구분하므로 다른 쿼리의 결과를 재사용하지 않음)
+- 같은 지문의 테이블이 아직 만료되지 않았으면 쿼리를 다시 실행하지 않고
+  tabledata.list(list_rows, 쿼리 과금 없음)로 결과를 읽습니다.
+- 만료 시간이 지나면 BigQuery가 테이블을 자동 삭제합니다.
+- 지문 라벨이 없는 기존 테이블(이 스크립트가 만들지 않은 테이블)은 잘못 지정한
+  destination으로 실제 테이블을 지우지 않도록 force 없이는 덮어쓰지 않습니다.
+
+사용 예:
+    python scripts/run_query.py eth_success_30d.sql --destination scratch.eth_success_30d --expire-after 12h
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Any
+
+try:
+    from google.cloud import bigquery
+    from google.cloud.exceptions import NotFound
+except ImportError:
+    bigquery = None
+    NotFound = Exception
+
+from run_history import sql_cache_key
+
+# 만료 시간 기본값과 SQL 지문 라벨 키
+DEFAULT_EXPIRE_AFTER = '24h'
+FINGERPRINT_LABEL = 'sql_fingerprint'
+
+# 만료 직전 테이블은 읽는 도중 삭제될 수 있으므로 재사용하지 않음
+EXPIRY_MARGIN = timedelta(minutes=1)
+
+_DURATION_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days'}
+
+
+def parse_duration(text: str) -> timedelta:
+    """
+    기간 문자열을 timedelta로 변환
+    
+    Args:
+        text: '30m', '12h', '7d' 형식 (단위가 없으면 시간)
+    
+    Returns:
+        timedelta
+    
+    Raises:
+        ValueError: 형식이 잘못되었거나 0 이하인 경우
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*', text.lower())
+    if not match:
+        raise ValueError(f"기간 형식이 잘못되었습니다: {text} (예: 30m, 12h, 7d)")
+    amount, unit = float(match.group(1)), match.group(2) or 'h'
+    duration = timedelta(**{_DURATION_UNITS[unit]: amount})
+    if duration <= timedelta(0):
+        raise ValueError(f"기간은 0보다 커야 합니다: {text}")
+    return duration
+
+
+def qualify_table_id(destination: str, project: Optional[str]) -> str:
+    """
+    'dataset.table'을 'project.dataset.table'로 변환
+    
+    Args:
+        destination: dataset.table 또는 project.dataset.table
+        project: 기본 프로젝트 ID
+    
+    Returns:
+        project.dataset.table
+    """
+    parts = destination.strip('`').split('.')
+    if len(parts) == 2 and project:
+        parts.insert(0, project)
+    if len(parts) != 3 or not all(parts):
+        raise ValueError(f"대상 테이블은 dataset.table 또는 project.dataset.table 형식이어야 합니다: {destination}")
+    return '.'.join(parts)
+
+
+class Materializer:
+    """destination 테이블 저장/만료 설정/재사용 판단"""
+    
+    def __init__(
+        self,
+        client: Any,
+        destination: str,
+        expire_after: Optional[timedelta] = None,
+        reuse: bool = True,
+        force: bool = False
+    ):
+        """
+        초기화
+        
+        Args:
+            client: bigquery.Client
+            destination: 결과를 저장할 테이블 (dataset.table)
+            expire_after: 저장 후 테이블 만료까지의 기간 (None이면 DEFAULT_EXPIRE_AFTER)
+            reuse: 같은 SQL 지문의 만료되지 않은 테이블이 있으면 재사용
+            force: SQL 지문 라벨이 없는 기존 테이블도 덮어쓰기
+        """
+        if bigquery is None:
+            raise ImportError("--destination은 google-cloud-bigquery 패키지가 필요합니다.")
+        self.client = client
+        self.table_id = qualify_table_id(destination, getattr(client, 'project', None))
+        self.expire_after = expire_after or parse_duration(DEFAULT_EXPIRE_AFTER)
+        self.reuse = reuse
+        self.force = force
+    
+    def find_fresh(self, sql: str) -> Optional[Any]:
+        """
+        재사용 가능한 테이블 조회
+        
+        Args:
+            sql: 실행할 SQL (지문 비교용)
+        
+        Returns:
+            같은 지문이고 만료되지 않은 bigquery.Table, 없으면 None
+        """
+        if not self.reuse:
+            return None
+        try:
+            table = self.client.get_table(self.table_id)
+        except NotFound:
+            return None
+        
+        labels = table.labels or {}
+        if labels.get(FINGERPRINT_LABEL) != sql_cache_key(sql):
+            return None
+        if table.expires is not None and table.expires - EXPIRY_MARGIN <= datetime.now(timezone.utc):
+            return None
+        return table
+    
+    def configure(self, job_config: Any, sql: str) -> None:
+        """
+        쿼리 결과를 destination 테이블에 덮어쓰도록 잡 설정
+        
+        Args:
+            job_config: bigquery.QueryJobConfig
+            sql: 실행할 SQL
+        
+        Raises:
+            ValueError: 이 스크립트가 만들지 않은(지문 라벨이 없는) 기존 테이블이고 force가 아닌 경우
+        """
+        if not self.force:
+            try:
+                table = self.client.get_table(self.table_id)
+            except NotFound:
+                table = None
+            if table is not None and FINGERPRINT_LABEL not in (table.labels or {}):
+                raise ValueError(
+                    f"{self.table_id}은(는) --destination으로 만든 테이블이 아니므로 덮어쓰지 않습니다 "
+                    f"({FINGERPRINT_LABEL} 라벨 없음). 덮어쓰려면 --force-overwrite를 사용하세요."
+                )
+        job_config.destination = self.table_id
+        job_config.write_disposition = bigquery.WriteDisposition.WRITE_TRUNCATE
+        job_config.labels = {**(job_config.labels or {}), FINGERPRINT_LABEL: sql_cache_key(sql)}
+    
+    def finalize(self, sql: str) -> Any:
+        """
+        쿼리 완료 후 테이블에 만료 시간과 SQL 지문 라벨 설정
+        
+        Args:
+            sql: 실행한 SQL
+        
+        Returns:
+            갱신된 bigquery.Table
+        """
+        table = self.client.get_table(self.table_id)
+        table.expires = datetime.now(timezone.utc) + self.expire_after
+        table.labels = {**(table.labels or {}), FINGERPRINT_LABEL: sql_cache_key(sql)}
+        return self.client.update_table(table, ['expires', 'labels'])
+    
+    def read(self, table: Any) -> Any:
+        """테이블 행 읽기 (tabledata.list, 쿼리 과금 없음)"""
+        return self.client.list_rows(table)
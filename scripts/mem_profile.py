@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+파이프라인 단계별 메모리 프로파일링 (tracemalloc + RSS 샘플링)
+
+대용량 결과에서 OOM이 나도 어느 단계가 메모리를 쓰는지 알 수 없어, --profile-memory를
+지정하면 단계마다 다음 값을 측정합니다.
+
+- 최대(추적): 단계 실행 중 tracemalloc이 추적한 Python 할당의 최대값
+- 증가분: 최대(추적) - 단계 시작 시점 할당량 (이 단계가 추가로 필요했던 메모리)
+- 잔류: 단계가 끝난 뒤에도 남은 할당 (다음 단계로 넘어가는 결과 크기)
+- 최대 RSS: 백그라운드 스레드가 /proc/self/statm을 주기적으로 읽은 프로세스 RSS 최대값
+  (pyarrow/DuckDB 같은 네이티브 할당 포함, /proc이 없으면 프로세스 전체 최대 RSS)
+- 상위 할당 위치: 단계 전후 스냅샷 비교로 잔류 메모리가 가장 많은 소스 위치
+
+측정 단계 (같은 이름을 여러 번 실행하면 합산, 최대값은 최대로 집계):
+    fetch                 쿼리 잡 대기, 저장된 결과/테이블 읽기
+    row_conversion        결과 페이지 수신과 컬럼 기반 ResultSet 변환
+    enrichment            --address-labels 라벨 컬럼 추가
+    format_query_results  요약 통계/샘플 행 계산
+    serialization         결과 파일 또는 표준 출력 쓰기 (run_query.py)
+    prompt_build          프롬프트 데이터 JSON 직렬화와 토큰 예산 압축 (summarize_with_gemini.py)
+
+tracemalloc은 할당마다 추적 정보를 남기므로 실행 시간이 늘고 메모리도 더 씁니다.
+회귀 확인용 수치로만 사용하고, 시간 측정과는 따로 실행하세요.
+단계는 중첩하지 않으며, 여러 스레드의 단계는 한 번에 하나씩 실행됩니다.
+
+사용 예:
+    profiler = MemoryProfiler(enabled=True)
+    profiler.start()
+    with profiler.stage('fetch'):
+        results = job.result()
+    profiler.stop()
+    profiler.report()
+    history.record('run_query', sql, **profiler.metrics())
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, List, Iterator, TextIO
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows에는 resource 모듈이 없음 (RSS 측정 생략)
+
+from serialization import to_json
+
+# 단계별로 보여줄 상위 할당 위치 수, RSS 샘플링 간격(초)
+DEFAULT_TOP_SITES = 5
+DEFAULT_RSS_INTERVAL = 0.005
+
+STAGES = ('fetch', 'row_conversion', 'enrichment', 'format_query_results', 'serialization', 'prompt_build')
+
+_STATM_PATH = '/proc/self/statm'
+
+# 상위 할당 위치에서 제외할 프레임 (프로파일러 자신과 임포트 과정)
+_SITE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+]
+
+
+def current_rss() -> Optional[int]:
+    """현재 프로세스 RSS (바이트, /proc이 없으면 None)"""
+    try:
+        with open(_STATM_PATH) as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss() -> Optional[int]:
+    """프로세스 시작 후 최대 RSS (바이트, resource 모듈이 없으면 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _short_path(filename: str) -> str:
+    """sys.path 기준 모듈 경로로 표시 (예: result_set.py, re/_parser.py)"""
+    prefixes = [os.path.join(os.path.abspath(entry), '') for entry in sys.path if entry]
+    matches = [prefix for prefix in prefixes if filename.startswith(prefix)]
+    return filename[len(max(matches, key=len)):] if matches else filename
+
+
+def format_bytes(value: Optional[float], signed: bool = False) -> str:
+    """바이트를 읽기 쉬운 형식으로 변환 (None이면 '-')"""
+    if value is None:
+        return '-'
+    sign = ('+' if value >= 0 else '-') if signed else ('-' if value < 0 else '')
+    value = abs(value)
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if value < 1024.0:
+            return f"{sign}{value:.1f} {unit}"
+        value /= 1024.0
+    return f"{sign}{value:.1f} TB"
+
+
+class _RssSampler(threading.Thread):
+    """단계 실행 중 RSS 최대값을 주기적으로 기록하는 백그라운드 스레드"""
+    
+    def __init__(self, interval: float):
+        super().__init__(name='rss-sampler', daemon=True)
+        self.interval = interval
+        self.peak = current_rss() or 0
+        self._stop_event = threading.Event()
+    
+    def reset(self) -> None:
+        self.peak = current_rss() or 0
+    
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            rss = current_rss()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+    
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class MemoryProfiler:
+    """파이프라인 단계별 메모리 측정기 (비활성화 상태면 stage()는 아무것도 하지 않음)"""
+    
+    def __init__(
+        self,
+        enabled: bool = True,
+        top: int = DEFAULT_TOP_SITES,
+        interval: float = DEFAULT_RSS_INTERVAL
+    ):
+        """
+        초기화
+        
+        Args:
+            enabled: False면 측정하지 않음 (옵션이 없을 때도 같은 코드 경로를 쓰기 위함)
+            top: 단계별로 기록할 상위 할당 위치 수
+            interval: RSS 샘플링 간격(초)
+        """
+        self.enabled = enabled
+        self.top = top
+        self.interval = interval
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+        self._sampler: Optional[_RssSampler] = None
+        self._started_tracing = False
+    
+    def start(self) -> None:
+        """tracemalloc과 RSS 샘플링 시작"""
+        if not self.enabled:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if current_rss() is not None:
+            self._sampler = _RssSampler(self.interval)
+            self._sampler.start()
+    
+    def stop(self) -> None:
+        """측정 종료 (start()에서 시작한 tracemalloc만 중지)"""
+        if self._sampler is not None:
+            self._sampler.stop()
+            self._sampler = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        with 블록을 한 단계로 측정
+        
+        Args:
+            name: 단계 이름 (STAGES 중 하나 권장)
+        """
+        if not self.enabled or not tracemalloc.is_tracing():
+            yield
+            return
+        
+        with self._lock:
+            before_snapshot = tracemalloc.take_snapshot()
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            if self._sampler is not None:
+                self._sampler.reset()
+            start_time = time.perf_counter()
+            try:
+                yield
+            finally:
+                seconds = time.perf_counter() - start_time
+                after, peak = tracemalloc.get_traced_memory()
+                rss_after = current_rss()
+                rss_peak = max(self._sampler.peak, rss_after or 0) if self._sampler is not None else max_rss()
+                # 필터 패턴 컴파일이 측정에 섞이지 않도록 두 스냅샷을 모두 찍은 뒤 필터링
+                after_snapshot = tracemalloc.take_snapshot().filter_traces(_SITE_FILTERS)
+                before_snapshot = before_snapshot.filter_traces(_SITE_FILTERS)
+                self._add(name, {
+                    'seconds': seconds,
+                    'peak_bytes': peak,
+                    'peak_increase_bytes': peak - before,
+                    'retained_bytes': after - before,
+                    'rss_peak_bytes': rss_peak,
+                    'rss_after_bytes': rss_after,
+                    'top_sites': self._top_sites(after_snapshot.compare_to(before_snapshot, 'lineno')),
+                })
+    
+    def _top_sites(self, diffs: List[tracemalloc.StatisticDiff]) -> List[Dict[str, Any]]:
+        """잔류 메모리가 늘어난 상위 할당 위치"""
+        sites = []
+        for diff in diffs:
+            if diff.size_diff <= 0:
+                continue
+            frame = diff.traceback[0]
+            sites.append({
+                'site': f"{_short_path(frame.filename)}:{frame.lineno}",
+                'size_diff': diff.size_diff,
+                'count_diff': diff.count_diff,
+            })
+            if len(sites) >= self.top:
+                break
+        return sites
+    
+    def _add(self, name: str, measured: Dict[str, Any]) -> None:
+        """같은 이름의 단계는 시간/잔류는 합산, 최대값은 최대로 집계"""
+        stage = self.stages.get(name)
+        if stage is None:
+            self.stages[name] = {'calls': 1, **measured}
+            return
+        stage['calls'] += 1
+        stage['seconds'] += measured['seconds']
+        stage['retained_bytes'] += measured['retained_bytes']
+        stage['rss_after_bytes'] = measured['rss_after_bytes']
+        for key in ('peak_bytes', 'peak_increase_bytes', 'rss_peak_bytes'):
+            if measured[key] is not None:
+                stage[key] = max(stage[key] or 0, measured[key])
+        sites = {site['site']: dict(site) for site in stage['top_sites']}
+        for site in measured['top_sites']:
+            if site['site'] in sites:
+                sites[site['site']]['size_diff'] += site['size_diff']
+                sites[site['site']]['count_diff'] += site['count_diff']
+            else:
+                sites[site['site']] = site
+        stage['top_sites'] = sorted(sites.values(), key=lambda s: s['size_diff'], reverse=True)[:self.top]
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        실행 이력에 기록할 지표 (측정한 단계가 없으면 빈 딕셔너리)
+        
+        Returns:
+            peak_memory_bytes, peak_rss_bytes, memory_profile(단계별 JSON) 딕셔너리
+        """
+        if not self.stages:
+            return {}
+        rss_peaks = [s['rss_peak_bytes'] for s in self.stages.values() if s['rss_peak_bytes'] is not None]
+        profile = {
+            name: {key: round(value, 3) if key == 'seconds' else value
+                   for key, value in stage.items() if key != 'top_sites'}
+            for name, stage in self.stages.items()
+        }
+        return {
+            'peak_memory_bytes': max(s['peak_bytes'] for s in self.stages.values()),
+            'peak_rss_bytes': max(rss_peaks) if rss_peaks else None,
+            'memory_profile': to_json(profile, compact=True),
+        }
+    
+    def report(self, stream: Optional[TextIO] = None) -> None:
+        """
+        단계별 메모리 표와 상위 할당 위치 출력
+        
+        Args:
+            stream: 출력 스트림 (None이면 sys.stdout)
+        """
+        if not self.enabled:
+            return
+        out = stream or sys.stdout
+        print("\n🧠 메모리 프로파일 (tracemalloc + RSS)", file=out)
+        if not self.stages:
+            print("  측정한 단계가 없습니다.", file=out)
+            return
+        for name, stage in self.stages.items():
+            print(
+                f"  - {name} ({stage['calls']}회, {stage['seconds']:.2f}초): "
+                f"최대(추적) {format_bytes(stage['peak_bytes'])}, "
+                f"증가분 {format_bytes(stage['peak_increase_bytes'])}, "
+                f"잔류 {format_bytes(stage['retained_bytes'], signed=True)}, "
+                f"최대 RSS {format_bytes(stage['rss_peak_bytes'])}",
+                file=out
+            )
+        if current_rss() is None:
+            print("  (RSS는 /proc을 읽을 수 없어 프로세스 전체 최대값입니다)", file=out)
+        
+        for name, stage in self.stages.items():
+            if not stage['top_sites']:
+                continue
+            print(f"\n  [{name}] 상위 할당 위치 (잔류 기준)", file=out)
+            for site in stage['top_sites']:
+                print(f"    {site['site']}: {format_bytes(site['size_diff'], signed=True)} "
+                      f"({site['count_diff']:+,}개 블록)", file=out)
@@ -0,0 +1,218 @@
+"""
+토큰 예산 기반 프롬프트 데이터 구성
+
+프롬프트에 넣을 데이터(format_query_results() 결과 등)를 토큰 예산 안에서 가장
+정보가 많은 표현으로 바꿉니다. 아래 순서로 시도하여 처음 예산에 들어가는
+표현을 사용합니다.
+
+1. records: 원본 그대로 (행마다 컬럼 이름 반복)
+2. columnar: 표를 컬럼 이름 1회 + 행 값 배열로 변환 (정보 손실 없음)
+3. columnar_rounded: 실수를 유효숫자 4자리로 반올림
+4. columnar_sampled: 표의 행을 균등 간격으로 줄임 (예산에 맞는 최대 행 수)
+5. statistics_only: 표의 행을 모두 빼고 통계/메타 정보만 전달
+
+토큰 수는 로컬 근사치(chunking.estimate_tokens)로 먼저 판단하고, 예산 경계에
+가까울 때만 모델의 count_tokens로 정확히 셉니다.
+
+사용법:
+    from prompt_builder import TokenCounter, pack_payload
+    
+    counter = TokenCounter(model)
+    packed = pack_payload(format_query_results(rows), budget=4000, counter=counter)
+    prompt = f"## 데이터\\n{packed.text}"
+"""
+
+import math
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, List, Mapping, Optional
+
+from chunking import estimate_tokens
+from result_set import ResultSet
+from serialization import to_json
+
+# 프롬프트 데이터 기본 토큰 예산
+DEFAULT_PROMPT_BUDGET = 30000
+
+# 반올림 유효숫자
+DEFAULT_SIGNIFICANT_DIGITS = 4
+
+# 근사치가 예산의 이 범위 안에 있으면 모델 count_tokens로 다시 셈
+EXACT_COUNT_MARGIN = (0.8, 1.25)
+
+
+class TokenCounter:
+    """모델 count_tokens + 로컬 근사치 토큰 계산기"""
+    
+    def __init__(self, model: Any = None):
+        """
+        초기화
+        
+        Args:
+            model: count_tokens()를 지원하는 Gemini 모델 (None이면 근사치만 사용)
+        """
+        self.model = model
+        # 모델 토큰 수 / 근사치 비율 (정확히 셀 때마다 갱신하여 근사치 보정)
+        self.calibration = 1.0
+    
+    def estimate(self, text: str) -> int:
+        """로컬 근사 토큰 수 (API 호출 없음)"""
+        return math.ceil(estimate_tokens(text) * self.calibration)
+    
+    def count(self, text: str) -> int:
+        """모델 토큰 수 (count_tokens 실패 시 근사치)"""
+        if self.model is not None:
+            try:
+                total = self.model.count_tokens(text).total_tokens
+                approximate = estimate_tokens(text)
+                if approximate:
+                    self.calibration = total / approximate
+                return total
+            except Exception:
+                pass
+        return self.estimate(text)
+
+
+@dataclass
+class PackedPayload:
+    """예산에 맞춘 프롬프트 데이터"""
+    text: str
+    tokens: int
+    representation: str
+    rows_kept: int
+    rows_total: int
+    fits: bool
+
+
+def _round(value: float, digits: int) -> float:
+    if value == 0 or math.isnan(value) or math.isinf(value):
+        return value
+    return float(f"{value:.{digits}g}")
+
+
+def _select(count: int, keep: Optional[int]) -> List[int]:
+    """전체 count행 중 keep행을 첫 행/마지막 행을 포함하여 균등 간격으로 선택"""
+    if keep is None or keep >= count:
+        return list(range(count))
+    if keep <= 0:
+        return []
+    if keep == 1:
+        return [0]
+    return sorted({round(i * (count - 1) / (keep - 1)) for i in range(keep)})
+
+
+def _is_table(value: Any) -> bool:
+    return (
+        isinstance(value, ResultSet)
+        or (isinstance(value, list) and value and all(isinstance(v, Mapping) for v in value))
+    )
+
+
+def _table_lengths(value: Any) -> List[int]:
+    """데이터 안의 표(dict 리스트/ResultSet) 행 수 목록"""
+    if _is_table(value):
+        return [len(value)]
+    if isinstance(value, Mapping):
+        return [n for v in value.values() for n in _table_lengths(v)]
+    if isinstance(value, (list, tuple)):
+        return [n for v in value for n in _table_lengths(v)]
+    return []
+
+
+def _transform(
+    value: Any,
+    columnar: bool,
+    digits: Optional[int],
+    keep: Optional[int]
+) -> Any:
+    """표 변환/반올림/행 선택을 데이터 전체에 재귀 적용"""
+    if _is_table(value):
+        records = value.to_records() if isinstance(value, ResultSet) else value
+        indices = _select(len(records), keep)
+        if not columnar:
+            return [_transform(dict(records[i]), columnar, digits, None) for i in indices]
+        
+        columns: List[str] = []
+        for record in records:
+            for name in record:
+                if name not in columns:
+                    columns.append(name)
+        table = {
+            'columns': columns,
+            'rows': [
+                [_transform(records[i].get(name), columnar, digits, None) for name in columns]
+                for i in indices
+            ]
+        }
+        if len(indices) < len(records):
+            table['rows_total'] = len(records)
+        return table
+    
+    if isinstance(value, Mapping):
+        return {k: _transform(v, columnar, digits, keep) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_transform(v, columnar, digits, keep) for v in value]
+    if digits is not None:
+        if isinstance(value, float):
+            return _round(value, digits)
+        if isinstance(value, Decimal):
+            return _round(float(value), digits)
+    return value
+
+
+def pack_payload(
+    data: Any,
+    budget: int = DEFAULT_PROMPT_BUDGET,
+    counter: Optional[TokenCounter] = None,
+    significant_digits: int = DEFAULT_SIGNIFICANT_DIGITS
+) -> PackedPayload:
+    """
+    토큰 예산 안에서 가장 정보가 많은 데이터 표현 선택
+    
+    Args:
+        data: 프롬프트에 넣을 데이터 (dict, dict 리스트, ResultSet 등)
+        budget: 데이터 부분에 허용할 토큰 수
+        counter: 토큰 계산기 (None이면 로컬 근사치만 사용)
+        significant_digits: 반올림 단계의 유효숫자
+    
+    Returns:
+        PackedPayload (모든 단계가 예산을 넘으면 가장 작은 표현, fits=False)
+    """
+    counter = counter or TokenCounter()
+    lengths = _table_lengths(data)
+    rows_total = max(lengths) if lengths else 0
+    
+    def build(representation: str, columnar: bool, digits: Optional[int], keep: Optional[int]) -> PackedPayload:
+        text = to_json(_transform(data, columnar, digits, keep), compact=True)
+        tokens = counter.estimate(text)
+        low, high = EXACT_COUNT_MARGIN
+        if budget * low < tokens <= budget * high:
+            tokens = counter.count(text)
+        kept = rows_total if keep is None else min(keep, rows_total)
+        return PackedPayload(text, tokens, representation, kept, rows_total, tokens <= budget)
+    
+    candidates: List[Callable[[], PackedPayload]] = [
+        lambda: build('records', False, None, None),
+        lambda: build('columnar', True, None, None),
+        lambda: build('columnar_rounded', True, significant_digits, None),
+    ]
+    for candidate in candidates:
+        packed = candidate()
+        if packed.fits:
+            return packed
+    
+    # 예산에 맞는 최대 행 수를 이진 탐색
+    best = None
+    low, high = 1, rows_total - 1
+    while low <= high:
+        middle = (low + high) // 2
+        packed = build('columnar_sampled', True, significant_digits, middle)
+        if packed.fits:
+            best = packed
+            low = middle + 1
+        else:
+            high = middle - 1
+    if best is not None:
+        return best
+    
+    return build('statistics_only', True, significant_digits, 0)
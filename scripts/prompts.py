@@ -0,0 +1,456 @@
+"""
+Gemini 프롬프트 템플릿 레지스트리와 정적 프리픽스 캐시
+
+요약 프롬프트를 정적인 지시문(프리픽스)과 호출마다 바뀌는 데이터(본문)로 나눠
+한 곳에서 관리합니다. scripts/summarize_with_gemini.py와
+templates/gemini/prompt_template.py가 같은 템플릿을 사용합니다.
+
+프리픽스는 템플릿 이름과 파라미터별로 한 번만 만들어 재사용하며, PrefixCache를
+사용하면 Gemini 컨텍스트 캐시(google.generativeai.caching)에 올려 반복 호출 시
+프리픽스 입력 비용을 한 번만 냅니다. 테스트나 캐시를 쓸 수 없는 환경에서는
+같은 인터페이스의 로컬 대체 구현(LocalCachedContent)을 사용합니다.
+
+사용법:
+    from prompts import PrefixCache, render_prompt
+    
+    prefix, body = render_prompt('weekly', {'데이터 요약': data_text})
+    response = model.generate_content(prefix + body)
+    
+    cache = PrefixCache(model, mode='local')
+    response = cache.generate(prefix, body)
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from google.generativeai import caching
+except ImportError:
+    caching = None  # 컨텍스트 캐시 미지원 버전이면 로컬 대체 구현만 사용
+
+from chunking import estimate_tokens
+
+# 컨텍스트 캐시 최소 토큰 수 (이보다 짧은 프리픽스는 그대로 전송)
+# 기본 템플릿의 프리픽스는 모두 이보다 짧아 긴 custom 지시문에서만 캐시됨
+MIN_CACHE_TOKENS = 4096
+
+# 컨텍스트 캐시 기본 유지 시간 (분)
+DEFAULT_CACHE_TTL_MINUTES = 60
+
+CACHE_MODES = ('off', 'gemini', 'local')
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    """정적 지시문 + 데이터 섹션으로 구성된 프롬프트"""
+    name: str
+    prefix: str
+    data_title: str = '데이터'
+
+
+_TEMPLATES = [
+    PromptTemplate('weekly', """
+당신은 블록체인 데이터 분석가입니다. 아래 온체인 데이터를 기반으로
+기관 투자자/증권사 관점에서 읽을 수 있는 주간 요약 리포트를 작성해주세요.
+
+## 요구사항
+1. 핵심 지표 3가지를 한 문장씩 요약
+2. 전주 대비 변화율 언급 (가능한 경우)
+3. 주목할 만한 이상 징후나 패턴 발견 시 언급
+4. 전문적이지만 이해하기 쉬운 문체 사용
+5. 총 3-5문장으로 구성
+
+## 출력 형식
+[주간 요약]
+(내용)
+
+[주요 변화]
+(내용)
+
+[이상 징후]
+(내용 또는 "특별한 이상 징후 없음")
+""", data_title='데이터 요약'),
+    PromptTemplate('weekly_delta', """
+당신은 블록체인 데이터 분석가입니다. 아래 온체인 데이터를 기반으로
+기관 투자자/증권사 관점에서 읽을 수 있는 주간 요약 리포트를 작성해주세요.
+
+## 데이터 설명
+- statistics는 이번 기간(period) 컬럼별 합계/평균/최소/최대입니다.
+- deltas는 직전 보고 기간(previous_period) 대비 미리 계산한 변화량(change)과 변화율(change_pct, %)입니다.
+
+## 요구사항
+1. 핵심 지표 3가지를 한 문장씩 요약
+2. 전주 대비 변화율은 deltas의 change_pct 값을 그대로 인용 (직접 계산하지 말 것)
+3. 주목할 만한 이상 징후나 패턴 발견 시 언급
+4. 전문적이지만 이해하기 쉬운 문체 사용
+5. 총 3-5문장으로 구성
+
+## 출력 형식
+[주간 요약]
+(내용)
+
+[주요 변화]
+(내용)
+
+[이상 징후]
+(내용 또는 "특별한 이상 징후 없음")
+""", data_title='데이터 요약'),
+    PromptTemplate('comparison', """
+다음은 {label1}과 {label2} 네트워크의 온체인 데이터입니다.
+두 네트워크를 비교하여 기관 투자자 관점에서 3줄 요약을 작성해주세요.
+
+## 요구사항
+1. 처리량(트랜잭션 수) 비교
+2. 수수료 효율성 비교
+3. 네트워크 활성도 비교
+4. 각 네트워크의 강점을 데이터로 뒷받침하여 설명
+5. 총 3줄로 간결하게 작성
+"""),
+    PromptTemplate('multi_comparison', """
+다음은 {names} 네트워크의 온체인 데이터입니다.
+네트워크들을 비교하여 기관 투자자 관점에서 3줄 요약을 작성해주세요.
+
+## 데이터 설명
+- 지표 컬럼 이름은 "지표_체인" 형식입니다. (예: tx_count_{example_slug})
+- ratio/delta_pct 컬럼은 {base} 대비 비율과 변화율(%)입니다.
+- alignment가 relative이면 체인별 데이터 기간이 달라 최근 기간끼리 순번(period)으로 맞춘 것입니다.
+
+## 요구사항
+1. 처리량(트랜잭션 수) 비교
+2. 수수료 효율성 비교
+3. 네트워크 활성도 비교
+4. 각 네트워크의 강점을 데이터로 뒷받침하여 설명
+5. 총 3줄로 간결하게 작성
+"""),
+    PromptTemplate('anomalies', """
+아래 온체인 데이터에서 이상 징후나 주목할 만한 패턴을 찾아주세요.
+
+## 분석 요청
+1. 평소와 다른 급증/급감 지점 식별
+2. 가능한 원인 추론 (이벤트, 시장 상황 등)
+3. 추가 조사가 필요한 항목 제안
+
+이상 징후가 없다면 "특별한 이상 징후 없음"이라고 답변하세요.
+"""),
+    PromptTemplate('anomalies_prefiltered', """
+아래는 온체인 시계열 데이터에서 통계 기법으로 미리 찾아낸 이상 구간과 변화점입니다.
+- zscore: 직전 구간 평균/표준편차 대비 편차
+- mad: 직전 구간 중앙값/MAD 대비 편차
+- seasonal: 같은 요일(시간별 데이터는 같은 요일·시각) 기준선 대비 편차
+- changepoints: 평균 수준이 바뀐 지점 (before_mean → after_mean)
+점수는 기준선 대비 표준편차 배수이며, context는 이상 구간 앞뒤의 원본 행입니다.
+
+## 분석 요청
+1. 각 이상 구간과 변화점이 어떤 급증/급감인지 수치로 설명
+2. 가능한 원인 추론 (이벤트, 시장 상황 등)
+3. 추가 조사가 필요한 항목 제안
+""", data_title='탐지 결과'),
+    PromptTemplate('report', """
+당신은 블록체인 데이터 분석가입니다. 아래 온체인 데이터를 기반으로
+기관 투자자/증권사 관점에서 읽을 수 있는 주간 리포트를 JSON으로 작성해주세요.
+
+## 항목별 요구사항
+- weekly_summary: 핵심 지표 3가지를 포함해 3-5문장, 전문적이지만 이해하기 쉬운 문체
+- key_changes: 전주 대비 등 주요 지표의 변화 (가능하면 변화율/수치 포함)
+- anomalies: 평소와 다른 급증/급감 지점과 가능한 원인 (없으면 빈 배열)
+- 데이터에 local_anomaly_detection이 있으면 통계 기법으로 미리 찾은 이상 구간이므로 anomalies의 근거로 사용
+- 데이터에 deltas가 있으면 직전 보고 기간 대비 미리 계산한 변화율(change_pct, %)이므로 key_changes에 그대로 사용
+수치는 데이터의 원본 값을 사용하세요.
+"""),
+    PromptTemplate('custom', """
+{custom_prompt}
+"""),
+    PromptTemplate('map', """
+아래는 온체인 쿼리 결과 전체 중 일부 구간입니다.
+다른 구간의 요약과 합쳐 최종 리포트를 만들 예정이므로 이 구간에서 확인되는 사실만 정리해주세요.
+
+## 요구사항
+1. 주요 지표의 구간 내 범위(최소/최대)와 추세(증가/감소/횡보)
+2. 급증/급감 지점이 있으면 시점과 수치
+3. 수치는 원본 값을 그대로 사용
+4. 3-5개 bullet로 간결하게 작성
+"""),
+    PromptTemplate('reduce', """
+아래는 연속된 구간별 온체인 데이터 요약입니다. 하나의 구간 요약으로 합쳐주세요.
+
+## 요구사항
+1. 구간 전체의 추세와 범위를 정리
+2. 급증/급감 지점은 시점과 수치를 유지
+3. 3-5개 bullet로 간결하게 작성
+"""),
+]
+
+# 템플릿 레지스트리 (모듈 로드 시 한 번 구성)
+PROMPTS: Dict[str, PromptTemplate] = {template.name: template for template in _TEMPLATES}
+
+
+def get_prompt(name: str) -> PromptTemplate:
+    """이름으로 템플릿 조회 (없으면 KeyError)"""
+    try:
+        return PROMPTS[name]
+    except KeyError:
+        raise KeyError(f"등록되지 않은 프롬프트: {name} (사용 가능: {', '.join(PROMPTS)})")
+
+
+@lru_cache(maxsize=256)
+def _render_prefix(name: str, params: Tuple[Tuple[str, str], ...]) -> str:
+    return get_prompt(name).prefix.format(**dict(params))
+
+
+def render_prefix(name: str, **params: Any) -> str:
+    """
+    템플릿의 정적 프리픽스 생성 (이름/파라미터 조합별로 한 번만 만들어 재사용)
+    
+    Args:
+        name: 템플릿 이름
+        **params: 프리픽스 파라미터 (예: comparison의 label1, label2)
+    
+    Returns:
+        프리픽스 문자열
+    """
+    return _render_prefix(name, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+
+def render_body(sections: Dict[str, str]) -> str:
+    """데이터 섹션 {제목: 내용}을 프롬프트 본문으로 변환"""
+    return "".join(f"\n## {title}\n{text}\n" for title, text in sections.items())
+
+
+def render_prompt(
+    name: str,
+    data: Any,
+    **params: Any
+) -> Tuple[str, str]:
+    """
+    프롬프트를 (정적 프리픽스, 데이터 본문)으로 생성
+    
+    Args:
+        name: 템플릿 이름
+        data: 데이터 텍스트 (템플릿의 data_title 섹션으로 들어감)
+            또는 {섹션 제목: 텍스트} 딕셔너리
+        **params: 프리픽스 파라미터
+    
+    Returns:
+        (prefix, body) - 전체 프롬프트는 prefix + body
+    """
+    sections = data if isinstance(data, dict) else {get_prompt(name).data_title: data}
+    return render_prefix(name, **params), render_body(sections)
+
+
+class _LocalUsage:
+    """로컬 캐시 응답의 usage_metadata (캐시된 토큰 수 추가)"""
+    
+    def __init__(self, usage: Any, cached_tokens: int):
+        self._usage = usage
+        self.cached_content_token_count = cached_tokens
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._usage, name)
+
+
+class _LocalResponse:
+    def __init__(self, response: Any, cached_tokens: int):
+        self._response = response
+        self.usage_metadata = _LocalUsage(getattr(response, 'usage_metadata', None), cached_tokens)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
+
+
+class LocalCachedContent:
+    """
+    컨텍스트 캐시 로컬 대체 구현
+    
+    caching.CachedContent와 같은 속성(name, expire_time, usage_metadata)을 가지며,
+    generate_content()는 캐시된 프리픽스를 붙여 원래 모델을 호출하고 응답의
+    usage_metadata.cached_content_token_count에 프리픽스 토큰 수를 기록합니다.
+    """
+    
+    def __init__(self, model: Any, prefix: str, ttl: timedelta):
+        self.model = model
+        self.prefix = prefix
+        self.name = f"local/{hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:16]}"
+        self.expire_time = datetime.now(timezone.utc) + ttl
+        self.token_count = estimate_tokens(prefix)
+    
+    def generate_content(self, body: str, **options: Any) -> Any:
+        response = self.model.generate_content(self.prefix + body, **options)
+        return _LocalResponse(response, self.token_count)
+    
+    def delete(self) -> None:
+        pass
+
+
+class PrefixCache:
+    """
+    정적 프리픽스 캐시
+    
+    mode:
+        off: 캐시 없이 prefix + body를 그대로 전송
+        gemini: 프리픽스를 Gemini 컨텍스트 캐시에 올리고 본문만 전송
+            (MIN_CACHE_TOKENS보다 짧거나 생성에 실패하면 그대로 전송)
+        local: LocalCachedContent로 캐시 동작을 흉내 냄 (API 캐시 비용 없음, 테스트용)
+    """
+    
+    def __init__(
+        self,
+        model: Any,
+        mode: str = 'off',
+        ttl_minutes: int = DEFAULT_CACHE_TTL_MINUTES,
+        min_tokens: int = MIN_CACHE_TOKENS,
+        token_counter: Any = None
+    ):
+        """
+        초기화
+        
+        Args:
+            model: Gemini GenerativeModel
+            mode: 'off', 'gemini', 'local'
+            ttl_minutes: 캐시 유지 시간 (분)
+            min_tokens: gemini 모드에서 캐시할 최소 프리픽스 토큰 수
+            token_counter: count(text)를 지원하는 토큰 계산기 (None이면 근사치)
+        """
+        if mode not in CACHE_MODES:
+            raise ValueError(f"지원하지 않는 캐시 모드: {mode} (사용 가능: {', '.join(CACHE_MODES)})")
+        if mode == 'gemini' and caching is None:
+            raise ValueError("google-generativeai 패키지가 컨텍스트 캐시(caching)를 지원하지 않습니다. 패키지를 업데이트하세요.")
+        
+        self.model = model
+        self.mode = mode
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self.min_tokens = min_tokens
+        self.token_counter = token_counter
+        # 프리픽스 해시 -> 캐시 객체 (None이면 캐시 불가로 판단되어 그대로 전송)
+        self._entries: Dict[str, Any] = {}
+        # 프리픽스 해시 -> 생성 완료 이벤트 (같은 프리픽스를 동시에 만들지 않도록)
+        self._pending: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.stats = {'created': 0, 'hits': 0, 'inline': 0}
+    
+    def generate(self, prefix: str, body: str, **options: Any) -> Any:
+        """
+        프리픽스 + 본문으로 generate_content 호출
+        
+        Args:
+            prefix: 정적 프리픽스
+            body: 데이터 본문
+            **options: generate_content 옵션 (generation_config 등)
+        
+        Returns:
+            Gemini 응답
+        """
+        entry = self._entry(prefix) if self.mode != 'off' else None
+        if entry is None:
+            with self._lock:
+                self.stats['inline'] += 1
+            return self.model.generate_content(prefix + body, **options)
+        return entry.generate_content(body, **options)
+    
+    def _entry(self, prefix: str) -> Optional[Any]:
+        key = hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    entry = self._entries[key]
+                    if entry is not None and self._expired(entry):
+                        del self._entries[key]
+                    else:
+                        if entry is not None:
+                            self.stats['hits'] += 1
+                        return entry
+                
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # 다른 스레드가 같은 프리픽스를 만드는 중이면 끝난 뒤 다시 확인
+            pending.wait()
+        
+        # 캐시 생성은 네트워크 호출이므로 락 밖에서 실행 (다른 프리픽스의 요청을 막지 않음)
+        try:
+            entry = self._create(prefix)
+            with self._lock:
+                self._entries[key] = entry
+                if entry is not None:
+                    self.stats['created'] += 1
+            return entry
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+    
+    def _expired(self, entry: Any) -> bool:
+        expire_time = getattr(entry, 'expire_time', None)
+        if expire_time is None:
+            return False
+        # 만료 직전 캐시는 새로 생성
+        return expire_time - timedelta(minutes=1) <= datetime.now(timezone.utc)
+    
+    def _create(self, prefix: str) -> Optional[Any]:
+        if self.mode == 'local':
+            return LocalCachedContent(self.model, prefix, self.ttl)
+        
+        tokens = self.token_counter.count(prefix) if self.token_counter else estimate_tokens(prefix)
+        if tokens < self.min_tokens:
+            return None
+        model_name = cache_model_name(self.model)
+        if model_name is None:
+            return None
+        try:
+            cached = caching.CachedContent.create(
+                model=model_name,
+                display_name=f"onchain-prefix-{hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:12]}",
+                contents=[prefix],
+                ttl=self.ttl
+            )
+            return _GeminiCachedModel(cached)
+        except Exception:
+            return None
+    
+    def close(self) -> None:
+        """생성한 컨텍스트 캐시 삭제 (보관 비용 방지)"""
+        with self._lock:
+            entries = [entry for entry in self._entries.values() if entry is not None]
+            self._entries.clear()
+        for entry in entries:
+            try:
+                entry.delete()
+            except Exception:
+                pass
+
+
+def cache_model_name(model: Any) -> Optional[str]:
+    """
+    컨텍스트 캐시를 만들 모델 이름 (캐시 유무와 관계없이 같은 모델을 쓰도록 요약 모델에서 가져옴)
+    
+    Args:
+        model: Gemini GenerativeModel
+    
+    Returns:
+        'models/<이름>' 형식의 모델 이름 (알 수 없으면 None)
+    """
+    name = getattr(model, 'model_name', None)
+    if not name:
+        return None
+    return name if name.startswith('models/') else f"models/{name}"
+
+
+class _GeminiCachedModel:
+    """캐시된 프리픽스를 사용하는 GenerativeModel 래퍼"""
+    
+    def __init__(self, cached: Any):
+        import google.generativeai as genai
+        
+        self.cached = cached
+        self.expire_time = cached.expire_time
+        self.model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+    
+    def generate_content(self, body: str, **options: Any) -> Any:
+        return self.model.generate_content(body, **options)
+    
+    def delete(self) -> None:
+        self.cached.delete()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+템플릿 결과/요약 주기 갱신 서비스 (로컬 HTTP API 제공)
+
+BigQuery/Gemini 클라이언트를 한 번만 만들어 유지하면서 설정 파일에 등록된
+SQL 템플릿을 주기적으로 실행하고, 최신 결과와 요약을 메모리와 디스크에
+보관합니다. 대시보드나 팀원은 새 쿼리를 실행하지 않고 HTTP로 결과를 읽습니다.
+
+사용법:
+    python scripts/refresh_service.py <config.json> [옵션]
+
+예시:
+    python scripts/refresh_service.py service.json
+    python scripts/refresh_service.py service.json --port 8090 --no-summary
+
+HTTP API:
+    GET  /jobs                  등록된 작업 목록과 상태
+    GET  /jobs/<name>           최신 요약 + 통계
+    GET  /jobs/<name>/results   최신 결과 행
+    POST /jobs/<name>/refresh   즉시 갱신 요청
+"""
+
+import sys
+import json
+import random
+import signal
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from summarize_with_gemini import BigQueryExecutor, GeminiSummarizer, format_query_results
+from serialization import dump_json, to_json_bytes
+from structured_report import render_report
+
+DEFAULT_INTERVAL_MINUTES = 60
+DEFAULT_JITTER_SECONDS = 60
+DEFAULT_MAX_CONCURRENCY = 2
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+# 서비스가 보관하는 Gemini 호출별 토큰 기록 수 (오래된 기록부터 버림)
+MAX_TOKEN_USAGE_RECORDS = 500
+
+
+class RefreshJob:
+    """갱신 작업 하나 (설정 + 최신 상태)"""
+    
+    def __init__(self, config: Dict[str, Any], defaults: Dict[str, Any]):
+        """
+        초기화
+        
+        Args:
+            config: 작업 설정 (name, sql_file, summary_type, custom_prompt, interval_minutes)
+            defaults: 서비스 공통 설정
+        """
+        if 'name' not in config or 'sql_file' not in config:
+            raise ValueError(f"작업 설정에 name과 sql_file이 필요합니다: {config}")
+        
+        self.name = config['name']
+        self.sql_file = config['sql_file']
+        self.summary_type = config.get('summary_type', 'weekly')
+        self.custom_prompt = config.get('custom_prompt')
+        self.interval_seconds = 60 * config.get(
+            'interval_minutes', defaults.get('interval_minutes', DEFAULT_INTERVAL_MINUTES)
+        )
+        self.jitter_seconds = config.get(
+            'jitter_seconds', defaults.get('jitter_seconds', DEFAULT_JITTER_SECONDS)
+        )
+        
+        self.next_run = time.time()
+        self.running = False
+        # 실행 중에 받은 즉시 실행 요청 (끝나면 다음 주기를 기다리지 않고 바로 다시 실행)
+        self.pending_trigger = False
+        self.state: Dict[str, Any] = {
+            'name': self.name,
+            'sql_file': self.sql_file,
+            'summary_type': self.summary_type,
+            'status': 'pending',
+            'updated_at': None,
+            'duration_seconds': None,
+            'error': None
+        }
+        self.results: List[Dict[str, Any]] = []
+        # running, pending_trigger, next_run, state, results는 이 락 안에서 읽고 씀
+        self.lock = threading.Lock()
+    
+    def update_state(self, **fields: Any):
+        """상태 갱신 (HTTP 핸들러가 읽는 중에 바뀌지 않도록 락 안에서)"""
+        with self.lock:
+            self.state.update(fields)
+    
+    def snapshot(self, with_results: bool = False) -> Dict[str, Any]:
+        """
+        응답/저장용 상태 복사본
+        
+        Args:
+            with_results: True면 {'state', 'results'}, False면 상태만
+        
+        Returns:
+            락 안에서 복사한 딕셔너리
+        """
+        with self.lock:
+            state = dict(self.state)
+            if with_results:
+                return {'state': state, 'results': self.results}
+            return state
+    
+    def schedule_next(self):
+        """다음 실행 시각 설정 (동시 실행이 몰리지 않도록 jitter 추가)"""
+        jitter = random.uniform(0, self.jitter_seconds) if self.jitter_seconds else 0
+        self.next_run = time.time() + self.interval_seconds + jitter
+
+
+class RefreshService:
+    """작업 스케줄러 + 결과 저장소"""
+    
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        output_dir: str,
+        project_id: Optional[str] = None,
+        api_key: Optional[str] = None,
+        summarize: bool = True
+    ):
+        """
+        초기화
+        
+        Args:
+            config: 서비스 설정 (jobs, interval_minutes, jitter_seconds, max_concurrency, backend, local_db, context_cache, query_timeout)
+            output_dir: 최신 결과를 저장할 디렉토리
+            project_id: GCP 프로젝트 ID
+            api_key: Gemini API 키
+            summarize: False면 쿼리만 갱신하고 요약은 생성하지 않음
+        """
+        self.jobs: Dict[str, RefreshJob] = {}
+        for job_config in config.get('jobs', []):
+            job = RefreshJob(job_config, config)
+            self.jobs[job.name] = job
+        if not self.jobs:
+            raise ValueError("설정 파일에 등록된 작업(jobs)이 없습니다.")
+        
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        # 클라이언트는 한 번만 생성하여 모든 갱신에서 재사용
+        self.bq_executor = BigQueryExecutor(
+            project_id=project_id,
+            backend=config.get('backend', 'bigquery'),
+            local_db=config.get('local_db'),
+            timeout=config.get('query_timeout'),
+            progress=False
+        )
+        self.summarizer = GeminiSummarizer(
+            api_key=api_key,
+            context_cache=config.get('context_cache', 'off'),
+            max_usage_records=MAX_TOKEN_USAGE_RECORDS
+        ) if summarize else None
+        
+        max_concurrency = config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)
+        self.pool = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.stop_event = threading.Event()
+        
+        self._load_saved()
+    
+    def _job_path(self, job: RefreshJob) -> Path:
+        return self.output_dir / f"{job.name}.json"
+    
+    def _load_saved(self):
+        """이전 실행에서 저장한 결과 불러오기 (재시작 직후에도 바로 응답)"""
+        for job in self.jobs.values():
+            path = self._job_path(job)
+            if not path.exists():
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    saved = json.load(f)
+                with job.lock:
+                    job.state.update(saved.get('state', {}))
+                    job.results = saved.get('results', [])
+            except (OSError, ValueError) as e:
+                print(f"⚠️  저장된 결과를 읽을 수 없습니다: {path} ({e})")
+    
+    def refresh(self, job: RefreshJob):
+        """작업 하나 실행: 쿼리 → 통계 → 요약 → 저장"""
+        with job.lock:
+            if job.running:
+                return
+            job.running = True
+        
+        start_time = time.perf_counter()
+        job.update_state(status='running')
+        try:
+            sql = self.bq_executor.read_sql_file(job.sql_file)
+            results = self.bq_executor.execute_query(sql)
+            formatted = format_query_results(results)
+            
+            summary = None
+            if self.summarizer and job.summary_type:
+                summary = self._summarize(job, formatted)
+            
+            records = results.to_records()
+            duration = round(time.perf_counter() - start_time, 3)
+            with job.lock:
+                job.results = records
+                job.state.update({
+                    'status': 'ok',
+                    'updated_at': datetime.now().isoformat(timespec='seconds'),
+                    'duration_seconds': duration,
+                    'total_rows': len(results),
+                    'statistics': formatted.get('statistics', {}),
+                    'summary': summary,
+                    'error': None
+                })
+            dump_json(job.snapshot(with_results=True), self._job_path(job))
+            print(f"✓ 갱신 완료: {job.name} ({duration:.2f}초, {len(results):,}행)")
+        except Exception as e:
+            job.update_state(status='error', error=str(e))
+            print(f"✗ 갱신 실패: {job.name} ({e})", file=sys.stderr)
+        finally:
+            with job.lock:
+                if job.pending_trigger:
+                    # 실행 중에 받은 즉시 실행 요청은 끝나자마자 반영
+                    job.pending_trigger = False
+                    job.next_run = time.time()
+                else:
+                    job.schedule_next()
+                job.running = False
+    
+    def _summarize(self, job: RefreshJob, formatted: Dict[str, Any]) -> str:
+        if job.summary_type == 'weekly':
+            return self.summarizer.generate_weekly_summary(formatted)
+        if job.summary_type == 'anomalies':
+            return self.summarizer.detect_anomalies(formatted)
+        if job.summary_type == 'report':
+            return render_report(self.summarizer.generate_structured_report(formatted))
+        if job.summary_type == 'custom':
+            return self.summarizer.generate_custom_summary(formatted, job.custom_prompt or '')
+        raise ValueError(f"지원하지 않는 요약 타입: {job.summary_type}")
+    
+    def trigger(self, name: str) -> Optional[str]:
+        """
+        작업 즉시 실행 요청
+        
+        Args:
+            name: 작업 이름
+        
+        Returns:
+            'scheduled' (바로 실행), 'queued' (실행 중이라 끝난 직후 다시 실행),
+            작업이 없으면 None
+        """
+        job = self.jobs.get(name)
+        if job is None:
+            return None
+        with job.lock:
+            if job.running:
+                job.pending_trigger = True
+                return 'queued'
+            job.next_run = time.time()
+            return 'scheduled'
+    
+    def run_scheduler(self, poll_seconds: float = 1.0):
+        """실행 시각이 된 작업을 동시 실행 한도 안에서 제출"""
+        while not self.stop_event.is_set():
+            now = time.time()
+            for job in self.jobs.values():
+                with job.lock:
+                    if job.running or job.next_run > now:
+                        continue
+                    # 제출 직후 중복 제출을 막기 위해 다음 실행 시각을 먼저 미룸
+                    job.next_run = float('inf')
+                self.pool.submit(self.refresh, job)
+            self.stop_event.wait(poll_seconds)
+    
+    def shutdown(self):
+        self.stop_event.set()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.bq_executor.jobs.cancel_all()
+        if self.summarizer:
+            self.summarizer.close()
+
+
+def make_handler(service: RefreshService):
+    """RefreshService를 참조하는 HTTP 요청 핸들러 클래스 생성"""
+    
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: Any):
+            payload = to_json_bytes(body)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def _parts(self) -> List[str]:
+            return [p for p in self.path.split('?', 1)[0].split('/') if p]
+        
+        def do_GET(self):
+            parts = self._parts()
+            if parts == ['jobs']:
+                self._send(200, [
+                    {k: v for k, v in job.snapshot().items() if k not in ('statistics', 'summary')}
+                    for job in service.jobs.values()
+                ])
+                return
+            if len(parts) in (2, 3) and parts[0] == 'jobs' and parts[1] in service.jobs:
+                job = service.jobs[parts[1]]
+                if len(parts) == 2:
+                    self._send(200, job.snapshot())
+                    return
+                if parts[2] == 'results':
+                    self._send(200, job.snapshot(with_results=True))
+                    return
+            self._send(404, {'error': f"존재하지 않는 경로: {self.path}"})
+        
+        def do_POST(self):
+            parts = self._parts()
+            if len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'refresh':
+                status = service.trigger(parts[1])
+                if status:
+                    self._send(202, {'name': parts[1], 'status': status})
+                    return
+            self._send(404, {'error': f"존재하지 않는 경로: {self.path}"})
+        
+        def log_message(self, format: str, *args):
+            pass  # 요청 로그는 출력하지 않음
+    
+    return Handler
+
+
+def load_config(config_file: str) -> Dict[str, Any]:
+    """서비스 설정 파일(JSON) 읽기"""
+    config_path = Path(config_file)
+    if not config_path.exists():
+        raise FileNotFoundError(f"설정 파일을 찾을 수 없습니다: {config_file}")
+    
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        description='템플릿 결과/요약 주기 갱신 서비스',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # 설정 파일에 등록된 템플릿을 주기적으로 갱신하고 http://127.0.0.1:8080 으로 제공
+  python scripts/refresh_service.py service.json
+  
+  # 요약 없이 쿼리 결과만 갱신
+  python scripts/refresh_service.py service.json --no-summary
+  
+  # 최신 결과 조회
+  curl http://127.0.0.1:8080/jobs/eth_tx_volume
+        """
+    )
+    
+    parser.add_argument('config', help='서비스 설정 파일 경로 (JSON)')
+    parser.add_argument('--host', help=f'HTTP 바인드 주소 (기본값: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, help=f'HTTP 포트 (기본값: {DEFAULT_PORT})')
+    parser.add_argument(
+        '--output-dir',
+        help='최신 결과 저장 디렉토리 (기본값: 설정의 output_dir 또는 service_data)'
+    )
+    parser.add_argument('--project-id', '-p', help='GCP 프로젝트 ID (기본값: GCP_PROJECT_ID 환경 변수)')
+    parser.add_argument('--api-key', help='Gemini API 키 (기본값: GEMINI_API_KEY 환경 변수)')
+    parser.add_argument('--no-summary', action='store_true', help='Gemini 요약 없이 쿼리 결과만 갱신')
+    
+    args = parser.parse_args()
+    
+    try:
+        config = load_config(args.config)
+        service = RefreshService(
+            config,
+            output_dir=args.output_dir or config.get('output_dir', 'service_data'),
+            project_id=args.project_id,
+            api_key=args.api_key,
+            summarize=not args.no_summary
+        )
+    except Exception as e:
+        print(f"\n✗ 오류 발생: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    
+    host = args.host or config.get('host', DEFAULT_HOST)
+    port = args.port or config.get('port', DEFAULT_PORT)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    
+    def stop(signum, frame):
+        print("\n종료 중...")
+        service.shutdown()
+        threading.Thread(target=server.shutdown, daemon=True).start()
+    
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    
+    scheduler = threading.Thread(target=service.run_scheduler, daemon=True)
+    scheduler.start()
+    
+    print(f"🔄 갱신 서비스 시작: 작업 {len(service.jobs)}개, http://{host}:{port}/jobs")
+    server.serve_forever()
+    server.server_close()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+"""
+저장된 쿼리 결과 읽기/쓰기 (CSV, NDJSON, JSON, Parquet, 표준 입출력)
+
+run_query.py가 저장한 결과(또는 `-o -`로 표준 출력에 쓴 결과)를 다시 ResultSet으로
+읽어 summarize_with_gemini.py가 BigQuery를 다시 조회하지 않고 요약할 수 있게 합니다.
+
+- 파일은 mmap으로 열어 줄 단위로 읽고, 일정 행 수마다 컬럼으로 전치하여
+  전체 텍스트나 행 dict 리스트를 메모리에 두지 않습니다.
+- CSV/JSON의 문자열 값은 컬럼 단위로 타입을 추론합니다 (INT64, BIGNUMERIC, FLOAT64,
+  BOOL, DATE, DATETIME, TIMESTAMP, STRING). 64비트를 넘는 정수(wei 값 등)는
+  Decimal(BIGNUMERIC)로 읽습니다. 시간 컬럼은 chunking/alignment에서
+  그대로 인식됩니다.
+- Parquet은 pyarrow가 설치된 경우에만 지원합니다 (pip install pyarrow).
+
+사용법:
+    from result_io import read_results, write_results
+    
+    rows = read_results('results.csv')          # 또는 '-' (표준 입력)
+    write_results(rows.schema, rows.iter_tuples(), sys.stdout, 'ndjson')
+    
+    python scripts/run_query.py templates/queries/01_tx_volume.sql -o - -f ndjson \\
+      | python scripts/summarize_with_gemini.py --from-file -
+"""
+
+import io
+import sys
+import csv
+import json
+import mmap
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None  # Parquet 입력은 pyarrow가 있을 때만 지원
+
+from result_set import INT64_MAX, INT64_MIN, ResultSet, _compact_column
+from serialization import json_default
+
+# 표준 입출력을 뜻하는 경로
+STDIO_PATH = '-'
+
+# 확장자별 입력 형식
+FORMAT_BY_SUFFIX = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.json': 'json',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+}
+
+# 한 번에 컬럼으로 전치할 행 수
+READ_CHUNK_ROWS = 10_000
+
+PARQUET_MAGIC = b'PAR1'
+
+_BOOL_VALUES = {'true': True, 'false': False}
+
+
+def _parse_int(value: str) -> int:
+    if value.strip() != value or value.startswith('+'):
+        raise ValueError(value)
+    number = int(value)
+    if not INT64_MIN <= number <= INT64_MAX:
+        raise ValueError(value)
+    return number
+
+
+def _parse_big_int(value: str) -> Decimal:
+    """INT64 범위를 넘는 정수 (wei 값 등)는 정밀도를 잃지 않도록 Decimal로 변환"""
+    if value.strip() != value or value.startswith('+'):
+        raise ValueError(value)
+    return Decimal(int(value))
+
+
+def _parse_timestamp(value: str) -> datetime:
+    if len(value) < 19 or value[4] != '-' or value[10] not in ' T':
+        raise ValueError(value)
+    # BigQuery 콘솔/CLI 표기 (2025-03-01 00:00:00 UTC)와 Z 표기 처리
+    if value.endswith(' UTC'):
+        value = value[:-4] + '+00:00'
+    elif value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+
+def _parse_date(value: str) -> date:
+    if len(value) != 10 or value[4] != '-':
+        raise ValueError(value)
+    return date.fromisoformat(value)
+
+
+def _convert_all(values: List[Any], parse) -> Optional[List[Any]]:
+    """모든 문자열 값을 parse로 변환 (하나라도 실패하면 None)"""
+    converted = []
+    try:
+        for value in values:
+            converted.append(None if value is None else parse(value))
+    except (ValueError, TypeError, KeyError):
+        return None
+    return converted
+
+
+def infer_column(values: List[Any]) -> Tuple[List[Any], Optional[str]]:
+    """
+    문자열 컬럼의 타입 추론 및 변환
+    
+    빈 문자열은 NULL로 봅니다. 문자열이 아닌 값(JSON 숫자 등)이 섞여 있으면
+    변환하지 않습니다.
+    
+    Args:
+        values: 컬럼 값 목록
+    
+    Returns:
+        (변환된 값 목록, BigQuery 필드 타입)
+    """
+    values = [None if value == '' else value for value in values]
+    present = [value for value in values if value is not None]
+    if not present:
+        return values, None
+    if not all(isinstance(value, str) for value in present):
+        if all(isinstance(value, bool) for value in present):
+            return values, 'BOOL'
+        if all(isinstance(value, int) and not isinstance(value, bool) for value in present):
+            if all(INT64_MIN <= value <= INT64_MAX for value in present):
+                return values, 'INT64'
+            return [None if value is None else Decimal(value) for value in values], 'BIGNUMERIC'
+        if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+            return [None if value is None else float(value) for value in values], 'FLOAT64'
+        return values, None
+    
+    for parse, field_type in (
+        (_parse_int, 'INT64'),
+        (_parse_big_int, 'BIGNUMERIC'),
+        (float, 'FLOAT64'),
+        (lambda v: _BOOL_VALUES[v.lower()], 'BOOL'),
+        (_parse_date, 'DATE'),
+        (_parse_timestamp, None),
+    ):
+        converted = _convert_all(values, parse)
+        if converted is None:
+            continue
+        if field_type is None:
+            first = next(value for value in converted if value is not None)
+            field_type = 'TIMESTAMP' if first.tzinfo is not None else 'DATETIME'
+        return converted, field_type
+    return values, 'STRING'
+
+
+def _finish(schema: Sequence[str], columns: List[list]) -> ResultSet:
+    """컬럼별 타입 추론 후 ResultSet 생성"""
+    converted, field_types = [], []
+    for column in columns:
+        values, field_type = infer_column(column)
+        converted.append(_compact_column(values))
+        field_types.append(field_type)
+    return ResultSet(schema, converted, field_types)
+
+
+def _read_csv(lines: Iterator[str]) -> ResultSet:
+    reader = csv.reader(lines)
+    try:
+        header = next(reader)
+    except StopIteration:
+        return ResultSet([], [])
+    
+    # 청크 단위로 전치하여 행 리스트를 오래 들고 있지 않음
+    columns: List[list] = [[] for _ in header]
+    rows = (row for row in reader if row)
+    while True:
+        chunk = list(islice(rows, READ_CHUNK_ROWS))
+        if not chunk:
+            break
+        for row in chunk:
+            if len(row) != len(header):
+                raise ValueError(f"컬럼 수가 헤더와 다른 행이 있습니다: 헤더 {len(header)}개, 행 {len(row)}개")
+        for column, values in zip(columns, zip(*chunk)):
+            column.extend(values)
+    return _finish(header, columns)
+
+
+def _read_records(records: Iterable[Any]) -> ResultSet:
+    """JSON 객체 행을 읽는 즉시 컬럼에 추가 (중간에 새 컬럼이 나오면 이전 행은 NULL)"""
+    schema: List[str] = []
+    columns: List[list] = []
+    count = 0
+    for record in records:
+        if not isinstance(record, dict):
+            raise ValueError(f"{count + 1}번째 행이 JSON 객체가 아닙니다.")
+        for name in record:
+            if name not in schema:
+                schema.append(name)
+                columns.append([None] * count)
+        for name, column in zip(schema, columns):
+            column.append(record.get(name))
+        count += 1
+    return _finish(schema, columns)
+
+
+def _parse_lines(lines: Iterator[str]) -> Iterator[Any]:
+    """NDJSON 줄을 하나씩 파싱"""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"NDJSON {number}번째 줄을 읽을 수 없습니다: {e}")
+
+
+def _read_json(text: str) -> ResultSet:
+    data = json.loads(text)
+    if isinstance(data, dict):
+        # run_query.py 결과 외에 {"data": [...]} 형식도 허용
+        data = data.get('data', data.get('results', [data]))
+    return _read_records(data)
+
+
+def _parquet_field_type(arrow_type: Any) -> Optional[str]:
+    types = pyarrow.types
+    if types.is_timestamp(arrow_type):
+        return 'TIMESTAMP' if arrow_type.tz else 'DATETIME'
+    if types.is_date(arrow_type):
+        return 'DATE'
+    if types.is_integer(arrow_type):
+        return 'INT64'
+    if types.is_floating(arrow_type):
+        return 'FLOAT64'
+    if types.is_decimal(arrow_type):
+        return 'NUMERIC'
+    if types.is_boolean(arrow_type):
+        return 'BOOL'
+    if types.is_string(arrow_type) or types.is_large_string(arrow_type):
+        return 'STRING'
+    return None
+
+
+def _read_parquet(source: Any) -> ResultSet:
+    if pyarrow is None:
+        raise ValueError("Parquet 입력은 pyarrow 패키지가 필요합니다. 설치 방법: pip install pyarrow")
+    parquet_file = pq.ParquetFile(source, memory_map=isinstance(source, str))
+    arrow_schema = parquet_file.schema_arrow
+    schema = list(arrow_schema.names)
+    columns: List[list] = [[] for _ in schema]
+    for batch in parquet_file.iter_batches(batch_size=READ_CHUNK_ROWS):
+        for column, array in zip(columns, batch.columns):
+            column.extend(array.to_pylist())
+    field_types = [_parquet_field_type(field.type) for field in arrow_schema]
+    return ResultSet(schema, [_compact_column(c) for c in columns], field_types)
+
+
+def detect_format(path: str, head: bytes = b'') -> str:
+    """
+    입력 형식 판단 (확장자 우선, 표준 입력은 앞부분 내용으로 판단)
+    
+    Args:
+        path: 파일 경로 또는 '-'
+        head: 입력 앞부분 바이트
+    
+    Returns:
+        'csv', 'ndjson', 'json', 'parquet'
+    """
+    suffix = Path(path).suffix.lower() if path != STDIO_PATH else ''
+    if suffix in FORMAT_BY_SUFFIX:
+        format_name = FORMAT_BY_SUFFIX[suffix]
+        # .json 확장자라도 한 줄에 한 행이면 NDJSON
+        if format_name == 'json' and head.lstrip().startswith(b'{'):
+            return 'ndjson'
+        return format_name
+    if head.startswith(PARQUET_MAGIC):
+        return 'parquet'
+    stripped = head.lstrip()
+    if stripped.startswith(b'['):
+        return 'json'
+    if stripped.startswith(b'{'):
+        return 'ndjson'
+    return 'csv'
+
+
+def read_results(path: str, input_format: Optional[str] = None) -> ResultSet:
+    """
+    저장된 쿼리 결과를 ResultSet으로 읽기
+    
+    Args:
+        path: 파일 경로 ('-'이면 표준 입력)
+        input_format: 'csv', 'ndjson', 'json', 'parquet' (None이면 자동 판단)
+    
+    Returns:
+        ResultSet (문자열 값은 컬럼 단위로 타입 추론)
+    """
+    if path == STDIO_PATH:
+        stream = sys.stdin.buffer
+        head = stream.peek(64)[:64] if hasattr(stream, 'peek') else b''
+        input_format = input_format or detect_format(path, head)
+        if input_format == 'parquet':
+            # Parquet은 파일 끝의 메타데이터가 필요하므로 전체를 읽어야 함
+            return _read_parquet(io.BytesIO(stream.read()))
+        if input_format == 'json':
+            return _read_json(stream.read().decode('utf-8'))
+        lines = (line.decode('utf-8') for line in stream)
+        return _read_csv(lines) if input_format == 'csv' else _read_records(_parse_lines(lines))
+    
+    file_path = Path(path)
+    if not file_path.exists():
+        raise FileNotFoundError(f"결과 파일을 찾을 수 없습니다: {path}")
+    if file_path.stat().st_size == 0:
+        raise ValueError(f"결과 파일이 비어있습니다: {path}")
+    
+    with open(file_path, 'rb') as f:
+        input_format = input_format or detect_format(path, f.read(64))
+    if input_format == 'parquet':
+        return _read_parquet(str(file_path))
+    
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if input_format == 'json':
+            return _read_json(mapped[:].decode('utf-8'))
+        lines = (line.decode('utf-8') for line in iter(mapped.readline, b''))
+        return _read_csv(lines) if input_format == 'csv' else _read_records(_parse_lines(lines))
+
+
+def write_results(
+    schema: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    stream: TextIO,
+    output_format: str = 'csv'
+) -> int:
+    """
+    행을 스트림에 한 행씩 쓰기 (전체 결과를 모으지 않음)
+    
+    Args:
+        schema: 컬럼 이름 목록
+        rows: 값 튜플 이터러블
+        stream: 출력 텍스트 스트림 (예: sys.stdout)
+        output_format: 'csv' 또는 'ndjson' ('json'도 스트리밍을 위해 NDJSON으로 씀)
+    
+    Returns:
+        쓴 행 수
+    """
+    count = 0
+    if output_format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow(schema)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif output_format in ('ndjson', 'json'):
+        # 파일 저장과 같은 변환 규칙 (Decimal은 정밀도 보존을 위해 문자열)
+        for row in rows:
+            stream.write(json.dumps(
+                dict(zip(schema, row)),
+                ensure_ascii=False,
+                separators=(',', ':'),
+                default=json_default
+            ))
+            stream.write('\n')
+            count += 1
+    else:
+        raise ValueError(f"지원하지 않는 출력 형식: {output_format}")
+    stream.flush()
+    return count
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+컬럼 기반(columnar) 쿼리 결과 컨테이너
+
+BigQuery 결과를 행마다 dict로 만들면 모든 행이 컬럼 이름 문자열과 값 객체를
+따로 들고 있게 됩니다. ResultSet은 스키마(컬럼 이름) 하나를 공유하고 값은
+컬럼별로 저장합니다. 정수/실수 컬럼은 array.array로 압축하여 값 객체도 만들지 않습니다.
+
+사용법:
+    from result_set import ResultSet
+    
+    rows = ResultSet.from_bigquery(query_job.result())
+    rows['tx_count']        # 컬럼 접근 (복사 없음)
+    rows[:5]                # 슬라이스 (복사 없이 범위만 공유)
+    dict(rows[0])           # 행 뷰 → dict
+    rows.to_records()       # list of dict (JSON 직렬화용)
+
+메모리 비교:
+    python scripts/result_set.py --bench --rows 200000
+"""
+
+import sys
+import argparse
+from array import array
+from collections.abc import Mapping, Sequence
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+INT64_MIN = -(2 ** 63)
+INT64_MAX = 2 ** 63 - 1
+
+
+def _compact_column(values: list) -> Union[list, array]:
+    """
+    값이 모두 int 또는 모두 float인 컬럼을 array.array로 변환
+    
+    NULL(None)이 섞여 있거나 다른 타입이 있으면 list를 그대로 반환합니다.
+    """
+    if not values:
+        return values
+    
+    value_type = type(values[0])
+    if value_type is int:
+        for value in values:
+            if type(value) is not int or not INT64_MIN <= value <= INT64_MAX:
+                return values
+        return array('q', values)
+    
+    if value_type is float:
+        for value in values:
+            if type(value) is not float:
+                return values
+        return array('d', values)
+    
+    return values
+
+
+class ColumnView(Sequence):
+    """컬럼의 일부 범위를 복사 없이 참조하는 뷰"""
+    
+    __slots__ = ('_data', '_start', '_stop')
+    
+    def __init__(self, data: Sequence, start: int, stop: int):
+        self._data = data
+        self._start = start
+        self._stop = stop
+    
+    def __len__(self) -> int:
+        return self._stop - self._start
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self._data[self._start + i] for i in range(start, stop, step)]
+            return ColumnView(self._data, self._start + start, self._start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("컬럼 인덱스가 범위를 벗어났습니다.")
+        return self._data[self._start + index]
+    
+    def __iter__(self) -> Iterator[Any]:
+        return islice(self._data, self._start, self._stop)
+    
+    def tolist(self) -> list:
+        """일반 list로 복사"""
+        return list(self)
+
+
+class RowView(Mapping):
+    """ResultSet의 한 행을 dict처럼 읽는 뷰 (값을 복사하지 않음)"""
+    
+    __slots__ = ('_result_set', '_index')
+    
+    def __init__(self, result_set: 'ResultSet', index: int):
+        self._result_set = result_set
+        self._index = index
+    
+    def __getitem__(self, key: str) -> Any:
+        position = self._result_set._positions[key]
+        return self._result_set._columns[position][self._index]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._result_set.schema)
+    
+    def __len__(self) -> int:
+        return len(self._result_set.schema)
+    
+    def __repr__(self) -> str:
+        return f"RowView({dict(self)!r})"
+
+
+class ResultSet:
+    """컬럼 기반 쿼리 결과 (스키마 공유, 행 뷰/슬라이스/컬럼 접근 시 복사 없음)"""
+    
+    __slots__ = ('schema', 'field_types', '_columns', '_positions', '_start', '_stop')
+    
+    def __init__(
+        self,
+        schema: Iterable[str],
+        columns: List[Sequence],
+        field_types: Optional[Iterable[Optional[str]]] = None,
+        start: int = 0,
+        stop: Optional[int] = None
+    ):
+        """
+        초기화
+        
+        Args:
+            schema: 컬럼 이름 목록
+            columns: 컬럼별 값 목록 (schema와 같은 순서)
+            field_types: BigQuery 필드 타입 목록 (없으면 None)
+            start: 이 ResultSet이 참조하는 첫 행 위치
+            stop: 이 ResultSet이 참조하는 마지막 행 다음 위치 (None이면 끝까지)
+        """
+        self.schema: Tuple[str, ...] = tuple(schema)
+        if len(columns) != len(self.schema):
+            raise ValueError(
+                f"컬럼 수가 스키마와 다릅니다: 스키마 {len(self.schema)}개, 컬럼 {len(columns)}개"
+            )
+        self.field_types: Tuple[Optional[str], ...] = (
+            tuple(field_types) if field_types is not None else (None,) * len(self.schema)
+        )
+        self._columns = columns
+        self._positions: Dict[str, int] = {name: i for i, name in enumerate(self.schema)}
+        self._start = start
+        if stop is None:
+            stop = len(columns[0]) if columns else 0
+        self._stop = stop
+    
+    # ------------------------------------------------------------------
+    # 생성
+    # ------------------------------------------------------------------
+    
+    @classmethod
+    def from_rows(
+        cls,
+        schema: Iterable[str],
+        rows: Iterable[Sequence],
+        field_types: Optional[Iterable[Optional[str]]] = None,
+        chunk_size: int = 10_000
+    ) -> 'ResultSet':
+        """
+        튜플(값 시퀀스) 행들로부터 생성
+        
+        Args:
+            schema: 컬럼 이름 목록
+            rows: 행 이터러블 (각 행은 schema 순서의 값 시퀀스)
+            field_types: BigQuery 필드 타입 목록
+            chunk_size: 한 번에 전치(transpose)할 행 수
+        
+        Returns:
+            ResultSet
+        """
+        schema = tuple(schema)
+        columns: List[list] = [[] for _ in schema]
+        iterator = iter(rows)
+        
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            for column, values in zip(columns, zip(*chunk)):
+                column.extend(values)
+        
+        return cls(schema, [_compact_column(c) for c in columns], field_types)
+    
+    @classmethod
+    def from_bigquery(cls, row_iterator: Any) -> 'ResultSet':
+        """
+        BigQuery RowIterator(query_job.result())로부터 생성
+        
+        페이지 단위로 전치하므로 전체 결과를 행 객체 리스트로 들고 있지 않습니다.
+        
+        Args:
+            row_iterator: google.cloud.bigquery.table.RowIterator
+        
+        Returns:
+            ResultSet
+        """
+        schema = row_iterator.schema or []
+        names = [field.name for field in schema]
+        field_types = [getattr(field, 'field_type', None) for field in schema]
+        columns: List[list] = [[] for _ in names]
+        
+        pages = getattr(row_iterator, 'pages', None)
+        if pages is None:
+            pages = [row_iterator]
+        
+        for page in pages:
+            page_rows = [row.values() for row in page]
+            if not page_rows:
+                continue
+            for column, values in zip(columns, zip(*page_rows)):
+                column.extend(values)
+        
+        return cls(names, [_compact_column(c) for c in columns], field_types)
+    
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping]) -> 'ResultSet':
+        """
+        dict 리스트(기존 execute_query 반환 형식)로부터 생성
+        
+        Args:
+            records: 행 dict 목록
+        
+        Returns:
+            ResultSet
+        """
+        if isinstance(records, ResultSet):
+            return records
+        
+        records = list(records)
+        if not records:
+            return cls([], [])
+        
+        schema = list(records[0].keys())
+        return cls.from_rows(schema, ([record.get(name) for name in schema] for record in records))
+    
+    # ------------------------------------------------------------------
+    # 접근
+    # ------------------------------------------------------------------
+    
+    def __len__(self) -> int:
+        return self._stop - self._start
+    
+    def __bool__(self) -> bool:
+        return len(self) > 0
+    
+    def __iter__(self) -> Iterator[RowView]:
+        for index in range(self._start, self._stop):
+            yield RowView(self, index)
+    
+    def __getitem__(self, key: Union[int, slice, str]):
+        if isinstance(key, str):
+            return self.column(key)
+        
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return self.take(range(start, stop, step))
+            return ResultSet(
+                self.schema, self._columns, self.field_types,
+                self._start + start, self._start + max(start, stop)
+            )
+        
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("행 인덱스가 범위를 벗어났습니다.")
+        return RowView(self, self._start + key)
+    
+    def __repr__(self) -> str:
+        return f"ResultSet(rows={len(self)}, columns={list(self.schema)})"
+    
+    @property
+    def columns(self) -> List[str]:
+        """컬럼 이름 목록"""
+        return list(self.schema)
+    
+    def column(self, name: str) -> Sequence:
+        """
+        컬럼 값 시퀀스 반환 (복사 없음)
+        
+        Args:
+            name: 컬럼 이름
+        
+        Returns:
+            전체 범위면 내부 컬럼 자체, 일부 범위면 ColumnView
+        """
+        if name not in self._positions:
+            raise KeyError(f"존재하지 않는 컬럼: {name}")
+        
+        data = self._columns[self._positions[name]]
+        if self._start == 0 and self._stop == len(data):
+            return data
+        return ColumnView(data, self._start, self._stop)
+    
+    def take(self, indices: Iterable[int]) -> 'ResultSet':
+        """
+        지정한 행 위치들만 모은 새 ResultSet 생성 (값 복사 발생)
+        
+        Args:
+            indices: 이 ResultSet 기준 행 위치 목록
+        
+        Returns:
+            ResultSet
+        """
+        positions = [self._start + i for i in indices]
+        columns = [
+            _compact_column([data[p] for p in positions])
+            for data in self._columns
+        ]
+        return ResultSet(self.schema, columns, self.field_types)
+    
+    def with_column(self, name: str, values: Sequence, field_type: Optional[str] = None) -> 'ResultSet':
+        """
+        컬럼을 추가(또는 교체)한 새 ResultSet 반환 (기존 컬럼은 공유)
+        
+        Args:
+            name: 컬럼 이름
+            values: 이 ResultSet 길이와 같은 값 시퀀스
+            field_type: BigQuery 필드 타입
+        
+        Returns:
+            ResultSet
+        """
+        if len(values) != len(self):
+            raise ValueError(f"컬럼 길이가 다릅니다: {name} ({len(values)} != {len(self)})")
+        
+        base = self if (self._start == 0 and self._stop == self._full_length()) else self.take(range(len(self)))
+        schema = list(base.schema)
+        columns = list(base._columns)
+        field_types = list(base.field_types)
+        if name in base._positions:
+            position = base._positions[name]
+            columns[position] = values
+            field_types[position] = field_type
+        else:
+            schema.append(name)
+            columns.append(values)
+            field_types.append(field_type)
+        return ResultSet(schema, columns, field_types)
+    
+    def iter_tuples(self) -> Iterator[tuple]:
+        """행을 값 튜플로 순회 (CSV 저장 등)"""
+        return zip(*(self.column(name) for name in self.schema)) if self.schema else iter(())
+    
+    def to_records(self) -> List[Dict[str, Any]]:
+        """dict 리스트로 변환 (JSON 직렬화/프롬프트용)"""
+        schema = self.schema
+        return [dict(zip(schema, values)) for values in self.iter_tuples()]
+    
+    def _full_length(self) -> int:
+        return len(self._columns[0]) if self._columns else 0
+
+
+def _memory_of(factory) -> int:
+    """factory()가 만든 객체가 차지하는 메모리 (tracemalloc 기준 바이트)"""
+    import tracemalloc
+    
+    tracemalloc.start()
+    obj = factory()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current
+
+
+def benchmark(n_rows: int = 100_000, n_cols: int = 12):
+    """
+    list of dict와 ResultSet의 메모리 사용량 비교
+    
+    Args:
+        n_rows: 샘플 행 수
+        n_cols: 컬럼 수 (정수/실수/문자열 컬럼을 번갈아 생성)
+    """
+    schema = [f"col_{i}" for i in range(n_cols)]
+    
+    def make_value(row: int, col: int) -> Any:
+        kind = col % 3
+        if kind == 0:
+            return 1_000_000 + row * (col + 1)
+        if kind == 1:
+            return row / (col + 1.5)
+        return f"0x{row:040x}"
+    
+    def make_tuples():
+        return [tuple(make_value(r, c) for c in range(n_cols)) for r in range(n_rows)]
+    
+    dict_bytes = _memory_of(lambda: [dict(zip(schema, row)) for row in make_tuples()])
+    rs_bytes = _memory_of(lambda: ResultSet.from_rows(schema, make_tuples()))
+    
+    print(f"메모리 비교: {n_rows:,}행 × {n_cols}컬럼")
+    print(f"  list of dict : {dict_bytes / 1024 ** 2:8.2f} MB ({dict_bytes / n_rows:6.0f} B/행)")
+    print(f"  ResultSet    : {rs_bytes / 1024 ** 2:8.2f} MB ({rs_bytes / n_rows:6.0f} B/행)")
+    if rs_bytes:
+        print(f"  절감 비율    : x{dict_bytes / rs_bytes:.2f}")
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='ResultSet 메모리 벤치마크')
+    parser.add_argument('--bench', action='store_true', help='벤치마크 실행')
+    parser.add_argument('--rows', type=int, default=100_000, help='샘플 행 수 (기본값: 100000)')
+    parser.add_argument('--cols', type=int, default=12, help='컬럼 수 (기본값: 12)')
+    args = parser.parse_args()
+    
+    if not args.bench:
+        parser.print_help()
+        sys.exit(0)
+    
+    benchmark(args.rows, args.cols)
+
+
+if __name__ == '__main__':
+    main()
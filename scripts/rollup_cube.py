@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+시간별 집계를 한 번만 가져와 일/주/월/시간대 롤업을 로컬 Parquet으로 만드는 큐브
+
+Looker Studio 대시보드는 차트마다 다른 단위(일별 추이, 주별 합계, 시간대별 패턴)로
+BigQuery를 다시 조회합니다. 이 모듈은 시간별 집계(트랜잭션 수, 수수료 합계/최대)를
+날짜별 Parquet 파티션으로 한 번만 가져오고, 일/주/월/시간대(hour_of_day) 롤업을
+로컬에서 계산해 작은 Parquet 파일로 저장합니다.
+
+- 새로 가져온 날짜가 속한 파티션만 다시 계산합니다 (일/주 롤업은 월, 월 롤업은
+  연도 단위 파티션).
+- 하루가 끝나기 전에 가져온 날짜(오늘)는 다음 sync에서 다시 가져옵니다.
+- 평균은 합계/건수로 다시 계산하므로 어느 단위에서도 정확합니다. 중앙값과 고유 주소
+  수는 합칠 수 없으므로 큐브에 넣지 않습니다 (고유 주소는 hll_sketch.py 사용).
+- 파티션은 Hive 형식(<grain>/<key>=<value>/part-0.parquet)이라 DuckDB
+  read_parquet(..., hive_partitioning=true)나 bq load로 그대로 읽을 수 있습니다.
+
+사용법:
+    python scripts/rollup_cube.py sync <cube> [옵션]
+    python scripts/rollup_cube.py show <cube> <grain> [옵션]
+
+예시:
+    python scripts/rollup_cube.py sync eth --days 30
+    python scripts/rollup_cube.py show eth day --last 14
+    python scripts/rollup_cube.py show eth hour_of_day --window 7
+
+필요 패키지:
+    pip install pyarrow
+"""
+
+import os
+import sys
+import argparse
+import json
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Set, Tuple
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # python-dotenv가 없으면 환경 변수에서 직접 가져옴
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from job_control import JobController
+from local_backend import create_client
+from serialization import to_json
+
+# 큐브 기본 경로 (ROLLUP_CUBE_DIR 환경 변수로 변경)
+DEFAULT_CUBE_DIR = 'local_data/cube'
+
+# 시간대(hour_of_day) 롤업 기본 기간(일)
+DEFAULT_HOUR_OF_DAY_WINDOWS = (7, 30)
+
+# 측정값 (이름, 시간별 집계 SQL 식, 롤업 방식)과 파생 평균 (이름: (합계, 건수))
+CUBES: Dict[str, Dict[str, Any]] = {
+    'eth': {
+        'label': 'Ethereum',
+        'table': 'bigquery-public-data.crypto_ethereum.transactions',
+        'where': 'receipt_status = 1',
+        'measures': [
+            ('tx_count', 'COUNT(*)', 'sum'),
+            # gas_price * receipt_gas_used (wei)는 INT64를 넘을 수 있으므로 BIGNUMERIC으로 계산
+            ('gas_cost_eth_sum', 'SUM(CAST(gas_price AS BIGNUMERIC) * receipt_gas_used) / POW(10, 18)', 'sum'),
+            ('gas_cost_eth_max', 'MAX(CAST(gas_price AS BIGNUMERIC) * receipt_gas_used) / POW(10, 18)', 'max'),
+        ],
+        'ratios': {'avg_gas_cost_eth': ('gas_cost_eth_sum', 'tx_count')},
+    },
+    'sol': {
+        'label': 'Solana',
+        'table': 'bigquery-public-data.crypto_solana_mainnet_us.Transactions',
+        'where': "status = 'Success'",
+        'measures': [
+            ('tx_count', 'COUNT(*)', 'sum'),
+            ('fee_sol_sum', 'SUM(fee) / POW(10, 9)', 'sum'),
+            ('fee_sol_max', 'MAX(fee) / POW(10, 9)', 'max'),
+        ],
+        'ratios': {'avg_fee_sol': ('fee_sol_sum', 'tx_count')},
+    },
+}
+
+# 롤업 단위: (키 컬럼, 파티션 키 이름)
+GRAINS: Dict[str, Tuple[str, str]] = {
+    'hour': ('hour', 'date'),
+    'day': ('date', 'month'),
+    'week': ('week_start', 'month'),
+    'month': ('month', 'year'),
+    'hour_of_day': ('hour_of_day', 'window'),
+}
+
+PART_FILE = 'part-0.parquet'
+MANIFEST_FILE = '_manifest.json'
+
+
+def hourly_sql(cube: str, start: date, end: date) -> str:
+    """
+    시간별 집계 쿼리 (BigQuery, 로컬 백엔드는 translate_sql로 변환)
+    
+    Args:
+        cube: CUBES 키
+        start: 시작 날짜 (포함)
+        end: 끝 날짜 (포함)
+    
+    Returns:
+        hour와 측정값 컬럼을 반환하는 SQL
+    """
+    spec = CUBES[cube]
+    measures = ',\n'.join(f"  {expression} AS {name}" for name, expression, _ in spec['measures'])
+    return f"""SELECT
+  TIMESTAMP_TRUNC(block_timestamp, HOUR) AS hour,
+{measures}
+FROM
+  `{spec['table']}`
+WHERE
+  block_timestamp >= TIMESTAMP('{start.isoformat()}')
+  AND block_timestamp < TIMESTAMP('{(end + timedelta(days=1)).isoformat()}')
+  AND {spec['where']}
+GROUP BY
+  hour"""
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _days(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def _month_bounds(key: str) -> Tuple[date, date]:
+    first = date.fromisoformat(f"{key}-01")
+    following = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, following - timedelta(days=1)
+
+
+class RollupCube:
+    """큐브 하나(체인/백엔드)의 Parquet 파티션 저장소"""
+    
+    def __init__(self, cube: str, backend: str = 'bigquery', root: Optional[str] = None):
+        """
+        초기화
+        
+        Args:
+            cube: CUBES 키
+            backend: 시간별 집계를 가져온 백엔드 (백엔드별로 따로 저장)
+            root: 큐브 루트 디렉터리 (None이면 ROLLUP_CUBE_DIR 또는 DEFAULT_CUBE_DIR)
+        """
+        if pa is None:
+            raise ImportError("rollup_cube.py는 pyarrow 패키지가 필요합니다. (pip install pyarrow)")
+        if cube not in CUBES:
+            raise ValueError(f"알 수 없는 큐브: {cube} (사용 가능: {', '.join(CUBES)})")
+        self.cube = cube
+        self.spec = CUBES[cube]
+        self.path = Path(root or os.getenv('ROLLUP_CUBE_DIR') or DEFAULT_CUBE_DIR) / backend / cube
+        self.manifest_path = self.path / MANIFEST_FILE
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        if self.manifest_path.exists():
+            self.manifest = json.loads(self.manifest_path.read_text(encoding='utf-8'))
+    
+    # -- 파티션 입출력 ---------------------------------------------------
+    
+    def partition_path(self, grain: str, key: str) -> Path:
+        return self.path / grain / f"{GRAINS[grain][1]}={key}" / PART_FILE
+    
+    def write_partition(self, grain: str, key: str, table: 'pa.Table') -> None:
+        """파티션 파일 교체 (임시 파일에 쓴 뒤 이름 변경)"""
+        path = self.partition_path(grain, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix('.tmp')
+        pq.write_table(table, temporary)
+        os.replace(temporary, path)
+    
+    def read_partition(self, grain: str, key: str) -> Optional['pa.Table']:
+        path = self.partition_path(grain, key)
+        return pq.read_table(path) if path.exists() else None
+    
+    def partition_keys(self, grain: str) -> List[str]:
+        """저장된 파티션 키 목록 (오름차순)"""
+        directory = self.path / grain
+        if not directory.exists():
+            return []
+        prefix = f"{GRAINS[grain][1]}="
+        return sorted(
+            entry.name[len(prefix):] for entry in directory.iterdir()
+            if entry.name.startswith(prefix) and (entry / PART_FILE).exists()
+        )
+    
+    def read_hours(self, days: Iterable[date]) -> Optional['pa.Table']:
+        """날짜 목록의 시간별 파티션을 합친 테이블 (없는 날짜는 건너뜀)"""
+        tables = [table for table in (self.read_partition('hour', day.isoformat()) for day in days) if table is not None]
+        if not tables:
+            return None
+        return pa.concat_tables(tables)
+    
+    def complete_days(self) -> Set[date]:
+        """다시 가져올 필요가 없는(하루가 끝난 뒤 가져온) 날짜 집합"""
+        return {date.fromisoformat(day) for day, entry in self.manifest.items() if entry.get('complete')}
+    
+    def save_manifest(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.manifest_path.write_text(
+            json.dumps(dict(sorted(self.manifest.items())), ensure_ascii=False, indent=2),
+            encoding='utf-8'
+        )
+    
+    # -- 롤업 ------------------------------------------------------------
+    
+    def rollup(self, hours: 'pa.Table', grain: str) -> 'pa.Table':
+        """
+        시간별 테이블을 grain 단위로 집계 (pyarrow compute 벡터 연산)
+        
+        Args:
+            hours: hour 컬럼과 측정값 컬럼을 가진 시간별 테이블
+            grain: 'day', 'week', 'month', 'hour_of_day'
+        
+        Returns:
+            키 컬럼, hours(집계한 시간 수), 측정값, 파생 평균 컬럼 테이블 (키 오름차순)
+        """
+        key_column = GRAINS[grain][0]
+        timestamps = hours['hour']
+        if grain == 'hour_of_day':
+            keys = pc.hour(timestamps)
+        else:
+            unit = {'day': 'day', 'week': 'week', 'month': 'month'}[grain]
+            keys = pc.cast(pc.floor_temporal(timestamps, unit=unit, week_starts_monday=True), pa.timestamp('us')).cast(pa.date32())
+        
+        table = hours.append_column(key_column, keys)
+        aggregations = [('hour', 'count')] + [(name, how) for name, _, how in self.spec['measures']]
+        grouped = table.group_by(key_column).aggregate(aggregations)
+        columns = {key_column: grouped[key_column], 'hours': grouped['hour_count']}
+        for name, _, how in self.spec['measures']:
+            columns[name] = grouped[f"{name}_{how}"]
+        for name, (numerator, denominator) in self.spec['ratios'].items():
+            columns[name] = pc.divide(pc.cast(columns[numerator], pa.float64()), pc.cast(columns[denominator], pa.float64()))
+        return pa.table(columns).sort_by(key_column)
+    
+    def rebuild(self, touched_days: Iterable[date], hour_of_day_windows: Iterable[int] = DEFAULT_HOUR_OF_DAY_WINDOWS) -> Dict[str, int]:
+        """
+        새로 가져온 날짜가 속한 롤업 파티션만 다시 계산
+        
+        Args:
+            touched_days: 시간별 파티션이 바뀐 날짜
+            hour_of_day_windows: 시간대 롤업 기간(일) 목록 (최신 날짜 기준, 매번 다시 계산)
+        
+        Returns:
+            단위별 다시 쓴 파티션 수
+        """
+        touched_days = sorted(set(touched_days))
+        rewritten = {grain: 0 for grain in GRAINS if grain != 'hour'}
+        if not touched_days:
+            return rewritten
+        
+        # 일 롤업: 월 파티션
+        for key in sorted({day.strftime('%Y-%m') for day in touched_days}):
+            hours = self.read_hours(_days(*_month_bounds(key)))
+            if hours is not None:
+                self.write_partition('day', key, self.rollup(hours, 'day'))
+                rewritten['day'] += 1
+        
+        # 주 롤업: 주 시작일이 속한 월 파티션 (주가 다음 달로 넘어가도 같은 파티션)
+        for key in sorted({_week_start(day).strftime('%Y-%m') for day in touched_days}):
+            first, last = _month_bounds(key)
+            first_week = first + timedelta(days=(7 - first.weekday()) % 7)
+            hours = self.read_hours(_days(first_week, _week_start(last) + timedelta(days=6)))
+            if hours is not None:
+                self.write_partition('week', key, self.rollup(hours, 'week'))
+                rewritten['week'] += 1
+        
+        # 월 롤업: 연도 파티션
+        for year in sorted({day.year for day in touched_days}):
+            hours = self.read_hours(_days(date(year, 1, 1), date(year, 12, 31)))
+            if hours is not None:
+                self.write_partition('month', str(year), self.rollup(hours, 'month'))
+                rewritten['month'] += 1
+        
+        # 시간대 롤업: 저장된 최신 날짜 기준 최근 N일
+        stored = self.partition_keys('hour')
+        if stored:
+            latest = date.fromisoformat(stored[-1])
+            for window in hour_of_day_windows:
+                hours = self.read_hours(_days(latest - timedelta(days=window - 1), latest))
+                if hours is not None:
+                    self.write_partition('hour_of_day', f"{window}d", self.rollup(hours, 'hour_of_day'))
+                    rewritten['hour_of_day'] += 1
+        return rewritten
+    
+    def read(self, grain: str, keys: Optional[Iterable[str]] = None) -> Optional['pa.Table']:
+        """
+        롤업 읽기
+        
+        Args:
+            grain: GRAINS 키
+            keys: 읽을 파티션 키 (None이면 전체)
+        
+        Returns:
+            파티션을 합친 테이블 (없으면 None)
+        """
+        keys = self.partition_keys(grain) if keys is None else keys
+        tables = [table for table in (self.read_partition(grain, key) for key in keys) if table is not None]
+        if not tables:
+            return None
+        return pa.concat_tables(tables).sort_by(GRAINS[grain][0])
+
+
+def sync(
+    cube: RollupCube,
+    end: date,
+    days: int,
+    backend: str = 'bigquery',
+    project_id: Optional[str] = None,
+    local_db: Optional[str] = None,
+    hour_of_day_windows: Iterable[int] = DEFAULT_HOUR_OF_DAY_WINDOWS
+) -> Tuple[List[date], Dict[str, int]]:
+    """
+    아직 없는 날짜의 시간별 집계를 가져와 저장하고 바뀐 롤업 파티션만 다시 계산
+    
+    Args:
+        cube: 큐브 저장소
+        end: 마지막 날짜 (포함)
+        days: end부터 거슬러 올라갈 일수
+        backend: 'bigquery' 또는 'local'
+        project_id: GCP 프로젝트 ID
+        local_db: local 백엔드의 DuckDB 파일 경로
+        hour_of_day_windows: 시간대 롤업 기간(일) 목록
+    
+    Returns:
+        (새로 저장한 날짜 목록, 단위별 다시 쓴 파티션 수)
+    """
+    wanted = {end - timedelta(days=offset) for offset in range(days)}
+    missing = wanted - cube.complete_days()
+    if not missing:
+        return [], cube.rebuild([], hour_of_day_windows)
+    start, stop = min(missing), max(missing)
+    
+    client = create_client(backend, project_id, local_db)
+    names = ['hour'] + [name for name, _, _ in cube.spec['measures']]
+    by_day: Dict[date, Dict[str, list]] = {day: {name: [] for name in names} for day in missing}
+    with JobController() as jobs:
+        for row in jobs.wait(client.query(hourly_sql(cube.cube, start, stop))):
+            hour = row['hour']
+            if hour.tzinfo is None:
+                hour = hour.replace(tzinfo=timezone.utc)
+            columns = by_day.get(hour.astimezone(timezone.utc).date())
+            if columns is None:
+                continue
+            columns['hour'].append(hour)
+            for name in names[1:]:
+                value = row[name]
+                columns[name].append(None if value is None else float(value) if name != 'tx_count' else int(value))
+    
+    today = datetime.now(timezone.utc).date()
+    fetched_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    for day, columns in by_day.items():
+        order = sorted(range(len(columns['hour'])), key=columns['hour'].__getitem__)
+        arrays = {'hour': pa.array([columns['hour'][i] for i in order], pa.timestamp('us', tz='UTC'))}
+        for name in names[1:]:
+            arrays[name] = pa.array([columns[name][i] for i in order], pa.int64() if name == 'tx_count' else pa.float64())
+        cube.write_partition('hour', day.isoformat(), pa.table(arrays))
+        cube.manifest[day.isoformat()] = {'rows': len(order), 'complete': day < today, 'fetched_at': fetched_at}
+    cube.save_manifest()
+    
+    touched = sorted(missing)
+    return touched, cube.rebuild(touched, hour_of_day_windows)
+
+
+def _format_value(value: Any) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f"{value:,.6g}" if abs(value) < 1000 else f"{value:,.0f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+
+def main(argv: Optional[List[str]] = None):
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        description='시간별 집계를 한 번만 가져와 일/주/월/시간대 롤업 Parquet 생성',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # 최근 30일 시간별 집계 가져오기 + 바뀐 롤업 파티션만 다시 계산
+  python scripts/rollup_cube.py sync eth --days 30
+  
+  # 일별/주별 롤업 확인
+  python scripts/rollup_cube.py show eth day --last 14
+  python scripts/rollup_cube.py show eth week
+  
+  # 03_fee_gas.sql의 시간대별 가스비 패턴 (최근 7일)
+  python scripts/rollup_cube.py show eth hour_of_day --window 7
+  
+  # Solana 데이터셋은 2025-03-31 이후 업데이트 중단 → 기준일 지정
+  python scripts/rollup_cube.py --end 2025-03-31 sync sol --days 31
+        """
+    )
+    parser.add_argument('--root', help=f'큐브 루트 디렉터리 (기본값: ROLLUP_CUBE_DIR 또는 {DEFAULT_CUBE_DIR})')
+    parser.add_argument(
+        '--backend',
+        choices=['bigquery', 'local'],
+        default='bigquery',
+        help='시간별 집계를 가져올 백엔드 (local: 로컬 DuckDB, 기본값: bigquery)'
+    )
+    parser.add_argument('--end', type=date.fromisoformat, help='마지막 날짜 YYYY-MM-DD (기본값: 오늘, UTC)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    sync_parser = subparsers.add_parser('sync', help='시간별 집계 가져오기 및 롤업 갱신')
+    sync_parser.add_argument('cube', choices=sorted(CUBES), help='큐브 (체인)')
+    sync_parser.add_argument('--days', type=int, default=30, help='가져올 일수 (기본값: 30)')
+    sync_parser.add_argument(
+        '--hod-windows',
+        default=','.join(map(str, DEFAULT_HOUR_OF_DAY_WINDOWS)),
+        help='시간대(hour_of_day) 롤업 기간(일) 목록, 쉼표 구분 (기본값: 7,30)'
+    )
+    sync_parser.add_argument('--project-id', '-p', help='GCP 프로젝트 ID (기본값: GCP_PROJECT_ID 환경 변수)')
+    sync_parser.add_argument('--local-db', help='local 백엔드의 DuckDB 파일 경로')
+    
+    show_parser = subparsers.add_parser('show', help='저장된 롤업 출력')
+    show_parser.add_argument('cube', choices=sorted(CUBES), help='큐브 (체인)')
+    show_parser.add_argument('grain', choices=list(GRAINS), help='롤업 단위')
+    show_parser.add_argument('--last', type=int, help='마지막 N행만 출력')
+    show_parser.add_argument('--window', type=int, default=DEFAULT_HOUR_OF_DAY_WINDOWS[0], help='hour_of_day 기간(일) (기본값: 7)')
+    show_parser.add_argument('--json', action='store_true', help='JSON으로 출력')
+    
+    args = parser.parse_args(argv)
+    end = args.end or datetime.now(timezone.utc).date()
+    
+    try:
+        cube = RollupCube(args.cube, args.backend, args.root)
+        
+        if args.command == 'sync':
+            windows = sorted({int(w) for w in args.hod_windows.split(',') if w.strip()})
+            fetched, rewritten = sync(
+                cube, end, args.days, args.backend,
+                args.project_id or os.getenv("GCP_PROJECT_ID"), args.local_db, windows
+            )
+            print(f"✓ {cube.spec['label']}: 시간별 파티션 {len(fetched)}일 저장 ({cube.path})")
+            print("  롤업 파티션 갱신: " + ', '.join(f"{grain} {count}개" for grain, count in rewritten.items()))
+            return
+        
+        if args.grain == 'hour_of_day':
+            table = cube.read('hour_of_day', [f"{args.window}d"])
+        elif args.grain == 'hour':
+            table = cube.read('hour', [day.isoformat() for day in _days(end - timedelta(days=(args.last or 24) // 24), end)])
+        else:
+            table = cube.read(args.grain)
+        if table is None:
+            raise ValueError(f"저장된 롤업이 없습니다. 먼저 실행하세요: python scripts/rollup_cube.py sync {args.cube}")
+        rows = table.to_pylist()
+        if args.last:
+            rows = rows[-args.last:]
+        
+        if args.json:
+            print(to_json(rows))
+            return
+        
+        columns = table.column_names
+        print(f"📦 {cube.spec['label']} {args.grain} 롤업 ({len(rows)}행)")
+        cells = [[_format_value(row[name]) for name in columns] for row in rows]
+        widths = [max([len(name)] + [len(line[i]) for line in cells]) for i, name in enumerate(columns)]
+        print('  '.join(name.rjust(width) for name, width in zip(columns, widths)))
+        for line in cells:
+            print('  '.join(cell.rjust(width) for cell, width in zip(line, widths)))
+    
+    except Exception as e:
+        print(f"\n✗ 오류 발생: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
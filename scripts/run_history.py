@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+쿼리/요약 실행 이력 저장소 (SQLite)
+
+run_query.py와 summarize_with_gemini.py의 실행마다 SQL 지문(fingerprint), 템플릿
+경로, 처리/과금 바이트, 슬롯 시간, 실행 시간, 결과 행 수, 캐시 적중 여부,
+Gemini 토큰/응답 시간, --profile-memory 실행의 최대 메모리를 로컬 SQLite 파일에 한 행씩
+기록합니다.
+history 명령은 템플릿별 추세와 p50/p95 실행 시간을 보여주고, 같은 SQL의 최근
+실행(기준선) 대비 크게 느려지거나 비용이 늘어난 실행을 표시합니다.
+
+사용법:
+    python scripts/run_query.py history [옵션]
+    python scripts/run_history.py [옵션]
+
+예시:
+    python scripts/run_query.py history
+    python scripts/run_query.py history --template templates/queries/01_tx_volume.sql --days 30
+    python scripts/run_query.py history --threshold 2.0 --window 5
+"""
+
+import os
+import sys
+import argparse
+import hashlib
+import re
+import sqlite3
+import statistics
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from sampling import strip_comments
+from serialization import to_json
+
+# 이력 DB 기본 경로 (RUN_HISTORY_DB 환경 변수로 변경)
+DEFAULT_HISTORY_DB = 'local_data/run_history.sqlite'
+
+# 회귀 판단 기본값: 기준선(직전 실행 중앙값) 대비 배수, 기준선에 사용할 직전 실행 수
+DEFAULT_REGRESSION_THRESHOLD = 1.5
+DEFAULT_BASELINE_WINDOW = 10
+MIN_BASELINE_RUNS = 3
+
+# 회귀를 확인할 지표 (컬럼, 표시 이름, 최소값: 이보다 작은 값은 측정 잡음으로 보고 무시)
+REGRESSION_METRICS = [
+    ('duration_seconds', '실행 시간', 1.0),
+    ('bytes_billed', '과금 바이트', 10 * 1024 ** 2),
+    ('slot_ms', '슬롯 시간', 1000),
+    ('prompt_tokens', '프롬프트 토큰', 0),
+    ('gemini_seconds', 'Gemini 응답 시간', 1.0),
+    ('peak_memory_bytes', '최대 메모리(추적)', 10 * 1024 ** 2),
+    ('peak_rss_bytes', '최대 RSS', 50 * 1024 ** 2),
+]
+
+_COLUMNS = [
+    ('started_at', 'TEXT NOT NULL'),
+    ('tool', 'TEXT NOT NULL'),
+    ('template', 'TEXT'),
+    ('fingerprint', 'TEXT'),
+    ('backend', 'TEXT'),
+    ('dry_run', 'INTEGER DEFAULT 0'),
+    ('success', 'INTEGER DEFAULT 1'),
+    ('sample_percent', 'REAL'),
+    ('bytes_processed', 'INTEGER'),
+    ('bytes_billed', 'INTEGER'),
+    ('slot_ms', 'INTEGER'),
+    ('cache_hit', 'INTEGER'),
+    ('duration_seconds', 'REAL'),
+    ('rows', 'INTEGER'),
+    ('gemini_calls', 'INTEGER'),
+    ('prompt_tokens', 'INTEGER'),
+    ('output_tokens', 'INTEGER'),
+    ('gemini_seconds', 'REAL'),
+    ('job_id', 'TEXT'),
+    ('error', 'TEXT'),
+    ('peak_memory_bytes', 'INTEGER'),
+    ('peak_rss_bytes', 'INTEGER'),
+    ('memory_profile', 'TEXT'),
+]
+
+
+def default_history_path() -> str:
+    """이력 DB 경로 (RUN_HISTORY_DB 환경 변수 또는 local_data/run_history.sqlite)"""
+    return os.getenv('RUN_HISTORY_DB', DEFAULT_HISTORY_DB)
+
+
+# 문자열 리터럴과 백틱 식별자 (정규화에서 제외)
+_LITERAL_PATTERN = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)""")
+
+
+def _normalize_sql(sql: str, lower: bool) -> str:
+    """주석 제거, 리터럴 밖의 공백 정리(와 소문자 변환), 끝의 세미콜론 제거"""
+    parts = _LITERAL_PATTERN.split(strip_comments(sql))
+    # split의 캡처 그룹: 홀수 위치가 리터럴이므로 그대로 둠
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r'\s+', ' ', parts[i])
+        if lower:
+            parts[i] = parts[i].lower()
+    return ''.join(parts).strip().rstrip(';').strip()
+
+
+def fingerprint_sql(sql: str) -> str:
+    """
+    SQL 지문 (주석/공백/키워드 대소문자 차이를 무시한 해시, 이력 추세 집계용)
+    
+    문자열 리터럴 안은 바꾸지 않으므로 'So1AbC'와 'so1abc'(대소문자를 구분하는
+    Solana 주소)는 다른 지문이 됩니다.
+    
+    Args:
+        sql: SQL 텍스트
+    
+    Returns:
+        16자리 16진수 문자열
+    """
+    normalized = _normalize_sql(sql, lower=True)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def sql_cache_key(sql: str) -> str:
+    """
+    결과 재사용(destination 테이블, 카세트) 키 (주석과 리터럴 밖 공백만 무시한 해시)
+    
+    대소문자를 포함해 실행할 SQL 텍스트가 같을 때만 같은 키가 되므로, 다른 쿼리의
+    결과를 잘못 재사용하지 않습니다.
+    
+    Args:
+        sql: SQL 텍스트
+    
+    Returns:
+        16자리 16진수 문자열
+    """
+    normalized = _normalize_sql(sql, lower=False)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def job_metrics(job: Any) -> Dict[str, Any]:
+    """
+    QueryJob에서 기록할 비용/성능 지표 추출 (없는 속성은 None)
+    
+    Args:
+        job: BigQuery QueryJob 또는 local_backend.LocalQueryJob
+    
+    Returns:
+        bytes_processed, bytes_billed, slot_ms, cache_hit, job_id 딕셔너리
+    """
+    cache_hit = getattr(job, 'cache_hit', None)
+    return {
+        'bytes_processed': getattr(job, 'total_bytes_processed', None),
+        'bytes_billed': getattr(job, 'total_bytes_billed', None),
+        'slot_ms': getattr(job, 'slot_millis', None),
+        'cache_hit': None if cache_hit is None else int(bool(cache_hit)),
+        'job_id': getattr(job, 'job_id', None),
+    }
+
+
+def gemini_metrics(token_usage: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """GeminiSummarizer.token_usage를 호출 수/토큰/응답 시간 합계로 변환"""
+    if not token_usage:
+        return {}
+    return {
+        'gemini_calls': len(token_usage),
+        'prompt_tokens': sum(u['prompt_tokens'] or 0 for u in token_usage),
+        'output_tokens': sum(u['output_tokens'] or 0 for u in token_usage),
+        'gemini_seconds': round(sum(u.get('seconds') or 0 for u in token_usage), 3),
+    }
+
+
+class RunHistory:
+    """실행 이력 SQLite 저장소"""
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        초기화
+        
+        Args:
+            path: SQLite 파일 경로 (None이면 default_history_path())
+        """
+        self.path = path or default_history_path()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        columns = ', '.join(f"{name} {kind}" for name, kind in _COLUMNS)
+        with self.conn:
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+            # 이전 버전에서 만든 DB에는 새로 추가된 컬럼을 덧붙임
+            existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(runs)")}
+            for name, kind in _COLUMNS:
+                if name not in existing:
+                    self.conn.execute(f"ALTER TABLE runs ADD COLUMN {name} {kind}")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS runs_template ON runs (template, started_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS runs_fingerprint ON runs (fingerprint, started_at)")
+    
+    def record(self, tool: str, sql: Optional[str] = None, **fields: Any) -> int:
+        """
+        실행 1건 기록
+        
+        Args:
+            tool: 실행 도구 ('run_query', 'summarize')
+            sql: 실행한 SQL (지문 계산용)
+            **fields: _COLUMNS의 컬럼 값 (bool은 0/1로 저장)
+        
+        Returns:
+            추가된 행 id
+        """
+        known = {name for name, _ in _COLUMNS}
+        values = {k: (int(v) if isinstance(v, bool) else v) for k, v in fields.items() if k in known}
+        values.setdefault('started_at', datetime.now(timezone.utc).isoformat(timespec='seconds'))
+        values['tool'] = tool
+        if sql is not None:
+            values.setdefault('fingerprint', fingerprint_sql(sql))
+        
+        names = ', '.join(values)
+        placeholders = ', '.join('?' for _ in values)
+        with self._lock, self.conn:
+            cursor = self.conn.execute(f"INSERT INTO runs ({names}) VALUES ({placeholders})", list(values.values()))
+            return cursor.lastrowid
+    
+    def runs(
+        self,
+        template: Optional[str] = None,
+        days: Optional[float] = None,
+        include_dry_run: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        이력 조회 (오래된 순)
+        
+        Args:
+            template: 이 템플릿 경로의 실행만 조회
+            days: 최근 N일 실행만 조회
+            include_dry_run: dry run 실행 포함 여부
+        
+        Returns:
+            실행 기록 딕셔너리 리스트
+        """
+        conditions, params = [], []
+        if template:
+            conditions.append("template = ?")
+            params.append(template)
+        if days:
+            since = datetime.now(timezone.utc) - timedelta(days=days)
+            conditions.append("started_at >= ?")
+            params.append(since.isoformat(timespec='seconds'))
+        if not include_dry_run:
+            conditions.append("dry_run = 0")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self._lock:
+            rows = self.conn.execute(f"SELECT * FROM runs {where} ORDER BY started_at, id", params).fetchall()
+        return [dict(row) for row in rows]
+    
+    def close(self):
+        self.conn.close()
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """선형 보간 백분위수 (q: 0~100, 값이 없으면 None)"""
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def _mean(values: List[Any]) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def template_trends(runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    템플릿(백엔드별) 실행 통계
+    
+    Args:
+        runs: RunHistory.runs() 결과
+    
+    Returns:
+        템플릿별 실행 수, 실패 수, p50/p95 실행 시간, 평균 과금 바이트, 캐시 적중률,
+        평균 프롬프트 토큰, 최대 메모리(--profile-memory 실행), 실행 시간 추세(최근 절반 평균 / 이전 절반 평균 - 1, %) 리스트
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for run in runs:
+        template = run['template'] or '(SQL 직접 실행)'
+        groups.setdefault(f"{template} [{run['backend'] or '-'}]", []).append(run)
+    
+    trends = []
+    for template, group in groups.items():
+        ok = [run for run in group if run['success']]
+        durations = [run['duration_seconds'] for run in ok]
+        cache_flags = [run['cache_hit'] for run in ok if run['cache_hit'] is not None]
+        
+        trend = None
+        if len(ok) >= 4:
+            half = len(ok) // 2
+            before = _mean([run['duration_seconds'] for run in ok[:half]])
+            after = _mean([run['duration_seconds'] for run in ok[half:]])
+            if before:
+                trend = (after / before - 1) * 100
+        
+        trends.append({
+            'template': template,
+            'runs': len(group),
+            'failures': len(group) - len(ok),
+            'last_run': group[-1]['started_at'],
+            'p50_seconds': percentile(durations, 50),
+            'p95_seconds': percentile(durations, 95),
+            'avg_bytes_billed': _mean([run['bytes_billed'] for run in ok]),
+            'cache_hit_rate': (sum(cache_flags) / len(cache_flags)) if cache_flags else None,
+            'avg_prompt_tokens': _mean([run['prompt_tokens'] for run in ok]),
+            'p95_gemini_seconds': percentile([run['gemini_seconds'] for run in ok], 95),
+            'max_peak_memory_bytes': max((run['peak_memory_bytes'] for run in ok if run['peak_memory_bytes'] is not None), default=None),
+            'max_peak_rss_bytes': max((run['peak_rss_bytes'] for run in ok if run['peak_rss_bytes'] is not None), default=None),
+            'duration_trend_pct': trend,
+        })
+    return sorted(trends, key=lambda t: t['last_run'], reverse=True)
+
+
+def find_regressions(
+    runs: List[Dict[str, Any]],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+    window: int = DEFAULT_BASELINE_WINDOW
+) -> List[Dict[str, Any]]:
+    """
+    같은 SQL(지문)의 직전 실행 기준선 대비 회귀한 실행 찾기
+    
+    기준선은 같은 도구/백엔드/샘플 비율로 실행한 직전 window개 성공 실행의
+    중앙값이며, 직전 실행이 MIN_BASELINE_RUNS개 미만이면 판단하지 않습니다. 캐시 적중 실행은 비용/시간이 0에 가까워 기준선에서
+    제외합니다.
+    
+    Args:
+        runs: RunHistory.runs() 결과 (오래된 순)
+        threshold: 기준선 대비 배수 (이보다 크면 회귀)
+        window: 기준선에 사용할 직전 실행 수
+    
+    Returns:
+        회귀 항목 리스트 (run id, 템플릿, 지표, 값, 기준선, 배수)
+    """
+    history: Dict[Any, List[Dict[str, Any]]] = {}
+    regressions = []
+    for run in runs:
+        if not run['success'] or run['cache_hit']:
+            continue
+        key = (run['tool'], run['backend'], run['fingerprint'], run['sample_percent'])
+        previous = history.setdefault(key, [])
+        baseline_runs = previous[-window:]
+        
+        for metric, label, minimum in REGRESSION_METRICS:
+            value = run[metric]
+            baseline_values = [r[metric] for r in baseline_runs if r[metric] is not None]
+            if value is None or value < minimum or len(baseline_values) < MIN_BASELINE_RUNS:
+                continue
+            baseline = statistics.median(baseline_values)
+            if baseline > 0 and value > baseline * threshold:
+                regressions.append({
+                    'id': run['id'],
+                    'started_at': run['started_at'],
+                    'template': run['template'],
+                    'metric': metric,
+                    'label': label,
+                    'value': value,
+                    'baseline': baseline,
+                    'ratio': value / baseline,
+                })
+        previous.append(run)
+    return regressions
+
+
+def _format_number(value: Optional[float], unit: str = '', digits: int = 2) -> str:
+    if value is None:
+        return '-'
+    if unit == 'B':
+        for suffix in ['B', 'KB', 'MB', 'GB', 'TB']:
+            if abs(value) < 1024.0:
+                return f"{value:.{digits}f} {suffix}"
+            value /= 1024.0
+        return f"{value:.{digits}f} PB"
+    return f"{value:,.{digits}f}{unit}"
+
+
+def print_report(trends: List[Dict[str, Any]], regressions: List[Dict[str, Any]], threshold: float):
+    """history 명령 결과 출력"""
+    print("="*60)
+    print("템플릿별 실행 추세")
+    print("="*60)
+    for t in trends:
+        print(f"\n{t['template']}")
+        print(f"  - 실행: {t['runs']}회 (실패 {t['failures']}회), 마지막 실행: {t['last_run']}")
+        print(f"  - 실행 시간: p50 {_format_number(t['p50_seconds'], '초')}, p95 {_format_number(t['p95_seconds'], '초')}", end='')
+        if t['duration_trend_pct'] is not None:
+            print(f" (추세 {t['duration_trend_pct']:+.1f}%)")
+        else:
+            print()
+        print(f"  - 평균 과금 데이터: {_format_number(t['avg_bytes_billed'], 'B')}", end='')
+        if t['cache_hit_rate'] is not None:
+            print(f", 캐시 적중률 {t['cache_hit_rate'] * 100:.0f}%")
+        else:
+            print()
+        if t['avg_prompt_tokens'] is not None:
+            print(f"  - Gemini: 평균 프롬프트 토큰 {t['avg_prompt_tokens']:,.0f}, "
+                  f"p95 응답 시간 {_format_number(t['p95_gemini_seconds'], '초')}")
+        if t['max_peak_memory_bytes'] is not None or t['max_peak_rss_bytes'] is not None:
+            print(f"  - 메모리: 최대(추적) {_format_number(t['max_peak_memory_bytes'], 'B')}, "
+                  f"최대 RSS {_format_number(t['max_peak_rss_bytes'], 'B')}")
+    
+    print("\n" + "="*60)
+    print(f"회귀 실행 (기준선 대비 {threshold:g}배 초과)")
+    print("="*60)
+    if not regressions:
+        print("회귀로 판단된 실행이 없습니다.")
+    for r in regressions:
+        unit = {
+            'bytes_billed': 'B', 'peak_memory_bytes': 'B', 'peak_rss_bytes': 'B',
+            'duration_seconds': '초', 'gemini_seconds': '초'
+        }.get(r['metric'], '')
+        print(f"⚠️  #{r['id']} {r['started_at']} {r['template'] or '-'}")
+        print(f"    {r['label']}: {_format_number(r['value'], unit)} "
+              f"(기준선 {_format_number(r['baseline'], unit)}, {r['ratio']:.1f}배)")
+
+
+def main(argv: Optional[List[str]] = None):
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        prog='run_query.py history',
+        description='쿼리/요약 실행 이력 추세와 회귀 보고',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # 전체 템플릿 추세와 회귀 실행
+  python scripts/run_query.py history
+  
+  # 특정 템플릿의 최근 30일
+  python scripts/run_query.py history --template templates/queries/01_tx_volume.sql --days 30
+  
+  # 기준선(직전 5회 중앙값) 대비 2배 넘게 느려지거나 비싸진 실행만 표시
+  python scripts/run_query.py history --threshold 2.0 --window 5
+        """
+    )
+    
+    parser.add_argument(
+        '--template',
+        help='이 템플릿(SQL 파일 경로)의 실행만 보고'
+    )
+    
+    parser.add_argument(
+        '--days',
+        type=float,
+        help='최근 N일 실행만 보고'
+    )
+    
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help=f'회귀 판단 배수, 기준선 대비 (기본값: {DEFAULT_REGRESSION_THRESHOLD})'
+    )
+    
+    parser.add_argument(
+        '--window',
+        type=int,
+        default=DEFAULT_BASELINE_WINDOW,
+        help=f'기준선에 사용할 직전 실행 수 (기본값: {DEFAULT_BASELINE_WINDOW})'
+    )
+    
+    parser.add_argument(
+        '--db',
+        help='이력 DB 경로 (기본값: RUN_HISTORY_DB 또는 local_data/run_history.sqlite)'
+    )
+    
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='보고서를 JSON으로 출력'
+    )
+    
+    args = parser.parse_args(argv)
+    
+    path = args.db or default_history_path()
+    if not Path(path).exists():
+        print(f"실행 이력이 없습니다: {path}")
+        print("run_query.py 또는 summarize_with_gemini.py를 실행하면 자동으로 기록됩니다.")
+        sys.exit(0)
+    
+    history = RunHistory(path)
+    try:
+        runs = history.runs(template=args.template, days=args.days)
+    finally:
+        history.close()
+    
+    trends = template_trends(runs)
+    regressions = find_regressions(runs, args.threshold, args.window)
+    
+    if args.json:
+        print(to_json({'templates': trends, 'regressions': regressions}))
+    else:
+        print(f"이력 DB: {path} ({len(runs)}건)\n")
+        print_report(trends, regressions, args.threshold)
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,15 +9,16 @@ BigQuery 쿼리 실행 자동화 스크립트
     python scripts/run_query.py templates/sql/01_basic_exploration.sql
     python scripts/run_query.py templates/queries/01_tx_volume.sql --output results.csv
     python scripts/run_query.py my_query.sql --dry-run --verbose
+    python scripts/run_query.py history
 """
 
 import os
 import sys
 import argparse
-import json
+import sqlite3
 from pathlib import Path
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, TextIO
 
 try:
     from dotenv import load_dotenv
@@ -33,19 +34,73 @@ except ImportError:
     print("설치 방법: pip install google-cloud-bigquery")
     sys.exit(1)
 
+from job_control import JobController, JobTimeoutError
+from label_index import LabelIndex, describe_matches, enrich
+from local_backend import LocalClient, LocalQueryError
+from materialize import DEFAULT_EXPIRE_AFTER, Materializer, parse_duration
+from mem_profile import MemoryProfiler
+from result_io import STDIO_PATH, write_results
+from result_set import ResultSet
+from run_history import RunHistory, job_metrics, main as history_main
+from sampling import sample_sql, extrapolate
+from serialization import dump_json
+
 
 class BigQueryRunner:
     """BigQuery 쿼리 실행 클래스"""
     
-    def __init__(self, project_id: Optional[str] = None, dry_run: bool = False):
+    def __init__(
+        self,
+        project_id: Optional[str] = None,
+        dry_run: bool = False,
+        backend: str = 'bigquery',
+        local_db: Optional[str] = None,
+        sample_percent: Optional[float] = None,
+        history: Optional[RunHistory] = None,
+        timeout: Optional[float] = None,
+        destination: Optional[str] = None,
+        expire_after: Optional[timedelta] = None,
+        reuse: bool = True,
+        force_overwrite: bool = False,
+        profiler: Optional[MemoryProfiler] = None,
+        address_labels: Optional[LabelIndex] = None
+    ):
         """
         초기화
         
         Args:
             project_id: GCP 프로젝트 ID (None이면 환경 변수에서 가져옴)
             dry_run: True면 실제 실행 없이 비용만 확인
+            backend: 'bigquery' 또는 'local' (로컬 DuckDB에서 실행)
+            local_db: local 백엔드의 DuckDB 파일 경로
+            sample_percent: 대용량 테이블을 이 비율(%)만 샘플링하고 COUNT/SUM을 확장 추정
+            history: 실행 이력 저장소 (None이면 기록하지 않음)
+            timeout: 제한 시간(초), 넘으면 서버 잡을 취소 (None이면 무제한)
+            destination: 결과를 저장할 테이블 (dataset.table, None이면 저장하지 않음)
+            expire_after: destination 테이블 만료까지의 기간 (None이면 24시간)
+            reuse: 같은 SQL의 만료되지 않은 destination 테이블이 있으면 쿼리 대신 읽기
+            force_overwrite: --destination으로 만들지 않은 기존 테이블도 덮어쓰기
+            profiler: 단계별 메모리 측정기 (None이면 측정하지 않음)
+            address_labels: 결과의 주소 컬럼에 <컬럼>_label을 붙일 라벨 인덱스
         """
+        self.backend = backend
         self.project_id = project_id or os.getenv("GCP_PROJECT_ID")
+        self.dry_run = dry_run
+        self.sample_percent = sample_percent
+        self.history = history
+        self.jobs = JobController(timeout=timeout)
+        self.materializer: Optional[Materializer] = None
+        self.profiler = profiler or MemoryProfiler(enabled=False)
+        self.address_labels = address_labels
+        # 마지막 실행 결과 (대화형 세션에서 재조회 없이 요약/저장에 사용, 스트리밍 출력이면 None)
+        self.last_results: Optional[ResultSet] = None
+        
+        if backend == 'local':
+            if destination:
+                raise ValueError("--destination은 bigquery 백엔드에서만 사용할 수 있습니다.")
+            self.client = LocalClient(local_db)
+            return
+        
         if not self.project_id:
             raise ValueError(
                 "GCP_PROJECT_ID 환경 변수를 설정하거나 --project-id 옵션을 사용하세요.\n"
@@ -53,7 +108,8 @@ class BigQueryRunner:
             )
         
         self.client = bigquery.Client(project=self.project_id)
-        self.dry_run = dry_run
+        if destination:
+            self.materializer = Materializer(self.client, destination, expire_after, reuse, force_overwrite)
     
     def read_sql_file(self, file_path: str) -> str:
         """SQL 파일 읽기 (멀티쿼리 파일의 경우 첫 번째 쿼리만 반환)"""
@@ -170,19 +226,32 @@ class BigQueryRunner:
         self,
         sql: str,
         output_file: Optional[str] = None,
-        output_format: str = 'csv'
+        output_format: str = 'csv',
+        template: Optional[str] = None,
+        output_stream: Optional[TextIO] = None
     ) -> Dict[str, Any]:
         """
         쿼리 실행
         
         Args:
             sql: 실행할 SQL 쿼리
-            output_file: 결과를 저장할 파일 경로 (None이면 출력하지 않음)
-            output_format: 출력 형식 ('csv', 'json', 'table')
+            output_file: 결과를 저장할 파일 경로 (None이면 출력하지 않음, '-'이면 output_stream)
+            output_format: 출력 형식 ('csv', 'json', 'ndjson')
+            template: SQL 파일 경로 (실행 이력의 템플릿별 집계에 사용)
+            output_stream: output_file이 '-'일 때 결과를 쓸 스트림 (기본값: sys.stdout)
         
         Returns:
             실행 결과 딕셔너리
         """
+        original_sql = sql
+        sample_plan = None
+        if self.sample_percent:
+            sample_plan = sample_sql(sql, self.sample_percent)
+            sql = sample_plan.sql
+            if not sample_plan.sampled_tables:
+                print("⚠️  샘플링할 대용량 테이블(transactions, blocks 등)이 없어 전체 데이터로 실행합니다.")
+                sample_plan = None
+        
         job_config = bigquery.QueryJobConfig()
         
         if self.dry_run:
@@ -190,16 +259,24 @@ class BigQueryRunner:
             job_config.dry_run = True
             job_config.use_query_cache = False
         
+        # 같은 SQL로 만든 destination 테이블이 아직 유효하면 쿼리 대신 테이블을 읽음
+        reused_table = None
+        if self.materializer and not self.dry_run:
+            reused_table = self.materializer.find_fresh(sql)
+            if reused_table is None:
+                self.materializer.configure(job_config, sql)
+        
         start_time = datetime.now()
         
         try:
-            query_job = self.client.query(sql, job_config=job_config)
+            query_job = None if reused_table is not None else self.client.query(sql, job_config=job_config)
             
             if self.dry_run:
                 # Dry run 결과
                 end_time = datetime.now()
                 duration = (end_time - start_time).total_seconds()
                 
+                self._record(original_sql, template, query_job, duration)
                 return {
                     'dry_run': True,
                     'total_bytes_processed': query_job.total_bytes_processed,
@@ -209,45 +286,142 @@ class BigQueryRunner:
                 }
             
             # 실제 쿼리 실행
-            print(f"쿼리 실행 중... (프로젝트: {self.project_id})")
-            results = query_job.result()
+            if reused_table is not None:
+                expires = f"{reused_table.expires:%Y-%m-%d %H:%M} UTC" if reused_table.expires else "없음"
+                print(f"♻️  저장된 결과 테이블 재사용: {self.materializer.table_id} (만료: {expires})")
+                with self.profiler.stage('fetch'):
+                    results = self.materializer.read(reused_table)
+            else:
+                if self.backend == 'local':
+                    print(f"쿼리 실행 중... (로컬 DB: {self.client.database})")
+                else:
+                    print(f"쿼리 실행 중... (프로젝트: {self.project_id})")
+                with self.profiler.stage('fetch'):
+                    results = self.jobs.wait(query_job)
+                if self.materializer:
+                    table = self.materializer.finalize(sql)
+                    print(f"  - 결과 테이블: {self.materializer.table_id} (만료: {table.expires:%Y-%m-%d %H:%M} UTC)")
+            
+            label_matches = None
+            if output_file == STDIO_PATH and not sample_plan and self.address_labels is None:
+                # 스트리밍 출력: 페이지를 받는 대로 한 행씩 써서 결과 전체를 모으지 않음
+                schema = [field.name for field in (results.schema or [])]
+                with self.profiler.stage('serialization'):
+                    total_rows = write_results(
+                        schema,
+                        (row.values() for row in results),
+                        output_stream or sys.stdout,
+                        output_format
+                    )
+                rows = None
+            else:
+                # 결과 처리 (행마다 dict를 만들지 않고 컬럼 단위로 저장)
+                with self.profiler.stage('row_conversion'):
+                    rows = ResultSet.from_bigquery(results)
+                    if sample_plan:
+                        rows = extrapolate(rows, sample_plan)
+                if self.address_labels is not None:
+                    with self.profiler.stage('enrichment'):
+                        rows, label_matches = enrich(rows, self.address_labels)
+                total_rows = len(rows)
+            self.last_results = rows
             
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
             
-            # 결과 처리
-            rows = list(results)
-            total_rows = len(rows)
-            
-            # 결과 출력
+            # 결과 출력 (테이블 재사용은 쿼리 과금 없음)
+            bytes_processed = query_job.total_bytes_processed if query_job is not None else 0
             print(f"\n✓ 쿼리 실행 완료!")
-            print(f"  - 처리된 데이터: {self._format_bytes(query_job.total_bytes_processed)}")
-            print(f"  - 예상 비용: ${self._calculate_cost(query_job.total_bytes_processed):.6f}")
+            print(f"  - 처리된 데이터: {self._format_bytes(bytes_processed)}")
+            print(f"  - 예상 비용: ${self._calculate_cost(bytes_processed):.6f}")
             print(f"  - 실행 시간: {duration:.2f}초")
             print(f"  - 결과 행 수: {total_rows:,}개")
+            if label_matches is not None:
+                print(f"  - 주소 라벨: {describe_matches(label_matches, total_rows) or '주소 컬럼 없음'}")
+            if sample_plan:
+                self._print_sample_info(sample_plan)
             
-            # 파일로 저장
-            if output_file:
-                self._save_results(rows, results.schema, output_file, output_format)
+            # 파일로 저장 (표준 출력은 위에서 썼거나, 샘플 확장 후 여기서 씀)
+            if output_file == STDIO_PATH:
+                if rows is not None:
+                    with self.profiler.stage('serialization'):
+                        write_results(rows.schema, rows.iter_tuples(), output_stream or sys.stdout, output_format)
+                print("  - 결과 출력: 표준 출력")
+            elif output_file:
+                with self.profiler.stage('serialization'):
+                    self._save_results(rows, output_file, output_format)
                 print(f"  - 결과 저장: {output_file}")
             
+            # 메모리 측정값은 저장 단계까지 끝난 뒤 함께 기록
+            self._record(
+                original_sql, template, query_job, duration, rows=total_rows,
+                **({'cache_hit': True} if reused_table is not None else {}),
+                **self.profiler.metrics()
+            )
+            
             return {
                 'success': True,
-                'total_bytes_processed': query_job.total_bytes_processed,
-                'estimated_cost_usd': self._calculate_cost(query_job.total_bytes_processed),
+                'total_bytes_processed': bytes_processed,
+                'estimated_cost_usd': self._calculate_cost(bytes_processed),
                 'duration_seconds': duration,
                 'total_rows': total_rows,
-                'output_file': output_file
+                'output_file': output_file,
+                'destination': self.materializer.table_id if self.materializer else None,
+                'reused': reused_table is not None,
+                'sampling': sample_plan.describe() if sample_plan else None
             }
             
-        except GoogleCloudError as e:
+        except (GoogleCloudError, JobTimeoutError, LocalQueryError) as e:
             print(f"\n✗ 쿼리 실행 실패:")
             print(f"  {str(e)}")
+            self._record(
+                original_sql, template, None,
+                (datetime.now() - start_time).total_seconds(),
+                success=False, error=str(e)
+            )
             return {
                 'success': False,
                 'error': str(e)
             }
     
+    def _record(
+        self,
+        sql: str,
+        template: Optional[str],
+        query_job: Any,
+        duration: float,
+        **fields: Any
+    ):
+        """실행 이력 기록 (이력 DB 오류는 경고만 출력)"""
+        if self.history is None:
+            return
+        try:
+            self.history.record(
+                'run_query',
+                sql,
+                template=template,
+                backend=self.backend,
+                dry_run=self.dry_run,
+                sample_percent=self.sample_percent,
+                duration_seconds=duration,
+                **(job_metrics(query_job) if query_job is not None else {}),
+                **fields
+            )
+        except sqlite3.Error as e:
+            print(f"⚠️  실행 이력을 기록하지 못했습니다: {e}", file=sys.stderr)
+    
+    def _print_sample_info(self, plan):
+        """샘플 실행 시 추정 방식 안내"""
+        print(f"\n⚠️  {plan.percent:g}% 샘플 실행 결과입니다 (추정값)")
+        print(f"  - 샘플 테이블: {', '.join(plan.sampled_tables)}")
+        if plan.unsampled_tables:
+            print(f"  - 전체 조회 테이블 (조인): {', '.join(plan.unsampled_tables)}")
+        if plan.scaled:
+            names = ', '.join(column.name for column in plan.scaled)
+            print(f"  - {100 / plan.percent:g}배 확장: {names} (95% 오차: <컬럼>_err95)")
+        if plan.distinct_columns:
+            print(f"  - 확장하지 않음 (COUNT DISTINCT, 실제보다 작음): {', '.join(plan.distinct_columns)}")
+    
     def _calculate_cost(self, bytes_processed: int) -> float:
         """
         BigQuery 쿼리 비용 계산
@@ -270,8 +444,7 @@ class BigQueryRunner:
     
     def _save_results(
         self,
-        rows: list,
-        schema: Any,
+        rows: ResultSet,
         output_file: str,
         output_format: str
     ):
@@ -284,18 +457,16 @@ class BigQueryRunner:
             
             with open(output_path, 'w', newline='', encoding='utf-8') as f:
                 if rows:
-                    writer = csv.DictWriter(f, fieldnames=[field.name for field in schema])
-                    writer.writeheader()
-                    for row in rows:
-                        writer.writerow(dict(row))
+                    writer = csv.writer(f)
+                    writer.writerow(rows.schema)
+                    writer.writerows(rows.iter_tuples())
         
         elif output_format == 'json':
-            results = []
-            for row in rows:
-                results.append(dict(row))
-            
+            dump_json(rows.to_records(), output_path)
+        
+        elif output_format == 'ndjson':
             with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+                write_results(rows.schema, rows.iter_tuples(), f, 'ndjson')
         
         else:
             raise ValueError(f"지원하지 않는 출력 형식: {output_format}")
@@ -303,6 +474,10 @@ class BigQueryRunner:
 
 def main():
     """메인 함수"""
+    # 이력 보고: python scripts/run_query.py history [옵션]
+    if len(sys.argv) > 1 and sys.argv[1] == 'history':
+        history_main(sys.argv[2:])
+    
     parser = argparse.ArgumentParser(
         description='BigQuery 쿼리 실행 자동화 스크립트',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -314,11 +489,35 @@ def main():
   # 결과를 CSV로 저장
   python scripts/run_query.py my_query.sql --output results.csv
   
+  # 결과를 표준 출력으로 스트리밍하여 재조회 없이 바로 요약
+  python scripts/run_query.py my_query.sql -o - -f ndjson | python scripts/summarize_with_gemini.py --from-file -
+  
   # Dry run (비용만 확인)
   python scripts/run_query.py my_query.sql --dry-run
   
+  # 5% 샘플로 빠르게 탐색 (COUNT/SUM은 확장 추정값 + 95% 오차)
+  python scripts/run_query.py templates/queries/02_active_addresses.sql --sample 5
+  
+  # 로컬 DuckDB 샘플 데이터로 실행 (네트워크/비용 없음)
+  python scripts/run_query.py templates/queries/01_tx_volume.sql --backend local
+  
+  # 공통 중간 결과를 12시간 만료 테이블로 저장 (다시 실행하면 테이블을 재사용)
+  python scripts/run_query.py eth_success_30d.sql --destination scratch.eth_success_30d --expire-after 12h
+  
+  # 10분 안에 끝나지 않으면 BigQuery 잡 취소
+  python scripts/run_query.py my_query.sql --timeout 600
+  
   # 상세 출력
   python scripts/run_query.py my_query.sql --verbose
+  
+  # 주소/프로그램 라벨 컬럼 추가 (BigQuery JOIN 없이 로컬 인덱스로)
+  python scripts/run_query.py templates/queries/02_active_addresses.sql --address-labels local_data/address_labels.lblidx
+  
+  # 단계별 최대/잔류 메모리와 상위 할당 위치 (OOM 조사, 이력에 기록)
+  python scripts/run_query.py big_export.sql -o export.ndjson -f ndjson --profile-memory
+  
+  # 실행 이력: 템플릿별 p50/p95 실행 시간과 회귀 실행
+  python scripts/run_query.py history
         """
     )
     
@@ -329,14 +528,14 @@ def main():
     
     parser.add_argument(
         '--output', '-o',
-        help='결과를 저장할 파일 경로 (CSV 또는 JSON)'
+        help='결과를 저장할 파일 경로 (CSV, JSON, NDJSON), -이면 표준 출력으로 스트리밍'
     )
     
     parser.add_argument(
         '--format', '-f',
-        choices=['csv', 'json'],
+        choices=['csv', 'json', 'ndjson'],
         default='csv',
-        help='출력 형식 (기본값: csv)'
+        help='출력 형식, 표준 출력의 json은 ndjson으로 출력 (기본값: csv)'
     )
     
     parser.add_argument(
@@ -350,6 +549,76 @@ def main():
         help='실제 실행 없이 비용만 확인'
     )
     
+    parser.add_argument(
+        '--sample',
+        type=float,
+        metavar='PCT',
+        help='대용량 테이블을 PCT%%만 샘플링하여 실행하고 COUNT/SUM 컬럼을 확장 추정 (예: --sample 5)'
+    )
+    
+    parser.add_argument(
+        '--backend',
+        choices=['bigquery', 'local'],
+        default='bigquery',
+        help='쿼리 실행 백엔드 (local: 로컬 DuckDB 샘플 데이터, 기본값: bigquery)'
+    )
+    
+    parser.add_argument(
+        '--local-db',
+        help='local 백엔드의 DuckDB 파일 경로 (기본값: LOCAL_DUCKDB_PATH 또는 local_data/blockchain.duckdb)'
+    )
+    
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        metavar='SEC',
+        help='제한 시간(초), 넘으면 BigQuery 잡을 취소하고 실패로 종료'
+    )
+    
+    parser.add_argument(
+        '--destination',
+        metavar='DATASET.TABLE',
+        help='결과를 만료 시간이 있는 BigQuery 테이블로 저장 (같은 SQL의 유효한 테이블이 있으면 재사용)'
+    )
+    
+    parser.add_argument(
+        '--expire-after',
+        type=parse_duration,
+        default=DEFAULT_EXPIRE_AFTER,
+        metavar='DURATION',
+        help=f'--destination 테이블 만료 기간 (예: 30m, 12h, 7d, 기본값: {DEFAULT_EXPIRE_AFTER})'
+    )
+    
+    parser.add_argument(
+        '--no-reuse',
+        action='store_true',
+        help='유효한 --destination 테이블이 있어도 쿼리를 다시 실행'
+    )
+    
+    parser.add_argument(
+        '--force-overwrite',
+        action='store_true',
+        help='--destination이 이 스크립트로 만들지 않은(sql_fingerprint 라벨 없는) 기존 테이블이어도 덮어쓰기'
+    )
+    
+    parser.add_argument(
+        '--no-history',
+        action='store_true',
+        help='실행 이력(RUN_HISTORY_DB 또는 local_data/run_history.sqlite)에 기록하지 않음'
+    )
+    
+    parser.add_argument(
+        '--address-labels',
+        metavar='INDEX',
+        help='label_index.py로 만든 라벨 인덱스로 address, contract_address, fee_payer 등에 <컬럼>_label 추가'
+    )
+    
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='단계별(fetch, row_conversion, serialization) 최대/잔류 메모리와 RSS를 측정해 출력하고 실행 이력에 기록 (느려짐)'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -358,14 +627,36 @@ def main():
     
     args = parser.parse_args()
     
+    # 표준 출력으로 결과를 쓰면 진행 메시지는 표준 에러로 출력
+    data_stream = sys.stdout
+    if args.output == STDIO_PATH:
+        sys.stdout = sys.stderr
+    
+    profiler = MemoryProfiler(enabled=args.profile_memory)
+    
     # SQL 파일 읽기
     try:
-        runner = BigQueryRunner(project_id=args.project_id, dry_run=args.dry_run)
+        runner = BigQueryRunner(
+            project_id=args.project_id,
+            dry_run=args.dry_run,
+            backend=args.backend,
+            local_db=args.local_db,
+            sample_percent=args.sample,
+            history=None if args.no_history else RunHistory(),
+            timeout=args.timeout,
+            destination=args.destination,
+            expire_after=args.expire_after,
+            reuse=not args.no_reuse,
+            force_overwrite=args.force_overwrite,
+            profiler=profiler,
+            address_labels=LabelIndex(args.address_labels) if args.address_labels else None
+        )
         sql = runner.read_sql_file(args.sql_file)
         
         if args.verbose:
             print(f"SQL 파일: {args.sql_file}")
             print(f"프로젝트 ID: {runner.project_id}")
+            print(f"백엔드: {runner.backend}")
             print(f"Dry run: {args.dry_run}")
             if args.output:
                 print(f"출력 파일: {args.output}")
@@ -375,8 +666,20 @@ def main():
             print(sql)
             print("="*60 + "\n")
         
-        # 쿼리 실행
-        result = runner.execute_query(sql, args.output, args.format)
+        # 쿼리 실행 (Ctrl-C를 받으면 서버 잡을 취소한 뒤 종료)
+        profiler.start()
+        try:
+            with runner.jobs:
+                result = runner.execute_query(
+                    sql,
+                    args.output,
+                    args.format,
+                    template=args.sql_file,
+                    output_stream=data_stream
+                )
+        finally:
+            profiler.stop()
+        profiler.report()
         
         # Dry run 결과 출력
         if args.dry_run:
@@ -389,6 +692,9 @@ def main():
         # 성공/실패에 따른 종료 코드
         sys.exit(0 if result.get('success', True) else 1)
         
+    except KeyboardInterrupt:
+        print("\n✗ 사용자 요청으로 중단되었습니다.", file=sys.stderr)
+        sys.exit(130)
     except Exception as e:
         print(f"\n✗ 오류 발생: {str(e)}", file=sys.stderr)
         if args.verbose:
@@ -0,0 +1,347 @@
+"""
+샘플 실행(--sample) 지원: TABLESAMPLE 쿼리 변환과 집계값 확장(extrapolation)
+
+큰 테이블(transactions, blocks 등)의 FROM 절에 `TABLESAMPLE SYSTEM (p PERCENT)`를
+붙여 스캔량을 줄이고, 결과의 COUNT/COUNTIF/SUM 컬럼을 100/p배로 확장합니다.
+확장한 컬럼마다 95% 오차 범위(`<컬럼>_err95`)를 함께 계산합니다.
+
+오차는 행 단위 무작위 추출(Horvitz-Thompson)을 가정합니다. SYSTEM 샘플은 저장
+블록 단위로 추출되므로 실제 오차는 이보다 클 수 있습니다.
+COUNT(DISTINCT ...)는 샘플 크기에 비례하지 않아 확장하지 않습니다 (실제보다 작게 나옴).
+AVG, 비율, 중앙값 등은 그대로 사용합니다.
+
+사용법:
+    from sampling import sample_sql, extrapolate
+    
+    plan = sample_sql(sql, percent=5)
+    rows = extrapolate(ResultSet.from_bigquery(client.query(plan.sql).result()), plan)
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from result_set import ResultSet
+
+# 샘플링 대상 테이블 (crypto_* 데이터셋의 대용량 테이블)
+SAMPLED_TABLES = {'transactions', 'blocks', 'logs', 'traces', 'token_transfers'}
+
+# 95% 신뢰구간 z 값
+Z_95 = 1.96
+
+AUX_PREFIX = '__sample_'
+
+_AGGREGATE = re.compile(
+    r'\b(COUNTIF|COUNT|SUM|AVG|MIN|MAX|ANY_VALUE|ARRAY_AGG|STRING_AGG|'
+    r'APPROX_\w+|STDDEV\w*|VARIANCE|VAR_\w+|LOGICAL_\w+|HLL_COUNT\.\w+)\s*\(',
+    re.IGNORECASE
+)
+
+# 집계 뒤에 허용하는 상수 곱/나눗셈 (예: SUM(value) / POW(10, 18))
+_CONSTANT_SCALE = re.compile(
+    r'^(\s*[*/]\s*(POW\s*\(\s*[\d.]+\s*,\s*[\d.]+\s*\)|[\d.]+(e[+-]?\d+)?))*\s*$',
+    re.IGNORECASE
+)
+
+_ALIAS_KEYWORDS = {
+    'WHERE', 'GROUP', 'ORDER', 'LIMIT', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL',
+    'CROSS', 'ON', 'USING', 'UNION', 'WINDOW', 'HAVING', 'QUALIFY', 'TABLESAMPLE', 'FOR'
+}
+
+
+@dataclass
+class ScaledColumn:
+    """확장 대상 컬럼"""
+    name: str
+    raw_column: str
+    square_column: Optional[str]
+
+
+@dataclass
+class SamplePlan:
+    """샘플 쿼리 변환 결과"""
+    sql: str
+    percent: float
+    sampled_tables: List[str] = field(default_factory=list)
+    unsampled_tables: List[str] = field(default_factory=list)
+    scaled: List[ScaledColumn] = field(default_factory=list)
+    distinct_columns: List[str] = field(default_factory=list)
+    
+    def describe(self) -> Dict[str, Any]:
+        """프롬프트/출력용 샘플 정보"""
+        return {
+            'sample_percent': self.percent,
+            'sampled_tables': self.sampled_tables,
+            'extrapolated_columns': [c.name for c in self.scaled],
+            'not_extrapolated_distinct_counts': self.distinct_columns,
+            'note': (
+                f"{self.percent:g}% 샘플에서 추정한 값입니다. COUNT/SUM 컬럼은 {100 / self.percent:g}배로 "
+                "확장했고 <컬럼>_err95는 95% 오차 범위입니다. COUNT(DISTINCT) 컬럼은 확장하지 않았습니다."
+            )
+        }
+
+
+def strip_comments(sql: str) -> str:
+    """SQL 주석 제거 (문자열 리터럴 안의 --, /* 는 유지)"""
+    out, i, quote = [], 0, None
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            out.append(char)
+            if char == quote:
+                quote = None
+        elif char in ("'", '"', '`'):
+            quote = char
+            out.append(char)
+        elif sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = len(sql) if end < 0 else end
+            continue
+        elif sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = len(sql) if end < 0 else end + 2
+            out.append(' ')
+            continue
+        else:
+            out.append(char)
+        i += 1
+    return ''.join(out)
+
+
+def _mask(sql: str) -> Tuple[str, List[int]]:
+    """
+    문자열/식별자 리터럴 내용을 '_'로 가린 텍스트와 위치별 괄호 깊이 반환
+    
+    가린 텍스트에서 키워드/쉼표를 찾으면 리터럴 안의 값과 혼동하지 않습니다.
+    """
+    masked, depths = [], []
+    depth, quote = 0, None
+    for char in sql:
+        if quote:
+            masked.append(char if char == quote else '_')
+            if char == quote:
+                quote = None
+        elif char in ("'", '"', '`'):
+            quote = char
+            masked.append(char)
+        else:
+            if char == ')':
+                depth -= 1
+            masked.append(char)
+            if char == '(':
+                depth += 1
+        depths.append(depth)
+    return ''.join(masked), depths
+
+
+def _matching_paren(masked: str, open_position: int) -> int:
+    """여는 괄호에 대응하는 닫는 괄호 위치"""
+    depth = 0
+    for position in range(open_position, len(masked)):
+        if masked[position] == '(':
+            depth += 1
+        elif masked[position] == ')':
+            depth -= 1
+            if depth == 0:
+                return position
+    raise ValueError("SQL 괄호가 맞지 않습니다.")
+
+
+def _sample_tables(sql: str, percent: float) -> Tuple[str, List[str], List[str]]:
+    """첫 번째 대용량 테이블 참조 뒤에 TABLESAMPLE 추가"""
+    sampled, unsampled = [], []
+    insert_at = None
+    for match in re.finditer(r'`([^`]+)`', sql):
+        name = match.group(1)
+        if name.split('.')[-1].lower() not in SAMPLED_TABLES:
+            continue
+        if not re.search(r'\b(FROM|JOIN)\s*$', sql[:match.start()], re.IGNORECASE):
+            continue
+        
+        end = match.end()
+        alias = re.match(r'\s+(?:AS\s+)?(\w+)', sql[end:], re.IGNORECASE)
+        if alias and alias.group(1).upper() not in _ALIAS_KEYWORDS:
+            end += alias.end()
+        if re.match(r'\s+TABLESAMPLE\b', sql[end:], re.IGNORECASE):
+            continue
+        
+        if insert_at is None:
+            insert_at = end
+            sampled.append(name)
+        else:
+            # 조인의 양쪽을 모두 샘플링하면 일치 행이 p² 비율로 줄어 확장할 수 없음
+            unsampled.append(name)
+    
+    if insert_at is None:
+        return sql, sampled, unsampled
+    clause = f" TABLESAMPLE SYSTEM ({percent:g} PERCENT)"
+    return sql[:insert_at] + clause + sql[insert_at:], sampled, unsampled
+
+
+def _select_items(sql: str) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    최상위 SELECT 목록의 항목 범위와 FROM 위치
+    
+    Returns:
+        ([(시작, 끝), ...], FROM 위치) — 최상위 SELECT가 없으면 ([], -1)
+    """
+    masked, depths = _mask(sql)
+    select = next(
+        (m for m in re.finditer(r'\bSELECT\b', masked, re.IGNORECASE) if depths[m.start()] == 0),
+        None
+    )
+    if select is None:
+        return [], -1
+    from_match = next(
+        (m for m in re.finditer(r'\bFROM\b', masked[select.end():], re.IGNORECASE)
+         if depths[select.end() + m.start()] == 0),
+        None
+    )
+    if from_match is None:
+        return [], -1
+    from_position = select.end() + from_match.start()
+    
+    start = select.end()
+    distinct = re.match(r'\s*DISTINCT\b', masked[start:], re.IGNORECASE)
+    if distinct:
+        start += distinct.end()
+    
+    items = []
+    for position in range(start, from_position):
+        if masked[position] == ',' and depths[position] == 0:
+            items.append((start, position))
+            start = position + 1
+    items.append((start, from_position))
+    return items, from_position
+
+
+def _item_name(expression: str) -> Tuple[str, Optional[str]]:
+    """SELECT 항목을 (식, 출력 컬럼 이름)으로 분리"""
+    expression = expression.strip()
+    alias = re.match(r'^(.*?)\s+AS\s+`?(\w+)`?$', expression, re.IGNORECASE | re.DOTALL)
+    if alias:
+        return alias.group(1).strip(), alias.group(2)
+    identifier = re.match(r'^(?:\w+\.)*(\w+)$', expression)
+    return expression, identifier.group(1) if identifier else None
+
+
+def sample_sql(sql: str, percent: float) -> SamplePlan:
+    """
+    쿼리를 샘플 실행용으로 변환
+    
+    Args:
+        sql: 원본 BigQuery SQL (단일 문장)
+        percent: 샘플 비율 (0 < percent < 100)
+    
+    Returns:
+        SamplePlan (변환된 SQL과 확장 대상 컬럼 정보)
+    """
+    if not 0 < percent < 100:
+        raise ValueError(f"--sample 비율은 0보다 크고 100보다 작아야 합니다: {percent}")
+    
+    sql = strip_comments(sql).strip().rstrip(';')
+    sql, sampled, unsampled = _sample_tables(sql, percent)
+    plan = SamplePlan(sql, percent, sampled, unsampled)
+    if not sampled:
+        return plan
+    
+    items, from_position = _select_items(sql)
+    aux_columns = []
+    for index, (start, end) in enumerate(items):
+        expression, name = _item_name(sql[start:end])
+        if name is None:
+            continue
+        masked, depths = _mask(expression)
+        aggregates = [m for m in _AGGREGATE.finditer(masked)]
+        if len(aggregates) != 1:
+            continue
+        
+        aggregate = aggregates[0]
+        function = aggregate.group(1).upper()
+        close = _matching_paren(masked, aggregate.end() - 1)
+        argument = expression[aggregate.end():close].strip()
+        
+        if re.match(r'DISTINCT\b', argument, re.IGNORECASE):
+            if function == 'COUNT':
+                plan.distinct_columns.append(name)
+            continue
+        if function not in ('COUNT', 'COUNTIF', 'SUM'):
+            continue
+        # 집계 앞에 다른 식이 없고, 뒤에는 상수 곱/나눗셈만 있는 경우에만 확장
+        if expression[:aggregate.start()].strip() or not _CONSTANT_SCALE.match(masked[close + 1:]):
+            continue
+        
+        raw_column = f"{AUX_PREFIX}raw_{index}"
+        aux_columns.append(f"{expression[aggregate.start():close + 1]} AS {raw_column}")
+        square_column = None
+        if function == 'SUM':
+            square_column = f"{AUX_PREFIX}sq_{index}"
+            aux_columns.append(f"SUM(POW(CAST({argument} AS FLOAT64), 2)) AS {square_column}")
+        plan.scaled.append(ScaledColumn(name, raw_column, square_column))
+    
+    if aux_columns:
+        head = sql[:from_position].rstrip()
+        plan.sql = head + ',\n  ' + ',\n  '.join(aux_columns) + '\n' + sql[from_position:]
+    return plan
+
+
+def _margin(raw: Any, square: Any, fraction: float) -> Optional[float]:
+    """원래 값 대비 95% 오차 비율 (Horvitz-Thompson 분산 추정)"""
+    if raw is None or square is None or raw == 0:
+        return None
+    return Z_95 * math.sqrt((1 - fraction) * float(square)) / abs(float(raw))
+
+
+def extrapolate(results: ResultSet, plan: SamplePlan) -> ResultSet:
+    """
+    샘플 결과의 COUNT/SUM 컬럼을 전체 추정값으로 확장하고 오차 컬럼 추가
+    
+    Args:
+        results: 샘플 쿼리 결과
+        plan: sample_sql()이 반환한 SamplePlan
+    
+    Returns:
+        보조 컬럼을 제거하고 확장값/`<컬럼>_err95`를 담은 ResultSet
+    """
+    fraction = plan.percent / 100
+    scaled_values: Dict[str, list] = {}
+    margins: Dict[str, list] = {}
+    
+    for column in plan.scaled:
+        values = results.column(column.name)
+        raws = results.column(column.raw_column)
+        squares = results.column(column.square_column or column.raw_column)
+        integer = results.field_types[results.schema.index(column.name)] == 'INTEGER'
+        
+        scaled, errors = [], []
+        for value, raw, square in zip(values, raws, squares):
+            if value is None:
+                scaled.append(None)
+                errors.append(None)
+                continue
+            estimate = float(value) / fraction
+            relative = _margin(raw, square, fraction)
+            error = abs(estimate) * relative if relative is not None else None
+            if integer:
+                estimate = int(round(estimate))
+                error = int(round(error)) if error is not None else None
+            scaled.append(estimate)
+            errors.append(error)
+        scaled_values[column.name] = scaled
+        margins[column.name] = errors
+    
+    names = [name for name in results.schema if not name.startswith(AUX_PREFIX)]
+    output = ResultSet(
+        names,
+        [list(scaled_values.get(name, results.column(name))) for name in names],
+        [results.field_types[results.schema.index(name)] for name in names]
+    )
+    for column in plan.scaled:
+        field_type = output.field_types[output.schema.index(column.name)]
+        output = output.with_column(
+            f"{column.name}_err95",
+            margins[column.name],
+            'INTEGER' if field_type == 'INTEGER' else 'FLOAT'
+        )
+    return output
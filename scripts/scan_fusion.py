@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+스캔 병합(scan fusion) 플래너: 같은 테이블/기간/그룹 키를 쓰는 쿼리를 한 번의 스캔으로 실행
+
+01_tx_volume.sql, 03_fee_gas.sql, 04_failed_transactions.sql은 모두 최근 30일의
+crypto_ethereum.transactions를 DATE(block_timestamp)로 묶어 각각 전체 스캔합니다.
+이 모듈은 원본 테이블, 파티션 조건(block_timestamp 범위), 그룹 키가 같은 문장을
+찾아 집계를 하나의 쿼리로 합치고, 결과를 다시 문장별 출력으로 나눕니다.
+
+- 문장마다 다른 필터(예: receipt_status = 1)는 WHERE에서 빼고 조건부 집계로 바꿉니다.
+  COUNT(*) → COUNTIF(조건), SUM(x) → SUM(IF(조건, x, NULL)), COUNT(DISTINCT x) →
+  COUNT(DISTINCT IF(조건, x, NULL)) 등
+- 조건을 만족하는 행이 없는 그룹(예: 성공 트랜잭션이 없는 날)은 원래 쿼리처럼 빠지도록
+  문장별 행 수(COUNTIF(조건))를 함께 집계해 나눌 때 걸러냅니다.
+- ORDER BY/LIMIT은 나눈 뒤 문장별로 적용합니다.
+- 서브쿼리, JOIN, HAVING, 별칭이 있는 FROM 등은 병합하지 않고 원래대로 실행합니다.
+
+사용법:
+    python scripts/scan_fusion.py <sql_file>... [옵션]
+
+예시:
+    python scripts/scan_fusion.py templates/queries/01_tx_volume.sql templates/queries/03_fee_gas.sql templates/queries/04_failed_transactions.sql
+    python scripts/scan_fusion.py templates/queries/0*.sql --show-sql
+    python scripts/scan_fusion.py templates/queries/0*.sql --dry-run
+    python scripts/scan_fusion.py templates/queries/0*.sql --run --output-dir results/fused
+"""
+
+import os
+import sys
+import argparse
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # python-dotenv가 없으면 환경 변수에서 직접 가져옴
+
+from job_control import JobController
+from local_backend import create_client
+from result_io import write_results
+from result_set import ResultSet
+from sampling import _AGGREGATE, _item_name, _mask, _matching_paren, _select_items, strip_comments
+
+# 파티션 컬럼: 이 컬럼을 참조하는 WHERE 조건이 같아야 병합
+PARTITION_COLUMNS = ('block_timestamp',)
+
+# IF(조건, x, NULL)로 감싸도 의미가 유지되는 집계 (NULL을 무시하는 함수)
+CONDITIONAL_AGGREGATES = {
+    'COUNT', 'COUNTIF', 'SUM', 'AVG', 'MIN', 'MAX', 'APPROX_QUANTILES', 'APPROX_COUNT_DISTINCT',
+    'STRING_AGG', 'LOGICAL_AND', 'LOGICAL_OR', 'STDDEV', 'STDDEV_SAMP', 'STDDEV_POP',
+    'VARIANCE', 'VAR_SAMP', 'VAR_POP'
+}
+
+_CLAUSE = re.compile(
+    r'\b(FROM|WHERE|GROUP\s+BY|HAVING|QUALIFY|WINDOW|ORDER\s+BY|LIMIT)\b',
+    re.IGNORECASE
+)
+
+
+class NotFusible(ValueError):
+    """병합할 수 없는 문장 (사유를 메시지로 전달)"""
+
+
+@dataclass
+class ScanStatement:
+    """병합 분석용으로 분해한 SELECT 문장"""
+    source: str
+    sql: str
+    table: str
+    partition: Dict[str, str]
+    filters: Dict[str, str]
+    group_keys: List[Tuple[str, str]]
+    items: List[Tuple[str, str, bool]]
+    order_by: List[Tuple[str, bool]] = field(default_factory=list)
+    limit: Optional[int] = None
+    
+    @property
+    def signature(self) -> Tuple[str, Tuple[str, ...], Tuple[str, ...]]:
+        """병합 그룹 키: (테이블, 파티션 조건, 그룹 키 식)"""
+        return (
+            self.table.lower(),
+            tuple(sorted(self.partition)),
+            tuple(sorted(norm for norm, _ in self.group_keys))
+        )
+
+
+@dataclass
+class FusedQuery:
+    """병합 쿼리와 문장별 결과 복원 정보"""
+    sql: str
+    members: List[ScanStatement]
+    outputs: List[List[Tuple[str, str]]]
+    presence: List[Optional[str]]
+    
+    def fan_out(self, results: ResultSet) -> List[ResultSet]:
+        """
+        병합 쿼리 결과를 문장별 결과로 분리
+        
+        Args:
+            results: 병합 쿼리 결과
+        
+        Returns:
+            members와 같은 순서의 ResultSet 목록
+        """
+        outputs = []
+        for member, columns, presence in zip(self.members, self.outputs, self.presence):
+            indices = range(len(results))
+            if presence is not None:
+                counts = results.column(presence)
+                indices = [i for i in indices if counts[i]]
+            
+            subset = results.take(indices)
+            names = [name for name, _ in columns]
+            rows = ResultSet(
+                names,
+                [subset.column(column) for _, column in columns],
+                [subset.field_types[subset.schema.index(column)] for _, column in columns]
+            )
+            outputs.append(_order_and_limit(rows, member.order_by, member.limit))
+        return outputs
+
+
+def split_statements(text: str) -> List[str]:
+    """SQL 파일 내용을 주석을 뺀 문장 목록으로 분리"""
+    sql = strip_comments(text)
+    masked, depths = _mask(sql)
+    statements, start = [], 0
+    for position, char in enumerate(masked):
+        if char == ';' and depths[position] == 0:
+            statements.append(sql[start:position])
+            start = position + 1
+    statements.append(sql[start:])
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+def _normalize(expression: str) -> str:
+    """비교용 정규화: 리터럴 밖의 공백 정리/대문자 변환, 바깥 괄호 제거"""
+    out: List[str] = []
+    quote, space = None, False
+    for char in expression.strip():
+        if quote:
+            out.append(char)
+            if char == quote:
+                quote = None
+            continue
+        if char.isspace():
+            space = True
+            continue
+        if space and out and (out[-1].isalnum() or out[-1] == '_') and (char.isalnum() or char == '_'):
+            out.append(' ')
+        space = False
+        if char in ("'", '"', '`'):
+            quote = char
+        out.append(char if quote else char.upper())
+    text = ''.join(out)
+    while text.startswith('(') and _matching_paren(_mask(text)[0], 0) == len(text) - 1:
+        text = text[1:-1]
+    return text
+
+
+def _split_top(text: str, separator: str) -> List[str]:
+    """괄호/리터럴 밖의 구분자(정규식)로 분리"""
+    masked, depths = _mask(text)
+    pieces, start = [], 0
+    for match in re.finditer(separator, masked, re.IGNORECASE):
+        if depths[match.start()] == 0:
+            pieces.append(text[start:match.start()])
+            start = match.end()
+    pieces.append(text[start:])
+    return [piece.strip() for piece in pieces]
+
+
+def _conjuncts(where: str) -> List[str]:
+    """WHERE 절을 최상위 AND 조건으로 분리 (최상위 OR가 있으면 통째로 하나)"""
+    if len(_split_top(where, r'\bOR\b')) > 1:
+        return [where.strip()]
+    conjuncts: List[str] = []
+    for piece in _split_top(where, r'\bAND\b'):
+        # BETWEEN a AND b의 AND는 다시 붙임
+        if conjuncts and re.search(r'\bBETWEEN\b', _mask(conjuncts[-1])[0], re.IGNORECASE) \
+                and len(_split_top(conjuncts[-1], r'\bAND\b')) == 1:
+            conjuncts[-1] = f"{conjuncts[-1]} AND {piece}"
+        else:
+            conjuncts.append(piece)
+    return conjuncts
+
+
+def parse_statement(sql: str, source: str) -> ScanStatement:
+    """
+    SELECT 문장을 병합 분석용으로 분해
+    
+    Args:
+        sql: 주석을 뺀 단일 SELECT 문장
+        source: 표시용 이름 (예: 01_tx_volume.sql#1)
+    
+    Returns:
+        ScanStatement
+    
+    Raises:
+        NotFusible: 병합할 수 없는 형태
+    """
+    sql = sql.strip().rstrip(';')
+    masked, depths = _mask(sql)
+    if len(re.findall(r'\bSELECT\b', masked, re.IGNORECASE)) != 1:
+        raise NotFusible("서브쿼리/WITH 포함")
+    if re.match(r'\s*SELECT\s+(DISTINCT|AS\s+STRUCT)\b', masked, re.IGNORECASE):
+        raise NotFusible("SELECT DISTINCT")
+    
+    clauses = [
+        (re.sub(r'\s+', ' ', m.group(1)).upper(), m.start(), m.end())
+        for m in _CLAUSE.finditer(masked) if depths[m.start()] == 0
+    ]
+    parts: Dict[str, str] = {}
+    for index, (name, _, end) in enumerate(clauses):
+        stop = clauses[index + 1][1] if index + 1 < len(clauses) else len(sql)
+        parts[name] = sql[end:stop].strip()
+    for unsupported in ('HAVING', 'QUALIFY', 'WINDOW'):
+        if unsupported in parts:
+            raise NotFusible(f"{unsupported} 포함")
+    if 'GROUP BY' not in parts:
+        raise NotFusible("GROUP BY 없음")
+    
+    table = re.fullmatch(r'`([^`]+)`', parts.get('FROM', ''))
+    if not table:
+        raise NotFusible("단일 테이블 FROM이 아님 (JOIN/별칭/UNNEST)")
+    
+    partition, filters = {}, {}
+    for conjunct in _conjuncts(parts['WHERE']) if 'WHERE' in parts else []:
+        target = partition if any(
+            re.search(rf'\b{column}\b', conjunct, re.IGNORECASE) for column in PARTITION_COLUMNS
+        ) else filters
+        target[_normalize(conjunct)] = conjunct
+    
+    ranges, _ = _select_items(sql)
+    items = [_item_name(sql[start:end]) for start, end in ranges]
+    if any(name is None for _, name in items):
+        raise NotFusible("이름 없는 SELECT 항목")
+    by_name = {name.lower(): expression for expression, name in items}
+    
+    group_keys = []
+    for key in _split_top(parts['GROUP BY'], ','):
+        if key.isdigit():
+            expression = items[int(key) - 1][0]
+        else:
+            expression = by_name.get(key.strip('`').lower(), key)
+        group_keys.append((_normalize(expression), expression))
+    key_norms = {norm for norm, _ in group_keys}
+    
+    statement_items = []
+    for expression, name in items:
+        is_key = _normalize(expression) in key_norms
+        if not is_key and not _AGGREGATE.search(_mask(expression)[0]):
+            raise NotFusible(f"집계도 그룹 키도 아닌 컬럼: {name}")
+        statement_items.append((name, expression, is_key))
+    
+    names = [name for name, _, _ in statement_items]
+    order_by = []
+    for item in _split_top(parts['ORDER BY'], ',') if 'ORDER BY' in parts else []:
+        match = re.fullmatch(r'(.+?)(?:\s+(ASC|DESC))?', item, re.IGNORECASE | re.DOTALL)
+        target, direction = match.group(1).strip(), (match.group(2) or 'ASC').upper()
+        if target.isdigit():
+            target = names[int(target) - 1]
+        else:
+            norm = _normalize(target)
+            target = next(
+                (name for name, expression, _ in statement_items
+                 if name.lower() == target.strip('`').lower() or _normalize(expression) == norm),
+                None
+            )
+            if target is None:
+                raise NotFusible(f"출력 컬럼이 아닌 ORDER BY: {item}")
+        order_by.append((target, direction == 'DESC'))
+    
+    limit = None
+    if 'LIMIT' in parts:
+        if not parts['LIMIT'].isdigit():
+            raise NotFusible("LIMIT ... OFFSET")
+        limit = int(parts['LIMIT'])
+    
+    return ScanStatement(
+        source, sql, table.group(1), partition, filters,
+        group_keys, statement_items, order_by, limit
+    )
+
+
+def _conditional(expression: str, condition: Optional[str]) -> str:
+    """식 안의 집계를 조건부 집계로 변환 (condition이 None이면 그대로)"""
+    if condition is None:
+        return expression
+    masked, _ = _mask(expression)
+    out, position = [], 0
+    for match in _AGGREGATE.finditer(masked):
+        if match.start() < position:
+            continue
+        function = match.group(1).upper()
+        if function not in CONDITIONAL_AGGREGATES:
+            raise NotFusible(f"조건부로 바꿀 수 없는 집계: {function}")
+        close = _matching_paren(masked, match.end() - 1)
+        argument = expression[match.end():close].strip()
+        
+        if function == 'COUNT' and argument == '*':
+            rewritten = f"COUNTIF({condition})"
+        elif function == 'COUNTIF':
+            rewritten = f"COUNTIF(({condition}) AND ({argument}))"
+        else:
+            distinct = re.match(r'DISTINCT\s+', argument, re.IGNORECASE)
+            head = distinct.group(0) if distinct else ''
+            arguments = _split_top(argument[len(head):], ',')
+            arguments[0] = f"IF({condition}, {arguments[0]}, NULL)"
+            rewritten = f"{expression[match.start():match.end()]}{head}{', '.join(arguments)})"
+        
+        out.append(expression[position:match.start()])
+        out.append(rewritten)
+        position = close + 1
+    out.append(expression[position:])
+    return ''.join(out)
+
+
+def _column_name(index: int, name: str) -> str:
+    """병합 쿼리의 문장별 출력 컬럼 이름 (m<문장 번호>_<컬럼>)"""
+    return f"m{index}_" + re.sub(r'\W', '_', name)
+
+
+def fuse(members: List[ScanStatement]) -> FusedQuery:
+    """
+    같은 병합 그룹의 문장들을 하나의 쿼리로 합침
+    
+    Args:
+        members: signature가 같은 ScanStatement 목록 (2개 이상)
+    
+    Returns:
+        FusedQuery
+    """
+    common = set.intersection(*(set(member.filters) for member in members))
+    conditions: List[Optional[str]] = []
+    for member in members:
+        extra = [text for norm, text in member.filters.items() if norm not in common]
+        if len(extra) > 1 or (extra and len(_split_top(extra[0], r'\bOR\b')) > 1):
+            extra = [f"({text})" for text in extra]
+        conditions.append(' AND '.join(extra) if extra else None)
+    
+    first = members[0]
+    key_columns = {norm: f"key_{index}" for index, (norm, _) in enumerate(first.group_keys)}
+    select = [f"{expression} AS {key_columns[norm]}" for norm, expression in first.group_keys]
+    seen: Dict[str, str] = {}
+    
+    def add(expression: str, column: str) -> str:
+        norm = _normalize(expression)
+        if norm not in seen:
+            seen[norm] = column
+            select.append(f"{expression} AS {column}")
+        return seen[norm]
+    
+    outputs, presence = [], []
+    for index, (member, condition) in enumerate(zip(members, conditions)):
+        row_count = add(f"COUNTIF({condition})", _column_name(index, '_rows')) if condition else None
+        columns = []
+        for name, expression, is_key in member.items:
+            if is_key:
+                columns.append((name, key_columns[_normalize(expression)]))
+                continue
+            rewritten = _conditional(expression, condition)
+            if condition and '/' in _mask(expression)[0]:
+                # 조건을 만족하는 행이 없는 그룹에서 0으로 나누지 않도록 (BigQuery IF는 선택된 쪽만 평가)
+                rewritten = f"IF(COUNTIF({condition}) > 0, {rewritten}, NULL)"
+            columns.append((name, add(rewritten, _column_name(index, name))))
+        outputs.append(columns)
+        presence.append(row_count)
+    
+    where = list(first.partition.values()) + [first.filters[norm] for norm in sorted(common)]
+    if all(conditions):
+        # 모든 문장이 추가 조건을 가지면 어느 문장에도 쓰이지 않는 행은 미리 제외
+        where.append('(' + ' OR '.join(conditions) + ')')
+    
+    sql = (
+        "SELECT\n  " + ",\n  ".join(select) +
+        f"\nFROM\n  `{first.table}`" +
+        ("\nWHERE\n  " + "\n  AND ".join(where) if where else "") +
+        "\nGROUP BY\n  " + ", ".join(key_columns.values())
+    )
+    return FusedQuery(sql, members, outputs, presence)
+
+
+def plan_fusion(statements: List[Tuple[str, str]]) -> Tuple[List[FusedQuery], List[Tuple[str, str, str]]]:
+    """
+    문장 목록에서 병합 가능한 그룹을 찾아 병합 쿼리 생성
+    
+    Args:
+        statements: (표시용 이름, SQL) 목록
+    
+    Returns:
+        (병합 쿼리 목록, 그대로 실행할 문장 [(이름, SQL, 사유)] 목록)
+    """
+    groups: Dict[Tuple, List[ScanStatement]] = {}
+    standalone = []
+    for source, sql in statements:
+        try:
+            statement = parse_statement(sql, source)
+        except NotFusible as e:
+            standalone.append((source, sql, str(e)))
+            continue
+        groups.setdefault(statement.signature, []).append(statement)
+    
+    fused = []
+    for members in groups.values():
+        if len(members) < 2:
+            standalone.append((members[0].source, members[0].sql, "같은 테이블/기간/그룹 키의 문장 없음"))
+            continue
+        try:
+            fused.append(fuse(members))
+        except NotFusible as e:
+            standalone.extend((member.source, member.sql, str(e)) for member in members)
+    return fused, standalone
+
+
+def _order_and_limit(rows: ResultSet, order_by: List[Tuple[str, bool]], limit: Optional[int]) -> ResultSet:
+    """ORDER BY/LIMIT 적용 (BigQuery와 같이 NULL은 ASC에서 처음, DESC에서 마지막)"""
+    indices = list(range(len(rows)))
+    for name, descending in reversed(order_by):
+        values = rows.column(name)
+        indices.sort(key=lambda i: (values[i] is not None, values[i] if values[i] is not None else 0), reverse=descending)
+    if limit is not None:
+        indices = indices[:limit]
+    if indices == list(range(len(rows))):
+        return rows
+    return rows.take(indices)
+
+
+def load_statements(sql_files: List[str]) -> List[Tuple[str, str]]:
+    """SQL 파일들의 문장 목록 [(파일명#번호, SQL)]"""
+    statements = []
+    for sql_file in sql_files:
+        text = Path(sql_file).read_text(encoding='utf-8')
+        for index, sql in enumerate(split_statements(text), 1):
+            statements.append((f"{Path(sql_file).name}#{index}", sql))
+    return statements
+
+
+def _format_bytes(bytes_count: int) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if bytes_count < 1024.0:
+            return f"{bytes_count:.2f} {unit}"
+        bytes_count /= 1024.0
+    return f"{bytes_count:.2f} PB"
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        description='같은 테이블/기간/그룹 키를 쓰는 쿼리를 한 번의 스캔으로 병합',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # 병합 계획 확인
+  python scripts/scan_fusion.py templates/queries/01_tx_volume.sql templates/queries/03_fee_gas.sql templates/queries/04_failed_transactions.sql
+  
+  # 병합 SQL 출력
+  python scripts/scan_fusion.py templates/queries/0*.sql --show-sql
+  
+  # 개별 실행 대비 스캔량 비교 (dry run, 비용 없음)
+  python scripts/scan_fusion.py templates/queries/0*.sql --dry-run
+  
+  # 병합 실행 후 문장별 결과를 <파일명>_<번호>.csv로 저장
+  python scripts/scan_fusion.py templates/queries/0*.sql --run --output-dir results/fused
+        """
+    )
+    parser.add_argument('sql_files', nargs='+', help='SQL 파일 경로 (파일 안의 모든 문장을 분석)')
+    parser.add_argument('--show-sql', action='store_true', help='병합 SQL 출력')
+    parser.add_argument('--dry-run', action='store_true', help='개별 실행과 병합 실행의 처리 데이터량 비교')
+    parser.add_argument('--run', action='store_true', help='병합 쿼리와 병합되지 않은 문장을 실행하고 문장별 결과 저장')
+    parser.add_argument('--output-dir', '-o', default='results/fused', help='--run 결과 저장 디렉토리 (기본값: results/fused)')
+    parser.add_argument('--format', '-f', choices=['csv', 'ndjson'], default='csv', help='결과 파일 형식 (기본값: csv)')
+    parser.add_argument('--project-id', '-p', help='GCP 프로젝트 ID (기본값: GCP_PROJECT_ID 환경 변수)')
+    parser.add_argument(
+        '--backend',
+        choices=['bigquery', 'local'],
+        default='bigquery',
+        help='쿼리 실행 백엔드 (기본값: bigquery)'
+    )
+    parser.add_argument('--local-db', help='local 백엔드의 DuckDB 파일 경로')
+    parser.add_argument('--timeout', type=float, metavar='SEC', help='쿼리별 제한 시간(초)')
+    
+    args = parser.parse_args()
+    
+    if args.dry_run and args.backend == 'local':
+        # 로컬 DuckDB는 처리 바이트를 0으로 보고하므로 스캔량을 비교할 수 없음
+        print("오류: --dry-run은 bigquery 백엔드에서만 사용할 수 있습니다. 로컬 백엔드는 --run으로 실행하세요.", file=sys.stderr)
+        sys.exit(1)
+    
+    try:
+        fused, standalone = plan_fusion(load_statements(args.sql_files))
+        
+        print(f"🔗 병합 쿼리 {len(fused)}개, 그대로 실행할 문장 {len(standalone)}개")
+        for number, query in enumerate(fused, 1):
+            members = query.members
+            print(f"\n[병합 {number}] `{members[0].table}` ({', '.join(expression for _, expression in members[0].group_keys)})")
+            for member in members:
+                print(f"  - {member.source}")
+            if args.show_sql:
+                print("\n" + query.sql + "\n")
+        if standalone:
+            print("\n[그대로 실행]")
+            for source, _, reason in standalone:
+                print(f"  - {source}: {reason}")
+        
+        if not (args.dry_run or args.run):
+            return
+        
+        if args.backend == 'bigquery' and not (args.project_id or os.getenv("GCP_PROJECT_ID")):
+            raise ValueError("GCP_PROJECT_ID 환경 변수를 설정하거나 --project-id 옵션을 사용하세요.")
+        client = create_client(args.backend, args.project_id or os.getenv("GCP_PROJECT_ID"), args.local_db)
+        
+        if args.dry_run:
+            from google.cloud import bigquery
+            
+            def dry_run_bytes(sql: str) -> int:
+                config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+                return client.query(sql, job_config=config).total_bytes_processed or 0
+            
+            separate = sum(dry_run_bytes(member.sql) for query in fused for member in query.members)
+            combined = sum(dry_run_bytes(query.sql) for query in fused)
+            print(f"\n[Dry Run] 병합 대상 문장 개별 실행: {_format_bytes(separate)} → 병합 실행: {_format_bytes(combined)}")
+            if separate:
+                print(f"  절감: {100 * (1 - combined / separate):.1f}%")
+            return
+        
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        def save(source: str, rows: ResultSet) -> None:
+            name, number = source.rsplit('#', 1)
+            path = output_dir / f"{Path(name).stem}_{number}.{args.format}"
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                write_results(rows.schema, rows.iter_tuples(), f, args.format)
+            print(f"  - {source} → {path} ({len(rows):,}행)")
+        
+        with JobController(timeout=args.timeout) as jobs:
+            for number, query in enumerate(fused, 1):
+                print(f"\n📊 병합 {number} 실행 중 (문장 {len(query.members)}개)...")
+                results = ResultSet.from_bigquery(jobs.wait(client.query(query.sql)))
+                for member, rows in zip(query.members, query.fan_out(results)):
+                    save(member.source, rows)
+            for source, sql, _ in standalone:
+                print(f"\n📊 {source} 실행 중...")
+                save(source, ResultSet.from_bigquery(jobs.wait(client.query(sql))))
+        
+        print(f"\n✓ 결과 저장 완료: {output_dir}")
+    
+    except KeyboardInterrupt:
+        print("\n✗ 사용자 요청으로 중단되었습니다.", file=sys.stderr)
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n✗ 오류 발생: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
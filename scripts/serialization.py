@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+쿼리 결과/프롬프트 공용 JSON 직렬화 모듈
+
+BigQuery 결과에 자주 등장하는 Decimal, datetime, date, time, bytes 값을
+타입별 변환 함수로 바로 처리합니다. (json.dumps(default=str)처럼 매번
+범용 fallback을 거치지 않음) orjson이 설치되어 있으면 자동으로 사용합니다.
+
+사용법:
+    from serialization import to_json, dump_json
+    
+    prompt_data = to_json(results, compact=True)   # 프롬프트용 (공백 없음)
+    dump_json(rows, 'results/data.json')           # 파일 저장용 (indent=2)
+
+벤치마크:
+    python scripts/serialization.py --bench --rows 200000
+"""
+
+import sys
+import json
+import base64
+import argparse
+import time
+from collections.abc import Mapping
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # orjson이 없으면 표준 json 모듈 사용
+
+from result_set import INT64_MAX, INT64_MIN
+
+
+def _decimal_to_number(value: Decimal) -> Union[int, float]:
+    """
+    NUMERIC/BIGNUMERIC 값을 숫자로 변환 (프롬프트용, 따옴표 없이 출력)
+    
+    orjson은 64비트를 넘는 정수를 인코딩하지 못하므로 wei 합계처럼 큰 정수는
+    float로 변환합니다. (프롬프트에는 유효숫자 17자리면 충분)
+    """
+    if value == value.to_integral_value():
+        number = int(value)
+        if INT64_MIN <= number <= INT64_MAX:
+            return number
+    return float(value)
+
+
+def _bytes_to_str(value: bytes) -> str:
+    """BYTES 컬럼 값을 base64 문자열로 변환 (BigQuery 콘솔과 동일한 표기)"""
+    return base64.b64encode(value).decode('ascii')
+
+
+# 파일 저장용 변환 함수: Decimal은 정밀도 보존을 위해 문자열로 저장
+_FILE_HANDLERS: Dict[type, Callable[[Any], Any]] = {
+    Decimal: str,
+    datetime: datetime.isoformat,
+    date: date.isoformat,
+    dt_time: dt_time.isoformat,
+    timedelta: str,
+    bytes: _bytes_to_str,
+    set: list,
+    frozenset: list,
+    tuple: list,
+}
+
+# 프롬프트용 변환 함수: Decimal은 숫자로 출력하여 토큰 수를 줄임
+_COMPACT_HANDLERS: Dict[type, Callable[[Any], Any]] = {
+    **_FILE_HANDLERS,
+    Decimal: _decimal_to_number,
+}
+
+
+def _make_default(handlers: Dict[type, Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    """타입별 변환 테이블을 사용하는 default 함수 생성"""
+    def default(obj: Any) -> Any:
+        handler = handlers.get(type(obj))
+        if handler is not None:
+            return handler(obj)
+        
+        # 하위 클래스 (예: pandas.Timestamp, BigQuery Row 등)
+        if isinstance(obj, Mapping):
+            return dict(obj)
+        for base, base_handler in handlers.items():
+            if isinstance(obj, base):
+                return base_handler(obj)
+        if hasattr(obj, 'to_records'):
+            return obj.to_records()
+        
+        return str(obj)
+    
+    return default
+
+
+json_default = _make_default(_FILE_HANDLERS)
+json_default_compact = _make_default(_COMPACT_HANDLERS)
+
+
+def to_json_bytes(obj: Any, compact: bool = False) -> bytes:
+    """
+    객체를 UTF-8 JSON 바이트로 직렬화
+    
+    Args:
+        obj: 직렬화할 객체 (쿼리 결과, 요약 딕셔너리 등)
+        compact: True면 공백 없이 출력 (프롬프트용), False면 indent=2
+    
+    Returns:
+        UTF-8로 인코딩된 JSON 바이트
+    """
+    default = json_default_compact if compact else json_default
+    
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            # orjson이 처리하지 못하는 값 (예: 64비트를 넘는 wei 컬럼 int)은 표준 json으로 다시 출력
+            # (표준 json에서도 실패하는 값이면 거기서 오류가 남)
+            pass
+    
+    return _stdlib_dumps(obj, compact, default).encode('utf-8')
+
+
+def to_json(obj: Any, compact: bool = False) -> str:
+    """
+    객체를 JSON 문자열로 직렬화 (ensure_ascii=False와 동일하게 한글 그대로 출력)
+    
+    Args:
+        obj: 직렬화할 객체
+        compact: True면 공백 없이 출력 (프롬프트용), False면 indent=2
+    
+    Returns:
+        JSON 문자열
+    """
+    if orjson is not None:
+        return to_json_bytes(obj, compact).decode('utf-8')
+    
+    default = json_default_compact if compact else json_default
+    return _stdlib_dumps(obj, compact, default)
+
+
+def dump_json(obj: Any, output_file: Union[str, Path], compact: bool = False):
+    """
+    객체를 JSON 파일로 저장
+    
+    Args:
+        obj: 저장할 객체
+        output_file: 저장할 파일 경로
+        compact: True면 공백 없이 저장
+    """
+    with open(output_file, 'wb') as f:
+        f.write(to_json_bytes(obj, compact))
+
+
+def _stdlib_dumps(obj: Any, compact: bool, default: Callable[[Any], Any]) -> str:
+    """표준 json 모듈을 사용한 직렬화"""
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default)
+    return json.dumps(obj, indent=2, ensure_ascii=False, default=default)
+
+
+def _make_sample_rows(n_rows: int) -> list:
+    """벤치마크용 샘플 결과 생성 (BigQuery 반환 타입과 동일한 구성)"""
+    base_time = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(n_rows):
+        ts = base_time + timedelta(minutes=i)
+        rows.append({
+            'date': ts.date(),
+            'block_timestamp': ts,
+            'tx_count': 1_000_000 + i,
+            'unique_senders': 350_000 + (i % 1000),
+            'avg_fee_sol': Decimal('0.000005123') + Decimal(i % 97) / Decimal(10 ** 9),
+            'failure_rate_percent': float(i % 500) / 100.0,
+            'fee_payer': f"Addr{i:040d}",
+        })
+    return rows
+
+
+def benchmark(n_rows: int = 100_000, repeat: int = 3):
+    """
+    기존 방식(json.dumps(indent=2, default=str))과 현재 직렬화 경로 비교
+    
+    Args:
+        n_rows: 샘플 행 수
+        repeat: 반복 횟수 (최솟값 사용)
+    """
+    rows = _make_sample_rows(n_rows)
+    
+    cases = [
+        ('json.dumps(indent=2, default=str)',
+         lambda: json.dumps(rows, indent=2, ensure_ascii=False, default=str)),
+        ('to_json (파일용, indent=2)', lambda: to_json(rows)),
+        ('to_json (프롬프트용, compact)', lambda: to_json(rows, compact=True)),
+    ]
+    
+    print(f"벤치마크: {n_rows:,}행 × {len(rows[0])}컬럼, 백엔드: {'orjson' if orjson else 'json'}")
+    print(f"{'경로':<40} {'시간(초)':>10} {'크기(MB)':>10}")
+    
+    baseline = None
+    for label, func in cases:
+        best = float('inf')
+        size = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = func()
+            best = min(best, time.perf_counter() - start)
+            size = len(output.encode('utf-8'))
+        if baseline is None:
+            baseline = best
+        speedup = baseline / best if best else 0.0
+        print(f"{label:<40} {best:>10.3f} {size / 1024 ** 2:>10.2f}  (x{speedup:.2f})")
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description='JSON 직렬화 벤치마크')
+    parser.add_argument('--bench', action='store_true', help='벤치마크 실행')
+    parser.add_argument('--rows', type=int, default=100_000, help='샘플 행 수 (기본값: 100000)')
+    parser.add_argument('--repeat', type=int, default=3, help='반복 횟수 (기본값: 3)')
+    args = parser.parse_args()
+    
+    if not args.bench:
+        parser.print_help()
+        sys.exit(0)
+    
+    benchmark(args.rows, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
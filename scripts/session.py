@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+대화형 쿼리 세션 (클라이언트를 한 번만 만들어 유지)
+
+run_query.py를 실행할 때마다 인터프리터 시작, 패키지 import, 인증 정보 탐색,
+클라이언트 생성 비용을 다시 냅니다. 세션은 BigQueryRunner와 GeminiSummarizer를
+한 번만 만들고, 마지막 결과를 메모리에 보관해 재조회 없이 요약/저장합니다.
+명령마다 걸린 시간을 표시합니다.
+
+사용법:
+    python scripts/session.py [옵션]
+
+예시:
+    python scripts/session.py
+    python scripts/session.py --backend local
+    python scripts/session.py --address-labels local_data/address_labels.lblidx --timeout 300
+
+세션 명령:
+    run <SQL 파일 | SQL>        쿼리 실행, 결과를 메모리에 보관
+    dry [SQL 파일 | SQL]        비용만 확인 (인자가 없으면 마지막 SQL)
+    <SQL>;                      SELECT/WITH로 시작하는 SQL은 run 없이 바로 실행 (;까지 여러 줄)
+    show [N]                    마지막 결과의 앞 N행 (기본값: 10)
+    summarize [타입] [프롬프트]  마지막 결과 요약 (weekly, anomalies, report, custom)
+    export <파일> [형식]         마지막 결과 저장 (csv, json, ndjson, 기본값: 확장자)
+    sql                         마지막 SQL 출력
+    quit                        종료 (Ctrl-D)
+"""
+
+import cmd
+import sys
+import argparse
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from label_index import LabelIndex
+from result_set import ResultSet
+from run_history import RunHistory
+from run_query import BigQueryRunner
+from summarize_with_gemini import GeminiSummarizer, format_query_results
+from structured_report import render_report
+
+SUMMARY_TYPES = ('weekly', 'anomalies', 'report', 'custom')
+# 실행 시간을 표시할 명령
+TIMED_COMMANDS = ('run', 'dry', 'show', 'summarize', 'export')
+EXPORT_FORMATS = ('csv', 'json', 'ndjson')
+DEFAULT_SHOW_ROWS = 10
+# show 출력에서 셀 하나의 최대 너비
+MAX_CELL_WIDTH = 32
+# 명령 없이 바로 실행하는 인라인 SQL의 시작 키워드
+SQL_KEYWORDS = ('select', 'with', '(')
+
+
+class QuerySession(cmd.Cmd):
+    """BigQueryRunner/GeminiSummarizer를 유지하는 대화형 세션"""
+    
+    intro = "대화형 쿼리 세션입니다. help로 명령 목록을 보고, quit 또는 Ctrl-D로 종료합니다."
+    prompt = 'bq> '
+    continuation_prompt = '... '
+    
+    def __init__(
+        self,
+        runner: BigQueryRunner,
+        api_key: Optional[str] = None,
+        sample_rows: int = 5
+    ):
+        """
+        초기화
+        
+        Args:
+            runner: 세션 동안 재사용할 쿼리 실행기
+            api_key: Gemini API 키 (None이면 환경 변수, 첫 summarize에서 요약기 생성)
+            sample_rows: 프롬프트에 넣을 결과 행 수 (0이면 예산 안에서 전체 행)
+        """
+        super().__init__()
+        self.runner = runner
+        self.api_key = api_key
+        self.sample_rows = sample_rows
+        self.summarizer: Optional[GeminiSummarizer] = None
+        self.last_sql: Optional[str] = None
+        self.last_source: Optional[str] = None
+        self.results: Optional[ResultSet] = None
+        # 샘플 실행 정보 (요약 프롬프트에 추정값임을 알리기 위해 결과와 함께 보관)
+        self.sampling: Optional[dict] = None
+        self._buffer: list = []
+    
+    # ----- 명령 -----
+    
+    def do_run(self, arg: str):
+        """run <SQL 파일 | SQL>: 쿼리를 실행하고 결과를 메모리에 보관"""
+        sql, source = self._resolve(arg)
+        if sql is None:
+            return
+        self.runner.dry_run = False
+        self.runner.last_results = None
+        with self.runner.jobs:
+            result = self.runner.execute_query(sql, template=source)
+        self.last_sql, self.last_source = sql, source
+        if result.get('success'):
+            self.results = self.runner.last_results
+            self.sampling = result.get('sampling')
+    
+    def do_dry(self, arg: str):
+        """dry [SQL 파일 | SQL]: 실행 없이 처리 바이트와 예상 비용 확인 (인자가 없으면 마지막 SQL)"""
+        sql, source = self._resolve(arg) if arg.strip() else (self.last_sql, self.last_source)
+        if sql is None:
+            if not arg.strip():
+                print("✗ 실행한 SQL이 없습니다. dry <SQL 파일 | SQL>로 지정하세요.")
+            return
+        self.runner.dry_run = True
+        try:
+            result = self.runner.execute_query(sql, template=source)
+        finally:
+            self.runner.dry_run = False
+        self.last_sql, self.last_source = sql, source
+        if not result.get('dry_run'):
+            return
+        print(f"\n[Dry Run 결과]")
+        print(f"  처리될 데이터: {self.runner._format_bytes(result['total_bytes_processed'])}")
+        print(f"  예상 비용: ${result['estimated_cost_usd']:.6f}")
+    
+    def do_show(self, arg: str):
+        """show [N]: 마지막 결과의 앞 N행 출력 (기본값: 10)"""
+        if not self._require_results():
+            return
+        try:
+            limit = int(arg) if arg.strip() else DEFAULT_SHOW_ROWS
+        except ValueError:
+            print(f"✗ 행 수는 정수여야 합니다: {arg}")
+            return
+        print(format_table(self.results, limit))
+        print(f"({min(limit, len(self.results)):,}/{len(self.results):,}행)")
+    
+    def do_summarize(self, arg: str):
+        """summarize [weekly|anomalies|report|custom] [프롬프트]: 마지막 결과를 Gemini로 요약 (재조회 없음)"""
+        if not self._require_results():
+            return
+        summary_type, _, custom_prompt = arg.strip().partition(' ')
+        summary_type = summary_type or 'weekly'
+        if summary_type not in SUMMARY_TYPES:
+            print(f"✗ 요약 타입은 {', '.join(SUMMARY_TYPES)} 중 하나여야 합니다: {summary_type}")
+            return
+        if summary_type == 'custom' and not custom_prompt.strip():
+            print("✗ custom 타입은 프롬프트가 필요합니다. 예: summarize custom 주요 특징을 3줄로 요약해주세요")
+            return
+        
+        if self.summarizer is None:
+            # 요약을 쓰지 않는 세션은 API 키 없이도 쿼리만 실행할 수 있도록 처음 요약할 때 생성
+            self.summarizer = GeminiSummarizer(api_key=self.api_key)
+        formatted = format_query_results(self.results, self.sample_rows or None)
+        if self.sampling:
+            # 샘플 실행이면 추정값임을 프롬프트에 함께 전달
+            formatted['sampling'] = self.sampling
+            print(f"⚠️  {self.runner.sample_percent:g}% 샘플 실행: COUNT/SUM 컬럼은 확장 추정값입니다 (95% 오차: <컬럼>_err95).")
+        calls = len(self.summarizer.token_usage)
+        
+        print(f"🤖 Gemini로 요약 생성 중...")
+        if summary_type == 'weekly':
+            summary = self.summarizer.generate_weekly_summary(formatted)
+        elif summary_type == 'anomalies':
+            summary = self.summarizer.detect_anomalies(formatted)
+        elif summary_type == 'report':
+            summary = render_report(self.summarizer.generate_structured_report(formatted))
+        else:
+            summary = self.summarizer.generate_custom_summary(formatted, custom_prompt.strip())
+        
+        print("\n" + "="*60)
+        print(summary)
+        print("="*60)
+        usage = self.summarizer.token_usage[calls:]
+        if usage:
+            print(f"📏 프롬프트 토큰 {sum(u['prompt_tokens'] for u in usage):,}, "
+                  f"응답 토큰 {sum(u['output_tokens'] or 0 for u in usage):,}")
+    
+    def do_export(self, arg: str):
+        """export <파일> [csv|json|ndjson]: 마지막 결과를 파일로 저장 (형식 기본값: 확장자, 없으면 csv)"""
+        if not self._require_results():
+            return
+        parts = arg.split()
+        if not parts or len(parts) > 2:
+            print("✗ 사용법: export <파일> [csv|json|ndjson]")
+            return
+        output_file = parts[0]
+        output_format = parts[1] if len(parts) == 2 else Path(output_file).suffix.lstrip('.').lower()
+        if output_format not in EXPORT_FORMATS:
+            if len(parts) == 2:
+                print(f"✗ 형식은 {', '.join(EXPORT_FORMATS)} 중 하나여야 합니다: {output_format}")
+                return
+            output_format = 'csv'
+        self.runner._save_results(self.results, output_file, output_format)
+        print(f"✓ {len(self.results):,}행 저장: {output_file} ({output_format})")
+    
+    def do_sql(self, arg: str):
+        """sql: 마지막으로 실행한 SQL 출력"""
+        if self.last_sql is None:
+            print("실행한 SQL이 없습니다.")
+            return
+        print(self.last_sql)
+    
+    def do_quit(self, arg: str):
+        """quit: 세션 종료"""
+        return True
+    
+    do_exit = do_quit
+    
+    def do_EOF(self, arg: str):
+        """Ctrl-D: 세션 종료"""
+        print()
+        return True
+    
+    # ----- 명령 처리 -----
+    
+    def default(self, line: str):
+        """명령이 아닌 입력은 인라인 SQL이면 실행"""
+        if line.lstrip().lower().startswith(SQL_KEYWORDS):
+            return self.do_run(line)
+        print(f"✗ 알 수 없는 명령입니다: {line.split()[0]} (help로 명령 목록 확인)")
+    
+    def emptyline(self):
+        """빈 줄은 마지막 명령을 반복하지 않음"""
+    
+    def onecmd(self, line: str):
+        """
+        한 줄 처리: 인라인 SQL은 ;가 나올 때까지 모으고, 명령별 실행 시간 표시
+        
+        오류나 Ctrl-C는 세션을 끝내지 않고 메시지만 출력합니다.
+        """
+        if self._buffer or (line.lstrip().lower().startswith(SQL_KEYWORDS) and not line.rstrip().endswith(';')):
+            self._buffer.append(line)
+            if not line.rstrip().endswith(';'):
+                self.prompt = self.continuation_prompt
+                return False
+            line = '\n'.join(self._buffer)
+            self.reset_input()
+        
+        command = self.parseline(line)[0]
+        if command and not hasattr(self, 'do_' + command):
+            command = 'run' if line.lstrip().lower().startswith(SQL_KEYWORDS) else None
+        start_time = time.perf_counter()
+        try:
+            return super().onecmd(line)
+        except KeyboardInterrupt:
+            print("\n✗ 명령을 중단했습니다.")
+        except Exception as e:
+            print(f"✗ 오류 발생: {e}")
+        finally:
+            if command in TIMED_COMMANDS:
+                print(f"⏱  {command}: {time.perf_counter() - start_time:.2f}초")
+        return False
+    
+    def reset_input(self) -> None:
+        """입력 중인 여러 줄 SQL 버리기"""
+        self._buffer = []
+        self.prompt = QuerySession.prompt
+        self.intro = None
+    
+    def _resolve(self, arg: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        인자를 SQL로 변환
+        
+        Args:
+            arg: SQL 파일 경로 또는 인라인 SQL
+        
+        Returns:
+            (실행할 SQL, 템플릿 경로) 튜플 (인라인 SQL은 템플릿 None, 인자가 없으면 SQL None)
+        """
+        text = arg.strip()
+        if not text:
+            print("✗ SQL 파일 경로나 SQL을 입력하세요.")
+            return None, None
+        if '\n' not in text and (text.endswith('.sql') or Path(text).is_file()):
+            return self.runner.read_sql_file(text), text
+        statements = BigQueryRunner._split_sql_statements(text)
+        if len(statements) > 1:
+            print(f"⚠️  {len(statements)}개의 쿼리 중 첫 번째 쿼리만 실행합니다.")
+        return (statements[0] if statements else text.rstrip(';')), None
+    
+    def _require_results(self) -> bool:
+        """보관 중인 결과가 있는지 확인"""
+        if self.results is None:
+            print("✗ 보관 중인 결과가 없습니다. 먼저 run으로 쿼리를 실행하세요.")
+            return False
+        return True
+    
+    def close(self) -> None:
+        """생성한 컨텍스트 캐시와 이력 DB 정리"""
+        if self.summarizer is not None:
+            self.summarizer.close()
+        if self.runner.history is not None:
+            self.runner.history.close()
+
+
+def format_table(results: ResultSet, limit: int) -> str:
+    """
+    결과 앞부분을 고정 폭 텍스트 표로 변환
+    
+    Args:
+        results: 쿼리 결과
+        limit: 출력할 최대 행 수
+    
+    Returns:
+        표 문자열
+    """
+    def cell(value) -> str:
+        text = '' if value is None else str(value)
+        return text if len(text) <= MAX_CELL_WIDTH else text[:MAX_CELL_WIDTH - 1] + '…'
+    
+    header = list(results.schema)
+    rows = [[cell(value) for value in row] for row in results[:limit].iter_tuples()]
+    widths = [max([len(name)] + [len(row[i]) for row in rows]) for i, name in enumerate(header)]
+    lines = [
+        '  '.join(name.ljust(width) for name, width in zip(header, widths)),
+        '  '.join('-' * width for width in widths)
+    ]
+    lines.extend('  '.join(value.ljust(width) for value, width in zip(row, widths)) for row in rows)
+    return '\n'.join(lines)
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(
+        description='BigQuery/Gemini 클라이언트를 유지하는 대화형 쿼리 세션',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+예시:
+  # BigQuery 세션
+  python scripts/session.py
+  
+  # 로컬 DuckDB 샘플 데이터로 세션
+  python scripts/session.py --backend local
+  
+  # 세션 안에서
+  bq> run templates/queries/01_tx_volume.sql
+  bq> summarize weekly
+  bq> SELECT DATE(block_timestamp) AS day, COUNT(*) AS tx_count
+  ...   FROM `bigquery-public-data.crypto_ethereum.transactions`
+  ...  WHERE block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 7 DAY)
+  ...  GROUP BY day ORDER BY day;
+  bq> export daily.csv
+        """
+    )
+    
+    parser.add_argument('--project-id', '-p', help='GCP 프로젝트 ID (기본값: GCP_PROJECT_ID 환경 변수)')
+    parser.add_argument('--api-key', help='Gemini API 키 (기본값: GEMINI_API_KEY 환경 변수)')
+    parser.add_argument(
+        '--backend',
+        choices=['bigquery', 'local'],
+        default='bigquery',
+        help='쿼리 실행 백엔드 (local: 로컬 DuckDB 샘플 데이터, 기본값: bigquery)'
+    )
+    parser.add_argument(
+        '--local-db',
+        help='local 백엔드의 DuckDB 파일 경로 (기본값: LOCAL_DUCKDB_PATH 또는 local_data/blockchain.duckdb)'
+    )
+    parser.add_argument(
+        '--sample',
+        type=float,
+        metavar='PCT',
+        help='대용량 테이블을 PCT%%만 샘플링하여 실행하고 COUNT/SUM 컬럼을 확장 추정'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        metavar='SEC',
+        help='명령별 제한 시간(초), 넘으면 BigQuery 잡을 취소'
+    )
+    parser.add_argument(
+        '--address-labels',
+        metavar='INDEX',
+        help='label_index.py로 만든 라벨 인덱스로 결과의 주소 컬럼에 <컬럼>_label 추가'
+    )
+    parser.add_argument(
+        '--sample-rows',
+        type=int,
+        default=5,
+        help='요약 프롬프트에 넣을 결과 행 수, 0이면 전체 행을 예산 안에서 최대한 포함 (기본값: 5)'
+    )
+    parser.add_argument(
+        '--no-history',
+        action='store_true',
+        help='실행 이력(RUN_HISTORY_DB 또는 local_data/run_history.sqlite)에 기록하지 않음'
+    )
+    
+    args = parser.parse_args()
+    
+    start_time = time.perf_counter()
+    try:
+        runner = BigQueryRunner(
+            project_id=args.project_id,
+            backend=args.backend,
+            local_db=args.local_db,
+            sample_percent=args.sample,
+            history=None if args.no_history else RunHistory(),
+            timeout=args.timeout,
+            address_labels=LabelIndex(args.address_labels) if args.address_labels else None
+        )
+    except Exception as e:
+        print(f"\n✗ 오류 발생: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    
+    session = QuerySession(runner, api_key=args.api_key, sample_rows=args.sample_rows)
+    target = runner.client.database if args.backend == 'local' else runner.project_id
+    print(f"⚡ 세션 준비 완료 ({args.backend}: {target}, {time.perf_counter() - start_time:.2f}초)")
+    
+    try:
+        while True:
+            try:
+                session.cmdloop()
+                break
+            except KeyboardInterrupt:
+                # 입력 중 Ctrl-C는 입력 중인 SQL만 버리고 세션은 유지
+                print("^C")
+                session.reset_input()
+    finally:
+        session.close()
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+요약 통계 스냅샷 저장소와 기간 대비 변화율 계산 (SQLite)
+
+주간 요약 프롬프트는 "전주 대비 변화율"을 요구하지만 현재 기간 결과만 전달하면
+모델이 변화율을 추측하게 되고, 이전 기간까지 함께 보내면 프롬프트가 두 배가 됩니다.
+summarize_with_gemini.py는 실행마다 결과의 요약 통계(컬럼별 sum/avg/min/max/count)와
+데이터 기간을 스냅샷으로 저장하고, --delta를 지정하면 직전 보고 기간 스냅샷과의
+변화량/변화율을 로컬에서 계산해 현재 스냅샷과 변화율만 프롬프트로 보냅니다.
+이전 기간을 다시 조회하지 않습니다.
+
+- 스냅샷은 소스(템플릿 경로, 결과 파일, 테이블)별로 저장하며, 같은 기간을 다시
+  요약하면 덮어씁니다.
+- 직전 기간은 같은 소스/백엔드에서 현재 기간 시작 전에 끝난 가장 최근 스냅샷입니다 (겹치는 기간은 제외).
+  시간 컬럼이 없는 결과는 가장 최근 스냅샷과 비교합니다.
+
+사용 예:
+    store = SnapshotStore()
+    snapshot = take_snapshot(results, summary['statistics'])
+    previous = store.previous('templates/queries/01_tx_volume.sql', snapshot, backend='bigquery')
+    deltas = compute_deltas(snapshot, previous)
+    store.save('templates/queries/01_tx_volume.sql', snapshot, sql, backend='bigquery')
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from chunking import find_time_column
+from result_set import ResultSet
+from run_history import fingerprint_sql
+
+# 스냅샷 DB 기본 경로 (SUMMARY_SNAPSHOT_DB 환경 변수로 변경)
+DEFAULT_SNAPSHOT_DB = 'local_data/summary_snapshots.sqlite'
+
+# 변화율을 계산할 통계 항목
+DELTA_STATS = ('sum', 'avg', 'min', 'max')
+
+
+def default_snapshot_path() -> str:
+    """스냅샷 DB 경로 (SUMMARY_SNAPSHOT_DB 환경 변수 또는 local_data/summary_snapshots.sqlite)"""
+    return os.getenv('SUMMARY_SNAPSHOT_DB', DEFAULT_SNAPSHOT_DB)
+
+
+def _iso(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def take_snapshot(results: ResultSet, statistics: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    """
+    쿼리 결과의 요약 통계 스냅샷 생성
+    
+    Args:
+        results: 쿼리 결과
+        statistics: format_query_results()의 statistics (컬럼별 sum/avg/min/max/count)
+    
+    Returns:
+        period(start, end, time_column), total_rows, statistics 딕셔너리
+    """
+    period = None
+    time_column = find_time_column(results) if results else None
+    if time_column:
+        times = [t for t in results.column(time_column) if t is not None]
+        if times:
+            period = {'start': _iso(min(times)), 'end': _iso(max(times)), 'time_column': time_column}
+    
+    return {
+        'period': period,
+        'total_rows': len(results),
+        'statistics': statistics or {}
+    }
+
+
+def compute_deltas(current: Dict[str, Any], previous: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    두 스냅샷의 컬럼별 변화량/변화율 계산
+    
+    Args:
+        current: 현재 스냅샷
+        previous: 비교할 이전 스냅샷
+    
+    Returns:
+        {컬럼: {통계: {previous, change, change_pct}}} (이전 값이 0이면 change_pct는 None)
+    """
+    deltas: Dict[str, Dict[str, Any]] = {}
+    previous_stats = previous.get('statistics') or {}
+    for column, stats in (current.get('statistics') or {}).items():
+        before = previous_stats.get(column)
+        if not before:
+            continue
+        column_deltas = {}
+        for stat in DELTA_STATS:
+            if stats.get(stat) is None or before.get(stat) is None:
+                continue
+            change = stats[stat] - before[stat]
+            column_deltas[stat] = {
+                'previous': before[stat],
+                'change': change,
+                'change_pct': round(change / abs(before[stat]) * 100, 2) if before[stat] else None
+            }
+        if column_deltas:
+            deltas[column] = column_deltas
+    return deltas
+
+
+class SnapshotStore:
+    """요약 통계 스냅샷 SQLite 저장소"""
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        초기화
+        
+        Args:
+            path: SQLite 파일 경로 (None이면 default_snapshot_path())
+        """
+        self.path = path or default_snapshot_path()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "created_at TEXT NOT NULL, "
+                "source TEXT NOT NULL, "
+                "backend TEXT, "
+                "fingerprint TEXT, "
+                "period_start TEXT, "
+                "period_end TEXT, "
+                "snapshot TEXT NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS snapshots_source ON snapshots (source, period_end, created_at)")
+    
+    def save(
+        self,
+        source: str,
+        snapshot: Dict[str, Any],
+        sql: Optional[str] = None,
+        backend: Optional[str] = None
+    ) -> int:
+        """
+        스냅샷 저장 (같은 소스/기간의 이전 스냅샷은 교체)
+        
+        Args:
+            source: 템플릿 경로, 결과 파일 또는 테이블 ID
+            snapshot: take_snapshot() 결과
+            sql: 실행한 SQL (지문 기록용, 저장된 결과를 요약할 때는 None)
+            backend: 실행 백엔드 (bigquery, local, file)
+        
+        Returns:
+            추가된 행 id
+        """
+        period = snapshot.get('period') or {}
+        values = (
+            datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            source,
+            backend,
+            fingerprint_sql(sql) if sql else None,
+            period.get('start'),
+            period.get('end'),
+            json.dumps(snapshot, ensure_ascii=False)
+        )
+        with self._lock, self.conn:
+            if period:
+                self.conn.execute(
+                    "DELETE FROM snapshots WHERE source = ? AND backend IS ? AND period_start = ? AND period_end = ?",
+                    (source, backend, period['start'], period['end'])
+                )
+            cursor = self.conn.execute(
+                "INSERT INTO snapshots (created_at, source, backend, fingerprint, period_start, period_end, snapshot) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values
+            )
+            return cursor.lastrowid
+    
+    def previous(
+        self,
+        source: str,
+        snapshot: Dict[str, Any],
+        backend: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        비교할 직전 보고 기간 스냅샷 조회
+        
+        Args:
+            source: 템플릿 경로, 결과 파일 또는 테이블 ID
+            snapshot: 현재 스냅샷
+            backend: 실행 백엔드 (다른 백엔드의 스냅샷과는 비교하지 않음)
+        
+        Returns:
+            직전 스냅샷 (created_at, fingerprint 포함), 없으면 None
+        """
+        period = snapshot.get('period')
+        if period:
+            query = ("SELECT * FROM snapshots WHERE source = ? AND backend IS ? AND period_end < ? "
+                     "ORDER BY period_end DESC, created_at DESC LIMIT 1")
+            params = (source, backend, period['start'])
+        else:
+            query = "SELECT * FROM snapshots WHERE source = ? AND backend IS ? ORDER BY created_at DESC, id DESC LIMIT 1"
+            params = (source, backend)
+        
+        with self._lock:
+            row = self.conn.execute(query, params).fetchone()
+        if row is None:
+            return None
+        previous = json.loads(row['snapshot'])
+        previous.update({'created_at': row['created_at'], 'fingerprint': row['fingerprint']})
+        return previous
+    
+    def close(self):
+        self.conn.close()
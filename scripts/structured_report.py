@@ -0,0 +1,147 @@
+"""
+구조화(JSON) 요약 리포트 스키마, 검증, 렌더링
+
+주간 요약/주요 변화/이상 징후를 섹션마다 따로 요청하지 않고, Gemini에
+JSON 응답 스키마(response_schema)를 지정해 한 번의 호출로 모든 섹션을 받습니다.
+응답은 parse_report()로 검증한 뒤 render_report()로 기존 텍스트 형식
+([주간 요약]/[주요 변화]/[이상 징후])으로 변환합니다.
+
+사용법:
+    from structured_report import REPORT_GENERATION_CONFIG, parse_report, render_report
+    
+    response = model.generate_content(prompt, generation_config=REPORT_GENERATION_CONFIG)
+    print(render_report(parse_report(response.text)))
+"""
+
+import json
+from typing import Any, Dict, List
+
+# Gemini response_schema (OpenAPI 스키마 부분집합)
+REPORT_SCHEMA: Dict[str, Any] = {
+    'type': 'OBJECT',
+    'properties': {
+        'weekly_summary': {
+            'type': 'STRING',
+            'description': '핵심 지표 3가지를 포함한 3-5문장 요약'
+        },
+        'key_changes': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'metric': {'type': 'STRING', 'description': '지표 이름'},
+                    'change': {'type': 'STRING', 'description': '변화 내용 (변화율/수치 포함)'}
+                },
+                'required': ['metric', 'change']
+            }
+        },
+        'anomalies': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'period': {'type': 'STRING', 'description': '이상 징후 시점 또는 구간'},
+                    'description': {'type': 'STRING', 'description': '급증/급감 내용과 수치'},
+                    'possible_cause': {'type': 'STRING', 'description': '추정 원인'}
+                },
+                'required': ['period', 'description']
+            }
+        }
+    },
+    'required': ['weekly_summary', 'key_changes', 'anomalies']
+}
+
+REPORT_GENERATION_CONFIG: Dict[str, Any] = {
+    'response_mime_type': 'application/json',
+    'response_schema': REPORT_SCHEMA
+}
+
+NO_ANOMALY_TEXT = "특별한 이상 징후 없음"
+
+
+def _strip_code_fence(text: str) -> str:
+    """```json ... ``` 으로 감싼 응답 처리"""
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+        if text.rstrip().endswith('```'):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def _validate(value: Any, schema: Dict[str, Any], path: str) -> Any:
+    """스키마에 맞는지 확인하고 문자열 앞뒤 공백 제거 (불일치 시 ValueError)"""
+    kind = schema['type']
+    if kind == 'STRING':
+        if not isinstance(value, str):
+            raise ValueError(f"{path}: 문자열이 아닙니다 ({type(value).__name__})")
+        return value.strip()
+    if kind == 'ARRAY':
+        if not isinstance(value, list):
+            raise ValueError(f"{path}: 배열이 아닙니다 ({type(value).__name__})")
+        return [_validate(item, schema['items'], f"{path}[{i}]") for i, item in enumerate(value)]
+    if not isinstance(value, dict):
+        raise ValueError(f"{path}: 객체가 아닙니다 ({type(value).__name__})")
+    for name in schema.get('required', []):
+        if name not in value or value[name] is None:
+            raise ValueError(f"{path}.{name}: 필수 항목이 없습니다")
+    return {
+        name: _validate(value[name], field, f"{path}.{name}")
+        for name, field in schema['properties'].items()
+        if value.get(name) is not None
+    }
+
+
+def parse_report(text: str) -> Dict[str, Any]:
+    """
+    Gemini JSON 응답을 파싱하고 REPORT_SCHEMA로 검증
+    
+    Args:
+        text: 모델 응답 텍스트
+    
+    Returns:
+        검증된 리포트 딕셔너리 (스키마에 없는 항목은 제거)
+    
+    Raises:
+        ValueError: JSON이 아니거나 스키마와 맞지 않는 경우
+    """
+    try:
+        data = json.loads(_strip_code_fence(text))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 파싱 실패: {e}")
+    report = _validate(data, REPORT_SCHEMA, 'report')
+    if not report['weekly_summary']:
+        raise ValueError("report.weekly_summary: 내용이 비어 있습니다")
+    return report
+
+
+def render_report(report: Dict[str, Any]) -> str:
+    """
+    리포트 딕셔너리를 기존 요약 텍스트 형식으로 변환
+    
+    Args:
+        report: parse_report() 반환값
+    
+    Returns:
+        [주간 요약]/[주요 변화]/[이상 징후] 형식의 텍스트
+    """
+    changes: List[str] = [
+        f"- {item['metric']}: {item['change']}" for item in report['key_changes']
+    ]
+    anomalies: List[str] = []
+    for item in report['anomalies']:
+        line = f"- {item['period']}: {item['description']}"
+        if item.get('possible_cause'):
+            line += f" (추정 원인: {item['possible_cause']})"
+        anomalies.append(line)
+    
+    return "\n".join([
+        "[주간 요약]",
+        report['weekly_summary'],
+        "",
+        "[주요 변화]",
+        "\n".join(changes) or "특별한 변화 없음",
+        "",
+        "[이상 징후]",
+        "\n".join(anomalies) or NO_ANOMALY_TEXT,
+    ])
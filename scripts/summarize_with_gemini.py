@@ -15,10 +15,16 @@ import os
 import sys
 import argparse
 import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from decimal import Decimal
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from array import array
+from typing import Optional, Dict, Any, Iterator, List, Tuple, Union
 
 try:
     from dotenv import load_dotenv
@@ -41,110 +47,119 @@ except ImportError:
     print("설치 방법: pip install google-generativeai")
     sys.exit(1)
 
+from alignment import MissingTimeColumnError, align_results, label_slug, to_compact_table
+from anomaly import DEFAULT_THRESHOLD, detect_anomalies as detect_local_anomalies
+from cassette import Cassette
+from chunking import Chunk, chunk_results, estimate_tokens
+from downsample import DEFAULT_METHOD as DEFAULT_SAMPLE_METHOD, DOWNSAMPLE_METHODS, downsample
+from job_control import JobController
+from label_index import LabelIndex, describe_matches, enrich
+from local_backend import LocalClient
+from materialize import qualify_table_id
+from mem_profile import MemoryProfiler
+from prompt_builder import DEFAULT_PROMPT_BUDGET, PackedPayload, TokenCounter, pack_payload
+from prompts import CACHE_MODES, MIN_CACHE_TOKENS, PrefixCache, render_prompt
+from result_io import STDIO_PATH, read_results
+from result_set import ResultSet
+from run_history import RunHistory, fingerprint_sql, gemini_metrics, job_metrics
+from sampling import sample_sql, extrapolate
+from serialization import to_json
+from snapshots import SnapshotStore, compute_deltas, take_snapshot
+from structured_report import REPORT_GENERATION_CONFIG, parse_report, render_report
+
+# map-reduce 요약 기본값: 청크 하나의 데이터 토큰 예산, 동시 Gemini 호출 수
+DEFAULT_TOKEN_BUDGET = 8000
+DEFAULT_MAX_WORKERS = 4
+
 
 class GeminiSummarizer:
     """Gemini API를 사용한 요약 생성 클래스"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        prompt_budget: int = DEFAULT_PROMPT_BUDGET,
+        context_cache: str = 'off',
+        profiler: Optional[MemoryProfiler] = None,
+        cassette: Optional[Cassette] = None,
+        max_usage_records: Optional[int] = None
+    ):
         """
         초기화
         
         Args:
             api_key: Gemini API 키 (None이면 환경 변수에서 가져옴)
+            prompt_budget: 프롬프트 데이터 부분의 토큰 예산
+            context_cache: 정적 프리픽스 캐시 모드 ('off', 'gemini', 'local')
+            profiler: 단계별 메모리 측정기 (None이면 측정하지 않음)
+            cassette: 응답 녹화/재생 카세트 (재생 모드에서는 API 키 불필요)
+            max_usage_records: token_usage에 보관할 최대 호출 수 (None이면 전부, 장기 실행 서비스용)
         """
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
+        replaying = cassette is not None and cassette.replaying
+        if not self.api_key and not replaying:
             raise ValueError(
                 "GEMINI_API_KEY 환경 변수를 설정하거나 --api-key 옵션을 사용하세요.\n"
                 "예: export GEMINI_API_KEY='your-api-key'"
             )
         
-        genai.configure(api_key=self.api_key)
+        if self.api_key:
+            genai.configure(api_key=self.api_key)
         self.model = genai.GenerativeModel('gemini-2.0-flash')
+        if cassette is not None:
+            self.model = cassette.wrap_model(self.model)
+        
+        self.prompt_budget = prompt_budget
+        self.profiler = profiler or MemoryProfiler(enabled=False)
+        self.token_counter = TokenCounter(self.model)
+        self.prefix_cache = PrefixCache(self.model, context_cache, token_counter=self.token_counter)
+        # 호출별 토큰 사용량 기록 (call, prompt_tokens, output_tokens, representation)
+        self.token_usage: List[Dict[str, Any]] = []
+        self.max_usage_records = max_usage_records
+        self._usage_lock = threading.Lock()
+        # capture_usage()로 현재 스레드의 호출 기록을 따로 모을 때 사용
+        self._local = threading.local()
     
     def generate_weekly_summary(self, query_results: Dict[str, Any]) -> str:
         """
         주간 온체인 데이터 요약 생성
         
         Args:
-            query_results: BigQuery 쿼리 결과 딕셔너리
+            query_results: BigQuery 쿼리 결과 딕셔너리 (deltas가 있으면 직전 기간 대비
+                변화율을 그대로 인용하도록 지시하는 weekly_delta 프롬프트 사용)
         
         Returns:
             생성된 요약 텍스트
         """
-        prompt = f"""
-당신은 블록체인 데이터 분석가입니다. 다음 온체인 데이터를 기반으로 
-기관 투자자/증권사 관점에서 읽을 수 있는 주간 요약 리포트를 작성해주세요.
-
-## 데이터 요약
-{json.dumps(query_results, indent=2, ensure_ascii=False, default=str)}
-
-## 요구사항
-1. 핵심 지표 3가지를 한 문장씩 요약
-2. 전주 대비 변화율 언급 (가능한 경우)
-3. 주목할 만한 이상 징후나 패턴 발견 시 언급
-4. 전문적이지만 이해하기 쉬운 문체 사용
-5. 총 3-5문장으로 구성
-
-## 출력 형식
-[주간 요약]
-(내용)
-
-[주요 변화]
-(내용)
-
-[이상 징후]
-(내용 또는 "특별한 이상 징후 없음")
-"""
-        
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            raise RuntimeError(f"Gemini API 호출 실패: {str(e)}")
+        payload = self._payload(query_results)
+        prompt = render_prompt('weekly_delta' if 'deltas' in query_results else 'weekly', payload.text)
+        return self._generate(prompt, 'weekly', payload)
     
-    def generate_comparison_insight(
+    def generate_multi_comparison(
         self,
-        data1: Dict[str, Any],
-        data2: Dict[str, Any],
-        label1: str = "Ethereum",
-        label2: str = "Solana"
+        comparison_data: Dict[str, Any],
+        labels: List[str]
     ) -> str:
         """
-        두 데이터셋 비교 인사이트 생성
+        N개 체인 비교 인사이트 생성
         
         Args:
-            data1: 첫 번째 데이터셋
-            data2: 두 번째 데이터셋
-            label1: 첫 번째 데이터셋 라벨
-            label2: 두 번째 데이터셋 라벨
+            comparison_data: alignment.align_results()로 정렬한 표와 정렬 정보,
+                또는 시간 컬럼이 없는 경우 {라벨: format_query_results() 결과}
+            labels: 체인 라벨 목록 (첫 번째가 비율/변화율 기준)
         
         Returns:
             비교 분석 텍스트
         """
-        prompt = f"""
-다음은 {label1}과 {label2} 네트워크의 온체인 데이터입니다.
-두 네트워크를 비교하여 기관 투자자 관점에서 3줄 요약을 작성해주세요.
-
-## {label1} 데이터
-{json.dumps(data1, indent=2, ensure_ascii=False, default=str)}
-
-## {label2} 데이터
-{json.dumps(data2, indent=2, ensure_ascii=False, default=str)}
-
-## 요구사항
-1. 처리량(트랜잭션 수) 비교
-2. 수수료 효율성 비교
-3. 네트워크 활성도 비교
-4. 각 네트워크의 강점을 데이터로 뒷받침하여 설명
-5. 총 3줄로 간결하게 작성
-"""
-        
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            raise RuntimeError(f"Gemini API 호출 실패: {str(e)}")
+        payload = self._payload(comparison_data)
+        prompt = render_prompt(
+            'multi_comparison',
+            payload.text,
+            names=", ".join(labels),
+            base=labels[0],
+            example_slug=label_slug(labels[-1])
+        )
+        return self._generate(prompt, 'comparison', payload)
     
     def detect_anomalies(self, query_results: Dict[str, Any]) -> str:
         """
@@ -156,25 +171,33 @@ class GeminiSummarizer:
         Returns:
             이상 징후 분석 텍스트
         """
-        prompt = f"""
-다음 온체인 데이터에서 이상 징후나 주목할 만한 패턴을 찾아주세요.
-
-## 데이터
-{json.dumps(query_results, indent=2, ensure_ascii=False, default=str)}
-
-## 분석 요청
-1. 평소와 다른 급증/급감 지점 식별
-2. 가능한 원인 추론 (이벤트, 시장 상황 등)
-3. 추가 조사가 필요한 항목 제안
-
-이상 징후가 없다면 "특별한 이상 징후 없음"이라고 답변하세요.
-"""
+        payload = self._payload(query_results)
+        prompt = render_prompt('anomalies', payload.text)
+        return self._generate(prompt, 'anomalies', payload)
+    
+    def explain_anomalies(self, detection: Dict[str, Any]) -> str:
+        """
+        로컬에서 사전 탐지한 이상 구간 설명 생성
         
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            raise RuntimeError(f"Gemini API 호출 실패: {str(e)}")
+        전체 데이터 대신 anomaly.detect_anomalies()가 찾은 이상 구간(앞뒤 문맥 행,
+        기법별 점수)과 변화점만 전달합니다. 탐지된 구간이 없으면 Gemini를 호출하지 않습니다.
+        
+        Args:
+            detection: anomaly.detect_anomalies() 반환값
+        
+        Returns:
+            이상 징후 분석 텍스트
+        """
+        if not detection.get('flagged_windows') and not detection.get('changepoints'):
+            return (
+                "특별한 이상 징후 없음\n"
+                f"(로컬 통계 탐지: {detection.get('rows_scanned', 0)}행 검사, "
+                f"기준 점수 {detection.get('methods', {}).get('threshold', DEFAULT_THRESHOLD)})"
+            )
+        
+        payload = self._payload(detection)
+        prompt = render_prompt('anomalies_prefiltered', payload.text)
+        return self._generate(prompt, 'anomalies_prefiltered', payload)
     
     def generate_custom_summary(
         self,
@@ -191,37 +214,262 @@ class GeminiSummarizer:
         Returns:
             생성된 요약 텍스트
         """
-        full_prompt = f"""
-{custom_prompt}
-
-## 데이터
-{json.dumps(query_results, indent=2, ensure_ascii=False, default=str)}
-"""
+        payload = self._payload(query_results)
+        prompt = render_prompt('custom', payload.text, custom_prompt=custom_prompt)
+        return self._generate(prompt, 'custom', payload)
+    
+    def generate_structured_report(
+        self,
+        query_results: Dict[str, Any],
+        detection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        주간 요약/주요 변화/이상 징후를 한 번의 호출로 생성 (JSON 응답 스키마)
+        
+        weekly와 anomalies를 따로 호출하면 같은 데이터를 두 번 보내므로, 섹션 전체를
+        response_schema로 한 번에 요청하고 parse_report()로 검증합니다.
+        
+        Args:
+            query_results: BigQuery 쿼리 결과
+            detection: anomaly.detect_anomalies() 결과 (있으면 이상 징후 근거로 함께 전달)
         
+        Returns:
+            검증된 리포트 딕셔너리 (render_report()로 텍스트 변환)
+        """
+        data = dict(query_results)
+        if detection is not None:
+            data['local_anomaly_detection'] = detection
+        payload = self._payload(data)
+        prompt = render_prompt('report', payload.text)
+        text = self._generate(prompt, 'report', payload, generation_config=REPORT_GENERATION_CONFIG)
         try:
-            response = self.model.generate_content(full_prompt)
-            return response.text
+            return parse_report(text)
+        except ValueError as e:
+            raise RuntimeError(f"구조화 응답 검증 실패: {e}")
+    
+    
+    def summarize_map_reduce(
+        self,
+        results: ResultSet,
+        summary_type: str = 'weekly',
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        window: Optional[str] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        custom_prompt: Optional[str] = None
+    ) -> str:
+        """
+        프롬프트 한 번에 담기 어려운 결과의 계층 요약 (map-reduce)
+        
+        전체 결과를 토큰 예산에 맞게 나눠 구간별 요약을 병렬로 생성(map)하고,
+        구간 요약이 예산을 넘으면 다시 묶어 요약한 뒤, 전체 통계와 함께
+        기존 weekly/anomalies/custom 프롬프트로 최종 리포트를 생성(reduce)합니다.
+        
+        Args:
+            results: 쿼리 결과 전체
+            summary_type: 'weekly', 'anomalies', 'report', 'custom'
+            token_budget: 청크 하나의 데이터에 허용할 토큰 수
+            window: 시간 구간 단위 ('hour', 'day', 'week', None이면 행 수 기준)
+            max_workers: 동시에 실행할 Gemini 호출 수
+            custom_prompt: custom 타입일 때 사용할 프롬프트
+        
+        Returns:
+            최종 요약 텍스트
+        """
+        if summary_type not in ('weekly', 'anomalies', 'report', 'custom'):
+            raise ValueError(f"map-reduce 요약을 지원하지 않는 타입: {summary_type}")
+        
+        results = ResultSet.from_records(results)
+        chunks = chunk_results(results, token_budget, window)
+        
+        partials = self._map_chunks(chunks, max_workers)
+        partials = self._reduce_partials(partials, token_budget, max_workers)
+        
+        # 전체 통계는 그대로 전달 (샘플 행은 구간 요약으로 대체)
+        overview = format_query_results(results)
+        overview.pop('sample_data', None)
+        payload = {
+            'overall': overview,
+            'chunk_summaries': [{'range': label, 'summary': text} for label, text in partials]
+        }
+        
+        if summary_type == 'weekly':
+            return self.generate_weekly_summary(payload)
+        if summary_type == 'anomalies':
+            return self.detect_anomalies(payload)
+        if summary_type == 'report':
+            return render_report(self.generate_structured_report(payload))
+        return self.generate_custom_summary(payload, custom_prompt)
+    
+    def _map_chunks(self, chunks: List[Chunk], max_workers: int) -> List[Tuple[str, str]]:
+        """구간별 요약을 병렬로 생성 (입력 순서 유지)"""
+        total = len(chunks)
+        
+        def summarize(chunk: Chunk) -> Tuple[str, str]:
+            prompt = render_prompt('map', {
+                '구간': f"{chunk.index + 1}/{total}, {chunk.label}, {len(chunk.rows)}행",
+                '데이터': to_json(chunk.rows.to_records(), compact=True)
+            })
+            return chunk.label, self._generate(prompt, 'map')
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(summarize, chunks))
+    
+    def _reduce_partials(
+        self,
+        partials: List[Tuple[str, str]],
+        token_budget: int,
+        max_workers: int
+    ) -> List[Tuple[str, str]]:
+        """구간 요약 전체가 토큰 예산을 넘으면 연속된 요약끼리 묶어 다시 요약"""
+        while len(partials) > 1 and estimate_tokens(to_json(partials, compact=True)) > token_budget:
+            groups: List[List[Tuple[str, str]]] = [[]]
+            used = 0
+            for partial in partials:
+                tokens = estimate_tokens(partial[1])
+                if groups[-1] and used + tokens > token_budget:
+                    groups.append([])
+                    used = 0
+                groups[-1].append(partial)
+                used += tokens
+            
+            # 한 단계에서 최소 절반으로 줄어들도록 보장
+            if len(groups) == len(partials):
+                groups = [partials[i:i + 2] for i in range(0, len(partials), 2)]
+            
+            def merge(group: List[Tuple[str, str]]) -> Tuple[str, str]:
+                if len(group) == 1:
+                    return group[0]
+                label = f"{group[0][0]} ~ {group[-1][0]}"
+                prompt = render_prompt('reduce', {
+                    part_label: text for part_label, text in group
+                })
+                return label, self._generate(prompt, 'reduce')
+            
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                partials = list(executor.map(merge, groups))
+        
+        return partials
+    
+    def _payload(self, data: Any) -> PackedPayload:
+        """프롬프트 데이터를 토큰 예산에 맞는 표현으로 변환"""
+        with self.profiler.stage('prompt_build'):
+            return pack_payload(data, self.prompt_budget, self.token_counter)
+    
+    @contextmanager
+    def capture_usage(self) -> Iterator[List[Dict[str, Any]]]:
+        """
+        이 블록 안에서 현재 스레드가 호출한 Gemini 토큰 기록 수집
+        
+        여러 스레드가 요약기 하나를 공유할 때(batch_summarize) 항목별 사용량을
+        token_usage 전체 합계와 섞지 않고 구하기 위해 사용합니다.
+        
+        Returns:
+            호출 기록이 추가되는 리스트 (token_usage와 같은 형식)
+        """
+        records: List[Dict[str, Any]] = []
+        previous = getattr(self._local, 'records', None)
+        self._local.records = records
+        try:
+            yield records
+        finally:
+            self._local.records = previous
+    
+    def close(self) -> None:
+        """생성한 컨텍스트 캐시 정리"""
+        self.prefix_cache.close()
+    
+    def _generate(
+        self,
+        prompt: Tuple[str, str],
+        call: str = 'generate',
+        payload: Optional[PackedPayload] = None,
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Gemini 호출 (실패 시 RuntimeError) 및 토큰 사용량 기록"""
+        prefix, body = prompt
+        options = {'generation_config': generation_config} if generation_config else {}
+        start_time = time.perf_counter()
+        try:
+            response = self.prefix_cache.generate(prefix, body, **options)
+            text = response.text
         except Exception as e:
             raise RuntimeError(f"Gemini API 호출 실패: {str(e)}")
+        
+        # 응답의 usage_metadata를 우선 사용 (추가 API 호출 없음)
+        usage = getattr(response, 'usage_metadata', None)
+        prompt_tokens = getattr(usage, 'prompt_token_count', None)
+        record = {
+            'call': call,
+            'prompt_tokens': prompt_tokens if prompt_tokens is not None else self.token_counter.estimate(prefix + body),
+            'prompt_tokens_exact': prompt_tokens is not None,
+            'output_tokens': getattr(usage, 'candidates_token_count', None),
+            'cached_tokens': getattr(usage, 'cached_content_token_count', None) or 0,
+            'seconds': round(time.perf_counter() - start_time, 3),
+        }
+        if payload is not None:
+            record.update({
+                'representation': payload.representation,
+                'rows': f"{payload.rows_kept}/{payload.rows_total}",
+                'within_budget': payload.fits
+            })
+        with self._usage_lock:
+            self.token_usage.append(record)
+            if self.max_usage_records is not None and len(self.token_usage) > self.max_usage_records:
+                del self.token_usage[:-self.max_usage_records]
+        captured = getattr(self._local, 'records', None)
+        if captured is not None:
+            captured.append(record)
+        return text
 
 
 class BigQueryExecutor:
     """BigQuery 쿼리 실행 클래스"""
     
-    def __init__(self, project_id: Optional[str] = None):
+    def __init__(
+        self,
+        project_id: Optional[str] = None,
+        backend: str = 'bigquery',
+        local_db: Optional[str] = None,
+        sample_percent: Optional[float] = None,
+        timeout: Optional[float] = None,
+        progress: Optional[bool] = None,
+        profiler: Optional[MemoryProfiler] = None,
+        cassette: Optional[Cassette] = None
+    ):
         """
         초기화
         
         Args:
             project_id: GCP 프로젝트 ID
+            backend: 'bigquery' 또는 'local' (로컬 DuckDB에서 실행)
+            local_db: local 백엔드의 DuckDB 파일 경로
+            sample_percent: 대용량 테이블을 이 비율(%)만 샘플링하고 COUNT/SUM을 확장 추정
+            timeout: 쿼리별 제한 시간(초), 넘으면 서버 잡을 취소 (None이면 무제한)
+            progress: 진행 줄 표시 여부 (None이면 터미널일 때만 표시)
+            profiler: 단계별 메모리 측정기 (None이면 측정하지 않음)
+            cassette: 쿼리 결과 녹화/재생 카세트 (재생 모드에서는 프로젝트 ID/네트워크 불필요)
         """
+        self.backend = backend
         self.project_id = project_id or os.getenv("GCP_PROJECT_ID")
-        if not self.project_id:
-            raise ValueError(
-                "GCP_PROJECT_ID 환경 변수를 설정하거나 --project-id 옵션을 사용하세요."
-            )
+        self.sample_percent = sample_percent
+        self.jobs = JobController(timeout=timeout, progress=progress)
+        self.profiler = profiler or MemoryProfiler(enabled=False)
         
-        self.client = bigquery.Client(project=self.project_id)
+        if cassette is not None and cassette.replaying:
+            self.client = cassette.wrap_client(None)
+            return
+        
+        if backend == 'local':
+            self.client = LocalClient(local_db)
+        else:
+            if not self.project_id:
+                raise ValueError(
+                    "GCP_PROJECT_ID 환경 변수를 설정하거나 --project-id 옵션을 사용하세요."
+                )
+            self.client = bigquery.Client(project=self.project_id)
+        
+        if cassette is not None:
+            self.client = cassette.wrap_client(self.client)
     
     def read_sql_file(self, file_path: str) -> str:
         """SQL 파일 읽기 (멀티쿼리 파일의 경우 첫 번째 쿼리만 반환)"""
@@ -320,7 +568,7 @@ class BigQueryExecutor:
         
         return statements
     
-    def execute_query(self, sql: str) -> List[Dict[str, Any]]:
+    def execute_query(self, sql: str) -> ResultSet:
         """
         쿼리 실행 및 결과 반환
         
@@ -328,20 +576,57 @@ class BigQueryExecutor:
             sql: 실행할 SQL 쿼리
         
         Returns:
-            쿼리 결과 리스트
+            쿼리 결과 (컬럼 기반 ResultSet, 행은 dict처럼 읽을 수 있음)
         """
+        return self._run(sql)[0]
+    
+    def _run(self, sql: str) -> Tuple[ResultSet, Any]:
+        """쿼리 실행 (sample_percent가 있으면 샘플 쿼리로 실행 후 확장) → (결과, query_job)"""
+        plan = sample_sql(sql, self.sample_percent) if self.sample_percent else None
+        if plan and plan.sampled_tables:
+            sql = plan.sql
+        
         try:
             query_job = self.client.query(sql)
-            results = query_job.result()
-            
-            # 결과를 딕셔너리 리스트로 변환
-            rows = []
-            for row in results:
-                rows.append(dict(row))
-            
-            return rows
+            with self.profiler.stage('fetch'):
+                results = self.jobs.wait(query_job)
+            # BigQuery 결과 페이지는 행을 읽을 때 받아오므로 수신도 변환 단계에 포함
+            with self.profiler.stage('row_conversion'):
+                rows = ResultSet.from_bigquery(results)
         except GoogleCloudError as e:
             raise RuntimeError(f"BigQuery 쿼리 실행 실패: {str(e)}")
+        
+        if plan and plan.sampled_tables:
+            with self.profiler.stage('row_conversion'):
+                rows = extrapolate(rows, plan)
+        return rows, query_job
+    
+    def read_table(self, table_id: str) -> ResultSet:
+        """
+        저장된 테이블(run_query.py --destination) 읽기 (tabledata.list, 쿼리 과금 없음)
+        
+        Args:
+            table_id: dataset.table 또는 project.dataset.table
+        
+        Returns:
+            테이블 전체 행 (ResultSet)
+        """
+        if self.backend == 'local':
+            raise ValueError("--from-table은 bigquery 백엔드에서만 사용할 수 있습니다.")
+        try:
+            with self.profiler.stage('fetch'):
+                results = self.client.list_rows(qualify_table_id(table_id, self.project_id))
+            with self.profiler.stage('row_conversion'):
+                return ResultSet.from_bigquery(results)
+        except GoogleCloudError as e:
+            raise RuntimeError(f"BigQuery 테이블 읽기 실패: {str(e)}")
+    
+    def sample_info(self, sql: str) -> Optional[Dict[str, Any]]:
+        """샘플 실행 정보 (프롬프트에 추정값임을 알리기 위해 사용, 샘플 실행이 아니면 None)"""
+        if not self.sample_percent:
+            return None
+        plan = sample_sql(sql, self.sample_percent)
+        return plan.describe() if plan.sampled_tables else None
     
     def execute_query_to_dict(self, sql: str) -> Dict[str, Any]:
         """
@@ -353,30 +638,33 @@ class BigQueryExecutor:
         Returns:
             결과와 통계 정보를 포함한 딕셔너리
         """
-        try:
-            query_job = self.client.query(sql)
-            results = query_job.result()
-            
-            rows = []
-            for row in results:
-                rows.append(dict(row))
-            
-            return {
-                'data': rows,
-                'total_rows': len(rows),
-                'total_bytes_processed': query_job.total_bytes_processed,
-                'execution_time': (query_job.ended - query_job.started) if (query_job.ended and query_job.started) else None
-            }
-        except GoogleCloudError as e:
-            raise RuntimeError(f"BigQuery 쿼리 실행 실패: {str(e)}")
+        start_time = time.perf_counter()
+        rows, query_job = self._run(sql)
+        
+        return {
+            'data': rows,
+            'total_rows': len(rows),
+            'total_bytes_processed': query_job.total_bytes_processed,
+            'execution_time': (query_job.ended - query_job.started) if (query_job.ended and query_job.started) else None,
+            'duration_seconds': time.perf_counter() - start_time,
+            'job_metrics': job_metrics(query_job),
+            'sampling': self.sample_info(sql)
+        }
 
 
-def format_query_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+def format_query_results(
+    results: Union[ResultSet, List[Dict[str, Any]]],
+    sample_rows: Optional[int] = 5,
+    sample_method: str = DEFAULT_SAMPLE_METHOD
+) -> Dict[str, Any]:
     """
     쿼리 결과를 요약 가능한 형식으로 변환
     
     Args:
-        results: 쿼리 결과 리스트
+        results: 쿼리 결과 (ResultSet 또는 dict 리스트)
+        sample_rows: sample_data에 넣을 행 수 (None이면 전체 행, 프롬프트 예산에 맞춰 줄어듦)
+        sample_method: 시계열 결과에서 sample_data 행을 고르는 방식
+            ('lttb', 'minmax': 피크/저점을 보존하는 대표 지점, 'head': 앞에서 N행)
     
     Returns:
         요약용 딕셔너리
@@ -384,7 +672,9 @@ def format_query_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
     if not results:
         return {"message": "결과가 없습니다."}
     
-    # 첫 번째 행의 키를 사용하여 구조 파악
+    results = ResultSet.from_records(results)
+    
+    # 첫 번째 행의 값으로 구조 파악
     sample_row = results[0]
     
     # 숫자형 컬럼 찾기 (BigQuery NUMERIC/BIGNUMERIC은 decimal.Decimal으로 반환됨)
@@ -396,22 +686,27 @@ def format_query_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
     # 통계 계산
     summary = {
         'total_rows': len(results),
-        'columns': list(sample_row.keys()),
-        'sample_data': results[:5] if len(results) > 5 else results
+        'columns': list(results.schema),
+        'sample_data': downsample(results, sample_rows, sample_method).to_records()
     }
     
     # 숫자형 컬럼의 통계
     if numeric_cols:
         summary['statistics'] = {}
         for col in numeric_cols:
-            values = [float(row[col]) for row in results
-                      if row[col] is not None and isinstance(row[col], (int, float, Decimal))]
+            column = results.column(col)
+            if isinstance(column, array):
+                # int/float 전용 컬럼 (NULL 없음): 변환 없이 바로 집계
+                values = column
+            else:
+                values = [float(v) for v in column
+                          if v is not None and isinstance(v, (int, float, Decimal))]
             if values:
                 summary['statistics'][col] = {
-                    'sum': sum(values),
-                    'avg': sum(values) / len(values),
-                    'min': min(values),
-                    'max': max(values),
+                    'sum': float(sum(values)),
+                    'avg': float(sum(values)) / len(values),
+                    'min': float(min(values)),
+                    'max': float(max(values)),
                     'count': len(values)
                 }
     
@@ -431,25 +726,76 @@ def main():
   # 비교 분석 (두 쿼리 결과 비교)
   python scripts/summarize_with_gemini.py eth_query.sql sol_query.sql --type comparison
   
+  # N개 체인 비교 (날짜 기준으로 정렬한 표 하나를 전달)
+  python scripts/summarize_with_gemini.py eth.sql sol.sql polygon.sql --type comparison --labels Ethereum,Solana,Polygon
+  
   # 이상 징후 탐지
   python scripts/summarize_with_gemini.py my_query.sql --type anomalies
   
+  # 5% 샘플로 빠르게 탐색 (COUNT/SUM은 확장 추정값으로 요약)
+  python scripts/summarize_with_gemini.py templates/queries/02_active_addresses.sql --sample 5
+  
+  # 로컬 DuckDB 샘플 데이터로 실행 (BigQuery 비용 없이 프롬프트 반복 개선)
+  python scripts/summarize_with_gemini.py templates/queries/01_tx_volume.sql --backend local
+  
   # 커스텀 프롬프트
   python scripts/summarize_with_gemini.py my_query.sql --custom-prompt "이 데이터의 주요 특징을 3줄로 요약해주세요"
+  
+  # 이상 징후: 로컬 통계 탐지 후 이상 구간만 Gemini에 전달
+  python scripts/summarize_with_gemini.py templates/queries/04_failed_transactions.sql --type anomalies --prefilter
+  
+  # 주간 요약/주요 변화/이상 징후를 한 번의 호출로 생성 (JSON 응답)
+  python scripts/summarize_with_gemini.py templates/queries/01_tx_volume.sql --type report --output report.json
+  
+  # 대용량 결과: 일 단위로 나눠 요약한 뒤 합침 (map-reduce)
+  python scripts/summarize_with_gemini.py hourly_query.sql --type anomalies --map-reduce --chunk-window day
+  
+  # 직전 보고 기간 대비 변화율을 로컬에서 계산해 통계와 변화율만 전달
+  python scripts/summarize_with_gemini.py templates/queries/01_tx_volume.sql --delta
+  
+  # 단계별 최대/잔류 메모리와 상위 할당 위치 (OOM 조사, 이력에 기록)
+  python scripts/summarize_with_gemini.py hourly_query.sql --type anomalies --profile-memory
+  
+  # BigQuery/Gemini 응답을 녹화한 뒤 네트워크 없이 재생 (녹화한 지연 시간 그대로)
+  python scripts/summarize_with_gemini.py templates/queries/01_tx_volume.sql --record cassettes/tx_volume.json.gz
+  python scripts/summarize_with_gemini.py templates/queries/01_tx_volume.sql --replay cassettes/tx_volume.json.gz --replay-latency 1
+  
+  # 저장된 결과로 프롬프트만 반복 (쿼리 재실행 없음)
+  python scripts/summarize_with_gemini.py --from-file results/01_tx_volume.csv --type anomalies
+  
+  # run_query.py --destination으로 저장한 중간 테이블을 요약 (쿼리 과금 없음)
+  python scripts/summarize_with_gemini.py --from-table scratch.eth_success_30d --type anomalies
+  
+  # 쿼리 결과를 파이프로 바로 요약
+  python scripts/run_query.py templates/queries/01_tx_volume.sql -o - -f ndjson | python scripts/summarize_with_gemini.py --from-file -
         """
     )
     
     parser.add_argument(
         'sql_files',
-        nargs='+',
-        help='실행할 SQL 파일 경로 (1개 또는 2개)'
+        nargs='*',
+        help='실행할 SQL 파일 경로 (comparison 타입은 2개 이상)'
+    )
+    
+    parser.add_argument(
+        '--from-file',
+        action='append',
+        metavar='PATH',
+        help='쿼리 대신 저장된 결과(CSV/JSON/NDJSON/Parquet)를 요약. \'-\'는 표준 입력, comparison은 반복 지정'
+    )
+    
+    parser.add_argument(
+        '--from-table',
+        action='append',
+        metavar='DATASET.TABLE',
+        help='쿼리 대신 run_query.py --destination으로 저장한 테이블을 요약 (comparison은 반복 지정)'
     )
     
     parser.add_argument(
         '--type', '-t',
-        choices=['weekly', 'comparison', 'anomalies', 'custom'],
+        choices=['weekly', 'comparison', 'anomalies', 'report', 'custom'],
         default='weekly',
-        help='요약 타입 (기본값: weekly)'
+        help='요약 타입, report는 주간 요약/주요 변화/이상 징후를 JSON 응답 1회로 생성 (기본값: weekly)'
     )
     
     parser.add_argument(
@@ -462,6 +808,25 @@ def main():
         help='GCP 프로젝트 ID (기본값: GCP_PROJECT_ID 환경 변수)'
     )
     
+    parser.add_argument(
+        '--sample',
+        type=float,
+        metavar='PCT',
+        help='대용량 테이블을 PCT%%만 샘플링하여 실행하고 COUNT/SUM 컬럼을 확장 추정 (예: --sample 5)'
+    )
+    
+    parser.add_argument(
+        '--backend',
+        choices=['bigquery', 'local'],
+        default='bigquery',
+        help='쿼리 실행 백엔드 (local: 로컬 DuckDB 샘플 데이터, 기본값: bigquery)'
+    )
+    
+    parser.add_argument(
+        '--local-db',
+        help='local 백엔드의 DuckDB 파일 경로 (기본값: LOCAL_DUCKDB_PATH 또는 local_data/blockchain.duckdb)'
+    )
+    
     parser.add_argument(
         '--api-key',
         help='Gemini API 키 (기본값: GEMINI_API_KEY 환경 변수)'
@@ -472,6 +837,11 @@ def main():
         help='커스텀 프롬프트 (--type custom일 때 사용)'
     )
     
+    parser.add_argument(
+        '--labels',
+        help='데이터셋 라벨 목록, 쉼표로 구분 (comparison 타입용, 예: Ethereum,Solana,Polygon)'
+    )
+    
     parser.add_argument(
         '--label1',
         default='Ethereum',
@@ -484,6 +854,124 @@ def main():
         help='두 번째 데이터셋 라벨 (comparison 타입용)'
     )
     
+    parser.add_argument(
+        '--map-reduce',
+        action='store_true',
+        help='전체 결과를 구간별로 나눠 요약한 뒤 합침 (weekly/anomalies/custom 타입용)'
+    )
+    
+    parser.add_argument(
+        '--token-budget',
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help=f'map-reduce 청크 하나의 데이터 토큰 예산 (기본값: {DEFAULT_TOKEN_BUDGET})'
+    )
+    
+    parser.add_argument(
+        '--chunk-window',
+        choices=['hour', 'day', 'week'],
+        help='map-reduce 청크를 시간 구간 단위로 분할 (기본값: 행 수 기준)'
+    )
+    
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f'map-reduce 동시 Gemini 호출 수 (기본값: {DEFAULT_MAX_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--prefilter',
+        action='store_true',
+        help='로컬 통계 탐지로 이상 구간만 골라 Gemini에 전달 (anomalies, report 타입용)'
+    )
+    
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f'--prefilter 이상 판단 점수 기준, 표준편차 배수 (기본값: {DEFAULT_THRESHOLD})'
+    )
+    
+    parser.add_argument(
+        '--prompt-budget',
+        type=int,
+        default=DEFAULT_PROMPT_BUDGET,
+        help=f'프롬프트 데이터 부분의 토큰 예산, 넘으면 표현을 압축 (기본값: {DEFAULT_PROMPT_BUDGET})'
+    )
+    
+    parser.add_argument(
+        '--sample-rows',
+        type=int,
+        default=5,
+        help='프롬프트에 넣을 결과 행 수, 0이면 전체 행을 예산 안에서 최대한 포함 (기본값: 5)'
+    )
+    
+    parser.add_argument(
+        '--sample-method',
+        choices=list(DOWNSAMPLE_METHODS),
+        default=DEFAULT_SAMPLE_METHOD,
+        help=f'시계열 결과에서 프롬프트 행을 고르는 방식: lttb/minmax(피크·저점 보존), head(앞에서 N행) (기본값: {DEFAULT_SAMPLE_METHOD})'
+    )
+    
+    parser.add_argument(
+        '--context-cache',
+        choices=list(CACHE_MODES),
+        default='off',
+        help=f'정적 프롬프트 프리픽스 캐시: gemini(컨텍스트 캐시, {MIN_CACHE_TOKENS} 토큰 이상 프리픽스만 캐시되므로 기본 프롬프트에는 효과 없고 긴 --custom-prompt에서만 사용), local(로컬 대체 구현) (기본값: off)'
+    )
+    
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        metavar='SEC',
+        help='쿼리별 제한 시간(초), 넘으면 BigQuery 잡을 취소하고 종료'
+    )
+    
+    parser.add_argument(
+        '--delta',
+        action='store_true',
+        help='직전 보고 기간 스냅샷 대비 변화율을 로컬에서 계산해 요약 통계와 변화율만 전달 (weekly, report 타입용)'
+    )
+    
+    parser.add_argument(
+        '--no-history',
+        action='store_true',
+        help='실행 이력(RUN_HISTORY_DB 또는 local_data/run_history.sqlite)과 요약 통계 스냅샷(SUMMARY_SNAPSHOT_DB)에 기록하지 않음'
+    )
+    
+    parser.add_argument(
+        '--address-labels',
+        metavar='INDEX',
+        help='label_index.py로 만든 라벨 인덱스로 address, contract_address, fee_payer 등에 <컬럼>_label 추가'
+    )
+    
+    parser.add_argument(
+        '--record',
+        metavar='CASSETTE',
+        help='BigQuery 쿼리 결과와 Gemini 응답을 카세트 파일(gzip JSON)에 녹화'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        metavar='CASSETTE',
+        help='네트워크 없이 카세트에 녹화된 쿼리 결과와 Gemini 응답으로 실행'
+    )
+    
+    parser.add_argument(
+        '--replay-latency',
+        type=float,
+        default=0.0,
+        metavar='SCALE',
+        help='--replay에서 녹화한 쿼리/수신/Gemini 응답 시간에 곱해 기다릴 배수 (1: 녹화 그대로, 기본값: 0, 지연 없음)'
+    )
+    
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='단계별(fetch, row_conversion, format_query_results, prompt_build) 최대/잔류 메모리와 RSS를 측정해 출력하고 실행 이력에 기록 (느려짐)'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -493,55 +981,241 @@ def main():
     args = parser.parse_args()
     
     # 입력 검증
-    if args.type == 'comparison' and len(args.sql_files) != 2:
-        print("오류: comparison 타입은 2개의 SQL 파일이 필요합니다.", file=sys.stderr)
+    if sum(map(bool, (args.sql_files, args.from_file, args.from_table))) != 1:
+        print("오류: SQL 파일, --from-file, --from-table 중 하나만 지정해야 합니다.", file=sys.stderr)
+        sys.exit(1)
+    
+    sources = args.from_file or args.from_table or args.sql_files
+    if args.type == 'comparison' and len(sources) < 2:
+        print("오류: comparison 타입은 2개 이상의 SQL 파일(또는 결과 파일)이 필요합니다.", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.from_file and args.from_file.count(STDIO_PATH) > 1:
+        print("오류: 표준 입력('-')은 한 번만 지정할 수 있습니다.", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.labels:
+        labels = [label.strip() for label in args.labels.split(',') if label.strip()]
+    elif len(sources) == 2:
+        labels = [args.label1, args.label2]
+    else:
+        labels = [
+            'stdin' if source == STDIO_PATH else source.split('.')[-1] if args.from_table else Path(source).stem
+            for source in sources
+        ]
+    
+    if args.type == 'comparison' and len(labels) != len(sources):
+        print("오류: --labels의 라벨 수와 SQL 파일 수가 다릅니다.", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.type == 'comparison' and len(set(labels)) != len(labels):
+        # 같은 라벨이면 결과 하나가 비교에서 조용히 빠지므로 미리 거부
+        duplicates = sorted({label for label in labels if labels.count(label) > 1})
+        print(f"오류: 라벨이 중복되었습니다: {', '.join(duplicates)} (--labels로 구분되는 라벨을 지정하세요)", file=sys.stderr)
         sys.exit(1)
     
     if args.type == 'custom' and not args.custom_prompt:
         print("오류: custom 타입은 --custom-prompt 옵션이 필요합니다.", file=sys.stderr)
         sys.exit(1)
     
+    if args.map_reduce and args.type == 'comparison':
+        print("오류: --map-reduce는 comparison 타입을 지원하지 않습니다.", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.prefilter and (args.type not in ('anomalies', 'report') or args.map_reduce):
+        print("오류: --prefilter는 anomalies, report 타입에서만 사용할 수 있습니다. (--map-reduce와 함께 사용 불가)", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.delta and (args.type not in ('weekly', 'report') or args.map_reduce):
+        print("오류: --delta는 weekly, report 타입에서만 사용할 수 있습니다. (--map-reduce와 함께 사용 불가)", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.record and args.replay:
+        print("오류: --record와 --replay는 함께 사용할 수 없습니다.", file=sys.stderr)
+        sys.exit(1)
+    
+    if (args.record or args.replay) and (args.from_table or args.context_cache == 'gemini'):
+        print("오류: --record/--replay는 --from-table, --context-cache gemini를 지원하지 않습니다.", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.delta and sources[0] == STDIO_PATH:
+        print("오류: --delta는 이전 스냅샷을 찾을 소스 경로가 필요하므로 표준 입력과 함께 사용할 수 없습니다.", file=sys.stderr)
+        sys.exit(1)
+    
+    profiler = MemoryProfiler(enabled=args.profile_memory)
+    profiler.start()
+    cassette = None
+    
     try:
-        # BigQuery 실행기 초기화
-        bq_executor = BigQueryExecutor(project_id=args.project_id)
+        if args.record or args.replay:
+            cassette = Cassette(args.record or args.replay, 'record' if args.record else 'replay', args.replay_latency)
+        # 재생 실행은 이력/스냅샷에서 실제 백엔드와 섞이지 않도록 별도 백엔드로 기록
+        run_backend = 'replay' if args.replay else args.backend
+        
+        # BigQuery 실행기 초기화 (저장된 결과를 읽을 때는 불필요)
+        bq_executor = None
+        if not args.from_file:
+            bq_executor = BigQueryExecutor(
+                project_id=args.project_id,
+                backend=args.backend,
+                local_db=args.local_db,
+                sample_percent=args.sample,
+                timeout=args.timeout,
+                profiler=profiler,
+                cassette=cassette
+            )
         
         # Gemini 요약기 초기화
-        summarizer = GeminiSummarizer(api_key=args.api_key)
+        summarizer = GeminiSummarizer(
+            api_key=args.api_key,
+            prompt_budget=args.prompt_budget,
+            context_cache=args.context_cache,
+            profiler=profiler,
+            cassette=cassette
+        )
+        
+        # 쿼리 실행 (comparison 타입은 체인별 쿼리를 동시에 실행)
+        sql_files = sources if args.type == 'comparison' else sources[:1]
+        for sql_file in sql_files:
+            if args.from_file:
+                print(f"📂 저장된 결과 읽는 중: {'표준 입력' if sql_file == STDIO_PATH else sql_file}")
+            elif args.from_table:
+                print(f"📂 저장된 테이블 읽는 중: {sql_file}")
+            else:
+                print(f"📊 쿼리 실행 중: {sql_file}")
+        
+        sampling: Dict[str, Any] = {}
+        executions: Dict[str, Dict[str, Any]] = {}
+        
+        address_labels = LabelIndex(args.address_labels) if args.address_labels else None
+        
+        def run(sql_file: str) -> ResultSet:
+            results = fetch(sql_file)
+            if address_labels is not None:
+                # 다운로드한 결과에 라벨 컬럼을 붙여 프롬프트에서 이름으로 설명
+                with profiler.stage('enrichment'):
+                    results, matched = enrich(results, address_labels)
+                if args.verbose:
+                    print(f"  - {sql_file} 주소 라벨: {describe_matches(matched, len(results)) or '주소 컬럼 없음'}")
+            return results
+        
+        def fetch(sql_file: str) -> ResultSet:
+            if args.from_file:
+                # 파일 읽기와 ResultSet 변환이 함께 이루어지므로 fetch 단계로 측정
+                with profiler.stage('fetch'):
+                    return read_results(sql_file)
+            if args.from_table:
+                return bq_executor.read_table(sql_file)
+            sql = bq_executor.read_sql_file(sql_file)
+            execution = bq_executor.execute_query_to_dict(sql)
+            execution['sql'] = sql
+            executions[sql_file] = execution
+            sampling[sql_file] = execution['sampling']
+            return execution['data']
+        
+        # Ctrl-C를 받으면 실행 중인 BigQuery 잡을 취소한 뒤 종료
+        with (bq_executor.jobs if bq_executor else nullcontext()):
+            with ThreadPoolExecutor(max_workers=len(sql_files)) as executor:
+                all_results = list(executor.map(run, sql_files))
         
-        # 첫 번째 쿼리 실행
-        print(f"📊 쿼리 실행 중: {args.sql_files[0]}")
-        sql1 = bq_executor.read_sql_file(args.sql_files[0])
-        results1 = bq_executor.execute_query(sql1)
-        formatted_results1 = format_query_results(results1)
+        results1 = all_results[0]
+        sample_rows = args.sample_rows if args.sample_rows > 0 else None
+        with profiler.stage('format_query_results'):
+            formatted_results1 = format_query_results(results1, sample_rows, args.sample_method)
+        
+        # 샘플 실행이면 추정값임을 프롬프트에 함께 전달
+        if sampling.get(sql_files[0]):
+            formatted_results1['sampling'] = sampling[sql_files[0]]
+        if any(sampling.values()):
+            print(f"⚠️  {args.sample:g}% 샘플 실행: COUNT/SUM 컬럼은 확장 추정값입니다 (95% 오차: <컬럼>_err95).")
+        
+        # 요약 통계 스냅샷: 직전 보고 기간 대비 변화율을 로컬에서 계산 (이전 기간 재조회 없음)
+        if args.type != 'comparison' and results1 and sources[0] != STDIO_PATH:
+            source = sources[0]
+            snapshot_backend = 'file' if args.from_file else run_backend
+            snapshot = take_snapshot(results1, formatted_results1.get('statistics'))
+            try:
+                snapshot_store = SnapshotStore()
+                if args.delta:
+                    previous = snapshot_store.previous(source, snapshot, backend=snapshot_backend)
+                    if previous is None:
+                        print("ℹ️  비교할 직전 기간 스냅샷이 없어 전체 요약 데이터를 전달합니다.")
+                    else:
+                        sql = executions.get(source, {}).get('sql')
+                        if sql and previous['fingerprint'] and previous['fingerprint'] != fingerprint_sql(sql):
+                            print("⚠️  직전 스냅샷과 SQL이 달라 변화율이 정확하지 않을 수 있습니다.")
+                        delta_results = {
+                            **snapshot,
+                            'previous_period': previous['period'] or {'recorded_at': previous['created_at']},
+                            'deltas': compute_deltas(snapshot, previous)
+                        }
+                        if 'sampling' in formatted_results1:
+                            delta_results['sampling'] = formatted_results1['sampling']
+                        formatted_results1 = delta_results
+                        if args.verbose:
+                            print(f"  - 변화율: {len(delta_results['deltas'])}개 컬럼, "
+                                  f"직전 기간 {(previous['period'] or {}).get('start', '-')} ~ "
+                                  f"{(previous['period'] or {}).get('end', '-')}")
+                # 샘플 실행의 확장 추정값은 이후 비교 기준으로 쓰지 않음
+                if not args.no_history and not args.sample:
+                    snapshot_store.save(source, snapshot, executions.get(source, {}).get('sql'), backend=snapshot_backend)
+                snapshot_store.close()
+            except sqlite3.Error as e:
+                print(f"⚠️  요약 통계 스냅샷을 사용하지 못했습니다: {e}", file=sys.stderr)
         
         if args.verbose:
-            print(f"  - 결과 행 수: {len(results1)}개")
-            print(f"  - 컬럼: {', '.join(formatted_results1.get('columns', []))}")
-        
-        # 두 번째 쿼리 실행 (comparison 타입인 경우)
-        formatted_results2 = None
-        if args.type == 'comparison':
-            print(f"\n📊 쿼리 실행 중: {args.sql_files[1]}")
-            sql2 = bq_executor.read_sql_file(args.sql_files[1])
-            results2 = bq_executor.execute_query(sql2)
-            formatted_results2 = format_query_results(results2)
-            
-            if args.verbose:
-                print(f"  - 결과 행 수: {len(results2)}개")
-                print(f"  - 컬럼: {', '.join(formatted_results2.get('columns', []))}")
+            for sql_file, results in zip(sql_files, all_results):
+                print(f"  - {sql_file}: 결과 행 수 {len(results)}개, 컬럼: {', '.join(results.schema)}")
         
         # 요약 생성
         print(f"\n🤖 Gemini로 요약 생성 중...")
         
-        if args.type == 'weekly':
+        if args.map_reduce:
+            summary = summarizer.summarize_map_reduce(
+                results1,
+                args.type,
+                token_budget=args.token_budget,
+                window=args.chunk_window,
+                max_workers=args.max_workers,
+                custom_prompt=args.custom_prompt
+            )
+        elif args.type == 'weekly':
             summary = summarizer.generate_weekly_summary(formatted_results1)
         elif args.type == 'comparison':
-            summary = summarizer.generate_comparison_insight(
-                formatted_results1,
-                formatted_results2,
-                args.label1,
-                args.label2
-            )
+            try:
+                table, alignment = align_results(dict(zip(labels, all_results)))
+                comparison_data = {**alignment, 'table': to_compact_table(table)}
+                if any(sampling.values()):
+                    comparison_data['sampling'] = dict(zip(labels, (sampling[f] for f in sql_files)))
+                if args.verbose:
+                    print(f"  - 정렬: {alignment['alignment']} ({alignment['granularity']}), "
+                          f"{alignment['aligned_rows']}개 기간")
+            except MissingTimeColumnError as e:
+                # 시간 컬럼이 없는 결과 (예: Top N 주소)는 체인별 요약 통계를 그대로 비교
+                # (라벨 충돌, 일별/시간별 혼합 같은 다른 정렬 오류는 그대로 오류로 종료)
+                if args.verbose:
+                    print(f"  - 시간 정렬 생략: {e}")
+                with profiler.stage('format_query_results'):
+                    comparison_data = {
+                        label: format_query_results(results, sample_rows, args.sample_method)
+                        for label, results in zip(labels, all_results)
+                    }
+                for label, sql_file in zip(labels, sql_files):
+                    if sampling.get(sql_file):
+                        comparison_data[label]['sampling'] = sampling[sql_file]
+            summary = summarizer.generate_multi_comparison(comparison_data, labels)
+        elif args.type == 'report':
+            detection = None
+            if args.prefilter:
+                detection = detect_local_anomalies(results1, threshold=args.threshold)
+            report = summarizer.generate_structured_report(formatted_results1, detection)
+            summary = render_report(report)
+        elif args.type == 'anomalies' and args.prefilter:
+            detection = detect_local_anomalies(results1, threshold=args.threshold)
+            if args.verbose:
+                print(f"  - 로컬 탐지: 이상 구간 {len(detection['flagged_windows'])}개, "
+                      f"변화점 {len(detection['changepoints'])}개")
+            summary = summarizer.explain_anomalies(detection)
         elif args.type == 'anomalies':
             summary = summarizer.detect_anomalies(formatted_results1)
         else:  # custom
@@ -550,6 +1224,34 @@ def main():
                 args.custom_prompt
             )
         
+        # 컨텍스트 캐시는 TTL 동안 보관 비용이 들므로 요약이 끝나면 바로 삭제
+        summarizer.close()
+        profiler.stop()
+        if cassette is not None:
+            cassette.save()
+            print(f"\n📼 카세트 {cassette.describe()}")
+        
+        # 실행 이력 기록 (Gemini/메모리 지표는 첫 번째 쿼리 행에 함께 기록, 저장된 결과 요약은 제외)
+        if not args.no_history and executions:
+            try:
+                history = RunHistory()
+                for index, sql_file in enumerate(sql_files):
+                    execution = executions[sql_file]
+                    history.record(
+                        'summarize',
+                        execution['sql'],
+                        template=sql_file,
+                        backend=run_backend,
+                        sample_percent=args.sample,
+                        duration_seconds=execution['duration_seconds'],
+                        rows=execution['total_rows'],
+                        **execution['job_metrics'],
+                        **({**gemini_metrics(summarizer.token_usage), **profiler.metrics()} if index == 0 else {})
+                    )
+                history.close()
+            except sqlite3.Error as e:
+                print(f"⚠️  실행 이력을 기록하지 못했습니다: {e}", file=sys.stderr)
+        
         # 결과 출력
         print("\n" + "="*60)
         print("생성된 요약:")
@@ -557,15 +1259,44 @@ def main():
         print(summary)
         print("="*60)
         
-        # 파일로 저장
-        if args.output:
+        # 호출별 프롬프트 토큰 보고
+        if summarizer.token_usage:
+            total_prompt = sum(u['prompt_tokens'] for u in summarizer.token_usage)
+            total_output = sum(u['output_tokens'] or 0 for u in summarizer.token_usage)
+            total_cached = sum(u['cached_tokens'] for u in summarizer.token_usage)
+            print(f"\n📏 Gemini 호출 {len(summarizer.token_usage)}회, "
+                  f"프롬프트 토큰 {total_prompt:,}, 응답 토큰 {total_output:,}"
+                  + (f", 캐시 프리픽스 토큰 {total_cached:,}" if total_cached else ""))
+            if args.verbose:
+                for usage in summarizer.token_usage:
+                    detail = f"  - {usage['call']}: 프롬프트 {usage['prompt_tokens']:,}"
+                    if not usage['prompt_tokens_exact']:
+                        detail += " (근사치)"
+                    if 'representation' in usage:
+                        detail += f", 데이터 표현 {usage['representation']} ({usage['rows']}행)"
+                        if not usage['within_budget']:
+                            detail += " ⚠️ 예산 초과"
+                    print(detail)
+        if args.context_cache == 'gemini' and not summarizer.prefix_cache.stats['created']:
+            print(f"ℹ️  프리픽스가 최소 캐시 크기({MIN_CACHE_TOKENS:,} 토큰)보다 짧거나 캐시 생성에 실패해 "
+                  f"컨텍스트 캐시 없이 전송했습니다.")
+        
+        profiler.report()
+        
+        # 파일로 저장 (report 타입에 .json 경로면 구조화 결과 그대로 저장)
+        if args.output and args.type == 'report' and not args.map_reduce and args.output.endswith('.json'):
+            output_path = Path(args.output)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            output_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+            print(f"\n✓ 리포트 JSON이 저장되었습니다: {args.output}")
+        elif args.output:
             output_path = Path(args.output)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
             with open(output_path, 'w', encoding='utf-8') as f:
                 f.write(f"# 요약 리포트\n\n")
                 f.write(f"생성 일시: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                f.write(f"쿼리 파일: {', '.join(args.sql_files)}\n")
+                f.write(f"{'결과 파일' if args.from_file else '결과 테이블' if args.from_table else '쿼리 파일'}: {', '.join(sources)}\n")
                 f.write(f"요약 타입: {args.type}\n\n")
                 f.write("---\n\n")
                 f.write(summary)
@@ -574,6 +1305,9 @@ def main():
         
         sys.exit(0)
         
+    except KeyboardInterrupt:
+        print("\n✗ 사용자 요청으로 중단되었습니다.", file=sys.stderr)
+        sys.exit(130)
     except Exception as e:
         print(f"\n✗ 오류 발생: {str(e)}", file=sys.stderr)
         if args.verbose:
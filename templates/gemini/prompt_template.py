@@ -3,7 +3,7 @@ Gemini API를 사용한 온체인 데이터 요약 생성 템플릿
 """
 
 import os
-import json
+import sys
 import google.generativeai as genai
 from typing import Dict, Any
 
@@ -13,6 +13,11 @@ try:
 except ImportError:
     pass  # python-dotenv가 없으면 환경 변수에서 직접 가져옴
 
+# 공용 직렬화/프롬프트 모듈(scripts/serialization.py, scripts/prompts.py) 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'scripts'))
+from prompts import render_prompt
+from serialization import to_json
+
 
 # API 키 설정 (환경 변수에서 가져오기)
 # .env 파일 또는 export GEMINI_API_KEY="your-api-key-here"
@@ -37,34 +42,9 @@ def generate_weekly_summary(query_results: Dict[str, Any]) -> str:
     
     model = genai.GenerativeModel('gemini-2.0-flash')
     
-    data_str = json.dumps(query_results, indent=2, ensure_ascii=False, default=str)
-    
-    prompt = f"""
-당신은 블록체인 데이터 분석가입니다. 다음 온체인 데이터를 기반으로 
-기관 투자자/증권사 관점에서 읽을 수 있는 주간 요약 리포트를 작성해주세요.
-
-## 데이터 요약
-{data_str}
-
-## 요구사항
-1. 핵심 지표 3가지를 한 문장씩 요약
-2. 전주 대비 변화율 언급 (가능한 경우)
-3. 주목할 만한 이상 징후나 패턴 발견 시 언급
-4. 전문적이지만 이해하기 쉬운 문체 사용
-5. 총 3-5문장으로 구성
-
-## 출력 형식
-[주간 요약]
-(내용)
-
-[주요 변화]
-(내용)
-
-[이상 징후]
-(내용 또는 "특별한 이상 징후 없음")
-"""
+    prefix, body = render_prompt('weekly', to_json(query_results, compact=True))
     
-    response = model.generate_content(prompt)
+    response = model.generate_content(prefix + body)
     return response.text
 
 
@@ -85,28 +65,17 @@ def generate_comparison_insight(
     
     model = genai.GenerativeModel('gemini-2.0-flash')
     
-    eth_str = json.dumps(ethereum_data, indent=2, ensure_ascii=False, default=str)
-    sol_str = json.dumps(solana_data, indent=2, ensure_ascii=False, default=str)
-    
-    prompt = f"""
-다음은 Ethereum과 Solana 네트워크의 온체인 데이터입니다.
-두 네트워크를 비교하여 기관 투자자 관점에서 3줄 요약을 작성해주세요.
-
-## Ethereum 데이터
-{eth_str}
-
-## Solana 데이터
-{sol_str}
-
-## 요구사항
-1. 처리량(트랜잭션 수) 비교
-2. 수수료 효율성 비교
-3. 네트워크 활성도 비교
-4. 각 네트워크의 강점을 데이터로 뒷받침하여 설명
-5. 총 3줄로 간결하게 작성
-"""
+    prefix, body = render_prompt(
+        'comparison',
+        {
+            "Ethereum 데이터": to_json(ethereum_data, compact=True),
+            "Solana 데이터": to_json(solana_data, compact=True)
+        },
+        label1="Ethereum",
+        label2="Solana"
+    )
     
-    response = model.generate_content(prompt)
+    response = model.generate_content(prefix + body)
     return response.text
 
 
@@ -123,23 +92,9 @@ def detect_anomalies(query_results: Dict[str, Any]) -> str:
     
     model = genai.GenerativeModel('gemini-2.0-flash')
     
-    data_str = json.dumps(query_results, indent=2, ensure_ascii=False, default=str)
-    
-    prompt = f"""
-다음 온체인 데이터에서 이상 징후나 주목할 만한 패턴을 찾아주세요.
-
-## 데이터
-{data_str}
-
-## 분석 요청
-1. 평소와 다른 급증/급감 지점 식별
-2. 가능한 원인 추론 (이벤트, 시장 상황 등)
-3. 추가 조사가 필요한 항목 제안
-
-이상 징후가 없다면 "특별한 이상 징후 없음"이라고 답변하세요.
-"""
+    prefix, body = render_prompt('anomalies', to_json(query_results, compact=True))
     
-    response = model.generate_content(prompt)
+    response = model.generate_content(prefix + body)
     return response.text
 
 
@@ -74,3 +74,6 @@ LIMIT
 -- 2. 필터 추가: 특정 토큰, DEX 등으로 필터링
 -- 3. 집계 방식 변경: COUNT → SUM, AVG 등
 -- 4. Solana의 경우: 프로그램 이름 매핑 테이블과 JOIN하여 가독성 향상
+--    (JOIN 대신 결과를 받은 뒤 로컬 라벨 인덱스로 붙일 수도 있음:
+--     python scripts/label_index.py build programs.csv -o local_data/address_labels.lblidx
+--     python scripts/run_query.py templates/queries/02_active_addresses.sql --address-labels local_data/address_labels.lblidx)